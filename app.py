@@ -1,28 +1,30 @@
 #############################################################################
-# app.py — Dashboard: navbar, category filter (display only), grid of bet cards.
+# app.py — Dashboard: navbar, category filter, grid of bet cards.
 #############################################################################
 
-import base64
 import streamlit as st
 
-from data import get_available_bets
+import instrumentation
+from assets import asset_url, inline_style
+
+from data import count_bets, get_bets_in_category, get_price_series
 
 from modules import (
+    SPARKLINE_POINTS,
     display_individual_bet_summary,
+    display_paginated_bets,
     display_post,
     display_genai_advice,
-    display_individual_bet_summary,
-    display_recent_workouts,
     display_trade_summary,
 )
 from data_fetcher import (
-    get_user_posts,
-    get_genai_advice,
+    get_home_feed,
     get_user_profile,
-    get_user_sensor_data,
-    get_user_workouts,
-    get_user_trades,
+    publish_post,
 )
+from async_fetcher import load_page_data
+
+instrumentation.start_rerun("app")
 
 userId = 'user1'  # fallback when no username has been entered
 
@@ -45,20 +47,25 @@ def login():
 st.set_page_config(layout="wide", page_title="AirBets")
 
 LOGO_PATH = "static/images/airbets-logo.svg"
+APP_CSS_PATH = "static/css/app.css"
 COLS_PER_ROW = 4
+PAGE_SIZE = 16
+FEED_PAGE_SIZE = 20
+# True renders each page of cards as one bet_grid component (one iframe)
+BATCH_GRID = False
 
 # Navbar: one row, logo + name left (same div), Profile/Settings right
-def _logo_data_uri():
+def _logo_src():
+    # Minified once per process; a short hashed URL once `python -m assets` has run
     try:
-        with open(LOGO_PATH, "rb") as f:
-            return "data:image/svg+xml;base64," + base64.b64encode(f.read()).decode()
-    except Exception:
+        return asset_url(LOGO_PATH)
+    except FileNotFoundError:
         return ""
     # An example of displaying a custom component called "my_custom_component"
     # value = st.text_input('Enter your name')
     # display_my_custom_component(value)
 
-_logo = _logo_data_uri()
+_logo = _logo_src()
 st.markdown(
     '<nav style="display:flex; align-items:center; justify-content:space-between; flex-wrap:wrap; gap:8px; margin-bottom:1rem;">'
     '<div style="display:flex; align-items:center; gap:12px;">'
@@ -82,9 +89,8 @@ if st.session_state.get("show_individual"):
         st.session_state.show_individual = False
         st.rerun()
     st.markdown("---")
-    bets = get_available_bets()
-    if bets:
-        bet = bets[0]
+    bet = next(iter(get_bets_in_category("All")), None)
+    if bet is not None:
         display_individual_bet_summary(
             bet_name=bet["bet_name"],
             bet_image_link=bet.get("bet_image_link"),
@@ -93,45 +99,70 @@ if st.session_state.get("show_individual"):
             yes_percent=bet["yes_percent"],
             no_percent=bet["no_percent"],
             rules=bet["rules"],
+            price_history=get_price_series(bet["bet_id"], SPARKLINE_POINTS)[1],
         )
+    instrumentation.render_debug_panel()
     st.stop()
 
 # Columns fill top-to-bottom; minimal gap between cards
-st.markdown(
-    """
-    <style>
-    [data-testid="column"] { padding-left: 0 !important; padding-right: 0 !important; }
-    [data-testid="column"] > div { padding-left: 0 !important; padding-right: 0 !important; }
-    [data-testid="stVerticalBlockBorderWrapper"] { margin: 0 0 0.25rem 0 !important; padding: 0.5rem; }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+st.markdown(inline_style(APP_CSS_PATH), unsafe_allow_html=True)
 
-# ---- Category filter (hardcoded, not functioning — display only) ----
-st.selectbox(
+# ---- Category filter ----
+category = st.selectbox(
     "Category",
     options=["All", "Crypto", "Politics", "Sports", "Other"],
     index=0,
     key="category_filter",
     disabled=False,
 )
-bets = get_available_bets()
 
-# ---- 4 columns, each filled top-to-bottom with cards ----
-if not bets:
+# ---- 4 columns, each filled top-to-bottom with one page of cards ----
+if not count_bets(category):
     st.info("No bets yet.")
 else:
-    cols = st.columns(COLS_PER_ROW)
-    for c in range(COLS_PER_ROW):
-        col_bets = [bets[i] for i in range(c, len(bets), COLS_PER_ROW)]
-        with cols[c]:
-            for bet in col_bets:
-                with st.container(border=True):
-                    st.markdown(f"**{bet['category']}**")
-                    st.markdown(f"### {bet['bet_name']}")
-                    st.caption(f"Yes **{bet['yes_percent']}%** · No **{bet['no_percent']}%**")
-                    st.caption(f"${bet['yes_value']:.2f} / ${bet['no_value']:.2f}")
+    display_paginated_bets(
+        category,
+        page_size=PAGE_SIZE,
+        key="home_page",
+        cols_per_row=COLS_PER_ROW,
+        batch=BATCH_GRID,
+        column_major=True,
+    )
+
+
+def display_home_feed(uid):
+    """Post box and one page of the user's home feed with Newer/Older buttons."""
+    with st.form('new_post', clear_on_submit=True):
+        content = st.text_area("What's new?")
+        if st.form_submit_button('Post') and content.strip():
+            publish_post(uid, content.strip())
+            st.session_state.feed_cursors = []
+    # Cursors of the pages above the current one, for "Newer posts"
+    cursors = st.session_state.setdefault('feed_cursors', [])
+    posts, next_cursor = get_home_feed(
+        uid, limit=FEED_PAGE_SIZE, before=cursors[-1] if cursors else None
+    )
+    if not posts:
+        st.info('No posts yet.')
+    for post in posts:
+        try:
+            author = get_user_profile(post['user_id'])
+        except ValueError:
+            # Posts can outlive their author's profile
+            author = {'username': post['user_id'], 'profile_image': None}
+        display_post(
+            author['username'], author['profile_image'],
+            post['timestamp'], post['content'], post['image'],
+        )
+    newer_col, older_col = st.columns(2)
+    if cursors and newer_col.button('Newer posts', key='feed_newer'):
+        cursors.pop()
+        st.rerun()
+    if next_cursor is not None and older_col.button('Older posts', key='feed_older'):
+        cursors.append(next_cursor)
+        st.rerun()
+
+
 # This is the starting point for your app.  The flow checks login state
 # first and then renders either the home feed or the profile/trade page.
 if __name__ == '__main__':
@@ -140,9 +171,27 @@ if __name__ == '__main__':
             'Navigation', ['Home', 'Profile / Trade Summary']
         )
         if page == 'Home':
-            pass
+            st.title('Home')
+            uid = st.session_state.get('username', userId)
+            display_home_feed(uid)
         elif page == 'Profile / Trade Summary':
             st.title('Profile & Trade Summary')
             uid = st.session_state.get('username', userId)
-            trades = get_user_trades(uid)
-            display_trade_summary(trades)
+            # Fetched concurrently; a piece that fails keeps its last value
+            data, failed = load_page_data(uid, ('trades', 'dashboard', 'portfolio'))
+            if failed:
+                st.caption('Some data could not be refreshed: ' + ', '.join(sorted(failed)))
+            # Precomputed in the background when AIRBETS_PRECOMPUTE is set
+            dashboard = data['dashboard']
+            if dashboard.get('trade_metrics') is None:
+                st.info('Your trade summary is being prepared, check back in a moment.')
+            else:
+                display_trade_summary(
+                    data['trades'], metrics=dashboard['trade_metrics'], portfolio=data['portfolio']
+                )
+            # Generated in the background; None until the first advice is ready
+            advice = dashboard.get('genai_advice') or {}
+            display_genai_advice(advice.get('timestamp'), advice.get('content'), advice.get('image'))
+
+# Rerun timings in the sidebar when AIRBETS_PROFILE=1
+instrumentation.render_debug_panel()
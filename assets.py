@@ -0,0 +1,339 @@
+#############################################################################
+# assets.py
+#
+# Static asset pipeline: minified, content-hashed CSS / JS / SVG.
+#
+# `python -m assets` (run by the Dockerfile) writes every asset under
+# static/ and custom_components/static/ to static/dist/ as
+# <name>.<hash>.<ext>, plus a manifest.json mapping sources to bundles.
+# At runtime get_asset() serves each asset from a process-wide cache: the
+# prebuilt bundle when the manifest has it, otherwise the source minified on
+# first use. Nothing is read from disk again on later reruns.
+#
+# With Streamlit static serving on (see .streamlit/config.toml) asset_url()
+# returns the hashed bundle's URL, so pages send a short link instead of
+# re-inlining the file on every rerun; without a build it falls back to a
+# data: URI.
+#
+#############################################################################
+
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+# Directories whose assets `python -m assets` bundles
+SOURCE_DIRS = (
+    os.path.join(STATIC_DIR, "css"),
+    os.path.join(STATIC_DIR, "js"),
+    os.path.join(STATIC_DIR, "images"),
+    os.path.join(ROOT_DIR, "custom_components", "static"),
+)
+# URL prefix Streamlit serves STATIC_DIR under when enableStaticServing is on
+STATIC_URL = "app/static"
+
+MIME_TYPES = {
+    '.css': "text/css",
+    '.js': "text/javascript",
+    '.svg': "image/svg+xml",
+}
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{};,])\s*")
+_CSS_COLON_RE = re.compile(r":\s+")
+_SVG_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_SVG_TAG_GAP_RE = re.compile(r">\s+<")
+_SVG_PATH_DATA_RE = re.compile(r'\sd="([^"]*)"')
+_SVG_DECIMALS_RE = re.compile(r"\d+\.\d{2,}")
+
+
+def minify_css(css):
+    """Drop comments and collapse whitespace around CSS punctuation."""
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = _CSS_SPACE_RE.sub(" ", css)
+    css = _CSS_PUNCT_RE.sub(r"\1", css)
+    css = _CSS_COLON_RE.sub(":", css)
+    return css.replace(";}", "}").strip()
+
+
+_JS_QUOTES = ("'", '"', "`")
+
+
+def _scan_js_line(line, stack):
+    """Advance the lexer state ``stack`` over one line of JavaScript.
+
+    ``stack`` holds the open contexts, innermost last: a quote character for
+    a string or template literal, ``/*`` for a block comment, ``{`` for a
+    block and ``${`` for a template substitution. Regex literals are not
+    recognized; a quote inside one can only confuse the rest of its line.
+    """
+    i, n = 0, len(line)
+    while i is not None and i < n:
+        top = stack[-1] if stack else None
+        if top == "/*":
+            i = _skip_js_comment(line, i, stack)
+        elif top in _JS_QUOTES:
+            i = _scan_js_string(line, i, stack, top)
+        else:
+            i = _scan_js_code(line, i, stack, top)
+    # Quoted strings end with the line unless a backslash continues them
+    # (the escape then steps past the end of the line)
+    if i == n and stack and stack[-1] in ("'", '"'):
+        stack.pop()
+
+
+def _skip_js_comment(line, i, stack):
+    # Inside /* */: index after its end, or None when it runs past the line
+    end = line.find("*/", i)
+    if end < 0:
+        return None
+    stack.pop()
+    return end + 2
+
+
+def _scan_js_string(line, i, stack, quote):
+    # Inside a string or template literal: index of the next character to scan
+    char = line[i]
+    if char == "\\":
+        return i + 2
+    if char == quote:
+        stack.pop()
+    elif quote == "`" and line.startswith("${", i):
+        stack.append("${")
+        i += 1
+    return i + 1
+
+
+def _scan_js_code(line, i, stack, top):
+    # Outside strings and comments: index of the next character, None at a // comment
+    char = line[i]
+    if line.startswith("//", i):
+        return None
+    if line.startswith("/*", i):
+        stack.append("/*")
+        i += 1
+    elif char in _JS_QUOTES or char == "{":
+        stack.append(char)
+    elif char == "}" and top in ("{", "${"):
+        stack.pop()
+    return i + 1
+
+
+def minify_js(js):
+    """Strip indentation, blank lines and whole-line ``//`` comments.
+
+    Line breaks are kept so automatic semicolon insertion still applies.
+    Lines inside template literals and backslash-continued strings are kept
+    byte for byte, as is whitespace that ends a line inside one.
+    """
+    stack, lines = [], []
+    for line in js.splitlines():
+        in_string = bool(stack) and stack[-1] in _JS_QUOTES
+        in_comment = stack[-1:] == ["/*"]
+        _scan_js_line(line, stack)
+        ends_in_string = bool(stack) and stack[-1] in _JS_QUOTES
+        if in_string:
+            lines.append(line if ends_in_string else line.rstrip())
+            continue
+        line = line.lstrip() if ends_in_string else line.strip()
+        if line and (in_comment or not line.startswith("//")):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _round_tenth(match):
+    return f"{float(match.group()):.1f}"
+
+
+def minify_svg(svg):
+    """Drop comments and whitespace between tags; round path data to 0.1.
+
+    Our SVGs are drawn at a few dozen pixels from viewBoxes of several hundred
+    units, so a tenth of a unit is far below one device pixel.
+    """
+    svg = _SVG_COMMENT_RE.sub("", svg)
+    svg = _SVG_TAG_GAP_RE.sub("><", svg)
+    svg = _SVG_PATH_DATA_RE.sub(lambda m: ' d="' + _SVG_DECIMALS_RE.sub(_round_tenth, m.group(1)) + '"', svg)
+    return svg.strip()
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+    '.svg': minify_svg,
+}
+
+
+def content_hash(text):
+    """First 10 hex digits of the SHA-256 of ``text``."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:10]
+
+
+def bundle_name(path, text):
+    """``<name>.<hash>.<ext>`` for the minified ``text`` of ``path``."""
+    stem, ext = os.path.splitext(os.path.basename(path))
+    return f"{stem}.{content_hash(text)}{ext}"
+
+
+class Asset:
+    """A minified asset and its content-hashed bundle name."""
+
+    __slots__ = ("path", "text", "bundle", "mime", "mtime", "url", "_data_uri")
+
+    def __init__(self, path, text, bundle, mtime=None):
+        self.path = path
+        self.text = text
+        self.bundle = bundle
+        self.mime = MIME_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+        self.mtime = mtime
+        self.url = None  # set by asset_url
+        self._data_uri = None
+
+    @property
+    def data_uri(self):
+        """The asset as a base64 data: URI (built once)."""
+        if self._data_uri is None:
+            encoded = base64.b64encode(self.text.encode("utf-8")).decode()
+            self._data_uri = f"data:{self.mime};base64,{encoded}"
+        return self._data_uri
+
+    @property
+    def nbytes(self):
+        return len(self.text.encode("utf-8"))
+
+
+_assets = {}
+_manifest = None
+_lock = threading.Lock()
+
+
+def _relative(path):
+    return os.path.relpath(os.path.abspath(path), ROOT_DIR).replace(os.sep, "/")
+
+
+def _load_manifest():
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH) as file:
+                _manifest = json.load(file)
+        except (FileNotFoundError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def _load_asset(path, mtime):
+    bundle = _load_manifest().get(_relative(path))
+    if bundle is not None and mtime is None:
+        try:
+            return Asset(path, _read(os.path.join(DIST_DIR, bundle)), bundle)
+        except FileNotFoundError:
+            pass
+    source = _read(path)
+    minify = MINIFIERS.get(os.path.splitext(path)[1])
+    text = minify(source) if minify is not None else source
+    return Asset(path, text, bundle_name(path, text), mtime)
+
+
+def get_asset(path, check_mtime=False):
+    """Return the minified Asset for ``path``, loading it on first use.
+
+    check_mtime: reload when the source file changed (for DEV_MODE); this
+                 also skips the prebuilt bundle, which may be stale
+
+    Raises FileNotFoundError if the file does not exist.
+    """
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns if check_mtime else None
+    asset = _assets.get(path)
+    if asset is not None and (not check_mtime or asset.mtime == mtime):
+        return asset
+    with _lock:
+        asset = _assets[path] = _load_asset(path, mtime)
+    return asset
+
+
+def asset_url(path, fallback_to_data_uri=True):
+    """URL of the asset's hashed bundle under Streamlit's static serving.
+
+    Falls back to a data: URI when the bundle has not been built, or returns
+    None when ``fallback_to_data_uri`` is False.
+    """
+    asset = get_asset(path)
+    if asset.url is None:
+        built = os.path.exists(os.path.join(DIST_DIR, asset.bundle))
+        asset.url = f"{STATIC_URL}/dist/{asset.bundle}" if built else ""
+    if asset.url:
+        return asset.url
+    return asset.data_uri if fallback_to_data_uri else None
+
+
+def inline_style(path):
+    """The minified stylesheet wrapped in a ``<style>`` tag, for st.markdown."""
+    return f"<style>{get_asset(path).text}</style>"
+
+
+def clear_asset_cache():
+    global _manifest
+    with _lock:
+        _assets.clear()
+        _manifest = None
+
+
+def iter_sources(dirs=SOURCE_DIRS):
+    """Every bundleable file (by extension) in ``dirs``."""
+    for directory in dirs:
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if os.path.splitext(name)[1] in MINIFIERS:
+                yield os.path.join(directory, name)
+
+
+def build(dirs=SOURCE_DIRS, out_dir=DIST_DIR):
+    """Write the minified, hashed bundles and manifest.json to ``out_dir``.
+
+    Bundles from earlier builds that are no longer referenced are removed.
+    Returns the manifest (source path relative to the project -> bundle).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    for path in iter_sources(dirs):
+        text = MINIFIERS[os.path.splitext(path)[1]](_read(path))
+        bundle = bundle_name(path, text)
+        with open(os.path.join(out_dir, bundle), "w", encoding="utf-8") as file:
+            file.write(text)
+        manifest[_relative(path)] = bundle
+    for name in os.listdir(out_dir):
+        if name != "manifest.json" and name not in manifest.values():
+            os.remove(os.path.join(out_dir, name))
+    with open(os.path.join(out_dir, "manifest.json"), "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    clear_asset_cache()
+    return manifest
+
+
+def main():
+    manifest = build()
+    for source, bundle in manifest.items():
+        before = os.path.getsize(os.path.join(ROOT_DIR, source))
+        after = os.path.getsize(os.path.join(DIST_DIR, bundle))
+        print(f"{source:<55} {before:>7} -> {after:>7} bytes  {bundle}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#############################################################################
+# async_fetcher.py
+#
+# Async variants of the data_fetcher functions, for pages that need several
+# pieces of data at once.
+#
+# Every fetch and write of data_fetcher has a coroutine of the same name
+# here that runs it on a shared thread pool (AIRBETS_FETCH_WORKERS threads,
+# 16 by default), so independent fetches overlap instead of adding up.
+# Identical reads already in flight, from any session, share one call
+# (data/async_fetch.py); writes are never shared. Accessors of in-process
+# objects (get_social_graph, get_feed_service, get_cache_stats, ...) are
+# not I/O and stay in data_fetcher.
+#
+# gather_page_data(user_id, needs) fetches the named pieces of a page
+# (NEEDS) concurrently, each with its own timeout. A piece that fails or
+# times out does not fail the page: it falls back to the last value fetched
+# for the user, or to an empty default, and is reported in the second
+# return value so the page can say so. Streamlit scripts are synchronous;
+# load_page_data() runs gather_page_data to completion for them.
+#
+# Results are the same objects data_fetcher returns and shared in the same
+# way: do not modify them.
+#############################################################################
+
+import asyncio
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+import data_fetcher
+from data.async_fetch import DEFAULT_WORKERS, InflightCalls
+from instrumentation import span
+
+FETCH_WORKERS = int(os.environ.get("AIRBETS_FETCH_WORKERS") or DEFAULT_WORKERS)
+DEFAULT_TIMEOUT = 2.0   # seconds each piece of a page may take
+LAST_GOOD_SIZE = 4096   # fallback values kept, least recently fetched dropped first
+
+_calls = InflightCalls(FETCH_WORKERS)
+
+
+async def _run(name, share, args, kwargs, timeout=None):
+    # Looked up on each call, so patching data_fetcher applies here too
+    func = getattr(data_fetcher, name)
+    key = None
+    if share:
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+    return await _calls.run(key, func, *args, timeout=timeout, **kwargs)
+
+
+def _variant(name, share):
+    @functools.wraps(getattr(data_fetcher, name))
+    async def variant(*args, **kwargs):
+        return await _run(name, share, args, kwargs)
+    return variant
+
+
+get_user_sensor_data = _variant('get_user_sensor_data', share=True)
+get_user_sensor_series = _variant('get_user_sensor_series', share=True)
+get_user_sensor_chart = _variant('get_user_sensor_chart', share=True)
+get_user_workouts = _variant('get_user_workouts', share=True)
+get_user_trades = _variant('get_user_trades', share=True)
+get_user_portfolio = _variant('get_user_portfolio', share=True)
+get_user_profile = _variant('get_user_profile', share=True)
+get_friend_suggestions = _variant('get_friend_suggestions', share=True)
+get_user_posts = _variant('get_user_posts', share=True)
+get_home_feed = _variant('get_home_feed', share=True)
+get_genai_advice = _variant('get_genai_advice', share=True)
+get_user_trade_metrics = _variant('get_user_trade_metrics', share=True)
+get_user_dashboard = _variant('get_user_dashboard', share=True)
+record_sensor_reading = _variant('record_sensor_reading', share=False)
+record_trade = _variant('record_trade', share=False)
+add_friend = _variant('add_friend', share=False)
+publish_post = _variant('publish_post', share=False)
+
+
+async def stream_user_sensor_data(user_id, workout_id, sensor_type, chunk_size=data_fetcher.DEFAULT_CHUNK_SIZE,
+                                  start=None, end=None):
+    """Async iterator over data_fetcher.stream_user_sensor_data's chunks;
+    the workout is loaded on the thread pool."""
+    workout = await get_user_sensor_series(user_id, workout_id)
+    if sensor_type in workout:
+        for chunk in workout[sensor_type].iter_chunks(chunk_size, start, end):
+            yield chunk
+
+
+# Pieces of a page: need -> (data_fetcher function called with the user id,
+# value when it fails and nothing was fetched for the user before)
+NEEDS = {
+    'profile': ('get_user_profile', None),
+    'trades': ('get_user_trades', []),
+    'trade_metrics': ('get_user_trade_metrics', None),
+    'portfolio': ('get_user_portfolio', None),
+    'dashboard': ('get_user_dashboard', {}),
+    'posts': ('get_user_posts', []),
+    'home_feed': ('get_home_feed', ([], None)),
+    'friend_suggestions': ('get_friend_suggestions', []),
+    'genai_advice': ('get_genai_advice', None),
+    'workouts': ('get_user_workouts', []),
+}
+
+_last_good = OrderedDict()
+_last_good_lock = threading.Lock()
+
+
+async def gather_page_data(user_id, needs, timeout=DEFAULT_TIMEOUT, timeouts=None, options=None):
+    """Fetches the ``needs`` of a page (names from NEEDS) for a user at once.
+
+    timeout:  seconds each piece may take (None: no limit)
+    timeouts: ``{need: seconds}`` overriding ``timeout`` for some pieces
+    options:  ``{need: {keyword: value}}`` passed on to some fetches, e.g.
+              ``{'home_feed': {'limit': 20, 'before': cursor}}``
+
+    Returns ``(data, failed)``: ``data`` maps every need to its value and
+    ``failed`` maps the needs that errored or timed out to the reason. A
+    failed need holds the last value fetched for the user with the same
+    options, or the default of NEEDS.
+
+    Raises ValueError for an unknown need.
+    """
+    for need in needs:
+        if need not in NEEDS:
+            raise ValueError(f"Unknown need: {need}")
+    timeouts = timeouts or {}
+    options = options or {}
+    results = await asyncio.gather(*(
+        _fetch_need(user_id, need, timeouts.get(need, timeout), options.get(need, {})) for need in needs
+    ))
+    data, failed = {}, {}
+    for need, (value, error) in zip(needs, results):
+        data[need] = value
+        if error is not None:
+            failed[need] = error
+    return data, failed
+
+
+async def _fetch_need(user_id, need, timeout, kwargs):
+    name, default = NEEDS[need]
+    key = (need, user_id, tuple(sorted(kwargs.items())))
+    try:
+        value = await _run(name, True, (user_id,), kwargs, timeout)
+    except asyncio.TimeoutError:
+        return _fallback(key, default), f"timed out after {timeout:g} s"
+    except Exception as error:
+        return _fallback(key, default), f"{type(error).__name__}: {error}"
+    with _last_good_lock:
+        _last_good[key] = value
+        _last_good.move_to_end(key)
+        if len(_last_good) > LAST_GOOD_SIZE:
+            _last_good.popitem(last=False)
+    return value, None
+
+
+def _fallback(key, default):
+    with _last_good_lock:
+        return _last_good.get(key, default)
+
+
+def load_page_data(user_id, needs, timeout=DEFAULT_TIMEOUT, timeouts=None, options=None):
+    """gather_page_data for synchronous callers such as a Streamlit script.
+
+    Must not be called from a running event loop; await gather_page_data
+    there instead.
+    """
+    with span("fetch.load_page_data"):
+        return asyncio.run(gather_page_data(user_id, needs, timeout, timeouts, options))
+
+
+def get_fetch_stats():
+    """Returns the counters of the shared thread pool (see InflightCalls.stats)."""
+    return _calls.stats()
@@ -0,0 +1,2 @@
+# Benchmark scripts. Run from the project root, e.g.
+#   python -m benchmarks.bench_templates
@@ -0,0 +1,89 @@
+#############################################################################
+# benchmarks/bench_advice.py — GenAI advice: inline model calls vs AdviceService
+#
+# --users active users share --snapshots distinct feature snapshots (users
+# with similar stats). The model is a StubModel that answers after
+# --latency ms per call plus --per-prompt ms per prompt in it. Reports:
+#
+#   inline    a page calling the model itself on every rerun: page latency
+#             and the model time all users' pages would spend
+#   service   every user touched at once (a burst of page loads): page
+#             latency of get_genai_advice-style reads, time until every
+#             user has advice, model calls, prompts, batch size and cache
+#             hits
+#   stale     every user's data changes (as after a trade) but their
+#             snapshot does not: time until all are refreshed, from the
+#             cache without model calls
+#
+# Run from the project root:  python -m benchmarks.bench_advice
+#   --latency 50 --users 500   a quicker run
+#############################################################################
+import argparse
+import random
+import time
+
+from data.advice import AdviceService, StubModel, build_prompt
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GenAI advice latency, batching and caching.")
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--snapshots", type=int, default=300, help="distinct feature snapshots")
+    parser.add_argument("--latency", type=float, default=200.0, help="ms per model call")
+    parser.add_argument("--per-prompt", type=float, default=5.0, help="ms more per prompt in a call")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-wait", type=float, default=20.0, help="ms a batch waits to fill up")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    features = {f"user{n}": {'trades': rng.randrange(args.snapshots)} for n in range(args.users)}
+    print(f"{args.users:,} users, {args.snapshots:,} distinct snapshots, "
+          f"model {args.latency:g} ms + {args.per_prompt:g} ms per prompt")
+
+    model = StubModel(args.latency / 1000, args.per_prompt / 1000)
+    samples = []
+    for user_id in list(features)[:10]:
+        start = time.perf_counter()
+        model.generate([build_prompt(features[user_id])])
+        samples.append((time.perf_counter() - start) * 1e3)
+    p50, _ = percentiles(samples)
+    print(f"  inline    page p50 {p50:8.1f} ms   {p50 * args.users / 1000:,.0f} s of model time for all pages")
+
+    model = StubModel(args.latency / 1000, args.per_prompt / 1000)
+    service = AdviceService(model, features_of=features.__getitem__,
+                            batch_size=args.batch_size, max_wait=args.max_wait / 1000)
+    try:
+        samples = []
+        start = time.perf_counter()
+        for user_id in features:
+            began = time.perf_counter()
+            service.touch(user_id)
+            service.get(user_id)
+            samples.append((time.perf_counter() - began) * 1e3)
+        service.wait_idle()
+        ready = time.perf_counter() - start
+        p50, p99 = percentiles(samples)
+        stats = service.stats()
+        print(f"  service   page p50 {p50:8.3f} ms   p99 {p99:.3f} ms   all ready in {ready:.1f} s")
+        print(f"            {model.calls} model calls, {model.prompts} prompts "
+              f"({model.prompts / max(model.calls, 1):.1f} per call), {stats['cache_hits']:,} cache hits")
+
+        calls, hits = model.calls, stats['cache_hits']
+        start = time.perf_counter()
+        for user_id in features:
+            service.stale(user_id)
+        service.wait_idle()
+        print(f"  stale     all refreshed in {(time.perf_counter() - start) * 1e3:.1f} ms   "
+              f"{model.calls - calls} model calls, {service.stats()['cache_hits'] - hits:,} cache hits")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#############################################################################
+# benchmarks/bench_assets.py — startup time and per-rerun bytes of app.py
+#
+# Startup is measured as a fresh interpreter importing Streamlit and running
+# app.py to completion once through AppTest (the closest headless stand-in
+# for `streamlit run app.py` to first paint). Per-rerun bytes are the
+# serialized size of every element the warm rerun sends. Each is reported
+# for the old inline logo/style, the minified data: URI fallback and the
+# hashed static bundle URL.
+#
+# Run from the project root:  python -m benchmarks.bench_assets
+#############################################################################
+import argparse
+import base64
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import assets
+
+LOGO_PATH = "static/images/airbets-logo.svg"
+APP_CSS_PATH = "static/css/app.css"
+APP_PATH = os.path.join(assets.ROOT_DIR, "app.py")
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import assets
+if {unbuilt}:
+    assets.DIST_DIR = assets.MANIFEST_PATH = "/nonexistent"
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+print(time.perf_counter() - start)
+"""
+
+
+def legacy_logo_data_uri():
+    """The old per-rerun _logo_data_uri: read and base64 the raw SVG."""
+    with open(LOGO_PATH, "rb") as f:
+        return "data:image/svg+xml;base64," + base64.b64encode(f.read()).decode()
+
+
+def element_bytes(node):
+    """Serialized size of every element under an AppTest tree node."""
+    total = 0
+    proto = getattr(node, "proto", None)
+    if proto is not None and hasattr(proto, "ByteSize"):
+        total += proto.ByteSize()
+    for child in getattr(node, "children", {}).values():
+        total += element_bytes(child)
+    return total
+
+
+def rerun_bytes():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    at.run()
+    return element_bytes(at._tree)
+
+
+def startup_seconds(repeat, unbuilt=False):
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT.format(app=APP_PATH, unbuilt=unbuilt)],
+            cwd=assets.ROOT_DIR,
+            capture_output=True,
+            text=True,
+            env=env,
+            check=True,
+        )
+        runs.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time and per-rerun bytes of app.py.")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh-interpreter startups per mode")
+    args = parser.parse_args()
+
+    legacy_uri = legacy_logo_data_uri()
+    with open(APP_CSS_PATH) as file:
+        legacy_style = len(file.read()) + len("<style></style>")
+    minified_uri = assets.get_asset(LOGO_PATH).data_uri
+    print(f"{'logo in nav, legacy data URI':<36} {len(legacy_uri):>8} bytes")
+    print(f"{'logo in nav, minified data URI':<36} {len(minified_uri):>8} bytes")
+    print(f"{'app style, legacy / minified':<36} {legacy_style:>8} / {len(assets.inline_style(APP_CSS_PATH))} bytes")
+
+    number = 2000
+    legacy_us = min(timeit.repeat(legacy_logo_data_uri, number=number, repeat=5)) / number * 1e6
+    cached_us = min(timeit.repeat(lambda: assets.asset_url(LOGO_PATH), number=number, repeat=5)) / number * 1e6
+    print(f"{'logo per rerun, legacy / cached':<36} {legacy_us:>8.1f} / {cached_us:.2f} us")
+
+    with tempfile.TemporaryDirectory() as empty:
+        dist, manifest = assets.DIST_DIR, assets.MANIFEST_PATH
+        assets.DIST_DIR, assets.MANIFEST_PATH = empty, os.path.join(empty, "manifest.json")
+        assets.clear_asset_cache()
+        unbuilt = rerun_bytes()
+        assets.DIST_DIR, assets.MANIFEST_PATH = dist, manifest
+    assets.build()
+    built = rerun_bytes()
+    # The old app sent the raw SVG's data URI and the unminified style block
+    legacy = unbuilt + len(legacy_uri) - len(minified_uri) + legacy_style - len(assets.inline_style(APP_CSS_PATH))
+    print(f"{'rerun bytes, legacy (estimated)':<36} {legacy:>8}")
+    print(f"{'rerun bytes, no build (data URI)':<36} {unbuilt:>8}")
+    print(f"{'rerun bytes, built (hashed URL)':<36} {built:>8}")
+
+    print(f"{'startup to first run, no build':<36} {startup_seconds(args.repeat, unbuilt=True):>8.2f} s")
+    print(f"{'startup to first run, built':<36} {startup_seconds(args.repeat):>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#############################################################################
+# benchmarks/bench_async_fetch.py — sequential versus concurrent page fetches
+#
+# Puts storage behind a LatencyBackend (--latency ms per call, plus up to
+# --jitter ms) and gives the workouts fetch a delay of --service ms,
+# standing in for a remote service. A page needs the user's profile,
+# trades, posts, advice (read without waiting for the model) and workouts.
+# Reports per-page latency with the per-user cache dropped before every
+# load:
+#
+#   sequential   the five data_fetcher calls one after another, as the
+#                page scripts make them
+#   gathered     load_page_data: the same five fetches at once
+#   timeout      gathered with a --timeout ms limit on every piece: pages
+#                come back partial (how many pieces fell back is shown)
+#
+# Then --sessions threads load the same user's page at once, --rounds
+# times, and the shared-call counters show how many reads were coalesced.
+#
+# Run from the project root:  python -m benchmarks.bench_async_fetch
+#   --latency 5 --service 20   a faster backend
+#############################################################################
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import async_fetcher
+import data_fetcher
+from data.storage import LatencyBackend, MemoryBackend
+from data.trade_log import TradeLog
+
+NEEDS = ('profile', 'trades', 'posts', 'genai_advice', 'workouts')
+
+
+def delayed(func, seconds):
+    def call(*args, **kwargs):
+        time.sleep(seconds)
+        return func(*args, **kwargs)
+    return call
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+
+
+def sequential(user_id):
+    return {
+        'profile': data_fetcher.get_user_profile(user_id),
+        'trades': data_fetcher.get_user_trades(user_id),
+        'posts': data_fetcher.get_user_posts(user_id),
+        'genai_advice': data_fetcher.get_genai_advice(user_id),
+        'workouts': data_fetcher.get_user_workouts(user_id),
+    }
+
+
+def timed_pages(name, load, users, pages):
+    samples = []
+    fell_back = 0
+    for n in range(pages):
+        user_id = users[n % len(users)]
+        data_fetcher.invalidate_user_data(user_id)
+        start = time.perf_counter()
+        result = load(user_id)
+        samples.append((time.perf_counter() - start) * 1e3)
+        if isinstance(result, tuple):
+            fell_back += len(result[1])
+    p50, p99 = percentiles(samples)
+    note = f"   {fell_back / pages:.1f} of {len(NEEDS)} pieces fell back per page" if fell_back else ""
+    print(f"  {name:<12} p50 {p50:7.1f} ms   p99 {p99:7.1f} ms{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential versus concurrent page data fetches.")
+    parser.add_argument("--latency", type=float, default=20.0, help="ms per storage call")
+    parser.add_argument("--jitter", type=float, default=10.0, help="up to this many more ms per storage call")
+    parser.add_argument("--service", type=float, default=80.0, help="ms per workouts call")
+    parser.add_argument("--timeout", type=float, default=50.0, help="ms per piece in the timeout run")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    log = TradeLog(os.path.join(tmp, "trades.log"))
+    backend = LatencyBackend(MemoryBackend(log), args.latency / 1000, args.jitter / 1000, seed=0)
+    users = [f"user{n}" for n in range(1, 5)]
+    patches = (
+        patch("data_fetcher.get_backend", return_value=backend),
+        patch("data_fetcher._seeded", False),
+        patch("data_fetcher.get_user_workouts", delayed(data_fetcher.get_user_workouts, args.service / 1000)),
+    )
+    for patcher in patches:
+        patcher.start()
+    try:
+        for user_id in users:
+            sequential(user_id)         # seeds demo trades and posts
+        print(f"page of {len(NEEDS)} fetches; storage {args.latency:g}+{args.jitter:g} ms, "
+              f"workouts {args.service:g} ms per call")
+        timed_pages("sequential", sequential, users, args.pages)
+        timed_pages("gathered", lambda u: async_fetcher.load_page_data(u, NEEDS), users, args.pages)
+        timed_pages(f"timeout {args.timeout:g}", lambda u: async_fetcher.load_page_data(
+            u, NEEDS, timeout=args.timeout / 1000), users, args.pages)
+
+        rng = random.Random(0)
+        before = async_fetcher.get_fetch_stats()
+        samples = []
+        for _ in range(args.rounds):
+            user_id = rng.choice(users)
+            data_fetcher.invalidate_user_data(user_id)
+            barrier = threading.Barrier(args.sessions)
+
+            def session():
+                barrier.wait()
+                start = time.perf_counter()
+                async_fetcher.load_page_data(user_id, NEEDS)
+                samples.append((time.perf_counter() - start) * 1e3)
+            threads = [threading.Thread(target=session) for _ in range(args.sessions)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        after = async_fetcher.get_fetch_stats()
+        p50, p99 = percentiles(samples)
+        calls = after['calls'] - before['calls']
+        coalesced = after['coalesced'] - before['coalesced']
+        print(f"  {args.sessions} sessions on one user: p50 {p50:.1f} ms   p99 {p99:.1f} ms   "
+              f"{coalesced:,} of {calls:,} fetches shared a call in flight")
+    finally:
+        for patcher in patches:
+            patcher.stop()
+        log.close()
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
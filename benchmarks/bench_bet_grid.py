@@ -0,0 +1,81 @@
+#############################################################################
+# benchmarks/bench_bet_grid.py — rerun time of the bet grid vs catalog size
+#
+# Drives three grid scripts headlessly through Streamlit's AppTest:
+#   full      the pre-pagination app.py grid (every bet, 4 elements each)
+#   paged     display_paginated_bets, native containers, 16 bets per page
+#   batched   display_paginated_bets with batch=True (one bet_grid iframe)
+# and reports mean rerun time and the number of elements sent.
+#
+# Run from the project root:  python -m benchmarks.bench_bet_grid
+#############################################################################
+import argparse
+import time
+
+from streamlit.testing.v1 import AppTest
+
+import data.bets
+from data.simulator import synthetic_bets
+from data.store import BetStore
+
+
+def full_grid():
+    import streamlit as st
+    from data import get_available_bets
+
+    bets = get_available_bets()
+    cols = st.columns(4)
+    for c in range(4):
+        col_bets = [bets[i] for i in range(c, len(bets), 4)]
+        with cols[c]:
+            for bet in col_bets:
+                with st.container(border=True):
+                    st.markdown(f"**{bet['category']}**")
+                    st.markdown(f"### {bet['bet_name']}")
+                    st.caption(f"Yes **{bet['yes_percent']}%** · No **{bet['no_percent']}%**")
+                    st.caption(f"${bet['yes_value']:.2f} / ${bet['no_value']:.2f}")
+
+
+def paged_grid():
+    from modules import display_paginated_bets
+
+    display_paginated_bets("All", page_size=16, cols_per_row=4, column_major=True)
+
+
+def batched_grid():
+    from modules import display_paginated_bets
+
+    display_paginated_bets("All", page_size=16, cols_per_row=4, batch=True)
+
+
+def measure(script, reruns):
+    app = AppTest.from_function(script, default_timeout=600)
+    app.run()
+    start = time.perf_counter()
+    for _ in range(reruns):
+        app.run()
+    elapsed = (time.perf_counter() - start) / reruns
+    elements = len(app.markdown) + len(app.caption) + len(app.button) + len(app.get("iframe"))
+    return elapsed, elements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rerun time of the bet grid vs catalog size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 50_000])
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--full-max", type=int, default=1_000, help="skip the full grid above this many bets")
+    args = parser.parse_args()
+
+    print(f"{'bets':>7} {'mode':>8} {'rerun ms':>10} {'elements':>9}")
+    for n in args.sizes:
+        data.bets._store = BetStore.from_dicts(synthetic_bets(n))
+        for name, script in (("full", full_grid), ("paged", paged_grid), ("batched", batched_grid)):
+            if name == "full" and n > args.full_max:
+                print(f"{n:>7} {name:>8} {'skipped':>10}")
+                continue
+            elapsed, elements = measure(script, args.reruns)
+            print(f"{n:>7} {name:>8} {elapsed * 1e3:>10.1f} {elements:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#############################################################################
+# benchmarks/bench_bet_store.py — BetStore lookups vs copy-and-scan
+#
+# The old path copied the whole bet list on every call and then scanned it
+# to filter by category, find one bet or rank by a field.
+#
+# Run from the project root:  python -m benchmarks.bench_bet_store
+#############################################################################
+import argparse
+import random
+import timeit
+
+from data.simulator import synthetic_bets
+from data.store import BetStore
+
+
+def timed_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BetStore lookups vs copy-and-scan.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'bets':>8} {'lookup':>14} {'scan us':>12} {'store us':>10}")
+    for n in args.sizes:
+        bets = synthetic_bets(n)
+        store = BetStore.from_dicts(bets)
+        store.top_n_by("yes_percent", 1)  # build the sorted index
+        target = f"bet-{n // 2}"
+        number = max(1, 200_000 // n)
+        cases = {
+            "get_bet": (
+                lambda: next(b for b in list(bets) if b["bet_id"] == target),
+                lambda: store.get_bet(target),
+            ),
+            "category": (
+                lambda: [b for b in list(bets) if b["category"] == "Sports"],
+                lambda: store.bets_in_category("Sports"),
+            ),
+            "top_10": (
+                lambda: sorted(list(bets), key=lambda b: b["yes_percent"], reverse=True)[:10],
+                lambda: store.top_n_by("yes_percent", 10),
+            ),
+            "update": (
+                None,
+                lambda: store.update(target, yes_percent=random.randint(1, 99)),
+            ),
+        }
+        for name, (scan, indexed) in cases.items():
+            scan_us = f"{timed_us(scan, number):.1f}" if scan else "-"
+            print(f"{n:>8} {name:>14} {scan_us:>12} {timed_us(indexed, 10_000):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#############################################################################
+# benchmarks/bench_bet_summaries.py — one component per card vs one for all
+#
+# Compares the HTML shipped to the browser (and iframes created) when N bet
+# summary cards are rendered with display_individual_bet_summary each, versus
+# display_bet_summaries once.
+#
+# Run from the project root:  python -m benchmarks.bench_bet_summaries
+#############################################################################
+import argparse
+import time
+from unittest.mock import patch
+
+from data.simulator import synthetic_bets
+from modules import display_bet_summaries, display_individual_bet_summary
+
+
+def render_individually(bets):
+    for bet in bets:
+        display_individual_bet_summary(
+            bet_name=bet["bet_name"],
+            bet_image_link=bet.get("bet_image_link"),
+            yes_value=bet["yes_value"],
+            no_value=bet["no_value"],
+            yes_percent=bet["yes_percent"],
+            no_percent=bet["no_percent"],
+            rules=bet["rules"],
+        )
+
+
+def measure(render, bets, repeat=20):
+    # Capture what would be handed to Streamlit instead of rendering it
+    with patch("internals.components.html") as mock_html:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render(bets)
+        elapsed = (time.perf_counter() - start) / repeat
+        calls = mock_html.call_args_list[-(mock_html.call_count // repeat):]
+    return len(calls), sum(len(call[0][0].encode()) for call in calls), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="One component per card vs one for all.")
+    parser.add_argument("--cards", type=int, nargs="+", default=[1, 4, 12, 50])
+    args = parser.parse_args()
+
+    print(f"{'cards':>6} {'mode':>12} {'iframes':>8} {'bytes':>9} {'render us':>10}")
+    for n in args.cards:
+        bets = synthetic_bets(n)
+        for name, render in (("individual", render_individually), ("batched", display_bet_summaries)):
+            iframes, size, elapsed = measure(render, bets)
+            print(f"{n:>6} {name:>12} {iframes:>8} {size:>9,} {elapsed * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#############################################################################
+# benchmarks/bench_columnar.py — list-of-dicts vs ColumnarTable at 1M rows
+#
+# Reports memory held by each representation, trade metric aggregation time
+# (per-row engine vs vectorized) and the cost of building the DataFrame that
+# st.table / st.dataframe receive.
+#
+# Run from the project root:  python -m benchmarks.bench_columnar
+#############################################################################
+import argparse
+import random
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from data.columnar import TRADE_SCHEMA, ColumnarTable, trade_metrics
+from modules import compute_trade_metrics
+
+SYMBOLS = ['AAPL', 'GOOG', 'TSLA', 'MSFT']
+
+
+def make_records(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'trade_id': f'trade{i}',
+            'symbol': rng.choice(SYMBOLS),
+            'action': rng.choice(('BUY', 'SELL')),
+            'quantity': rng.randint(1, 100),
+            'price': round(rng.uniform(10.0, 500.0), 2),
+            'timestamp': f'2024-01-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00',
+        }
+        for i in range(n)
+    ]
+
+
+def allocated(build):
+    # Bytes still allocated by the object build() returns
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="list-of-dicts vs ColumnarTable.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    records, records_bytes = allocated(lambda: make_records(args.rows))
+    table, build_s = timed(lambda: ColumnarTable.from_records(records, TRADE_SCHEMA))
+    numeric_bytes = sum(column.nbytes for name, column in table.columns.items() if name != 'trade_id')
+    print(f"rows: {args.rows:,}")
+    print(f"memory  dicts: {records_bytes / 2**20:8.1f} MiB   columnar: {table.nbytes / 2**20:8.1f} MiB "
+          f"({numeric_bytes / 2**20:.1f} MiB without trade_id strings)   conversion {build_s:.2f} s")
+
+    _, dict_s = timed(lambda: compute_trade_metrics(records))
+    _, vec_s = timed(lambda: trade_metrics(table))
+    print(f"metrics dicts: {dict_s * 1e3:8.0f} ms      columnar: {vec_s * 1e3:8.1f} ms   ({dict_s / vec_s:.0f}x)")
+
+    _, df_dict_s = timed(lambda: pd.DataFrame(records))
+    frame, df_col_s = timed(table.to_dataframe)
+    shared = np.shares_memory(frame['price'].to_numpy(), table['price'])
+    print(f"dataframe dicts: {df_dict_s * 1e3:6.0f} ms      columnar: {df_col_s * 1e3:8.1f} ms   (shares arrays: {shared})")
+
+
+if __name__ == "__main__":
+    main()
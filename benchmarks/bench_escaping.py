@@ -0,0 +1,55 @@
+#############################################################################
+# benchmarks/bench_escaping.py — micro-benchmarks for value escaping
+#
+# Compares the original character-by-character safe_string with the
+# table-driven escapers in internals.py, cold (cache bypassed) and warm
+# (memoized), for payloads from 10 bytes to 1 MB.
+#
+# Run from the project root:  python -m benchmarks.bench_escaping
+#############################################################################
+import argparse
+import timeit
+
+from internals import ESCAPERS, escape_values
+
+PAYLOAD_SIZES = (10, 1_000, 100_000, 1_000_000)
+# Mix of plain text and characters every escaper rewrites
+_TEXT = 'Resolves "YES" if BTC > $100k & it\'s <b>confirmed</b>\\n. '
+
+
+def legacy_safe_string(string):
+    """The original list-building safe_string."""
+    return ''.join(['\\' + c if c in ["'", '"', '\\'] else c for c in string])
+
+
+def payload(size):
+    return (_TEXT * (size // len(_TEXT) + 1))[:size]
+
+
+def per_call_us(func, arg, number):
+    return min(timeit.repeat(lambda: func(arg), number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for value escaping.")
+    parser.add_argument("--budget", type=int, default=2_000_000, help="bytes escaped per measurement")
+    args = parser.parse_args()
+
+    print(f"{'bytes':>9} {'legacy us':>11} " + " ".join(f"{name + ' us':>10}" for name in ESCAPERS) + f" {'warm us':>9}")
+    for size in PAYLOAD_SIZES:
+        text = payload(size)
+        number = max(1, args.budget // size)
+        assert legacy_safe_string(text) == ESCAPERS['safe'](text)
+        legacy = per_call_us(legacy_safe_string, text, max(1, number // 20))
+        # __wrapped__ is the undecorated escaper, so these are cold timings
+        cold = [per_call_us(escape.__wrapped__, text, number) for escape in ESCAPERS.values()]
+        warm = per_call_us(ESCAPERS['safe'], text, number)
+        print(f"{size:>9} {legacy:>11.2f} " + " ".join(f"{us:>10.2f}" for us in cold) + f" {warm:>9.2f}")
+
+    data = {'BET_NAME': payload(40), 'RULES': payload(300), 'YES_VALUE': '0.72', 'NO_VALUE': '0.28'}
+    batch = per_call_us(escape_values, data, 20_000)
+    print(f"\nescape_values on a 4-key bet dict (warm): {batch:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
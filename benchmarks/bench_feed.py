@@ -0,0 +1,99 @@
+#############################################################################
+# benchmarks/bench_feed.py — home feed read latency and fan-out throughput
+#
+# Builds a random friend graph of --users users (100k by default, about
+# --friends friends each) plus --celebrities users with --celebrity-friends
+# friends, whose posts are pulled on read instead of fanned out. Every
+# user's timeline is built once, then --posts posts by random authors are
+# published (fan-out on write) and first pages and deeper pages of random
+# users' feeds are timed.
+#
+# Run from the project root:  python -m benchmarks.bench_feed
+#   --users 10000 --posts 50000   a smaller run
+#############################################################################
+import argparse
+import random
+import resource
+import time
+
+import numpy as np
+
+from data.feed import FeedService
+from data.social_graph import FriendGraph, SocialGraph
+
+
+def percentiles(latencies):
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+
+
+def build_graph(users, friends, celebrities, celebrity_friends, rng):
+    n_edges = users * friends // 2
+    src = [rng.integers(0, users, n_edges, dtype=np.int32)]
+    dst = [rng.integers(0, users, n_edges, dtype=np.int32)]
+    for celebrity in range(celebrities):
+        src.append(np.full(celebrity_friends, celebrity, dtype=np.int32))
+        dst.append(rng.integers(0, users, celebrity_friends, dtype=np.int32))
+    graph = FriendGraph.from_edges(np.concatenate(src), np.concatenate(dst), users)
+    return SocialGraph(graph, [f"user{i}" for i in range(users)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Home feed read latency and fan-out throughput.")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--friends", type=int, default=50, help="average friends per user")
+    parser.add_argument("--celebrities", type=int, default=20)
+    parser.add_argument("--celebrity-friends", type=int, default=20_000)
+    parser.add_argument("--posts", type=int, default=500_000)
+    parser.add_argument("--reads", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    social = build_graph(args.users, args.friends, args.celebrities, args.celebrity_friends, rng)
+    user_ids = social.user_ids
+    feed = FeedService(friends_of=social.friends, load_posts=lambda user_id: [], degree_of=social.degree)
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        feed.read(user_id, limit=1)
+    print(f"{args.users:,} users, {social.graph.n_edges:,} friendships; "
+          f"timelines built in {time.perf_counter() - start:.1f} s")
+
+    authors = rng.integers(0, args.users, args.posts).tolist()
+    # Celebrities post far more often than everyone else
+    authors[::50] = rng.integers(0, args.celebrities, len(authors[::50])).tolist()
+    timestamp = 1_700_000_000
+    start = time.perf_counter()
+    for n, author in enumerate(authors):
+        feed.publish({
+            'user_id': user_ids[author], 'post_id': f"p{n}", 'timestamp': timestamp + n // 100,
+            'content': "post", 'image': None,
+        })
+    elapsed = time.perf_counter() - start
+    stats = feed.stats()
+    print(f"  publish: {args.posts / elapsed:,.0f} posts/s "
+          f"({stats['timeline_entries'] / args.users:,.0f} timeline entries per user, "
+          f"{stats['celebrities']} celebrities)")
+
+    sample = random.Random(args.seed)
+    readers = [user_ids[sample.randrange(args.users)] for _ in range(args.reads)]
+    first, deep = [], []
+    for user_id in readers:
+        t0 = time.perf_counter_ns()
+        posts, cursor = feed.read(user_id, limit=20)
+        first.append((time.perf_counter_ns() - t0) / 1e6)
+        for _ in range(4):
+            if cursor is None:
+                break
+            t0 = time.perf_counter_ns()
+            posts, cursor = feed.read(user_id, limit=20, before=cursor)
+            deep.append((time.perf_counter_ns() - t0) / 1e6)
+    for name, latencies in (("first page", first), ("pages 2-5", deep)):
+        p50, p99 = percentiles(latencies)
+        print(f"  read {name:<11} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+    print(f"  max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
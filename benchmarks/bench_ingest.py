@@ -0,0 +1,82 @@
+#############################################################################
+# benchmarks/bench_ingest.py — ingestion throughput and staleness
+#
+# 1. apply: pre-generated deltas pushed through IngestPipeline as fast as
+#    possible (the pipeline's ceiling, no network).
+# 2. feed: a `python -m data.simulator` subprocess streams deltas at --rate
+#    over TCP; reports applied updates/sec and end-to-end staleness.
+#
+# Run from the project root:  python -m benchmarks.bench_ingest
+#############################################################################
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+from data.ingest import IngestPipeline, PriceDelta, ingest_from_feed
+from data.simulator import DeltaGenerator, synthetic_bets
+from data.store import BetStore
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def bench_apply(bets, count):
+    pipeline = IngestPipeline(BetStore.from_dicts(bets))
+    generator = DeltaGenerator(bets, seed=1)
+    deltas = [PriceDelta.from_json(generator.next_line()) for _ in range(count)]
+    consumer = asyncio.create_task(pipeline.run())
+    start = time.perf_counter()
+    for delta in deltas:
+        await pipeline.submit(delta)
+    await pipeline.drain()
+    elapsed = time.perf_counter() - start
+    consumer.cancel()
+    return count / elapsed, pipeline.stats
+
+
+async def bench_feed(markets, rate, duration):
+    port = free_port()
+    simulator = subprocess.Popen(
+        [sys.executable, "-m", "data.simulator", "--port", str(port), "--markets", str(markets),
+         "--rate", str(rate), "--duration", str(duration), "--seed", "1"],
+        stdout=subprocess.PIPE,
+    )
+    try:
+        simulator.stdout.readline()  # banner: server is listening
+        pipeline = IngestPipeline(BetStore.from_dicts(synthetic_bets(markets)))
+        await ingest_from_feed(pipeline, "127.0.0.1", port)
+        return pipeline.stats
+    finally:
+        simulator.terminate()
+        simulator.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion throughput and staleness.")
+    parser.add_argument("--markets", type=int, default=10_000)
+    parser.add_argument("--count", type=int, default=200_000, help="deltas for the apply benchmark")
+    parser.add_argument("--rates", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per feed run")
+    args = parser.parse_args()
+
+    bets = synthetic_bets(args.markets)
+    per_second, stats = asyncio.run(bench_apply(bets, args.count))
+    print(f"apply: {per_second:,.0f} deltas/s over {args.markets} markets "
+          f"({stats.batches} batches, {stats.coalesced} coalesced)")
+
+    print(f"\n{'rate/s':>8} {'applied/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for rate in args.rates:
+        stats = asyncio.run(bench_feed(args.markets, rate, args.duration))
+        applied = (stats.applied + stats.coalesced) / args.duration
+        print(f"{rate:>8} {applied:>10,.0f} {stats.staleness_percentile(50) * 1e3:>8.2f} "
+              f"{stats.staleness_percentile(99) * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
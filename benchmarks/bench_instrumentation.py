@@ -0,0 +1,88 @@
+#############################################################################
+# benchmarks/bench_instrumentation.py — cost of the rerun instrumentation
+#
+# Times a rerun-shaped workload (build a page of bet cards, render a bet
+# summary, compute trade metrics) plain and with the render and metrics
+# steps traced as in the app, plus the bare per-span cost.
+# Disabled instrumentation returns the original functions, so "plain" is
+# also the AIRBETS_PROFILE=0 cost.
+#
+# Run from the project root:  python -m benchmarks.bench_instrumentation
+#############################################################################
+import argparse
+import timeit
+
+import instrumentation
+from benchmarks.bench_templates import sample_data
+from data.simulator import synthetic_bets
+from internals import get_template, render_component
+from modules import _bet_card_html, compute_trade_metrics
+
+
+def sample_trades(n):
+    return [
+        {
+            'trade_id': f't{i}',
+            'symbol': ("AAPL", "MSFT", "TSLA")[i % 3],
+            'action': "BUY" if i % 2 else "SELL",
+            'quantity': 1 + i % 50,
+            'price': 100.0 + i % 7,
+            'timestamp': f"2024-01-01 {i % 24:02d}:00:00",
+        }
+        for i in range(n)
+    ]
+
+
+def make_rerun(render, metrics, bets, trades, data):
+    def rerun():
+        instrumentation.start_rerun("bench")
+        render({'CARDS_HTML': ''.join(_bet_card_html(bet) for bet in bets)}, "bet_grid", raw=('CARDS_HTML',))
+        render(data, "individual_bet_summary")
+        metrics(trades)
+        instrumentation.finish_rerun()
+    return rerun
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of rerun instrumentation.")
+    parser.add_argument("--cards", type=int, default=16, help="bet cards rendered per rerun")
+    parser.add_argument("--trades", type=int, default=200, help="trades aggregated per rerun")
+    parser.add_argument("--number", type=int, default=500, help="reruns per measurement")
+    args = parser.parse_args()
+
+    bets = synthetic_bets(args.cards)
+    trades = sample_trades(args.trades)
+    data = sample_data(2_000)
+    get_template("individual_bet_summary")
+    get_template("bet_grid")
+
+    plain = make_rerun(render_component, compute_trade_metrics, bets, trades, data)
+
+    instrumentation.ENABLED = True
+    traced = make_rerun(
+        instrumentation.traced("template.render", size=instrumentation.payload_bytes)(render_component),
+        instrumentation.traced("metrics.compute_trade_metrics")(compute_trade_metrics),
+        bets,
+        trades,
+        data,
+    )
+    noop = instrumentation.traced("noop")(lambda: None)
+
+    plain_s = min(timeit.repeat(plain, number=args.number, repeat=9))
+    traced_s = min(timeit.repeat(traced, number=args.number, repeat=9))
+    spans = len(instrumentation.recent_reruns()[-1].spans)
+    span_s = min(timeit.repeat(noop, number=100_000, repeat=5)) - min(
+        timeit.repeat(lambda: None, number=100_000, repeat=5)
+    )
+    instrumentation.clear()
+
+    print(f"rerun, plain/disabled:  {plain_s / args.number * 1e6:8.1f} us")
+    print(f"rerun, traced:          {traced_s / args.number * 1e6:8.1f} us  ({spans} spans)")
+    print(f"per span:               {span_s / 100_000 * 1e9:8.0f} ns")
+    # The difference of two noisy timings is less stable than spans x per-span cost
+    print(f"measured overhead:      {(traced_s - plain_s) / plain_s:8.2%}")
+    print(f"estimated overhead:     {spans * span_s / 100_000 / (plain_s / args.number):8.2%}")
+
+
+if __name__ == "__main__":
+    main()
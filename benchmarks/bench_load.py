@@ -0,0 +1,345 @@
+#############################################################################
+# benchmarks/bench_load.py — headless load test of app.py and the pages/ scripts
+#
+# Simulates --sessions user sessions with Streamlit's AppTest, each one an
+# independent browser tab with its own session state, walking a scenario:
+#
+#   app           open, log in, filter by category, next page of cards,
+#                 Profile / Trade Summary, back Home, individual bet view
+#   available     pages/1_Available_bets: open, filter, View a bet, back
+#   individual    pages/2_individual_view?bet_id=...: open, refresh
+#   compare       pages/3_Compare_bets: open, filter, pick three bets
+#
+# Sessions are interleaved one step at a time, as a single `streamlit run`
+# process (one container, see Dockerfile) serves all of its sessions on one
+# interpreter. Every step is one rerun; the report has reruns/s, p50/p95/p99
+# rerun latency overall and per step, the rendered payload per rerun (the
+# serialized element protos, i.e. what goes out over the websocket), the
+# resident memory each live session adds and, from the measured throughput,
+# how many users one process sustains at one interaction every --think-time
+# seconds. With AIRBETS_PROFILE=1 the slowest traced spans are listed too.
+#
+# Run from the project root:  python -m benchmarks.bench_load
+#   --sessions 20                 a quick run
+#   --save baseline.json          keep the results
+#   --baseline baseline.json      compare against them; exits with status 1
+#                                 when a metric is worse by more than --tolerance
+#############################################################################
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+from streamlit import config as streamlit_config
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+
+import instrumentation
+from data import get_bet_categories, get_bets_in_category
+from data_fetcher import users
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = {
+    'app': "app.py",
+    'available': "pages/1_Available_bets.py",
+    'individual': "pages/2_individual_view.py",
+    'compare': "pages/3_Compare_bets.py",
+}
+DEFAULT_MIX = "app=4,available=3,individual=2,compare=1"
+RUN_TIMEOUT = 30  # seconds AppTest waits for one rerun
+
+# (metric, True when higher is better) compared against a baseline
+BASELINE_METRICS = [
+    ('reruns_per_sec', True),
+    ('latency_ms.p50', False),
+    ('latency_ms.p95', False),
+    ('latency_ms.p99', False),
+    ('payload_bytes.mean', False),
+    ('memory_per_session_kb', False),
+]
+
+
+# ---- scenarios: lists of (step name, action on the AppTest before its rerun) ----
+
+def _button(at, key=None, label=None):
+    return next(button for button in at.button if button.key == key and (label is None or button.label == label))
+
+
+def app_steps(rng):
+    def log_in(at):
+        at.text_input[0].input(rng.choice(list(users)))
+        _button(at, label="Log in").click()
+
+    def filter_category(at):
+        at.selectbox(key="category_filter").select(rng.choice(["Crypto", "Politics", "Sports", "Other"]))
+
+    def next_page(at):
+        button = _button(at, "home_page_next")
+        if not button.disabled:   # a category that fits on one page just reruns
+            button.click()
+
+    def navigate(page):
+        return lambda at: at.sidebar.radio[0].set_value(page)
+
+    return [
+        ('app.open', None),
+        ('app.login', log_in),
+        ('app.home', None),   # the first rerun after the click shows the home page
+        ('app.filter', filter_category),
+        ('app.next_page', next_page),
+        ('app.trade_summary', navigate('Profile / Trade Summary')),
+        ('app.back_home', navigate('Home')),
+        ('app.individual_view', lambda at: _button(at, "go_individual").click()),
+        ('app.back_to_all', lambda at: _button(at, "back_all").click()),
+    ]
+
+
+def available_steps(rng):
+    def view(at):
+        rng.choice([button for button in at.button if button.key.startswith("view_")]).click()
+
+    return [
+        ('available.open', None),
+        ('available.filter',
+         lambda at: at.selectbox(key="dashboard_category").select(rng.choice(get_bet_categories()))),
+        ('available.view', view),
+        ('available.back', lambda at: _button(at, "back_to_list").click()),
+    ]
+
+
+def individual_steps(rng):
+    bet_ids = [bet['bet_id'] for bet in get_bets_in_category("All")]
+
+    def open_bet(at):
+        at.query_params["bet_id"] = rng.choice(bet_ids)
+
+    return [
+        ('individual.open', open_bet),
+        ('individual.refresh', None),
+    ]
+
+
+def compare_steps(rng):
+    bet_ids = [bet['bet_id'] for bet in get_bets_in_category("All")]
+
+    def pick(at):
+        # The widget's options are the formatted bet names; its values are bet ids
+        at.multiselect(key="compare_bets").set_value(rng.sample(bet_ids, min(3, len(bet_ids))))
+
+    return [
+        ('compare.open', None),
+        ('compare.filter', lambda at: at.selectbox(key="compare_category").select("All")),
+        ('compare.pick', pick),
+    ]
+
+
+SCENARIOS = {
+    'app': app_steps,
+    'available': available_steps,
+    'individual': individual_steps,
+    'compare': compare_steps,
+}
+
+
+# ---- measurements ----
+
+def payload_bytes(node):
+    """Serialized size of the element protos under an AppTest tree node."""
+    proto = getattr(node, "proto", None)
+    size = proto.ByteSize() if proto is not None else 0
+    for child in getattr(node, "children", {}).values():
+        size += payload_bytes(child)
+    return size
+
+
+def rss_kb():
+    """Resident set size of this process in KiB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        # Peak rather than current RSS, but monotonic enough for a delta
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def summarize(latencies, payloads):
+    return {
+        'count': len(latencies),
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'max': max(latencies),
+        'payload_bytes': sum(payloads) // len(payloads),
+    }
+
+
+class Session:
+    """One simulated user: an AppTest on a script and the steps left to walk."""
+
+    __slots__ = ("scenario", "at", "steps")
+
+    def __init__(self, scenario, rng):
+        self.scenario = scenario
+        self.at = AppTest.from_file(os.path.join(ROOT, SCRIPTS[scenario]), default_timeout=RUN_TIMEOUT)
+        self.steps = list(SCENARIOS[scenario](rng))
+
+    def step(self):
+        """Apply the next step and rerun; returns (step name, ms, bytes, error or None)."""
+        name, action = self.steps.pop(0)
+        start = time.perf_counter()
+        try:
+            if action is not None:
+                action(self.at)
+            self.at.run()
+        except Exception as exc:   # a broken step ends the session
+            self.steps.clear()
+            return name, (time.perf_counter() - start) * 1e3, 0, f"{type(exc).__name__}: {exc}"
+        elapsed = (time.perf_counter() - start) * 1e3
+        error = self.at.exception[0].message if len(self.at.exception) else None
+        return name, elapsed, payload_bytes(self.at._tree), error
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def warm_up(rng):
+    """Walk every scenario once so imports and process-wide caches are loaded."""
+    for scenario in SCENARIOS:
+        session = Session(scenario, rng)
+        while session.steps:
+            session.step()
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    weights = parse_mix(args.mix)
+    warm_up(rng)
+    instrumentation.clear()
+
+    rss_before = rss_kb()
+    sessions = [
+        Session(scenario, rng)
+        for scenario in rng.choices(list(weights), weights=list(weights.values()), k=args.sessions)
+    ]
+    latencies, payloads, by_step, errors = [], [], {}, {}
+    start = time.perf_counter()
+    live = sessions
+    while live:
+        for session in live:
+            name, ms, size, error = session.step()
+            latencies.append(ms)
+            payloads.append(size)
+            step = by_step.setdefault(name, ([], []))
+            step[0].append(ms)
+            step[1].append(size)
+            if error is not None:
+                errors[f"{name}: {error}"] = errors.get(f"{name}: {error}", 0) + 1
+        live = [session for session in live if session.steps]
+    elapsed = time.perf_counter() - start
+    rss_after = rss_kb()
+
+    reruns_per_sec = len(latencies) / elapsed
+    overall = summarize(latencies, payloads)
+    return {
+        'config': {'sessions': args.sessions, 'mix': weights, 'seed': args.seed},
+        'reruns': len(latencies),
+        'seconds': elapsed,
+        'reruns_per_sec': reruns_per_sec,
+        'latency_ms': {q: overall[q] for q in ('p50', 'p95', 'p99', 'max')},
+        'payload_bytes': {'mean': overall['payload_bytes'], 'max': max(payloads)},
+        'memory_per_session_kb': max(0, rss_after - rss_before) / args.sessions,
+        'sustained_users': reruns_per_sec * args.think_time,
+        'steps': {name: summarize(*values) for name, values in sorted(by_step.items())},
+        'errors': errors,
+    }
+
+
+def report(results, think_time):
+    latency = results['latency_ms']
+    print(f"{results['config']['sessions']} sessions, {results['reruns']:,} reruns in {results['seconds']:.1f} s")
+    print(f"  reruns/s          {results['reruns_per_sec']:10.1f}")
+    print(f"  rerun latency     p50 {latency['p50']:7.1f} ms   p95 {latency['p95']:7.1f} ms   "
+          f"p99 {latency['p99']:7.1f} ms   max {latency['max']:7.1f} ms")
+    print(f"  payload/rerun     mean {results['payload_bytes']['mean'] / 1024:6.1f} KiB   "
+          f"max {results['payload_bytes']['max'] / 1024:6.1f} KiB")
+    print(f"  memory/session    {results['memory_per_session_kb']:10.0f} KiB")
+    print(f"  sustained users   {results['sustained_users']:10.0f}   "
+          f"(one interaction per user every {think_time:g} s, one process)")
+    print(f"  {'step':<24}{'count':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'KiB':>8}")
+    for name, step in results['steps'].items():
+        print(f"  {name:<24}{step['count']:>6}{step['p50']:>9.1f}{step['p95']:>9.1f}{step['p99']:>9.1f}"
+              f"{step['payload_bytes'] / 1024:>8.1f}")
+    for error, count in results['errors'].items():
+        print(f"  ERROR x{count}  {error}")
+
+
+def _metric(results, path):
+    value = results
+    for part in path.split("."):
+        value = value[part]
+    return value
+
+
+def compare(results, baseline, tolerance):
+    """Print each metric against the baseline; returns the regressed metric names."""
+    regressions = []
+    print(f"against the baseline (tolerance {tolerance:.0%})")
+    for path, higher_is_better in BASELINE_METRICS:
+        new, old = _metric(results, path), _metric(baseline, path)
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        if flag:
+            regressions.append(path)
+        print(f"  {path:<24}{old:>12.1f} -> {new:>10.1f}  {change:+7.1%}  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test of the Streamlit app and pages.")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. app=1,compare=1")
+    parser.add_argument("--think-time", type=float, default=10.0,
+                        help="seconds between a user's interactions, for the sustained-users estimate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    # AppTest runs scripts outside a server; keep Streamlit's warnings out of the report
+    streamlit_config.set_option("logger.level", "error")
+    set_log_level("error")
+    results = run(args)
+    report(results, args.think_time)
+    if instrumentation.ENABLED:
+        print("  slowest traced spans (total over the run)")
+        spans = instrumentation.summarize(instrumentation.recent_reruns())
+        for name, entry in sorted(spans.items(), key=lambda item: -item[1]['total_ms'])[:10]:
+            print(f"    {name:<40}{entry['calls']:>7} calls {entry['total_ms']:>10.1f} ms")
+    if args.save:
+        with open(args.save, "w") as out:
+            json.dump(results, out, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            if compare(results, json.load(baseline), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
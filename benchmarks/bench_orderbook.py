@@ -0,0 +1,108 @@
+#############################################################################
+# benchmarks/bench_orderbook.py — matching engine throughput and latency
+#
+# Generates a seeded order stream (limit orders around a random-walking
+# price across --markets bets, with some cancels), or replays one saved with
+# --record, and pushes it through MatchingEngine single-threaded. Reports
+# orders/sec over the whole run and per-order latency percentiles, with and
+# without a BetStore receiving the traded prices.
+#
+# Run from the project root:  python -m benchmarks.bench_orderbook
+#   --record orders.jsonl   save the generated stream
+#   --replay orders.jsonl   run a saved stream instead of generating one
+#############################################################################
+import argparse
+import json
+import random
+import time
+
+from data.orderbook import MatchingEngine
+from data.simulator import synthetic_bets
+from data.store import BetStore
+
+
+def generate_orders(count, markets, seed=0, cancel_ratio=0.1):
+    """Orders as (action, bet_id, side, outcome, price, quantity) tuples.
+
+    A "CANCEL" action cancels the order submitted ``quantity`` orders before it.
+    """
+    rng = random.Random(seed)
+    mids = [rng.randint(20, 80) for _ in range(markets)]
+    orders = []
+    for i in range(count):
+        market = rng.randrange(markets)
+        if i and rng.random() < cancel_ratio:
+            orders.append(("CANCEL", f"bet-{market}", None, None, None, rng.randint(1, min(i, 50))))
+            continue
+        mid = mids[market] = min(95, max(5, mids[market] + rng.choice((-1, 0, 1))))
+        side = rng.choice(("BUY", "SELL"))
+        outcome = rng.choice(("YES", "NO"))
+        # Aggressive orders cross the mid, passive ones rest a few cents away
+        offset = rng.randint(-3, 3)
+        yes_price = mid + offset if (side == "BUY") == (outcome == "YES") else mid - offset
+        yes_price = min(99, max(1, yes_price))
+        price = yes_price if outcome == "YES" else 100 - yes_price
+        orders.append(("SUBMIT", f"bet-{market}", side, outcome, price, rng.randint(1, 20)))
+    return orders
+
+
+def replay(orders, engine):
+    """Run the stream; returns (elapsed seconds, per-order latencies in ns, fills)."""
+    submitted = []
+    latencies = []
+    fills = 0
+    clock = time.perf_counter_ns
+    start = time.perf_counter()
+    for action, bet_id, side, outcome, price, quantity in orders:
+        t0 = clock()
+        if action == "CANCEL":
+            if len(submitted) >= quantity:
+                engine.cancel(*submitted[-quantity])
+        else:
+            order, order_fills = engine.submit(bet_id, "bench", side, outcome, price, quantity)
+            submitted.append((bet_id, order.order_id))
+            fills += len(order_fills)
+        latencies.append(clock() - t0)
+    return time.perf_counter() - start, latencies, fills
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def report(label, orders, elapsed, latencies, fills):
+    latencies.sort()
+    p = {q: percentile(latencies, q) / 1000 for q in (0.5, 0.9, 0.99, 0.999)}
+    print(
+        f"{label:<14} {len(orders) / elapsed:>10,.0f} orders/s  {fills:>8} fills  "
+        f"p50 {p[0.5]:.1f} us  p90 {p[0.9]:.1f} us  p99 {p[0.99]:.1f} us  p99.9 {p[0.999]:.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matching engine throughput and latency.")
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--markets", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", help="write the generated order stream to this JSONL file")
+    parser.add_argument("--replay", help="replay an order stream from this JSONL file")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay) as file:
+            orders = [tuple(json.loads(line)) for line in file]
+    else:
+        orders = generate_orders(args.orders, args.markets, args.seed)
+    if args.record:
+        with open(args.record, "w") as file:
+            file.writelines(json.dumps(order) + "\n" for order in orders)
+
+    markets = {order[1] for order in orders}
+    bets = [bet for bet in synthetic_bets(max(int(m.split("-")[1]) for m in markets) + 1) if bet["bet_id"] in markets]
+
+    report("engine only", orders, *replay(orders, MatchingEngine()))
+    report("with store", orders, *replay(orders, MatchingEngine(BetStore.from_dicts(bets))))
+
+
+if __name__ == "__main__":
+    main()
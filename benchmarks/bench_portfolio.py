@@ -0,0 +1,108 @@
+#############################################################################
+# benchmarks/bench_portfolio.py — marking user positions to live bet prices
+#
+# --users users (100k by default) each hold --per-user positions (10): one
+# in a hot market everybody trades and the rest in random ones of --markets
+# bets, 1M positions in all. Then times:
+#
+#   tick         one price tick on a random market plus the next read of a
+#                holder's totals (revalues only that market's holders)
+#   hot tick     the same for the market every user holds
+#   every market a tick on every market, then one read: all positions
+#                revalued (the 1M-position target is 50 ms)
+#   full scan    recomputing every user's market value from all positions
+#                with NumPy, what a valuation without dirty flags costs
+#   python scan  the same per position in Python (the naive loop)
+#
+# Run from the project root:  python -m benchmarks.bench_portfolio
+#   --users 20000   a smaller run
+#############################################################################
+import argparse
+import random
+import time
+
+import numpy as np
+
+from data.portfolio import Portfolio
+from data.simulator import synthetic_bets
+from data.store import BetStore
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+
+
+def tick(store, bet_id, rng):
+    yes = rng.randint(1, 99)
+    store.update(bet_id, yes_percent=yes, no_percent=100 - yes, yes_value=yes / 100, no_value=(100 - yes) / 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental portfolio revaluation after price ticks.")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--per-user", type=int, default=10, help="positions per user")
+    parser.add_argument("--markets", type=int, default=1_000)
+    parser.add_argument("--ticks", type=int, default=200, help="timed ticks per kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    store = BetStore.from_dicts(synthetic_bets(args.markets, args.seed))
+    portfolio = Portfolio()
+    portfolio.attach(store)
+    start = time.perf_counter()
+    for n in range(args.users):
+        user = f"user{n}"
+        markets = {0} | set(rng.sample(range(1, args.markets), args.per_user - 1))
+        for market in markets:
+            portfolio.add_fill(user, (f"bet-{market}", rng.choice(("YES", "NO"))), rng.randint(1, 100),
+                               rng.randint(1, 99) / 100)
+    portfolio.revalue()
+    print(f"{len(portfolio):,} positions of {args.users:,} users over {args.markets:,} markets "
+          f"(built in {time.perf_counter() - start:.1f} s)")
+
+    def timed(bet_ids, reader):
+        samples = []
+        for bet_id in bet_ids:
+            start = time.perf_counter()
+            tick(store, bet_id, rng)
+            portfolio.totals(reader)
+            samples.append((time.perf_counter() - start) * 1e3)
+        return samples
+
+    p50, p99 = percentiles(timed([f"bet-{rng.randrange(1, args.markets)}" for _ in range(args.ticks)], "user0"))
+    print(f"  tick          p50 {p50:8.3f} ms   p99 {p99:8.3f} ms   "
+          f"(~{len(portfolio) // args.markets:,} holders per market)")
+    p50, p99 = percentiles(timed(["bet-0"] * args.ticks, "user0"))
+    print(f"  hot tick      p50 {p50:8.3f} ms   p99 {p99:8.3f} ms   ({args.users:,} holders)")
+
+    samples = []
+    revalued = 0
+    for _ in range(5):
+        for market in range(args.markets):
+            tick(store, f"bet-{market}", rng)
+        start = time.perf_counter()
+        revalued = portfolio.revalue()
+        samples.append((time.perf_counter() - start) * 1e3)
+    print(f"  every market  {min(samples):8.1f} ms best, {max(samples):.1f} ms worst "
+          f"to revalue {revalued:,} positions")
+
+    # Without dirty flags: value every position and sum per user on each read
+    size = len(portfolio)
+    users, instruments = portfolio._pos_user[:size], portfolio._pos_instrument[:size]
+    quantity, marks = portfolio._quantity[:size], portfolio._mark
+    start = time.perf_counter()
+    np.bincount(users, weights=quantity * marks[instruments], minlength=args.users)
+    print(f"  full scan     {(time.perf_counter() - start) * 1e3:8.1f} ms (NumPy, every position)")
+    rows = list(zip(users.tolist(), instruments.tolist(), quantity.tolist()))
+    marks_list = marks.tolist()
+    start = time.perf_counter()
+    totals = [0.0] * args.users
+    for user, instrument, held in rows:
+        totals[user] += held * marks_list[instrument]
+    print(f"  python scan   {(time.perf_counter() - start) * 1e3:8.1f} ms (a loop over every position)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#############################################################################
+# benchmarks/bench_precompute.py — background dashboard precompute
+#
+# --users active users (10k by default), each with --trades trades and a few
+# workouts, get the DASHBOARD_ARTIFACTS of data_fetcher computed:
+#
+#   inline     every dashboard computed in this process, one after another
+#              (what the Streamlit script did on the request thread)
+#   pool       PrecomputeScheduler on a process pool of --workers workers
+#              (default: every core); reports throughput, touch-to-ready
+#              latency, the latency of a user touched while the backlog is
+#              still queued (recent activity goes first) and the latency
+#              of the UI's read of precomputed results meanwhile
+#
+# Run from the project root:  python -m benchmarks.bench_precompute
+#   --users 2000   a smaller run
+#############################################################################
+import argparse
+import multiprocessing
+import random
+import time
+
+from data.cache import ResultCache
+from data.precompute import Artifact, PrecomputeScheduler
+from data_fetcher import DASHBOARD_ARTIFACTS
+
+SYMBOLS = ['AAPL', 'GOOG', 'TSLA', 'MSFT', 'NVDA', 'AMZN']
+
+
+def make_data(users, trades, seed):
+    rng = random.Random(seed)
+    data = {}
+    for n in range(users):
+        data[f"user{n}"] = {
+            'trade_metrics': [
+                {'trade_id': i, 'symbol': rng.choice(SYMBOLS), 'action': rng.choice(('BUY', 'SELL')),
+                 'quantity': rng.randint(1, 100), 'price': round(rng.uniform(10, 500), 2),
+                 'timestamp': 1_704_067_200 + i * 60}
+                for i in range(trades)
+            ],
+            'workout_summary': [
+                {'workout_id': f"workout{i}", 'start_timestamp': '2024-01-01 00:00:00',
+                 'end_timestamp': '2024-01-01 00:30:00', 'distance': rng.randint(0, 200) / 10,
+                 'steps': rng.randint(0, 20000), 'calories_burned': rng.randint(0, 100)}
+                for i in range(3)
+            ],
+        }
+    return data
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench_inline(artifacts, data):
+    start = time.perf_counter()
+    for user_id, inputs in data.items():
+        for artifact in artifacts:
+            artifact.compute(user_id if artifact.gather is None else inputs[artifact.name])
+    elapsed = time.perf_counter() - start
+    print(f"  inline            {len(data) / elapsed:>10,.0f} users/s   ({elapsed:.1f} s for all users)")
+
+
+def bench_pool(artifacts, data, workers):
+    cache = ResultCache(maxsize=4 * len(data) * len(artifacts), ttl=None)
+    scheduler = PrecomputeScheduler(artifacts, cache=cache, max_workers=workers)
+    user_ids = list(data)
+    # Start the workers before timing
+    scheduler.touch("warmup")
+    scheduler.wait_idle()
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        scheduler.touch(user_id)
+    # Touch a user from the back of the backlog, as a fresh page view would
+    time.sleep(0.5)
+    hot = user_ids[0]
+    hot_start = time.perf_counter()
+    scheduler.touch(hot)
+    hot_ms = None
+    reads = []
+    while True:
+        t0 = time.perf_counter_ns()
+        scheduler.results(user_ids[random.randrange(len(user_ids))])
+        reads.append((time.perf_counter_ns() - t0) / 1e6)
+        if hot_ms is None and scheduler.results(hot)['trade_metrics'] is not None:
+            hot_ms = (time.perf_counter() - hot_start) * 1e3
+        if scheduler.wait_idle(0.005):
+            break
+    elapsed = time.perf_counter() - start
+    stats = scheduler.stats()
+    scheduler.close()
+    print(f"  pool, {workers} worker(s) {len(data) / elapsed:>8,.0f} users/s   ({elapsed:.1f} s for all users)")
+    print(f"    touch to ready   p50 {stats['latency_p50'] * 1e3:9.1f} ms   p99 {stats['latency_p99'] * 1e3:9.1f} ms "
+          f"(whole backlog queued at once)")
+    print(f"    user touched behind the backlog ready in {hot_ms:.1f} ms")
+    print(f"    UI read of results while busy ({len(reads):,} reads) p50 {percentile(reads, 0.5):.3f} ms   "
+          f"p99 {percentile(reads, 0.99):.3f} ms")
+    print(f"    submitted {stats['submitted']:,}, completed {stats['completed']:,}, failed {stats['failed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background dashboard precompute throughput and latency.")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--trades", type=int, default=200, help="trades per user")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = make_data(args.users, args.trades, args.seed)
+    artifacts = [
+        Artifact(a.name, a.compute, None if a.gather is None else (lambda user_id, name=a.name: data[user_id][name]))
+        for a in DASHBOARD_ARTIFACTS
+    ]
+    data["warmup"] = data["user0"]
+    print(f"{args.users:,} active users, {args.trades} trades each, {multiprocessing.cpu_count()} CPU(s)")
+    bench_inline(artifacts, data)
+    bench_pool(artifacts, data, args.workers)
+
+
+if __name__ == "__main__":
+    main()
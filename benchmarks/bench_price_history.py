@@ -0,0 +1,131 @@
+#############################################################################
+# benchmarks/bench_price_history.py — per-bet price history and sparklines
+#
+# --ticks random-walk price updates (1M by default) go through a BetStore
+# of --bets markets, of which --active trade, with the clock advancing
+# --interval seconds per update (~14 hours by default). Reports:
+#
+#   record       store.update throughput with and without a PriceHistory
+#                attached (the cost of keeping ticks and 1s/1m/1h bars)
+#   memory       bytes of tick and bar buffers per traded bet
+#   sparkline    series(bet, 120) latency for a chart of the whole history
+#                and of the last 10 minutes, versus downsampling every raw
+#                tick of the bet kept in a plain list
+#
+# Run from the project root:  python -m benchmarks.bench_price_history
+#   --ticks 200000   a shorter run
+#############################################################################
+import argparse
+import random
+import time
+
+import numpy as np
+
+from data.price_history import PriceHistory
+from data.simulator import synthetic_bets
+from data.store import BetStore
+from data.timeseries import lttb_indices
+
+POINTS = 120
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_updates(args):
+    rng = random.Random(args.seed)
+    percent = {}
+    updates = []
+    for _ in range(args.ticks):
+        bet_id = f"bet-{rng.randrange(args.active)}"
+        yes = min(99, max(1, percent.get(bet_id, 50) + rng.choice((-1, 1))))
+        percent[bet_id] = yes
+        updates.append((bet_id, {'yes_percent': yes, 'no_percent': 100 - yes,
+                                 'yes_value': yes / 100, 'no_value': (100 - yes) / 100}))
+    return updates
+
+
+def replay(store, updates, clock, interval):
+    start = time.perf_counter()
+    for bet_id, fields in updates:
+        clock.now += interval
+        store.update(bet_id, **fields)
+    return len(updates) / (time.perf_counter() - start)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+
+
+def time_calls(name, calls, points):
+    samples = []
+    sizes = []
+    for call in calls:
+        start = time.perf_counter()
+        times, _ = call()
+        samples.append((time.perf_counter() - start) * 1e3)
+        sizes.append(len(times))
+    p50, p99 = percentiles(samples)
+    print(f"  {name:<26} p50 {p50:7.3f} ms   p99 {p99:7.3f} ms   ({sum(sizes) / len(sizes):.0f} of {points} points)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price history recording and sparkline query cost.")
+    parser.add_argument("--bets", type=int, default=10_000)
+    parser.add_argument("--active", type=int, default=1_000, help="bets that trade")
+    parser.add_argument("--ticks", type=int, default=1_000_000)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between updates")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bets = synthetic_bets(args.bets, args.seed)
+    updates = make_updates(args)
+    t0 = 1_767_225_600.0
+
+    plain = BetStore.from_dicts(bets)
+    base_rate = replay(plain, updates, Clock(t0), args.interval)
+
+    store = BetStore.from_dicts(bets)
+    clock = Clock(t0)
+    history = PriceHistory(clock=clock)
+    history.attach(store)
+    rate = replay(store, updates, clock, args.interval)
+    print(f"{args.ticks:,} updates over {args.active:,} of {args.bets:,} bets, "
+          f"{args.ticks * args.interval / 3600:.1f} h of prices")
+    print(f"  record       {rate:>10,.0f} updates/s with history   ({base_rate:,.0f}/s without)")
+
+    nbytes = sum(
+        h.ticks.buf.nbytes + sum(bars.buf.nbytes for bars in h.bars) for h in history._histories.values()
+    )
+    print(f"  memory       {nbytes / len(history._histories) / 1024:>10,.1f} KiB per traded bet")
+
+    # The naive alternative: every raw tick of a bet, downsampled per query
+    raw = {}
+    for i, (bet_id, fields) in enumerate(updates):
+        raw.setdefault(bet_id, ([], []))
+        raw[bet_id][0].append(t0 + (i + 1) * args.interval)
+        raw[bet_id][1].append(fields['yes_value'])
+
+    def naive(bet_id):
+        times, values = np.array(raw[bet_id][0]), np.array(raw[bet_id][1])
+        kept = lttb_indices(times, values, POINTS)
+        return times[kept], values[kept]
+
+    rng = random.Random(args.seed)
+    picks = [f"bet-{rng.randrange(args.active)}" for _ in range(args.queries)]
+    recent = clock.now - 600
+    print(f"  sparkline ({len(raw[picks[0]][0]):,} raw ticks per bet on average)")
+    time_calls("whole history", [lambda b=b: history.series(b, POINTS) for b in picks], POINTS)
+    time_calls("last 10 minutes", [lambda b=b: history.series(b, POINTS, start=recent) for b in picks], POINTS)
+    time_calls("raw ticks, downsampled", [lambda b=b: naive(b) for b in picks], POINTS)
+
+
+if __name__ == "__main__":
+    main()
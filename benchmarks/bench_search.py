@@ -0,0 +1,130 @@
+#############################################################################
+# benchmarks/bench_search.py — full-text and faceted bet search
+#
+# Builds a SearchIndex over --bets markets whose names and rules draw words
+# from a Zipf-distributed vocabulary (a few words in most bets, a long tail
+# of rare ones, like real market titles), then times:
+#
+#   scan         substring match over bet_name/rules of every bet in
+#                Python, the only way to find a bet without the index
+#   term         one-word queries for common, mid-frequency and rare words
+#   multi-term   two- and three-word queries (every word must match)
+#   typeahead    every prefix a user types on the way to a word
+#   filtered     a query with a category and a probability bucket filter
+#   browse       the empty query (facet counts of the whole catalog)
+#
+# plus repricing and re-indexing throughput. Every query returns a page of
+# 20 ranked bets with category and probability facet counts.
+#
+# Run from the project root:  python -m benchmarks.bench_search
+#   --bets 20000   a smaller catalog
+#############################################################################
+import argparse
+import itertools
+import random
+import time
+
+from data.search import SearchIndex
+from data.simulator import synthetic_bets
+from data.store import BetStore
+
+SYLLABLES = ["ba", "ko", "ri", "tu", "men", "sa", "lo", "vex", "dra", "pi", "qua", "zen", "no", "gal", "tor", "ek"]
+CATEGORIES = ["Crypto", "Politics", "Sports", "Other"]
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def make_bets(count, vocabulary, seed):
+    rng = random.Random(seed)
+    # Zipf: word i is drawn with weight 1 / (i + 1)
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocabulary))))
+    bets = synthetic_bets(count, seed)
+    for bet in bets:
+        name = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(4, 8))
+        rules = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(10, 20))
+        bet["bet_name"] = f"Will {' '.join(name)} happen?"
+        bet["rules"] = f"Resolves YES if {' '.join(rules)}."
+    return bets
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+
+
+def time_queries(name, index, queries, **filters):
+    samples = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        results = index.search(query, limit=20, **filters)
+        samples.append((time.perf_counter() - start) * 1e3)
+        hits += results.total
+    p50, p99 = percentiles(samples)
+    print(f"  {name:<12} p50 {p50:6.3f} ms   p99 {p99:6.3f} ms   ({len(queries)} queries, "
+          f"{hits / len(queries):,.0f} matches on average)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text and faceted bet search latency.")
+    parser.add_argument("--bets", type=int, default=200_000)
+    parser.add_argument("--vocabulary", type=int, default=20_000, help="distinct words")
+    parser.add_argument("--queries", type=int, default=500, help="queries per kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    store = BetStore.from_dicts(make_bets(args.bets, vocabulary, args.seed))
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.attach(store)
+    print(f"{args.bets:,} bets, {args.vocabulary:,} words: indexed in {time.perf_counter() - start:.1f} s")
+
+    needle = vocabulary[50]
+    start = time.perf_counter()
+    found = [bet for bet in store if needle in bet.bet_name.lower() or needle in bet.rules.lower()]
+    print(f"  {'scan':<12} {(time.perf_counter() - start) * 1e3:10.1f} ms   "
+          f"(one substring query, {len(found):,} matches)")
+
+    # Query words by frequency rank: common words are in a large share of
+    # the bets (the top ones in most, like stopwords), rare ones in a few
+    def words(lo, hi, count=args.queries):
+        return [vocabulary[rng.randrange(lo, min(hi, len(vocabulary)))] for _ in range(count)]
+
+    time_queries("common term", index, words(0, 100))
+    time_queries("mid term", index, words(100, 2_000))
+    time_queries("rare term", index, words(2_000, len(vocabulary)))
+    time_queries("multi-term", index, [
+        " ".join(words(0, 100, 1) + words(100, 2_000, 1) + words(0, len(vocabulary), rng.randint(0, 1)))
+        for _ in range(args.queries)
+    ])
+    prefixes = []
+    for target in words(100, 2_000):
+        prefixes.extend(target[:n] for n in range(1, len(target) + 1))
+    time_queries("typeahead", index, prefixes)
+    time_queries("filtered", index, words(0, 2_000), category="Sports", probability=(4, 5))
+    time_queries("browse", index, [""] * 50)
+
+    start = time.perf_counter()
+    reprices = [(f"bet-{rng.randrange(args.bets)}", rng.randint(1, 99)) for _ in range(100_000)]
+    for bet_id, yes_percent in reprices:
+        store.update(bet_id, yes_percent=yes_percent, no_percent=100 - yes_percent)
+    elapsed = time.perf_counter() - start
+    print(f"  reprice      {len(reprices) / elapsed:>10,.0f} updates/s (store and index)")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        bet_id = f"bet-{rng.randrange(args.bets)}"
+        store.update(bet_id, bet_name=f"Will {' '.join(words(0, len(vocabulary), 3))} happen?")
+    elapsed = time.perf_counter() - start
+    print(f"  rename       {10_000 / elapsed:>10,.0f} re-indexed bets/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#############################################################################
+# benchmarks/bench_social_graph.py — friend graph memory and query latency
+#
+# Builds a FriendGraph from --edges random friendships among --users users
+# (1M users / 50M friendships by default) and reports the build time, the
+# CSR arrays' size and the peak memory traced while building, then the
+# latency of single and batched neighbor lookups, 2-hop expansion,
+# mutual-friend suggestions, incremental edge updates and compaction.
+# Peak memory is measured with tracemalloc, which NumPy reports its
+# allocations to.
+#
+# Run from the project root:  python -m benchmarks.bench_social_graph
+#   --users 100000 --edges 5000000   a smaller graph for a quick run
+#############################################################################
+import argparse
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from data.social_graph import FriendGraph
+
+
+def timed(func, repeat):
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        func()
+        latencies.append((time.perf_counter_ns() - t0) / 1e6)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Friend graph memory and query latency.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--edges", type=int, default=50_000_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    src = rng.integers(0, args.users, args.edges, dtype=np.int32)
+    dst = rng.integers(0, args.users, args.edges, dtype=np.int32)
+    input_mb = (src.nbytes + dst.nbytes) / 1e6
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    graph = FriendGraph.from_edges(src, dst, args.users)
+    build_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del src, dst
+
+    print(f"{args.users:,} users, {graph.n_edges:,} friendships (input arrays {input_mb:,.0f} MB)")
+    print(f"  build {build_s:.1f} s; CSR {graph.nbytes / 1e6:,.0f} MB "
+          f"({graph.nbytes / graph.n_edges:.1f} bytes/friendship); "
+          f"peak traced while building {peak / 1e6:,.0f} MB; max RSS "
+          f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:,.0f} MB")
+
+    users = rng.integers(0, args.users, args.repeat)
+    it = iter(np.resize(users, args.repeat * 4).tolist())
+    batch = rng.integers(0, args.users, 1000)
+    rows = [
+        ("neighbors(u)", lambda: graph.neighbors(next(it))),
+        ("neighbors_many(1000 users)", lambda: graph.neighbors_many(batch)),
+        ("k_hop(u, 2)", lambda: graph.k_hop(next(it), 2)),
+        ("mutual_counts(u, 10)", lambda: graph.mutual_counts(next(it), 10)),
+    ]
+    for name, func in rows:
+        p50, p99 = timed(func, args.repeat)
+        print(f"  {name:<28} p50 {p50:9.3f} ms   p99 {p99:9.3f} ms")
+
+    pairs = rng.integers(0, args.users, (args.updates, 2)).tolist()
+    start = time.perf_counter()
+    for a, b in pairs:
+        if a != b:
+            graph.add_edge(a, b)
+    update_s = time.perf_counter() - start
+    print(f"  add_edge: {args.updates / update_s:,.0f} edges/s (pending after auto-compaction: "
+          f"{graph.pending_updates():,})")
+    p50, _ = timed(lambda: graph.neighbors_many(batch), args.repeat)
+    print(f"  neighbors_many with pending updates p50 {p50:.3f} ms")
+    start = time.perf_counter()
+    graph.compact()
+    print(f"  compact: {time.perf_counter() - start:.2f} s; CSR {graph.nbytes / 1e6:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
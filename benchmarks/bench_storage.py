@@ -0,0 +1,140 @@
+#############################################################################
+# benchmarks/bench_storage.py — storage backends under concurrent sessions
+#
+# Seeds a backend with --users users (with friends), --trades trades and
+# --bets bets using the bulk loaders, then runs --sessions threads at once,
+# each standing in for a Streamlit session rerunning its page --pages times.
+# A page load reads the user's profile, their friends' posts and their
+# trades, and with probability --write-ratio records a trade. Reports load
+# time, page loads/sec, per-page latency percentiles and (for SQLite) how
+# often a session had to wait for a pooled connection.
+#
+# Run from the project root:  python -m benchmarks.bench_storage
+#   --backend sqlite|memory|both   (default both)
+#   --pool-size 8                   SQLite connections shared by all sessions
+#############################################################################
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from data.simulator import synthetic_bets
+from data.storage import MemoryBackend, SQLiteBackend
+from data.trade_log import TradeLog
+
+SYMBOLS = ['AAPL', 'GOOG', 'TSLA', 'MSFT', 'NVDA', 'AMZN']
+START_TS = 1_704_067_200  # 2024-01-01
+
+
+def seed(backend, users, trades, bets, rng):
+    start = time.perf_counter()
+    backend.load_users({
+        f"user{i}": {
+            'full_name': f"User {i}",
+            'username': f"user_{i}",
+            'date_of_birth': '1990-01-01',
+            'profile_image': None,
+            'friends': [f"user{rng.randrange(users)}" for _ in range(rng.randint(0, 10))],
+        }
+        for i in range(users)
+    })
+    backend.add_posts([
+        {'user_id': f"user{i}", 'post_id': 'post1', 'timestamp': '2024-01-01 00:00:00', 'content': 'Hello', 'image': None}
+        for i in range(users)
+    ])
+    for batch in range(0, trades, 50_000):
+        backend.add_trades([
+            (f"user{rng.randrange(users)}", rng.choice(SYMBOLS), rng.choice(('BUY', 'SELL')),
+             rng.randint(1, 100), rng.uniform(10, 500), START_TS + batch + i)
+            for i in range(min(50_000, trades - batch))
+        ])
+    backend.load_bets(synthetic_bets(bets))
+    return time.perf_counter() - start
+
+
+def page_load(backend, user_id, rng, write_ratio):
+    profile = backend.get_user(user_id)
+    for friend_id in profile['friends']:
+        backend.get_user_posts(friend_id)
+    backend.get_user_trades(user_id)
+    if rng.random() < write_ratio:
+        backend.add_trades([(user_id, rng.choice(SYMBOLS), 'BUY', 1, 100.0, None)])
+
+
+def run_sessions(backend, sessions, pages, users, write_ratio):
+    latencies = [[] for _ in range(sessions)]
+    errors = []
+    barrier = threading.Barrier(sessions + 1)
+
+    def session(index):
+        rng = random.Random(index)
+        user_id = f"user{rng.randrange(users)}"
+        barrier.wait()
+        try:
+            for _ in range(pages):
+                t0 = time.perf_counter_ns()
+                page_load(backend, user_id, rng, write_ratio)
+                latencies[index].append((time.perf_counter_ns() - t0) / 1e6)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return elapsed, sorted(ms for per_session in latencies for ms in per_session), errors
+
+
+def report(name, backend, args, rng):
+    load_s = seed(backend, args.users, args.trades, args.bets, rng)
+    elapsed, latencies, errors = run_sessions(backend, args.sessions, args.pages, args.users, args.write_ratio)
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    print(f"{name}: seeded in {load_s:.1f} s; {args.sessions} sessions x {args.pages} pages in {elapsed:.2f} s "
+          f"({len(latencies) / elapsed:,.0f} pages/s)")
+    print(f"  page p50 {pct(50):7.2f} ms   p95 {pct(95):7.2f} ms   p99 {pct(99):7.2f} ms   max {latencies[-1]:7.2f} ms")
+    if hasattr(backend, "pool"):
+        stats = backend.pool.stats()
+        print(f"  pool: {stats['open']} connections, {stats['waits']:,} waits, {stats['wait_ms']:,.0f} ms waited in total")
+    if errors:
+        print(f"  {len(errors)} sessions failed, e.g. {errors[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage backends under concurrent sessions.")
+    parser.add_argument("--backend", choices=("sqlite", "memory", "both"), default="both")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=20, help="page loads per session")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--trades", type=int, default=200_000)
+    parser.add_argument("--bets", type=int, default=1_000)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        if args.backend in ("sqlite", "both"):
+            backend = SQLiteBackend(os.path.join(directory, "airbets.db"), pool_size=args.pool_size)
+            report(f"sqlite (pool of {args.pool_size})", backend, args, random.Random(args.seed))
+            backend.close()
+        if args.backend in ("memory", "both"):
+            log = TradeLog(os.path.join(directory, "trades.log"))
+            report("memory + trade log", MemoryBackend(log), args, random.Random(args.seed))
+            log.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#############################################################################
+# benchmarks/bench_templates.py — per-render cost of component templating
+#
+# Compares the old create_component path (read HTML/CSS/JS from disk, inline,
+# one full-document replace per data key) with the compiled, cached template.
+#
+# Run from the project root:  python -m benchmarks.bench_templates
+#############################################################################
+import argparse
+import os
+import re
+import timeit
+
+from benchmarks.bench_escaping import legacy_safe_string
+from internals import _COMPONENTS_DIR, get_template, load_html_file, render_component
+
+COMPONENT = "individual_bet_summary"
+
+# Inlined CSS/JS differs since the compiled path inlines minified assets
+_INLINED_RE = re.compile(r"<(style|script)>.*?</\1>", re.DOTALL)
+
+
+def legacy_render(data, component_name):
+    """The pre-compilation create_component body, minus components.html."""
+    component_html = load_html_file(os.path.join(_COMPONENTS_DIR, f"{component_name}.html"))
+    try:
+        css = load_html_file(os.path.join(_COMPONENTS_DIR, "static", f"{component_name}_css.css"))
+        component_html = component_html.replace(
+            f'<link rel="stylesheet" href="static/{component_name}_css.css">', f'<style>{css}</style>'
+        )
+    except FileNotFoundError:
+        pass
+    try:
+        js = load_html_file(os.path.join(_COMPONENTS_DIR, "static", f"{component_name}_js.js"))
+        component_html = component_html.replace(
+            f'<script src="static/{component_name}_js.js"></script>', f'<script>{js}</script>'
+        )
+    except FileNotFoundError:
+        pass
+    for key in data:
+        component_html = component_html.replace("{{" + str(key) + "}}", legacy_safe_string(str(data[key])))
+    return component_html
+
+
+def sample_data(rules_len):
+    return {
+        'BET_NAME': "Will Bitcoin hit $100k?",
+        'IMAGE_HTML': '<img src="https://example.com/btc.png" alt="Bet image" />',
+        'YES_VALUE': "0.72",
+        'NO_VALUE': "0.28",
+        'YES_PERCENT': "72",
+        'NO_PERCENT': "28",
+        'RULES': ("Resolves YES if Bitcoin closes above $100,000. " * (rules_len // 48 + 1))[:rules_len],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-render cost of component templating.")
+    parser.add_argument("--number", type=int, default=2000, help="renders per measurement")
+    args = parser.parse_args()
+
+    get_template(COMPONENT)  # warm the cache, as the first rerun would
+    print(f"{'rules bytes':>12} {'legacy us':>10} {'compiled us':>12} {'speedup':>8}")
+    for rules_len in (100, 2_000, 20_000):
+        data = sample_data(rules_len)
+        assert _INLINED_RE.sub("", legacy_render(data, COMPONENT)) == _INLINED_RE.sub(
+            "", render_component(data, COMPONENT)
+        )
+        legacy = min(timeit.repeat(lambda: legacy_render(data, COMPONENT), number=args.number, repeat=3))
+        compiled = min(timeit.repeat(lambda: render_component(data, COMPONENT), number=args.number, repeat=3))
+        legacy_us = legacy / args.number * 1e6
+        compiled_us = compiled / args.number * 1e6
+        print(f"{rules_len:>12} {legacy_us:>10.1f} {compiled_us:>12.1f} {legacy_us / compiled_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#############################################################################
+# benchmarks/bench_timeseries.py — sensor series appends, downsampling, aggregates
+#
+# Compares preparing a chart from get_user_sensor_data-style rows (sort and
+# group the list of dicts in Python, as a rerun would) with WorkoutSeries,
+# then times on one --points-reading series: streaming single appends,
+# batched appends, LTTB and min-max downsampling to --target points,
+# per-minute aggregates and a full pass over iter_chunks.
+#
+# Run from the project root:  python -m benchmarks.bench_timeseries
+#   --points 1000000   a smaller series for a quick run
+#############################################################################
+import argparse
+import random
+import time
+
+import numpy as np
+
+from data.columnar import SENSOR_SCHEMA, ColumnarTable
+from data.timeseries import Series, WorkoutSeries
+
+SENSOR_TYPES = ['accelerometer', 'gyroscope', 'pressure', 'temperature', 'heart_rate']
+START_TS = 1_704_067_200  # 2024-01-01
+
+
+def timed(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3, result
+
+
+def bench_rows(rows, seed):
+    rng = random.Random(seed)
+    records = [
+        {'sensor_type': rng.choice(SENSOR_TYPES), 'timestamp': START_TS + rng.randrange(rows), 'data': rng.random() * 100}
+        for _ in range(rows)
+    ]
+
+    def python_grouping():
+        grouped = {}
+        for record in sorted(records, key=lambda r: r['timestamp']):
+            grouped.setdefault(record['sensor_type'], []).append((record['timestamp'], record['data']))
+        return grouped
+
+    table = ColumnarTable.from_records(records, SENSOR_SCHEMA)
+    python_ms, _ = timed(python_grouping)
+    table_ms, _ = timed(lambda: WorkoutSeries.from_table(table))
+    print(f"{rows:,} sensor rows, sorted and grouped by type")
+    print(f"  list of dicts           {python_ms:10.1f} ms")
+    print(f"  WorkoutSeries.from_table {table_ms:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensor series appends, downsampling and aggregates.")
+    parser.add_argument("--rows", type=int, default=200_000, help="rows for the grouping comparison")
+    parser.add_argument("--points", type=int, default=10_000_000, help="readings in the large series")
+    parser.add_argument("--target", type=int, default=1000, help="downsampled point count")
+    parser.add_argument("--appends", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bench_rows(args.rows, args.seed)
+
+    rng = np.random.default_rng(args.seed)
+    times = START_TS + np.arange(args.points) * 0.1   # 10 Hz
+    values = 120 + np.cumsum(rng.normal(0, 0.5, args.points))
+
+    series = Series()
+    start = time.perf_counter()
+    for t, v in zip(times[:args.appends].tolist(), values[:args.appends].tolist()):
+        series.append(t, v)
+    elapsed = time.perf_counter() - start
+    print(f"series of {args.points:,} readings")
+    print(f"  append            {args.appends / elapsed:>14,.0f} readings/s")
+
+    series = Series()
+    start = time.perf_counter()
+    for offset in range(0, args.points, 10_000):
+        series.extend(times[offset:offset + 10_000], values[offset:offset + 10_000])
+    elapsed = time.perf_counter() - start
+    print(f"  extend, 10k/batch {args.points / elapsed:>14,.0f} readings/s ({series.nbytes / 1e6:,.0f} MB)")
+
+    for method in ('lttb', 'minmax'):
+        ms, (picked, _) = timed(lambda: series.downsample(args.target, method))
+        print(f"  {method:<6} -> {len(picked):,} points {ms:10.1f} ms")
+    window_start = START_TS + args.points * 0.1 / 2
+    ms, (picked, _) = timed(lambda: series.downsample(args.target, 'lttb', window_start, window_start + 600))
+    print(f"  lttb of a 10-minute window  {ms:6.2f} ms")
+    ms, windows = timed(lambda: series.aggregate(60))
+    print(f"  aggregate per minute ({len(windows['start']):,} windows) {ms:8.1f} ms")
+    ms, total = timed(lambda: sum(float(chunk.sum()) for _, chunk in series.iter_chunks()))
+    print(f"  iter_chunks pass  {ms:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
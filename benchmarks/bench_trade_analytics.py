@@ -0,0 +1,66 @@
+#############################################################################
+# benchmarks/bench_trade_analytics.py — incremental analytics on long histories
+#
+# Streams a synthetic trade history (10M trades by default) through
+# TradeAnalytics one trade at a time, then compares reading the metrics
+# (what a Streamlit rerun does) with recomputing them over the history.
+#
+# Run from the project root:  python -m benchmarks.bench_trade_analytics
+#############################################################################
+import argparse
+import random
+import time
+import timeit
+
+from data.trade_analytics import TradeAnalytics
+from modules import compute_trade_metrics
+
+SYMBOLS = ['AAPL', 'GOOG', 'TSLA', 'MSFT']
+START = 1_704_067_200  # 2024-01-01 00:00:00 UTC
+
+
+def trade_stream(n, users, seed=0):
+    # (user_id, symbol, action, quantity, price, epoch) tuples, generated lazily
+    rng = random.Random(seed)
+    for i in range(n):
+        yield (
+            f"user{rng.randrange(users)}",
+            rng.choice(SYMBOLS),
+            'BUY' if rng.random() < 0.5 else 'SELL',
+            rng.randint(1, 100),
+            round(rng.uniform(10.0, 500.0), 2),
+            START + i,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental analytics on long trade histories.")
+    parser.add_argument("--trades", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--recompute", type=int, default=1_000_000, help="history length for the recompute baseline")
+    args = parser.parse_args()
+
+    analytics = TradeAnalytics()
+    record = analytics.record
+    start = time.perf_counter()
+    for user_id, symbol, action, quantity, price, epoch in trade_stream(args.trades, args.users):
+        record(user_id, symbol, action, quantity, price, epoch)
+    elapsed = time.perf_counter() - start
+    print(f"ingested {args.trades:,} trades for {args.users} users in {elapsed:.1f} s "
+          f"({elapsed / args.trades * 1e6:.2f} us/trade incl. generation)")
+
+    read_us = min(timeit.repeat(lambda: analytics.metrics("user0"), number=1_000, repeat=3)) / 1_000 * 1e6
+    print(f"metrics read for one user ({args.trades // args.users:,} trades): {read_us:.1f} us")
+
+    history = [
+        {'symbol': s, 'action': a, 'quantity': q, 'price': p, 'timestamp': t}
+        for _, s, a, q, p, t in trade_stream(args.recompute, 1, seed=1)
+    ]
+    start = time.perf_counter()
+    compute_trade_metrics(history)
+    recompute_ms = (time.perf_counter() - start) * 1e3
+    print(f"recompute over {args.recompute:,} trades per rerun: {recompute_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
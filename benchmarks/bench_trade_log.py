@@ -0,0 +1,164 @@
+#############################################################################
+# benchmarks/bench_trade_log.py — trade log append throughput, scan latency
+#
+# Appends: single synced appends from 1 and --threads threads (group commit
+# shares fsyncs between threads) and batched append_many.
+#
+# Scans: fills a log with --records trades spread over --users users (50M by
+# default: a ~2 GB file, several minutes to build), checkpoints it, then
+# times opening it and per-user scans with the file evicted from the page
+# cache (cold, via posix_fadvise) and again once it is cached (warm), before
+# and after compact().
+#
+# Run from the project root:  python -m benchmarks.bench_trade_log
+#   --records 5000000   a smaller log for a quick run
+#   --dir /mnt/disk     where to put the log (default: a temporary directory)
+#############################################################################
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from data.trade_log import TradeLog
+
+SYMBOLS = ['AAPL', 'GOOG', 'TSLA', 'MSFT', 'NVDA', 'AMZN', 'META', 'NFLX']
+START_TS = 1_704_067_200  # 2024-01-01
+
+
+def generate_trades(count, users, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield (
+            f"user{rng.randrange(users)}",
+            rng.choice(SYMBOLS),
+            'BUY' if rng.random() < 0.5 else 'SELL',
+            rng.randint(1, 100),
+            round(rng.uniform(10.0, 500.0), 2),
+            START_TS + i,
+        )
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def bench_appends(directory, count, threads):
+    print(f"appends ({count} trades, fsync per commit)")
+
+    def run(n_threads):
+        path = os.path.join(directory, f"appends-{n_threads}.log")
+        log = TradeLog(path)
+        per_thread = count // n_threads
+
+        def worker(index):
+            for trade in generate_trades(per_thread, 1000, seed=index):
+                log.append(*trade)
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+        start = time.perf_counter()
+        for worker_thread in workers:
+            worker_thread.start()
+        for worker_thread in workers:
+            worker_thread.join()
+        elapsed = time.perf_counter() - start
+        log.close()
+        print(f"  sync append, {n_threads:>2} thread(s)   {per_thread * n_threads / elapsed:>12,.0f} trades/s")
+
+    run(1)
+    run(threads)
+
+    log = TradeLog(os.path.join(directory, "batched.log"))
+    trades = list(generate_trades(count, 1000))
+    start = time.perf_counter()
+    for i in range(0, count, 1000):
+        log.append_many(trades[i:i + 1000])
+    elapsed = time.perf_counter() - start
+    log.close()
+    print(f"  append_many, 1000 per batch  {count / elapsed:>12,.0f} trades/s")
+
+
+def fill(path, records, users):
+    log = TradeLog(path, durable=False)
+    batch = []
+    start = time.perf_counter()
+    for trade in generate_trades(records, users):
+        batch.append(trade)
+        if len(batch) == 100_000:
+            log.append_many(batch)
+            batch = []
+    log.append_many(batch)
+    log.close()
+    elapsed = time.perf_counter() - start
+    print(f"filled {records:,} trades in {elapsed:.1f} s ({records / elapsed:,.0f} trades/s, "
+          f"{os.path.getsize(path) / 1e6:,.0f} MB)")
+
+
+def evict(path):
+    for name in (path, path + ".idx"):
+        fd = os.open(name, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def bench_scans(path, users, samples, label):
+    rng = random.Random(1)
+    user_ids = [f"user{rng.randrange(users)}" for _ in range(samples)]
+
+    evict(path)
+    start = time.perf_counter()
+    log = TradeLog(path)
+    open_ms = (time.perf_counter() - start) * 1e3
+
+    def scan_all():
+        latencies = []
+        rows = 0
+        for user_id in user_ids:
+            t0 = time.perf_counter_ns()
+            trades = log.scan(user_id, start=START_TS, end=START_TS + 10**9)
+            # Touch every row so lazily mapped pages are actually read
+            rows += int(trades['quantity'].sum() > 0) * len(trades)
+            latencies.append((time.perf_counter_ns() - t0) / 1e6)
+        return latencies, rows
+
+    cold, rows = scan_all()
+    warm, _ = scan_all()
+    print(f"{label}: open {open_ms:,.1f} ms, {rows / samples:,.0f} trades per user")
+    for name, latencies in (("cold", cold), ("warm", warm)):
+        print(f"  {name} scan   p50 {percentile(latencies, 50):8.3f} ms   "
+              f"p99 {percentile(latencies, 99):8.3f} ms   max {max(latencies):8.3f} ms")
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade log append throughput and scan latency.")
+    parser.add_argument("--records", type=int, default=50_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--appends", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=200, help="users scanned per measurement")
+    parser.add_argument("--dir", help="directory for the logs (default: a temporary directory)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(dir=args.dir)
+    try:
+        bench_appends(directory, args.appends, args.threads)
+        path = os.path.join(directory, "scan.log")
+        fill(path, args.records, args.users)
+        log = bench_scans(path, args.users, args.samples, "append order")
+        start = time.perf_counter()
+        log.compact()
+        log.close()
+        print(f"compact: {time.perf_counter() - start:.1f} s")
+        bench_scans(path, args.users, args.samples, "compacted").close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+// Mode and choice for every card in the document, keyed by the card's bet_id
+const cardState = {};
+
+function cardFor(element) {
+    return element.closest('.bet-card');
+}
+
+function stateFor(card) {
+    const betId = card.dataset.betId;
+    if (!cardState[betId]) {
+        cardState[betId] = { mode: 'Buy', choice: 'Yes' };
+    }
+    return cardState[betId];
+}
+
+function setMode(button, newMode) {
+    const card = cardFor(button);
+    stateFor(card).mode = newMode;
+    card.querySelector('.buy-btn').classList.toggle('active',  newMode === 'Buy');
+    card.querySelector('.sell-btn').classList.toggle('active', newMode === 'Sell');
+    card.querySelector('.txn-btn').style.background = newMode === 'Buy' ? '#27ae60' : '#e74c3c';
+}
+
+function setChoice(button, newChoice) {
+    const card = cardFor(button);
+    stateFor(card).choice = newChoice;
+    card.querySelector('.yes-btn').classList.toggle('active', newChoice === 'Yes');
+    card.querySelector('.no-btn').classList.toggle('active',  newChoice === 'No');
+}
+
+function validateAmount(element) {
+    const card  = cardFor(element);
+    const input = card.querySelector('.amount-input');
+    const err   = card.querySelector('.error-msg');
+    const val   = parseFloat(input.value);
+    const valid = !isNaN(val) && val > 0;
+    err.style.display = (!input.value || valid) ? 'none' : 'block';
+    return valid;
+}
+
+function submitTransaction(button) {
+    const card = cardFor(button);
+    if (!validateAmount(card)) {
+        card.querySelector('.error-msg').style.display = 'block';
+        return;
+    }
+    const state  = stateFor(card);
+    const amount = parseFloat(card.querySelector('.amount-input').value).toFixed(2);
+    const name   = card.querySelector('.bet-title').textContent;
+    showToast(`✅ Transaction Successful! ${state.mode} ${state.choice} — $${amount} on ${name}`);
+}
+
+function showToast(msg) {
+    const toast = document.getElementById('toast');
+    toast.textContent = msg;
+    toast.style.display = 'block';
+    // Reset animation
+    toast.style.animation = 'none';
+    toast.offsetHeight; // reflow
+    toast.style.animation = 'fadeInOut 3s ease forwards';
+    setTimeout(() => { toast.style.display = 'none'; }, 3000);
+}
+
+// Set initial transaction button colors
+document.querySelectorAll('.txn-btn').forEach((btn) => { btn.style.background = '#27ae60'; });
@@ -0,0 +1,177 @@
+// Live individual bet summary (st.components.v2 module).
+// Python sends the bet's fields as `data`; only fields that changed are
+// written to the DOM, so a price move is a small data update rather than a
+// new document. Orders go back to Python as the "orders" trigger, batched:
+// a batch is sent once the user pauses for FLUSH_DELAY_MS, after
+// MAX_BATCH_DELAY_MS at the latest, or as soon as it holds MAX_BATCH_SIZE.
+// The ticket (mode, choice, amount) is published as the debounced "ticket" state.
+
+const FLUSH_DELAY_MS = 300;
+const MAX_BATCH_DELAY_MS = 1000;
+const MAX_BATCH_SIZE = 20;
+const TICKET_DELAY_MS = 500;
+const PRICE_FIELDS = ['yes_value', 'no_value', 'yes_percent', 'no_percent'];
+
+function formatField(name, value) {
+    if (name === 'yes_value' || name === 'no_value') return Number(value).toFixed(2);
+    if (name === 'yes_percent' || name === 'no_percent') return Number(value).toFixed(0);
+    return value == null ? '' : String(value);
+}
+
+function createCard(root, card) {
+    const state = {
+        mode: 'BUY',
+        outcome: 'YES',
+        bet: {},
+        pending: [],
+        firstQueuedAt: 0,
+        flushTimer: null,
+        ticketTimer: null,
+        batchSeq: 0,
+        statusId: null,
+        send: null,
+    };
+    const amountInput = card.querySelector('.amount-input');
+    const error = card.querySelector('.error-msg');
+    const txnBtn = card.querySelector('.txn-btn');
+    const pendingNote = card.querySelector('.pending-note');
+    const toast = root.querySelector('.toast');
+
+    function showToast(message, ok) {
+        toast.textContent = message;
+        toast.style.background = ok ? '#27ae60' : '#e74c3c';
+        toast.style.display = 'block';
+        toast.style.animation = 'none';
+        toast.offsetHeight; // reflow
+        toast.style.animation = 'fadeInOut 3s ease forwards';
+        setTimeout(() => { toast.style.display = 'none'; }, 3000);
+    }
+
+    function validAmount() {
+        const value = parseFloat(amountInput.value);
+        const valid = !isNaN(value) && value > 0;
+        error.style.display = (!amountInput.value || valid) ? 'none' : 'block';
+        return valid;
+    }
+
+    function publishTicket() {
+        clearTimeout(state.ticketTimer);
+        state.ticketTimer = setTimeout(() => {
+            const amount = parseFloat(amountInput.value);
+            state.send.setStateValue('ticket', {
+                side: state.mode,
+                outcome: state.outcome,
+                amount: isNaN(amount) ? null : amount,
+            });
+        }, TICKET_DELAY_MS);
+    }
+
+    function flush() {
+        clearTimeout(state.flushTimer);
+        state.flushTimer = null;
+        if (!state.pending.length) return;
+        state.batchSeq += 1;
+        const batch = {
+            batch_id: `${state.bet.bet_id}:${Date.now()}:${state.batchSeq}`,
+            orders: state.pending,
+        };
+        state.pending = [];
+        pendingNote.textContent = 'Sending…';
+        state.send.setTriggerValue('orders', batch);
+    }
+
+    function queueOrder() {
+        if (!validAmount()) {
+            error.style.display = 'block';
+            return;
+        }
+        const price = state.outcome === 'YES' ? state.bet.yes_percent : state.bet.no_percent;
+        if (!state.pending.length) state.firstQueuedAt = Date.now();
+        state.pending.push({
+            side: state.mode,
+            outcome: state.outcome,
+            amount: parseFloat(amountInput.value),
+            price: Math.round(price),
+            ts: Date.now() / 1000,
+        });
+        pendingNote.textContent = `${state.pending.length} order(s) queued`;
+        clearTimeout(state.flushTimer);
+        const waited = Date.now() - state.firstQueuedAt;
+        if (state.pending.length >= MAX_BATCH_SIZE || waited >= MAX_BATCH_DELAY_MS) {
+            flush();
+        } else {
+            state.flushTimer = setTimeout(flush, Math.min(FLUSH_DELAY_MS, MAX_BATCH_DELAY_MS - waited));
+        }
+    }
+
+    function setMode(mode) {
+        state.mode = mode;
+        card.querySelectorAll('[data-mode]').forEach((btn) => btn.classList.toggle('active', btn.dataset.mode === mode));
+        txnBtn.style.background = mode === 'BUY' ? '#27ae60' : '#e74c3c';
+        publishTicket();
+    }
+
+    function setOutcome(outcome) {
+        state.outcome = outcome;
+        card.querySelectorAll('[data-outcome]').forEach((btn) => btn.classList.toggle('active', btn.dataset.outcome === outcome));
+        publishTicket();
+    }
+
+    card.querySelectorAll('[data-mode]').forEach((btn) => { btn.onclick = () => setMode(btn.dataset.mode); });
+    card.querySelectorAll('[data-outcome]').forEach((btn) => { btn.onclick = () => setOutcome(btn.dataset.outcome); });
+    amountInput.oninput = () => { validAmount(); publishTicket(); };
+    txnBtn.onclick = queueOrder;
+    txnBtn.style.background = '#27ae60';
+
+    function setImage(link) {
+        const box = card.querySelector('[data-field="image"]');
+        box.textContent = '';
+        if (link) {
+            const img = document.createElement('img');
+            img.src = link;
+            img.alt = 'Bet image';
+            box.appendChild(img);
+        } else {
+            box.textContent = 'No Image Available';
+        }
+    }
+
+    function update(data) {
+        const bet = data.bet || {};
+        for (const [name, value] of Object.entries(bet)) {
+            if (state.bet[name] === value) continue;
+            if (name === 'bet_image_link') {
+                setImage(value);
+                continue;
+            }
+            card.querySelectorAll(`[data-field="${name}"]`).forEach((el) => {
+                el.textContent = formatField(name, value);
+                if (PRICE_FIELDS.includes(name) && state.bet[name] !== undefined) {
+                    el.classList.remove('flash-up', 'flash-down');
+                    el.classList.add(value > state.bet[name] ? 'flash-up' : 'flash-down');
+                    setTimeout(() => el.classList.remove('flash-up', 'flash-down'), 800);
+                }
+            });
+        }
+        state.bet = Object.assign({}, state.bet, bet);
+
+        const status = data.status;
+        if (status && status.id !== state.statusId) {
+            showToast(status.message, status.ok);
+            state.statusId = status.id;
+            pendingNote.textContent = state.pending.length ? `${state.pending.length} order(s) queued` : '';
+        }
+    }
+
+    return { state, update };
+}
+
+export default function (component) {
+    const { data, parentElement, setStateValue, setTriggerValue } = component;
+    const card = parentElement.querySelector('.bet-card');
+    if (!card.__live) {
+        card.__live = createCard(parentElement, card);
+    }
+    card.__live.state.send = { setStateValue, setTriggerValue };
+    if (data) card.__live.update(data);
+}
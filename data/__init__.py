@@ -1,4 +1,34 @@
 # Data layer: hardcoded / static data (bets, etc.). Replace with API later.
-from data.bets import get_available_bets, get_bet_categories
+from data.bets import (
+    count_bets,
+    get_available_bets,
+    get_bet,
+    get_bet_categories,
+    get_bet_page,
+    get_bet_store,
+    get_bets_in_category,
+    get_matching_engine,
+    get_portfolio,
+    get_price_history,
+    get_price_series,
+    get_search_index,
+    place_order,
+    search_bets,
+)
 
-__all__ = ["get_available_bets", "get_bet_categories"]
+__all__ = [
+    "count_bets",
+    "get_available_bets",
+    "get_bet",
+    "get_bet_categories",
+    "get_bet_page",
+    "get_bet_store",
+    "get_bets_in_category",
+    "get_matching_engine",
+    "get_portfolio",
+    "get_price_history",
+    "get_price_series",
+    "get_search_index",
+    "place_order",
+    "search_bets",
+]
@@ -0,0 +1,306 @@
+"""
+GenAI advice generated in the background, batched and cached by content.
+
+A model call takes seconds, so pages never wait for one. AdviceService
+keeps the latest advice of every user it has seen and refreshes it on a
+worker thread:
+
+- ``touch(user_id)`` marks a user active and queues them unless their
+  advice is recent; ``get(user_id)`` returns their latest advice (None
+  until the first is ready) and never blocks;
+- the worker takes queued users in micro-batches, waiting at most
+  ``max_wait`` seconds after the first for more to arrive. Users whose
+  advice is cached are answered at once; the rest fill a batch of up to
+  ``batch_size`` prompts, sent to the model in one call;
+- a user's prompt is built from a snapshot of their features
+  (``features_of(user_id)``, e.g. rounded trade metrics). Responses are
+  cached by a hash of the snapshot, so users with the same snapshot, and a
+  user whose snapshot has not changed, reuse advice without a model call;
+- active users are re-queued every ``refresh_interval`` seconds until they
+  have not been touched for ``active_window`` seconds, and ``stale`` re-queues
+  a user at once after their data changed, so a page usually finds fresh
+  advice already waiting.
+
+The model is pluggable (AdviceModel); StubModel is a deterministic local
+stand-in for tests and benchmarks.
+
+    service = AdviceService(StubModel(), features_of=lambda user_id: {'trades': 3})
+    service.touch('user1')
+    service.get('user1')        # None until the worker has generated it
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+from data.columnar import TIMESTAMP_FORMAT
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT = 0.02            # seconds a batch waits to fill up
+DEFAULT_CACHE_SIZE = 10_000        # responses kept, least recently used dropped first
+DEFAULT_REFRESH_INTERVAL = 300.0   # seconds between refreshes of an active user
+DEFAULT_ACTIVE_WINDOW = 900.0      # seconds after the last touch a user stays active
+
+STUB_ADVICE = [
+    'Your heart rate indicates you can push yourself further. You got this!',
+    "You're doing great! Keep up the good work.",
+    'You worked hard yesterday, take it easy today.',
+    'You have burned 100 calories so far today!',
+]
+STUB_IMAGES = [
+    'https://plus.unsplash.com/premium_photo-1669048780129-051d670fa2d1?q=80&w=3870&auto=format&fit=crop&ixlib=rb-4.0.3&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D',
+    None,
+]
+
+
+def snapshot_key(features):
+    """Content address of a feature snapshot: equal snapshots, equal keys."""
+    canonical = json.dumps(features, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def build_prompt(features):
+    """The model prompt for a feature snapshot."""
+    facts = "; ".join(f"{name}: {value}" for name, value in sorted(features.items()))
+    return f"Give one short, encouraging piece of advice to a user with these stats. {facts}"
+
+
+class AdviceModel:
+    """What AdviceService needs from a model."""
+
+    def generate(self, prompts):
+        """One ``{'content', 'image'}`` response per prompt, in order."""
+        raise NotImplementedError
+
+
+class StubModel(AdviceModel):
+    """A deterministic local model: a prompt always gets the same canned
+    advice.
+
+    latency:    seconds each call sleeps, like a round trip to a remote model
+    per_prompt: seconds more per prompt in the call
+    """
+
+    def __init__(self, latency=0.0, per_prompt=0.0):
+        self.latency = latency
+        self.per_prompt = per_prompt
+        self.calls = 0
+        self.prompts = 0
+
+    def generate(self, prompts):
+        self.calls += 1
+        self.prompts += len(prompts)
+        if self.latency or self.per_prompt:
+            time.sleep(self.latency + self.per_prompt * len(prompts))
+        responses = []
+        for prompt in prompts:
+            digest = int(hashlib.sha256(prompt.encode()).hexdigest()[:8], 16)
+            responses.append({
+                'content': STUB_ADVICE[digest % len(STUB_ADVICE)],
+                'image': STUB_IMAGES[digest // len(STUB_ADVICE) % len(STUB_IMAGES)],
+            })
+        return responses
+
+
+def open_model(spec):
+    """A model from an AIRBETS_ADVICE_MODEL value: "stub" or "stub:<ms>"
+    (a stub answering after <ms> milliseconds).
+
+    Raises ValueError for anything else.
+    """
+    name, _, milliseconds = spec.partition(":")
+    if name in ("", "stub"):
+        try:
+            return StubModel(latency=float(milliseconds or 0) / 1000)
+        except ValueError:
+            pass
+    raise ValueError(f"Unknown AIRBETS_ADVICE_MODEL: {spec!r}")
+
+
+class AdviceService:
+    """Latest advice per user, generated off the request path.
+
+    model:       an AdviceModel
+    features_of: ``features_of(user_id)`` -> JSON-able dict the prompt is
+                 built from; called on the worker thread
+
+    Thread-safe; the worker thread starts on the first ``touch``.
+    """
+
+    def __init__(self, model, features_of, batch_size=DEFAULT_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT,
+                 cache_size=DEFAULT_CACHE_SIZE, refresh_interval=DEFAULT_REFRESH_INTERVAL,
+                 active_window=DEFAULT_ACTIVE_WINDOW):
+        self.model = model
+        self.features_of = features_of
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self.refresh_interval = refresh_interval
+        self.active_window = active_window
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._queued = set()
+        self._busy = False
+        self._cache = OrderedDict()       # snapshot key -> advice
+        self._latest = {}                 # user -> (advice, monotonic time generated)
+        self._active = {}                 # user -> monotonic time of last touch
+        self._counts = dict.fromkeys(('touches', 'queued', 'batches', 'generated', 'cache_hits', 'errors'), 0)
+        self._worker = None
+        self._closed = False
+
+    # ---- request side ----
+
+    def touch(self, user_id):
+        """Mark a user active and queue them unless their advice is recent."""
+        now = time.monotonic()
+        with self._cond:
+            self._counts['touches'] += 1
+            self._active[user_id] = now
+            latest = self._latest.get(user_id)
+            if latest is None or now - latest[1] >= self.refresh_interval:
+                self._enqueue(user_id)
+
+    def prefetch(self, user_ids):
+        """Queue users for fresh advice whether or not they are active."""
+        with self._cond:
+            for user_id in user_ids:
+                self._enqueue(user_id)
+
+    def stale(self, user_id):
+        """The user's data changed: regenerate their advice if they are active."""
+        with self._cond:
+            if user_id in self._active:
+                self._enqueue(user_id)
+
+    def get(self, user_id):
+        """The user's latest advice dict (advice_id, timestamp, content,
+        image), or None if none has been generated yet. Never blocks."""
+        latest = self._latest.get(user_id)
+        return None if latest is None else latest[0]
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or being generated; returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def stats(self):
+        """Counters: touches, users queued, model batches, prompts generated,
+        cache hits and errors, with the current queue length."""
+        with self._cond:
+            stats = dict(self._counts)
+            stats.update(queue=len(self._queue), active=len(self._active), cached=len(self._cache))
+        return stats
+
+    def close(self):
+        """Stop the worker after its current batch."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join()
+
+    # ---- worker (callers of the _locked helpers hold the condition) ----
+
+    def _enqueue(self, user_id):
+        if user_id in self._queued or self._closed:
+            return
+        self._queued.add(user_id)
+        self._queue.append(user_id)
+        self._counts['queued'] += 1
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="advice", daemon=True)
+            self._worker.start()
+        self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    if not self._cond.wait(max(self.refresh_interval / 4, self.max_wait)):
+                        self._queue_due_locked()
+                if self._closed:
+                    return
+                # Micro-batch: give more users a moment to arrive
+                deadline = time.monotonic() + self.max_wait
+                while len(self._queue) < self.batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        break
+                self._busy = True
+            try:
+                self._generate(*self._take_batch())
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _queue_due_locked(self):
+        now = time.monotonic()
+        for user_id, touched in list(self._active.items()):
+            if now - touched > self.active_window:
+                del self._active[user_id]
+                continue
+            latest = self._latest.get(user_id)
+            if latest is None or now - latest[1] >= self.refresh_interval:
+                self._enqueue(user_id)
+
+    def _take_batch(self):
+        # Queued users until batch_size prompts are missing from the cache;
+        # users whose snapshot is cached get its advice right away
+        prompts = {}            # snapshot key -> prompt
+        waiting = []            # (user, snapshot key) answered by this batch
+        errors = 0
+        while len(prompts) < self.batch_size:
+            with self._cond:
+                if not self._queue or self._closed:
+                    break
+                user_id = self._queue.popleft()
+                self._queued.discard(user_id)
+            try:
+                features = self.features_of(user_id)
+            except Exception:
+                errors += 1
+                continue
+            key = snapshot_key(features)
+            with self._cond:
+                advice = self._cache.get(key)
+                if advice is not None:
+                    self._cache.move_to_end(key)
+                    self._counts['cache_hits'] += 1
+                    self._latest[user_id] = (advice, time.monotonic())
+                    continue
+            if key not in prompts:
+                prompts[key] = build_prompt(features)
+            waiting.append((user_id, key))
+        return prompts, waiting, errors
+
+    def _generate(self, prompts, waiting, errors):
+        responses = []
+        if prompts:
+            try:
+                responses = self.model.generate(list(prompts.values()))
+            except Exception:
+                errors += 1
+        timestamp = time.strftime(TIMESTAMP_FORMAT, time.gmtime())
+        now = time.monotonic()
+        with self._cond:
+            self._counts['errors'] += errors
+            if responses:
+                self._counts['batches'] += 1
+                self._counts['generated'] += len(responses)
+            for key, response in zip(prompts, responses):
+                self._cache[key] = {
+                    'advice_id': f"advice-{key[:12]}",
+                    'timestamp': timestamp,
+                    'content': response['content'],
+                    'image': response.get('image'),
+                }
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            for user_id, key in waiting:
+                advice = self._cache.get(key)
+                if advice is not None:
+                    self._latest[user_id] = (advice, now)
@@ -0,0 +1,125 @@
+"""
+Blocking calls run from asyncio, with identical calls in flight shared.
+
+InflightCalls runs blocking functions (storage reads, service calls) on a
+thread pool and lets coroutines await them with a timeout:
+
+- calls submitted under the same key while one is still running share that
+  one run and its result (or exception), so a burst of sessions asking for
+  the same user's trades costs one read;
+- a timeout only stops the wait: the call keeps running for anyone else
+  sharing it, and its result is dropped by the caller that gave up;
+- futures are plain concurrent.futures ones, so calls are shared across
+  event loops and threads, e.g. between Streamlit sessions that each run
+  their own loop.
+
+    calls = InflightCalls(max_workers=16)
+    trades = await calls.run(("trades", user_id), get_user_trades, user_id, timeout=2.0)
+
+A call given no key (None) is never shared; use that for writes.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 16
+
+
+class InflightCalls:
+    """A thread pool that shares identical in-flight calls.
+
+    max_workers: threads running calls at once; more calls queue
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._calls = self._coalesced = self._timeouts = 0
+
+    def submit(self, key, func, *args, **kwargs):
+        """Start ``func(*args, **kwargs)``, or join the running call with the
+        same ``key``; returns a concurrent.futures.Future."""
+        with self._lock:
+            self._calls += 1
+            if key is not None:
+                future = self._inflight.get(key)
+                if future is not None:
+                    self._coalesced += 1
+                    return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="fetch")
+            future = self._executor.submit(func, *args, **kwargs)
+            if key is not None:
+                self._inflight[key] = future
+        if key is not None:
+            future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def run(self, key, func, *args, timeout=None, **kwargs):
+        """Await ``func(*args, **kwargs)`` as ``submit`` runs it.
+
+        Raises asyncio.TimeoutError after ``timeout`` seconds (None: wait
+        for as long as it takes), or whatever the call raised.
+        """
+        future = self.submit(key, func, *args, **kwargs)
+        waiter = _waiter(future)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise
+
+    def in_flight(self):
+        """Number of shared calls still running."""
+        with self._lock:
+            return len(self._inflight)
+
+    def stats(self):
+        """Counters: calls submitted, calls that joined a running one, and
+        waits that timed out."""
+        with self._lock:
+            return {'calls': self._calls, 'coalesced': self._coalesced, 'timeouts': self._timeouts}
+
+    def close(self):
+        """Stop the pool once the calls already started have finished."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _waiter(future):
+    """An asyncio future on the running loop that follows ``future``.
+
+    Unlike asyncio.wrap_future, cancelling it (as wait_for does on a
+    timeout) leaves the shared call alone.
+    """
+    loop = asyncio.get_running_loop()
+    waiter = loop.create_future()
+
+    def resolve(done):
+        if waiter.done():
+            return
+        if done.cancelled():
+            waiter.cancel()
+        elif done.exception() is not None:
+            waiter.set_exception(done.exception())
+        else:
+            waiter.set_result(done.result())
+
+    def done_callback(done):
+        try:
+            loop.call_soon_threadsafe(resolve, done)
+        except RuntimeError:
+            pass                # the loop has closed since; nobody is waiting
+    future.add_done_callback(done_callback)
+    return waiter
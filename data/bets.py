@@ -1,8 +1,43 @@
 """
 Hardcoded bet data for the available-bets dashboard.
 Replace with Kalshi/Polymarket API later.
+
+The catalog lives in the storage backend (see data/storage.py), which is
+seeded with AVAILABLE_BETS when it has no bets. It is loaded once into a
+process-wide BetStore (see data/store.py); the functions below read from
+it instead of copying the list each time.
+Set AIRBETS_FEED=host:port to stream live price deltas into the store
+(e.g. from ``python -m data.simulator``; see data/ingest.py).
+
+Orders placed with place_order are matched in a process-wide
+MatchingEngine (see data/orderbook.py), which moves the bet's prices in
+the store after every trade; place_order saves the new prices to the
+backend.
+
+search_bets ranks bets by a text query with facet counts, from a
+process-wide SearchIndex (see data/search.py) built over the store on
+first use and kept in step with it.
+
+Every price change in the store is recorded in a process-wide PriceHistory
+(see data/price_history.py) from import on; get_price_series returns a
+bet's recent prices downsampled for a chart.
+
+A process-wide Portfolio (see data/portfolio.py) holds every user's
+positions from the engine's fills, marked to the store's prices.
 """
 
+import multiprocessing
+import os
+import threading
+
+from data.ingest import start_ingest_thread
+from data.orderbook import MatchingEngine
+from data.portfolio import Portfolio
+from data.price_history import PriceHistory
+from data.search import SearchIndex
+from data.storage import get_backend
+from data.store import BetStore
+
 BET_CATEGORIES = ["Crypto", "Politics", "Sports", "Other"]
 
 AVAILABLE_BETS = [
@@ -97,9 +132,120 @@ AVAILABLE_BETS = [
 ]
 
 
+_backend = get_backend()
+if not _backend.count_bets():
+    _backend.load_bets(AVAILABLE_BETS)
+
+_store = BetStore.from_dicts(_backend.get_bets())
+_engine = MatchingEngine(_store)
+# Attached before the feed starts so no price change is missed
+_price_history = PriceHistory()
+_price_history.attach(_store)
+_portfolio = Portfolio()
+_portfolio.attach(_store, _engine)
+
+_search_index = None
+_search_lock = threading.Lock()
+
+# Not in worker processes (e.g. the precompute pool), which import this too
+if os.environ.get("AIRBETS_FEED") and multiprocessing.parent_process() is None:
+    start_ingest_thread(_store, os.environ["AIRBETS_FEED"])
+
+
+def get_bet_store():
+    """Return the process-wide BetStore holding every available bet."""
+    return _store
+
+
+def get_matching_engine():
+    """Return the process-wide MatchingEngine trading the bets in the store."""
+    return _engine
+
+
+def get_search_index():
+    """Return the process-wide SearchIndex over the store, built on first use."""
+    global _search_index
+    if _search_index is None:
+        with _search_lock:
+            if _search_index is None:
+                index = SearchIndex()
+                index.attach(_store)
+                _search_index = index
+    return _search_index
+
+
+def search_bets(query="", category="All", probability=None, limit=20, after=None):
+    """Return SearchResults for a text query: one page of ``bets`` (best match
+    first), the ``total`` match count, ``facets`` (counts per category and per
+    probability bucket) and ``next_cursor`` to pass as ``after``.
+
+    probability restricts to probability buckets (see data/store.py): an int
+    or an iterable of them. The last word of the query also matches as a
+    prefix, so partial words find bets while typing.
+    """
+    return get_search_index().search(query, category=category, probability=probability, limit=limit, after=after)
+
+
+def get_portfolio():
+    """Return the process-wide Portfolio of users' positions, marked to the store's prices."""
+    return _portfolio
+
+
+def get_price_history():
+    """Return the process-wide PriceHistory recording every bet's price changes."""
+    return _price_history
+
+
+def get_price_series(bet_id, points=120, start=None, end=None):
+    """Return ``(times, yes_values)`` of a bet's price history, at most
+    ``points`` long (size it to the chart width), for [start, end) in epoch
+    seconds (the whole retained history by default). Empty arrays for an
+    unknown bet.
+    """
+    return _price_history.series(bet_id, points, start, end)
+
+
+def place_order(bet_id, user_id, side, outcome, price, quantity):
+    """Place a limit order on a bet; returns ``(order, fills)``.
+
+    side is "BUY"/"SELL", outcome "YES"/"NO", price the limit in cents
+    (1-99) and quantity a number of contracts. See MatchingEngine.submit.
+    """
+    order, fills = _engine.submit(bet_id, user_id, side, outcome, price, quantity)
+    if fills:
+        _backend.save_bet_prices([_store.get_bet(bet_id)])
+    return order, fills
+
+
 def get_available_bets():
-    """Return list of available bet dicts (for dashboard). Each has bet_id, bet_name, bet_image_link, yes_value, no_value, yes_percent, no_percent, rules, category."""
-    return list(AVAILABLE_BETS)
+    """Return list of available bets (for dashboard). Each has bet_id, bet_name, bet_image_link, yes_value, no_value, yes_percent, no_percent, rules, category."""
+    return list(_store.all_bets())
+
+
+def get_bet(bet_id):
+    """Return the bet with the given id, or None if there is no such bet."""
+    return _store.get_bet(bet_id)
+
+
+def get_bets_in_category(category):
+    """Return the bets in a category ("All" for every bet) without copying."""
+    if category == "All":
+        return _store.all_bets()
+    return _store.bets_in_category(category)
+
+
+def get_bet_page(category="All", after=None, limit=20):
+    """Return ``(bets, next_cursor)`` for one page of a category ("All" for every bet).
+
+    Pass the returned cursor as ``after`` to get the following page; it is
+    None on the last page.
+    """
+    return _store.page(None if category == "All" else category, after, limit)
+
+
+def count_bets(category="All"):
+    """Return how many bets are in a category ("All" for every bet)."""
+    return _store.count(None if category == "All" else category)
 
 
 def get_bet_categories():
@@ -0,0 +1,195 @@
+"""
+Per-user result cache with TTL and LRU eviction.
+
+Results are keyed by (namespace, user_id, data version, call arguments).
+Each user has a data version that ``invalidate_user`` bumps — e.g. when new
+trades land — which makes every cached result for that user unreachable
+and drops it. Entries also expire after a TTL and the least recently used
+ones are evicted once the cache is full. Hit/miss counters per namespace
+are available from ``stats()`` for monitoring.
+
+Cached values are shared between Streamlit sessions: treat them as
+read-only.
+
+    @user_cache.cached("trades")
+    def get_user_trades(user_id):
+        ...
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL = 30.0  # seconds
+
+_MISSING = object()
+
+
+class _Counters:
+    __slots__ = ("hits", "misses", "expired", "evicted", "invalidated")
+
+    def __init__(self):
+        self.hits = self.misses = self.expired = self.evicted = self.invalidated = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'invalidated': self.invalidated,
+        }
+
+
+class ResultCache:
+    """A thread-safe TTL + LRU cache partitioned by user and data version.
+
+    maxsize: most entries kept across all users and namespaces
+    ttl:     default seconds an entry stays fresh (None: no expiry)
+    clock:   monotonic time source, replaceable in tests
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._user_keys = {}           # user_id -> set of keys, for invalidation
+        self._versions = {}            # user_id -> data version
+        self._counters = {}            # namespace -> _Counters
+
+    def version(self, user_id):
+        """The user's current data version."""
+        return self._versions.get(user_id, 0)
+
+    def _key(self, namespace, user_id, args):
+        return (namespace, user_id, self._versions.get(user_id, 0), args)
+
+    def _counter(self, namespace):
+        counter = self._counters.get(namespace)
+        if counter is None:
+            counter = self._counters[namespace] = _Counters()
+        return counter
+
+    def get(self, namespace, user_id, args=(), default=None):
+        """Return a fresh cached value, or ``default`` (counted as a miss)."""
+        with self._lock:
+            key = self._key(namespace, user_id, args)
+            counter = self._counter(namespace)
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    counter.hits += 1
+                    return value
+                self._discard(key)
+                counter.expired += 1
+            counter.misses += 1
+            return default
+
+    def set(self, namespace, user_id, value, args=(), ttl=_MISSING):
+        """Store ``value`` for the user's current data version."""
+        with self._lock:
+            self._store(namespace, user_id, value, args, ttl)
+
+    def _store(self, namespace, user_id, value, args, ttl):
+        # Caller holds the lock
+        ttl = self.ttl if ttl is _MISSING else ttl
+        key = self._key(namespace, user_id, args)
+        expires_at = None if ttl is None else self._clock() + ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        self._user_keys.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self._counter(oldest[0]).evicted += 1
+
+    def set_if_current(self, namespace, user_id, version, value, args=(), ttl=_MISSING):
+        """Store ``value`` only if the user's data version is still ``version``.
+
+        For results computed elsewhere from data read at that version; returns
+        False (storing nothing) if the user was invalidated in the meantime.
+        """
+        with self._lock:
+            if self._versions.get(user_id, 0) != version:
+                return False
+            self._store(namespace, user_id, value, args, ttl)
+            return True
+
+    def get_or_compute(self, namespace, user_id, compute, args=(), ttl=_MISSING):
+        """Return the cached value or call ``compute()`` and cache its result.
+
+        Exceptions from ``compute`` propagate and nothing is cached. Neither
+        is a result whose user was invalidated while it was computed, since
+        it may come from data read before the change.
+        """
+        version = self.version(user_id)
+        value = self.get(namespace, user_id, args, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set_if_current(namespace, user_id, version, value, args, ttl)
+        return value
+
+    def cached(self, namespace, ttl=_MISSING):
+        """Decorator caching a function whose first argument is the user id.
+
+        The remaining arguments become part of the key, so they must be
+        hashable. The undecorated function stays available as ``__wrapped__``.
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(user_id, *args, **kwargs):
+                # Bind with defaults so f(u), f(u, False) and f(u, flag=False) share an entry
+                bound = signature.bind(user_id, *args, **kwargs)
+                bound.apply_defaults()
+                key_args = tuple(bound.arguments.values())[1:]
+                return self.get_or_compute(namespace, user_id, lambda: func(user_id, *args, **kwargs), key_args, ttl)
+            return wrapper
+        return decorator
+
+    def invalidate_user(self, user_id):
+        """Bump the user's data version and drop every entry cached for them."""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            for key in self._user_keys.pop(user_id, ()):
+                if key in self._entries:
+                    del self._entries[key]
+                    self._counter(key[0]).invalidated += 1
+
+    def clear(self):
+        """Drop every entry (versions and counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def stats(self):
+        """Counters per namespace plus the current entry count."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'namespaces': {name: counter.as_dict() for name, counter in self._counters.items()},
+            }
+
+    def _discard(self, key):
+        # Caller holds the lock
+        del self._entries[key]
+        keys = self._user_keys.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[key[1]]
+
+
+# Process-wide cache shared by data_fetcher and every Streamlit session
+user_cache = ResultCache()
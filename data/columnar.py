@@ -0,0 +1,230 @@
+"""
+Columnar (NumPy-backed) tables for trade and sensor data.
+
+Instead of one dict per row, a ColumnarTable keeps one typed array per
+field: numbers as int64/float64, timestamps as int64 epoch seconds and
+low-cardinality strings (symbol, action, sensor_type) as small integer codes
+plus a list of categories. That cuts memory several-fold and lets
+aggregations run as vectorized NumPy calls.
+
+    table = ColumnarTable.from_records(get_user_trades('user1'), TRADE_SCHEMA)
+    table.to_dataframe()      # for st.table / st.dataframe, no column copies
+    table.to_records()        # back to the list-of-dicts shape
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from data.trade_analytics import DEFAULT_BUCKET_SECONDS, to_epoch
+
+# Column kinds used in schemas
+CATEGORY = "category"   # small-int codes + categories list
+EPOCH = "epoch"         # int64 seconds since 1970-01-01 UTC
+OBJECT = "object"       # arbitrary Python objects (e.g. ids)
+
+TRADE_SCHEMA = {
+    'trade_id': OBJECT,
+    'symbol': CATEGORY,
+    'action': CATEGORY,
+    'quantity': np.int64,
+    'price': np.float64,
+    'timestamp': EPOCH,
+}
+
+SENSOR_SCHEMA = {
+    'sensor_type': CATEGORY,
+    'timestamp': EPOCH,
+    'data': np.float64,
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _code_dtype(n_categories):
+    # Smallest signed integer type that can index the categories
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def encode_categories(values):
+    """Return ``(codes, categories)`` for a sequence of hashable values."""
+    lookup = {}
+    codes = [lookup.setdefault(value, len(lookup)) for value in values]
+    return np.array(codes, dtype=_code_dtype(len(lookup))), list(lookup)
+
+
+class ColumnarTable:
+    """A table stored as one NumPy array per column.
+
+    columns:    name -> array (codes for CATEGORY columns)
+    categories: name -> list of labels, for CATEGORY columns only
+    schema:     name -> dtype or CATEGORY / EPOCH / OBJECT
+    """
+
+    __slots__ = ("columns", "categories", "schema")
+
+    def __init__(self, columns, categories, schema):
+        self.columns = columns
+        self.categories = categories
+        self.schema = schema
+
+    @classmethod
+    def from_records(cls, records, schema):
+        """Build a table from a list of dicts with the schema's keys."""
+        columns, categories = {}, {}
+        for name, kind in schema.items():
+            values = [record[name] for record in records]
+            if kind == CATEGORY:
+                columns[name], categories[name] = encode_categories(values)
+            elif kind == EPOCH:
+                columns[name] = np.array([to_epoch(v) for v in values], dtype=np.int64)
+            elif kind == OBJECT:
+                columns[name] = np.array(values, dtype=object)
+            else:
+                columns[name] = np.array(values, dtype=kind)
+        return cls(columns, categories, schema)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        """The raw column array (codes for categorical columns)."""
+        return self.columns[name]
+
+    def labels(self, name):
+        """A categorical column decoded to an array of its labels."""
+        return np.array(self.categories[name], dtype=object)[self.columns[name]]
+
+    def code_for(self, name, label):
+        """The code of ``label`` in a categorical column, or -1 if absent."""
+        try:
+            return self.categories[name].index(label)
+        except ValueError:
+            return -1
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays (plus the objects of OBJECT columns)."""
+        total = 0
+        for name, column in self.columns.items():
+            total += column.nbytes
+            if self.schema[name] == OBJECT:
+                total += sum(value.__sizeof__() for value in column)
+        return total
+
+    def to_dataframe(self):
+        """A pandas DataFrame over the same arrays (no per-column copies).
+
+        Categorical columns become pandas Categoricals sharing the codes and
+        timestamps a datetime64 view of the epoch array.
+        """
+        import pandas as pd
+
+        frame = {}
+        for name, column in self.columns.items():
+            kind = self.schema[name]
+            if kind == CATEGORY:
+                frame[name] = pd.Categorical.from_codes(column, self.categories[name], validate=False)
+            elif kind == EPOCH:
+                frame[name] = column.view('datetime64[s]')
+            else:
+                frame[name] = column
+        return pd.DataFrame(frame, copy=False)
+
+    def to_records(self):
+        """The list-of-dicts form returned by the data_fetcher functions."""
+        decoded = {}
+        for name, column in self.columns.items():
+            kind = self.schema[name]
+            if kind == CATEGORY:
+                decoded[name] = self.labels(name).tolist()
+            elif kind == EPOCH:
+                decoded[name] = [
+                    datetime.fromtimestamp(epoch, timezone.utc).strftime(TIMESTAMP_FORMAT) for epoch in column.tolist()
+                ]
+            else:
+                decoded[name] = column.tolist()
+        names = list(decoded)
+        return [dict(zip(names, row)) for row in zip(*decoded.values())]
+
+
+def _totals(quantity, notional):
+    volume = int(quantity.sum())
+    value = float(notional.sum())
+    return {'trades': len(quantity), 'volume': volume, 'value': value, 'vwap': value / volume if volume else None}
+
+
+def trade_metrics(table, bucket_seconds=DEFAULT_BUCKET_SECONDS):
+    """Vectorized trade metrics for a TRADE_SCHEMA table.
+
+    Returns the same keys as TradeStats.as_dict. Realized P&L depends on the
+    order of fills and cannot be vectorized, so realized_pnl and avg_cost are
+    None here; use data.trade_analytics for those.
+    """
+    quantity = table['quantity']
+    notional = quantity * table['price']
+    buy = table['action'] == table.code_for('action', 'BUY')
+    sell = table['action'] == table.code_for('action', 'SELL')
+    signed = np.where(buy, quantity, 0) - np.where(sell, quantity, 0)
+
+    symbols = table['symbol']
+    n_symbols = len(table.categories['symbol'])
+    sym_trades = np.bincount(symbols, minlength=n_symbols)
+    sym_volume = np.bincount(symbols, weights=quantity, minlength=n_symbols)
+    sym_value = np.bincount(symbols, weights=notional, minlength=n_symbols)
+    sym_buy = np.bincount(symbols, weights=np.where(buy, quantity, 0), minlength=n_symbols)
+    sym_sell = np.bincount(symbols, weights=np.where(sell, quantity, 0), minlength=n_symbols)
+    by_symbol = {}
+    for code, symbol in enumerate(table.categories['symbol']):
+        if not sym_trades[code]:
+            continue
+        volume = int(sym_volume[code])
+        by_symbol[symbol] = {
+            'trades': int(sym_trades[code]),
+            'volume': volume,
+            'value': float(sym_value[code]),
+            'vwap': float(sym_value[code]) / volume if volume else None,
+            'buy_volume': int(sym_buy[code]),
+            'sell_volume': int(sym_sell[code]),
+            'net_position': int(sym_buy[code] - sym_sell[code]),
+            'avg_cost': None,
+            'realized_pnl': None,
+        }
+
+    buckets = table['timestamp'] - table['timestamp'] % bucket_seconds
+    bucket_keys, bucket_index = np.unique(buckets, return_inverse=True)
+    bucket_volume = np.bincount(bucket_index, weights=quantity, minlength=len(bucket_keys))
+
+    totals = _totals(quantity, notional)
+    return {
+        'total_trades': totals['trades'],
+        'total_volume': totals['volume'],
+        'total_value': totals['value'],
+        'vwap': totals['vwap'],
+        'buy_volume': int(quantity[buy].sum()),
+        'sell_volume': int(quantity[sell].sum()),
+        'net_position': int(signed.sum()),
+        'realized_pnl': None,
+        'by_action': {
+            'BUY': _totals(quantity[buy], notional[buy]),
+            'SELL': _totals(quantity[sell], notional[sell]),
+        },
+        'by_symbol': by_symbol,
+        'volume_by_bucket': dict(zip(bucket_keys.tolist(), bucket_volume.astype(np.int64).tolist())),
+    }
+
+
+def sensor_means(table):
+    """Mean reading per sensor_type for a SENSOR_SCHEMA table."""
+    codes = table['sensor_type']
+    n_types = len(table.categories['sensor_type'])
+    counts = np.bincount(codes, minlength=n_types)
+    sums = np.bincount(codes, weights=table['data'], minlength=n_types)
+    return {
+        sensor_type: float(sums[code] / counts[code])
+        for code, sensor_type in enumerate(table.categories['sensor_type'])
+        if counts[code]
+    }
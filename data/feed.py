@@ -0,0 +1,252 @@
+"""
+Home feed: per-user precomputed timelines filled by fan-out on write.
+
+Every post gets an int64 feed key that orders it (timestamp seconds in the
+high bits, a counter in the low 20 bits, so keys are unique). A user's
+timeline is a bounded ring of the keys of the newest posts by them and their
+friends; publishing a post appends its key to the timeline of every friend
+whose timeline is loaded (fan-out on write), so reading a page never has to
+look at each friend's posts.
+
+Authors with ``celebrity_threshold`` or more friends are not fanned out to:
+their posts stay only in their own author ring and are pulled in when a
+friend reads (fan-in on read). A page is a k-way heap merge of the reader's
+timeline and those celebrity rings, newest first, from a cursor.
+
+Timelines are built on first read from the friends' posts (``load_posts``)
+and kept current by publish() and follow() afterwards. A timeline holds the
+newest ``timeline_capacity`` posts, so paging ends there.
+
+    feed = FeedService(friends_of=graph.friends, load_posts=backend.get_user_posts)
+    feed.publish(post)                         # post dict with user_id, post_id, timestamp
+    posts, cursor = feed.read('user1', limit=20)
+    older, cursor = feed.read('user1', limit=20, before=cursor)
+"""
+
+import heapq
+import threading
+
+import numpy as np
+
+from data.trade_analytics import to_epoch
+
+KEY_DTYPE = np.int64
+COUNTER_BITS = 20
+DEFAULT_TIMELINE_CAPACITY = 500
+DEFAULT_AUTHOR_CAPACITY = 1000
+DEFAULT_CELEBRITY_THRESHOLD = 1000
+_NO_KEYS = np.empty(0, dtype=KEY_DTYPE)
+
+
+class _Ring:
+    """Sorted int64 keys, keeping only the newest ``capacity``.
+
+    Keys live in a buffer of up to twice the capacity and slide back to the
+    front when it fills, so the live keys are always one contiguous, sorted
+    slice (``keys()``) and appends are amortized O(1).
+    """
+
+    __slots__ = ('buf', 'start', 'end', 'capacity')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buf = np.empty(8, dtype=KEY_DTYPE)
+        self.start = self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def keys(self):
+        return self.buf[self.start:self.end]
+
+    def append(self, key):
+        """Add a key; returns the keys pushed out to stay within capacity."""
+        if self.end > self.start and key < self.buf[self.end - 1]:
+            return self._insert(key)
+        if self.end == len(self.buf):
+            live = self.keys()
+            if len(self.buf) < 2 * self.capacity:
+                self.buf = np.empty(min(2 * len(self.buf), 2 * self.capacity), dtype=KEY_DTYPE)
+            self.buf[:len(live)] = live
+            self.start, self.end = 0, len(live)
+        self.buf[self.end] = key
+        self.end += 1
+        if self.end - self.start > self.capacity:
+            self.start += 1
+            return self.buf[self.start - 1:self.start]
+        return _NO_KEYS
+
+    def _insert(self, key):
+        # A backdated key: rebuild the slice in order (rare)
+        return self.merge(np.array([key], dtype=KEY_DTYPE))
+
+    def merge(self, keys):
+        """Add a batch of keys in any order; returns the keys pushed out."""
+        merged = np.union1d(self.keys(), keys)
+        dropped = merged[:-self.capacity] if len(merged) > self.capacity else _NO_KEYS
+        merged = merged[len(dropped):]
+        self.buf = np.empty(max(8, 2 * len(merged)), dtype=KEY_DTYPE)
+        self.buf[:len(merged)] = merged
+        self.start, self.end = 0, len(merged)
+        return dropped
+
+    def newest(self, limit, before=None):
+        """Up to ``limit`` keys older than ``before``, newest first."""
+        keys = self.keys()
+        stop = len(keys) if before is None else int(np.searchsorted(keys, before))
+        return keys[max(0, stop - limit):stop][::-1]
+
+
+class FeedService:
+    """Per-user home timelines with fan-out on write and celebrity fan-in.
+
+    ``friends_of(user_id)`` returns a user's friend ids and
+    ``load_posts(user_id)`` their posts (dicts with user_id, post_id,
+    timestamp, ...), called once per author. ``degree_of(user_id)`` counts a
+    user's friends, ``len(friends_of(user_id))`` if not given. Returned post
+    dicts are shared, do not modify them.
+    """
+
+    def __init__(self, friends_of, load_posts, degree_of=None, timeline_capacity=DEFAULT_TIMELINE_CAPACITY,
+                 author_capacity=DEFAULT_AUTHOR_CAPACITY, celebrity_threshold=DEFAULT_CELEBRITY_THRESHOLD):
+        self.friends_of = friends_of
+        self.load_posts = load_posts
+        self.degree_of = degree_of or (lambda user_id: len(friends_of(user_id)))
+        self.timeline_capacity = timeline_capacity
+        self.author_capacity = author_capacity
+        self.celebrity_threshold = celebrity_threshold
+        self._posts = {}        # feed key -> post dict
+        self._post_keys = {}    # (user_id, post_id) -> feed key
+        self._authored = {}     # user_id -> _Ring of their own posts
+        self._timelines = {}    # user_id -> _Ring of their home timeline
+        self._celebrities = set()
+        self._counter = 0
+        self._lock = threading.RLock()
+
+    def _key(self, post):
+        self._counter = (self._counter + 1) & ((1 << COUNTER_BITS) - 1)
+        return (to_epoch(post['timestamp']) << COUNTER_BITS) | self._counter
+
+    def _author_ring(self, author):
+        # Caller holds the lock; loads the author's stored posts the first time
+        ring = self._authored.get(author)
+        if ring is None:
+            ring = self._authored[author] = _Ring(self.author_capacity)
+            keys = [self._remember(post) for post in self.load_posts(author)]
+            self._forget(ring.merge(np.array(keys, dtype=KEY_DTYPE)))
+        return ring
+
+    def _remember(self, post):
+        ident = (post['user_id'], post['post_id'])
+        key = self._post_keys.get(ident)
+        if key is None:
+            key = self._post_keys[ident] = self._key(post)
+            self._posts[key] = post
+        return key
+
+    def _forget(self, keys):
+        for key in keys.tolist():
+            post = self._posts.pop(key, None)
+            if post is not None:
+                self._post_keys.pop((post['user_id'], post['post_id']), None)
+
+    def _is_celebrity(self, author, degree=None):
+        if author in self._celebrities:
+            return True
+        if degree is None:
+            degree = self.degree_of(author)
+        if degree >= self.celebrity_threshold:
+            self._celebrities.add(author)
+            return True
+        return False
+
+    def _timeline(self, user_id):
+        # Caller holds the lock; builds the timeline by fan-in the first time
+        ring = self._timelines.get(user_id)
+        if ring is None:
+            sources = [self._author_ring(user_id).keys()]
+            for friend in self.friends_of(user_id):
+                if not self._is_celebrity(friend):
+                    sources.append(self._author_ring(friend).keys())
+            ring = self._timelines[user_id] = _Ring(self.timeline_capacity)
+            ring.merge(np.concatenate(sources))
+        return ring
+
+    def publish(self, post):
+        """Add a new post to its author's ring and fan it out; returns its feed key.
+
+        Publishing a post the feed already has is a no-op.
+        """
+        author = post['user_id']
+        ident = (author, post['post_id'])
+        with self._lock:
+            known = self._post_keys.get(ident)
+            if known is not None:
+                return known
+            ring = self._author_ring(author)
+            # Loading the author's stored posts may have picked this one up already
+            key = self._post_keys.get(ident)
+            if key is None:
+                key = self._remember(post)
+                self._forget(ring.append(key))
+            timeline = self._timelines.get(author)
+            if timeline is not None:
+                timeline.append(key)
+            friends = self.friends_of(author)
+            if self._is_celebrity(author, len(friends)):
+                return key
+            timelines = self._timelines
+            for friend in friends:
+                timeline = timelines.get(friend)
+                if timeline is not None:
+                    timeline.append(key)
+            return key
+
+    def follow(self, user_id, author):
+        """Backfill ``author``'s recent posts after ``user_id`` befriends them."""
+        with self._lock:
+            timeline = self._timelines.get(user_id)
+            if timeline is not None and not self._is_celebrity(author):
+                timeline.merge(self._author_ring(author).keys())
+
+    def read(self, user_id, limit=20, before=None):
+        """Return ``(posts, next_cursor)``: up to ``limit`` posts, newest first.
+
+        Pass the returned cursor as ``before`` to get the following page; it is
+        None on the last page.
+        """
+        with self._lock:
+            sources = [self._timeline(user_id).newest(limit, before).tolist()]
+            for friend in self.friends_of(user_id):
+                if friend in self._celebrities:
+                    sources.append(self._author_ring(friend).newest(limit, before).tolist())
+            posts = []
+            last = None
+            for key in heapq.merge(*sources, reverse=True):
+                if key == last:
+                    continue  # fanned out before the author became a celebrity
+                last = key
+                post = self._posts.get(key)
+                if post is not None:
+                    posts.append(post)
+                    if len(posts) == limit:
+                        return posts, key
+            # Short of a page because keys were skipped, not because the sources ran dry
+            if last is not None and any(len(keys) == limit for keys in sources):
+                return posts, last
+            return posts, None
+
+    def invalidate(self, user_id):
+        """Drop a user's timeline; it is rebuilt from their friends' posts on next read."""
+        with self._lock:
+            self._timelines.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'timelines': len(self._timelines),
+                'authors': len(self._authored),
+                'posts': len(self._posts),
+                'celebrities': len(self._celebrities),
+                'timeline_entries': sum(map(len, self._timelines.values())),
+            }
@@ -0,0 +1,234 @@
+"""
+Streaming market-data ingestion.
+
+A feed (Kalshi/Polymarket later, ``python -m data.simulator`` for now) sends
+newline-delimited JSON price deltas:
+
+    {"bet_id": "btc-100k", "yes_value": 0.73, "no_value": 0.27,
+     "yes_percent": 73, "no_percent": 27, "ts": 1767225600.123}
+
+Only the price fields that changed need to be present; ``ts`` is the
+sender's wall-clock time and is used to measure staleness. Values must be
+numbers (or numeric strings) within range: 0-1 for values, 0-100 for
+percents. Anything else is counted as malformed and dropped. IngestPipeline
+queues deltas with a bounded asyncio.Queue (so a slow consumer pushes back
+on the reader), coalesces them per bet and applies each batch to a BetStore
+in one locked pass.
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+
+PRICE_FIELDS = ("yes_value", "no_value", "yes_percent", "no_percent")
+# Largest valid value of each price field (the smallest is 0)
+FIELD_MAX = {"yes_value": 1, "no_value": 1, "yes_percent": 100, "no_percent": 100}
+
+
+def _number(name, value, high=math.inf):
+    """``value`` as a finite number in 0..high; raises ValueError otherwise."""
+    if isinstance(value, str):
+        value = float(value)
+    elif isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number, not {type(value).__name__}")
+    if not (math.isfinite(value) and 0 <= value <= high):
+        raise ValueError(f"{name} out of range: {value}")
+    return value
+
+
+class PriceDelta:
+    """An incremental price update for one bet."""
+
+    __slots__ = ("bet_id", "fields", "ts")
+
+    def __init__(self, bet_id, fields, ts=None):
+        self.bet_id = bet_id
+        self.fields = fields
+        self.ts = ts
+
+    @classmethod
+    def from_json(cls, line):
+        """Parse one JSON line; unknown keys are ignored.
+
+        Raises ValueError for invalid JSON or fields and KeyError without a bet_id.
+        """
+        message = json.loads(line)
+        if not isinstance(message, dict):
+            raise ValueError(f"Expected a JSON object, got {type(message).__name__}")
+        bet_id = message["bet_id"]
+        if not isinstance(bet_id, str) or not bet_id:
+            raise ValueError(f"Invalid bet_id: {bet_id!r}")
+        fields = {field: _number(field, message[field], FIELD_MAX[field]) for field in PRICE_FIELDS if field in message}
+        ts = message.get("ts")
+        return cls(bet_id, fields, None if ts is None else float(_number("ts", ts)))
+
+    def to_json(self):
+        return json.dumps({"bet_id": self.bet_id, **self.fields, "ts": self.ts})
+
+
+class IngestStats:
+    """Counters and staleness samples for a running pipeline."""
+
+    def __init__(self, max_samples=10_000):
+        self.started = time.monotonic()
+        self.received = 0
+        self.applied = 0
+        self.coalesced = 0
+        self.unknown = 0
+        self.malformed = 0
+        self.batches = 0
+        # Seconds between a delta's ts and the moment its batch was applied
+        self.staleness = deque(maxlen=max_samples)
+
+    def updates_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return self.applied / elapsed if elapsed > 0 else 0.0
+
+    def staleness_percentile(self, pct):
+        if not self.staleness:
+            return None
+        samples = sorted(self.staleness)
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def as_dict(self):
+        return {
+            "received": self.received,
+            "applied": self.applied,
+            "coalesced": self.coalesced,
+            "unknown": self.unknown,
+            "malformed": self.malformed,
+            "batches": self.batches,
+            "updates_per_second": self.updates_per_second(),
+            "staleness_p50": self.staleness_percentile(50),
+            "staleness_p99": self.staleness_percentile(99),
+        }
+
+
+class IngestPipeline:
+    """Applies price deltas to a BetStore in batches with backpressure.
+
+    store:     the BetStore to update
+    max_queue: deltas buffered before ``submit`` blocks the producer
+    max_batch: most deltas taken off the queue per store update
+    max_delay: seconds to wait for a batch to fill once one delta is queued
+    """
+
+    def __init__(self, store, max_queue=10_000, max_batch=1_000, max_delay=0.01):
+        self.store = store
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = IngestStats()
+        self._queue = asyncio.Queue(maxsize=max_queue)
+
+    async def submit(self, delta):
+        """Queue a delta, waiting while the queue is full."""
+        self.stats.received += 1
+        await self._queue.put(delta)
+
+    async def consume_stream(self, reader):
+        """Read JSON-line deltas from an asyncio StreamReader until EOF."""
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                delta = PriceDelta.from_json(line)
+            except (ValueError, KeyError):
+                self.stats.malformed += 1
+                continue
+            await self.submit(delta)
+
+    async def _next_batch(self):
+        # Block for the first delta, then gather more until full or max_delay
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def apply_batch(self, batch):
+        """Coalesce deltas per bet (later fields win) and update the store."""
+        merged = {}
+        for delta in batch:
+            fields = merged.get(delta.bet_id)
+            if fields is None:
+                merged[delta.bet_id] = dict(delta.fields)
+            else:
+                fields.update(delta.fields)
+                self.stats.coalesced += 1
+        applied = self.store.update_many(merged.items())
+
+        now = time.time()
+        for delta in batch:
+            if delta.ts is not None:
+                self.stats.staleness.append(now - delta.ts)
+        self.stats.applied += applied
+        self.stats.unknown += len(merged) - applied
+        self.stats.batches += 1
+        return applied
+
+    async def run(self):
+        """Apply batches until cancelled. A batch the store rejects is
+        counted as malformed and dropped; the next one is still applied."""
+        while True:
+            batch = await self._next_batch()
+            try:
+                self.apply_batch(batch)
+            except Exception:
+                self.stats.malformed += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def drain(self):
+        """Wait until every queued delta has been applied."""
+        await self._queue.join()
+
+
+async def ingest_from_feed(pipeline, host, port):
+    """Connect to a JSON-lines feed and apply its deltas until it closes."""
+    reader, writer = await asyncio.open_connection(host, port)
+    consumer = asyncio.create_task(pipeline.run())
+    try:
+        await pipeline.consume_stream(reader)
+        await pipeline.drain()
+    finally:
+        consumer.cancel()
+        writer.close()
+
+
+def start_ingest_thread(store, feed, **pipeline_options):
+    """Run an IngestPipeline for ``feed`` ("host:port") on a daemon thread.
+
+    Streamlit scripts are synchronous, so the pipeline gets its own event
+    loop. Returns the pipeline so its stats can be read.
+    """
+    host, port = feed.rsplit(":", 1)
+    ready = threading.Event()
+    holder = {}
+
+    def run():
+        async def main():
+            holder["pipeline"] = IngestPipeline(store, **pipeline_options)
+            ready.set()
+            await ingest_from_feed(holder["pipeline"], host, int(port))
+
+        asyncio.run(main())
+
+    threading.Thread(target=run, name="airbets-ingest", daemon=True).start()
+    ready.wait()
+    return holder["pipeline"]
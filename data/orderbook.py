@@ -0,0 +1,277 @@
+"""
+Limit order books and matching for binary (Yes/No) bets.
+
+Prices are integer cents from 1 to 99. A Yes contract and a No contract
+together always pay 100, so the two books of a bet are one book in Yes
+terms: buying No at q is selling Yes at 100 - q, and selling No at q is
+buying Yes at 100 - q. Matching in that single book is what keeps
+``yes_value + no_value == 1`` after every trade.
+
+Orders match by price-time priority: best price first, then oldest first.
+Each side keeps a dict of price level -> deque of resting orders plus a
+heap of the prices (emptied levels are dropped lazily). A trade prints at
+the resting order's price.
+
+    engine = MatchingEngine(get_bet_store())
+    order, fills = engine.submit("btc-100k", "user1", "BUY", "YES", 72, 10)
+
+After a match the engine moves the bet's yes/no percent and value to the
+last traded price, then tells listeners registered with ``add_listener``
+about the fills (e.g. data/portfolio.py, which keeps users' positions).
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+SIDES = ("BUY", "SELL")
+OUTCOMES = ("YES", "NO")
+MIN_PRICE = 1
+MAX_PRICE = 99
+# Most contracts one order may ask for
+MAX_QUANTITY = 1_000_000
+
+
+class Order:
+    """One limit order; ``price`` is in cents of the order's own outcome."""
+
+    __slots__ = (
+        "order_id", "bet_id", "user_id", "side", "outcome", "price",
+        "quantity", "remaining", "is_bid", "yes_price", "ts",
+    )
+
+    def __init__(self, order_id, bet_id, user_id, side, outcome, price, quantity, ts=None):
+        self.order_id = order_id
+        self.bet_id = bet_id
+        self.user_id = user_id
+        self.side = side
+        self.outcome = outcome
+        self.price = price
+        self.quantity = quantity
+        self.remaining = quantity
+        # Position in the Yes book: buying Yes or selling No bids for Yes
+        self.is_bid = (side == "BUY") == (outcome == "YES")
+        self.yes_price = price if outcome == "YES" else 100 - price
+        self.ts = ts
+
+    @property
+    def filled(self):
+        return self.quantity - self.remaining
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Fill:
+    """A trade between a resting (maker) and an incoming (taker) order."""
+
+    __slots__ = ("bet_id", "maker_id", "taker_id", "yes_price", "quantity", "ts")
+
+    def __init__(self, bet_id, maker_id, taker_id, yes_price, quantity, ts):
+        self.bet_id = bet_id
+        self.maker_id = maker_id
+        self.taker_id = taker_id
+        self.yes_price = yes_price
+        self.quantity = quantity
+        self.ts = ts
+
+    @property
+    def no_price(self):
+        return 100 - self.yes_price
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _BookSide:
+    """Resting orders of one side: price -> deque, plus a heap of prices."""
+
+    __slots__ = ("levels", "heap", "sign")
+
+    def __init__(self, is_bid):
+        self.levels = {}
+        self.heap = []
+        # Bids pop the highest price first, so their heap holds negated prices
+        self.sign = -1 if is_bid else 1
+
+    def best(self):
+        """Best price with resting orders, or None."""
+        heap, levels = self.heap, self.levels
+        while heap:
+            price = heap[0] * self.sign
+            if price in levels:
+                return price
+            heapq.heappop(heap)
+        return None
+
+    def add(self, order):
+        level = self.levels.get(order.yes_price)
+        if level is None:
+            level = self.levels[order.yes_price] = deque()
+            heapq.heappush(self.heap, order.yes_price * self.sign)
+        level.append(order)
+
+    def depth(self, n):
+        prices = sorted(self.levels, key=lambda price: price * self.sign)[:n]
+        return [(price, sum(order.remaining for order in self.levels[price])) for price in prices]
+
+
+class OrderBook:
+    """The linked Yes/No book of one bet."""
+
+    def __init__(self, bet_id):
+        self.bet_id = bet_id
+        self.bids = _BookSide(is_bid=True)
+        self.asks = _BookSide(is_bid=False)
+        self.orders = {}  # order_id -> resting order
+        self.last_price = None
+        self.volume = 0
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def submit(self, order, makers=None):
+        """Match ``order`` against the book, rest what is left; return fills.
+
+        When a ``makers`` list is given, the resting order of each fill is
+        appended to it.
+        """
+        fills = []
+        if order.is_bid:
+            opposite, crosses = self.asks, lambda best: best <= order.yes_price
+        else:
+            opposite, crosses = self.bids, lambda best: best >= order.yes_price
+
+        levels = opposite.levels
+        while order.remaining:
+            best = opposite.best()
+            if best is None or not crosses(best):
+                break
+            level = levels[best]
+            while level and order.remaining:
+                maker = level[0]
+                quantity = min(maker.remaining, order.remaining)
+                maker.remaining -= quantity
+                order.remaining -= quantity
+                fills.append(Fill(self.bet_id, maker.order_id, order.order_id, best, quantity, order.ts))
+                if makers is not None:
+                    makers.append(maker)
+                if not maker.remaining:
+                    level.popleft()
+                    del self.orders[maker.order_id]
+            if not level:
+                del levels[best]
+
+        if fills:
+            self.last_price = fills[-1].yes_price
+            self.volume += sum(fill.quantity for fill in fills)
+        if order.remaining:
+            (self.bids if order.is_bid else self.asks).add(order)
+            self.orders[order.order_id] = order
+        return fills
+
+    def cancel(self, order_id):
+        """Remove a resting order; returns it, or None if it is not resting."""
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return None
+        side = self.bids if order.is_bid else self.asks
+        level = side.levels[order.yes_price]
+        level.remove(order)
+        if not level:
+            del side.levels[order.yes_price]
+        return order
+
+    def depth(self, levels=5):
+        """Top ``levels`` (yes price, resting quantity) pairs of each side."""
+        return {'bids': self.bids.depth(levels), 'asks': self.asks.depth(levels)}
+
+
+class MatchingEngine:
+    """Order books for every bet, optionally moving prices in a BetStore.
+
+    Each book has its own lock, so Streamlit sessions trading different bets
+    do not wait on each other.
+    """
+
+    def __init__(self, store=None, clock=time.time):
+        self.store = store
+        self._clock = clock
+        self._books = {}
+        self._locks = {}
+        self._books_lock = threading.Lock()
+        self._order_ids = itertools.count(1)
+        self._listeners = []
+
+    def book(self, bet_id):
+        """The bet's OrderBook, created on first use."""
+        book = self._books.get(bet_id)
+        if book is None:
+            with self._books_lock:
+                book = self._books.get(bet_id)
+                if book is None:
+                    self._locks[bet_id] = threading.Lock()
+                    book = self._books[bet_id] = OrderBook(bet_id)
+        return book
+
+    def add_listener(self, listener):
+        """Call ``listener(order, fills, makers)`` after every order that trades.
+
+        makers holds the resting order of each fill, in the same order.
+        Listeners run with the bet's book locked, so the fills of one bet
+        arrive in sequence; they must not submit orders.
+        """
+        self._listeners.append(listener)
+
+    def submit(self, bet_id, user_id, side, outcome, price, quantity):
+        """Place a limit order; returns ``(order, fills)``.
+
+        side:     "BUY" or "SELL"
+        outcome:  "YES" or "NO"
+        price:    limit price in cents of ``outcome`` (1-99)
+        quantity: number of contracts (1 to MAX_QUANTITY)
+
+        Raises ValueError for an invalid order, or when the engine has a
+        store that does not know ``bet_id``.
+        """
+        if side not in SIDES or outcome not in OUTCOMES:
+            raise ValueError(f"Invalid order side/outcome: {side} {outcome}")
+        if not MIN_PRICE <= price <= MAX_PRICE or int(price) != price:
+            raise ValueError(f"Price must be a whole number of cents from {MIN_PRICE} to {MAX_PRICE}: {price}")
+        if not 1 <= quantity <= MAX_QUANTITY or int(quantity) != quantity:
+            raise ValueError(f"Quantity must be a whole number of contracts from 1 to {MAX_QUANTITY:,}: {quantity}")
+        if self.store is not None and bet_id not in self.store:
+            raise ValueError(f"Unknown bet_id: {bet_id}")
+
+        order = Order(next(self._order_ids), bet_id, user_id, side, outcome, int(price), int(quantity), self._clock())
+        book = self.book(bet_id)
+        makers = [] if self._listeners else None
+        with self._locks[bet_id]:
+            fills = book.submit(order, makers)
+            if fills and self.store is not None:
+                self._publish_price(bet_id, book.last_price)
+            if fills:
+                for listener in self._listeners:
+                    listener(order, fills, makers)
+        return order, fills
+
+    def cancel(self, bet_id, order_id):
+        book = self._books.get(bet_id)
+        if book is None:
+            return None
+        with self._locks[bet_id]:
+            return book.cancel(order_id)
+
+    def _publish_price(self, bet_id, yes_price):
+        self.store.update(
+            bet_id,
+            yes_percent=yes_price,
+            no_percent=100 - yes_price,
+            yes_value=yes_price / 100,
+            no_value=(100 - yes_price) / 100,
+        )
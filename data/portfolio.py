@@ -0,0 +1,308 @@
+"""
+Portfolio valuation: users' positions marked to live prices.
+
+A position is a user's holding of one instrument: a bet outcome
+(``(bet_id, "YES")`` or ``(bet_id, "NO")``, priced at the bet's
+yes_value / no_value) or a traded symbol (``(symbol, None)``). Positions
+are rows of column arrays (user, instrument, quantity, average cost,
+market value), and every user's total market value and cost basis are
+kept up to date as rows change, so reading a valuation never sums a
+user's positions again.
+
+Revaluation is incremental, driven by dirty flags. A price tick only
+records the new mark of the instruments it moves and flags them; the
+next read revalues the holders of the flagged instruments, found through
+a reverse index from each instrument to its position rows, in one
+vectorized pass per instrument, and adjusts their owners' totals. Ticks on
+markets nobody holds cost a dict lookup, and several ticks on one market
+between reads are revalued once. When a quarter of all rows or more are
+flagged, one vectorized pass over every position is cheaper and is used
+instead.
+
+    portfolio = Portfolio(store)
+    portfolio.attach(store, engine)               # follow prices and fills
+    portfolio.add_trades("user1", get_user_trades("user1"))
+    portfolio.valuation("user1")                  # totals plus one dict per position
+
+Costs follow the average-cost method of data/trade_analytics.py (its
+apply_fill): adding to a position blends its average cost, reducing it
+realizes P&L.
+"""
+
+import threading
+from array import array
+
+import numpy as np
+
+from data.trade_analytics import ACTIONS, apply_fill
+
+OUTCOMES = ("YES", "NO")
+PRICE_FIELDS = ('yes_value', 'no_value', 'yes_percent', 'no_percent')
+_INITIAL_ROWS = 1024
+FULL_PASS_SHARE = 0.25      # revalue every row at once when this share of them is dirty
+
+
+class Portfolio:
+    """Positions of every user, with market values kept current.
+
+    store: optional BetStore the bet outcomes are marked against; without
+           one (or for bets it does not know) positions are marked at
+           their last fill price until ``set_mark`` is called.
+
+    Thread-safe: price ticks and fills may arrive on other threads.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._lock = threading.RLock()
+        # Users
+        self._user_code = {}
+        self._user_ids = []
+        self._user_rows = []                 # per user: array('i') of position rows
+        self._user_value = np.zeros(0)       # market value of open positions
+        self._user_cost = np.zeros(0)        # their cost basis
+        self._user_realized = np.zeros(0)
+        # Instruments
+        self._instrument_code = {}
+        self._instruments = []               # (market, outcome)
+        self._holders = []                   # per instrument: array('i') of position rows
+        self._by_market = {}                 # market -> instrument codes
+        self._mark = np.zeros(0)
+        self._dirty = {}                     # instrument code -> new mark
+        # Positions
+        self._row = {}                       # (user code, instrument code) -> row
+        self._size = 0
+        self._pos_user = np.zeros(_INITIAL_ROWS, dtype=np.int32)
+        self._pos_instrument = np.zeros(_INITIAL_ROWS, dtype=np.int32)
+        self._quantity = np.zeros(_INITIAL_ROWS)
+        self._avg_cost = np.zeros(_INITIAL_ROWS)
+        self._value = np.zeros(_INITIAL_ROWS)
+
+    def attach(self, store=None, engine=None):
+        """Mark bet outcomes to ``store``'s prices as they change and apply
+        the fills of ``engine`` (a MatchingEngine) to both parties."""
+        if store is not None:
+            self.store = store
+            store.add_listener(self._on_change)
+        if engine is not None:
+            engine.add_listener(self._on_fills)
+
+    def _on_change(self, event, bet, fields):
+        if event == "update" and not any(field in fields for field in PRICE_FIELDS):
+            return
+        codes = self._by_market.get(bet.bet_id)
+        if codes is None:
+            return
+        with self._lock:
+            for code, price in zip(codes, (bet.yes_value, bet.no_value)):
+                self._dirty[code] = price
+
+    def _on_fills(self, order, fills, makers):
+        with self._lock:
+            for fill, maker in zip(fills, makers):
+                for party in (order, maker):
+                    # Prices are cents of the party's own outcome
+                    price = fill.yes_price if party.outcome == "YES" else fill.no_price
+                    quantity = fill.quantity if party.side == "BUY" else -fill.quantity
+                    self.add_fill(party.user_id, (fill.bet_id, party.outcome), quantity, price / 100)
+
+    def __len__(self):
+        """Number of position rows (closed positions keep their row)."""
+        return self._size
+
+    # ---- positions ----
+
+    def add_fill(self, user_id, instrument, quantity, price):
+        """Apply a fill: ``quantity`` contracts or shares (negative to sell)
+        of ``instrument`` at ``price`` dollars each. A fill of 0 is ignored."""
+        if not quantity:
+            return
+        with self._lock:
+            user = self._user(user_id)
+            code = self._instrument(instrument, price)
+            row = self._row.get((user, code))
+            if row is None:
+                row = self._new_row(user, code)
+            old_cost = self._quantity[row] * self._avg_cost[row]
+            old_value = self._value[row]
+
+            new_position, avg_cost, realized = apply_fill(
+                float(self._quantity[row]), float(self._avg_cost[row]), quantity, price)
+            self._user_realized[user] += realized
+            self._quantity[row] = new_position
+            self._avg_cost[row] = avg_cost
+            # At the applied mark; a pending one reaches this row with the rest
+            self._value[row] = new_position * self._mark[code]
+            self._user_cost[user] += new_position * avg_cost - old_cost
+            self._user_value[user] += self._value[row] - old_value
+
+    def add_trades(self, user_id, trades):
+        """Apply get_user_trades-style dicts (symbol, action, quantity, price)
+        and mark each symbol at the price of its latest trade."""
+        latest = {}
+        for trade in trades:
+            if trade['action'] not in ACTIONS:
+                raise ValueError(f"Unknown action: {trade['action']}")
+            quantity = trade.get('quantity', 0)
+            self.add_fill(user_id, (trade['symbol'], None), quantity if trade['action'] == "BUY" else -quantity,
+                          trade['price'])
+            latest[trade['symbol']] = trade['price']
+        for symbol, price in latest.items():
+            self.set_mark((symbol, None), price)
+
+    def set_mark(self, instrument, price):
+        """Mark an instrument (e.g. a symbol, which has no live feed) at ``price``."""
+        with self._lock:
+            code = self._instrument_code.get(tuple(instrument))
+            if code is not None:
+                self._dirty[code] = price
+
+    # ---- valuation ----
+
+    def revalue(self):
+        """Revalue the holders of every instrument whose price moved since
+        the last call; returns how many positions were revalued."""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, {}
+            for code, mark in dirty.items():
+                self._mark[code] = mark
+            revalued = sum(len(self._holders[code]) for code in dirty)
+            if revalued > self._size * FULL_PASS_SHARE:
+                # Most rows moved: one pass over every position beats one per instrument
+                size = self._size
+                value = self._quantity[:size] * self._mark[self._pos_instrument[:size]]
+                self._user_value[:len(self._user_ids)] = np.bincount(
+                    self._pos_user[:size], weights=value, minlength=len(self._user_ids))
+                self._value[:size] = value
+                return revalued
+            for code, mark in dirty.items():
+                rows = np.frombuffer(self._holders[code], dtype=np.int32)
+                if not len(rows):
+                    continue
+                value = self._quantity[rows] * mark
+                # Each user holds an instrument in one row, so users are unique here
+                self._user_value[self._pos_user[rows]] += value - self._value[rows]
+                self._value[rows] = value
+            return revalued
+
+    def totals(self, user_id):
+        """``{'market_value', 'cost_basis', 'unrealized_pnl', 'realized_pnl'}`` of a user."""
+        with self._lock:
+            self.revalue()
+            user = self._user_code.get(user_id)
+            if user is None:
+                return {'market_value': 0.0, 'cost_basis': 0.0, 'unrealized_pnl': 0.0, 'realized_pnl': 0.0}
+            value, cost = float(self._user_value[user]), float(self._user_cost[user])
+            return {
+                'market_value': value,
+                'cost_basis': cost,
+                'unrealized_pnl': value - cost,
+                'realized_pnl': float(self._user_realized[user]),
+            }
+
+    def valuation(self, user_id):
+        """The user's totals plus ``positions``: one dict per open position
+        with market, outcome (None for symbols), quantity, avg_cost, mark,
+        market_value and unrealized_pnl."""
+        with self._lock:
+            result = self.totals(user_id)
+            user = self._user_code.get(user_id)
+            positions = []
+            if user is not None:
+                for row in self._user_rows[user]:
+                    quantity = float(self._quantity[row])
+                    if not quantity:
+                        continue
+                    code = int(self._pos_instrument[row])
+                    market, outcome = self._instruments[code]
+                    value, avg_cost = float(self._value[row]), float(self._avg_cost[row])
+                    positions.append({
+                        'market': market,
+                        'outcome': outcome,
+                        'quantity': quantity,
+                        'avg_cost': avg_cost,
+                        'mark': float(self._mark[code]),
+                        'market_value': value,
+                        'unrealized_pnl': value - quantity * avg_cost,
+                    })
+            result['positions'] = positions
+            return result
+
+    def holders(self, instrument):
+        """User ids with an open position in ``instrument``."""
+        with self._lock:
+            code = self._instrument_code.get(tuple(instrument))
+            if code is None:
+                return []
+            rows = np.frombuffer(self._holders[code], dtype=np.int32)
+            rows = rows[self._quantity[rows] != 0]
+            return [self._user_ids[user] for user in self._pos_user[rows].tolist()]
+
+    # ---- internals (caller holds the lock) ----
+
+    def _user(self, user_id):
+        user = self._user_code.get(user_id)
+        if user is None:
+            user = self._user_code[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+            self._user_rows.append(array('i'))
+            if user == len(self._user_value):
+                size = max(_INITIAL_ROWS, 2 * user)
+                self._user_value = _grown(self._user_value, size)
+                self._user_cost = _grown(self._user_cost, size)
+                self._user_realized = _grown(self._user_realized, size)
+        return user
+
+    def _instrument(self, instrument, price):
+        instrument = tuple(instrument)
+        code = self._instrument_code.get(instrument)
+        if code is None:
+            market, outcome = instrument
+            if outcome is not None and outcome not in OUTCOMES:
+                raise ValueError(f"Unknown outcome: {outcome}")
+            code = self._instrument_code[instrument] = len(self._instruments)
+            self._instruments.append(instrument)
+            self._holders.append(array('i'))
+            if code == len(self._mark):
+                self._mark = _grown(self._mark, max(64, 2 * code))
+            self._mark[code] = self._quote(market, outcome, price)
+            if outcome is not None:
+                # Both outcomes get codes, so a tick flags them as a pair
+                side = OUTCOMES.index(outcome)
+                codes = self._by_market.setdefault(market, [None, None])
+                codes[side] = code
+                if codes[1 - side] is None:
+                    self._instrument((market, OUTCOMES[1 - side]), 1 - price)
+        return code
+
+    def _quote(self, market, outcome, price):
+        # The store's current price of a bet outcome, else the fill price
+        bet = self.store.get_bet(market) if self.store is not None and outcome is not None else None
+        if bet is None:
+            return price
+        return bet.yes_value if outcome == "YES" else bet.no_value
+
+    def _new_row(self, user, code):
+        row = self._size
+        if row == len(self._quantity):
+            size = 2 * row
+            self._pos_user = _grown(self._pos_user, size)
+            self._pos_instrument = _grown(self._pos_instrument, size)
+            self._quantity = _grown(self._quantity, size)
+            self._avg_cost = _grown(self._avg_cost, size)
+            self._value = _grown(self._value, size)
+        self._size += 1
+        self._pos_user[row] = user
+        self._pos_instrument[row] = code
+        self._row[(user, code)] = row
+        self._user_rows[user].append(row)
+        self._holders[code].append(row)
+        return row
+
+
+def _grown(values, size):
+    grown = np.zeros(size, dtype=values.dtype)
+    grown[:len(values)] = values
+    return grown
@@ -0,0 +1,307 @@
+"""
+Background precompute of per-user artifacts on a process pool.
+
+An Artifact is one piece of derived per-user data (trade metrics, a workout
+summary, advice, ...): ``gather(user_id)`` reads its inputs in this process
+(cheap, usually cached I/O) and ``compute(inputs)`` derives it in a worker
+process, so it must be a picklable module-level function. All of a user's
+artifacts are computed together, and several users share a job to
+amortize the cost of handing work to another process.
+
+PrecomputeScheduler keeps the artifacts of active users fresh:
+
+- ``touch(user_id)`` marks a user active and queues a refresh unless their
+  results are recent and their data version unchanged;
+- the queue is a heap ordered by last activity, so the users seen most
+  recently are computed first; a user is queued at most once and never
+  computed twice at the same time (a change while in flight re-queues them
+  once the job is done);
+- only ``max_in_flight`` jobs of up to ``batch_size`` users are handed to
+  the pool at a time, so the priorities still apply under a backlog;
+- results go into the shared ResultCache under ``precompute.<artifact>``
+  for the data version they were computed from, and are dropped if the
+  user was invalidated meanwhile;
+- active users are refreshed every ``refresh_interval`` seconds until
+  they have not been touched for ``active_window`` seconds.
+
+The UI thread only reads: ``results(user_id)`` returns what is cached, with
+None for artifacts that are not ready yet.
+
+    scheduler = PrecomputeScheduler([Artifact('trade_metrics', trade_metrics, get_user_trades)])
+    scheduler.touch('user1')
+    scheduler.results('user1')      # {'trade_metrics': None} until the job lands
+"""
+
+import functools
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from data.cache import user_cache
+
+DEFAULT_REFRESH_INTERVAL = 30.0  # seconds between refreshes of an active user
+DEFAULT_ACTIVE_WINDOW = 300.0    # seconds after the last touch a user stays active
+DEFAULT_BATCH_SIZE = 16
+LATENCY_SAMPLES = 10_000
+
+
+class Artifact:
+    """A derived per-user value: ``compute(gather(user_id))``.
+
+    Without ``gather`` the user id itself is passed to ``compute``.
+    """
+
+    __slots__ = ("name", "compute", "gather")
+
+    def __init__(self, name, compute, gather=None):
+        self.name = name
+        self.compute = compute
+        self.gather = gather
+
+    @property
+    def namespace(self):
+        return f"precompute.{self.name}"
+
+
+def _run_job(computes, batch):
+    """Worker side of a job: every artifact's compute for each user's inputs,
+    or None for a user whose computation failed."""
+    results = []
+    for inputs in batch:
+        try:
+            results.append([compute(value) for compute, value in zip(computes, inputs)])
+        except Exception:
+            results.append(None)
+    return results
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def default_executor(max_workers=None):
+    """A process pool whose workers are started by a fork server (or spawned),
+    never forked from this multi-threaded process."""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+
+class PrecomputeScheduler:
+    """Refreshes the artifacts of active users in the background.
+
+    executor:      where jobs run (default: default_executor(max_workers))
+    max_in_flight: jobs handed to the executor at once (default: twice the
+                   worker count)
+    batch_size:    most users per job
+    ttl:           lifetime of cached results (default: active_window)
+    clock:         monotonic time source, replaceable in tests
+    """
+
+    def __init__(self, artifacts, cache=user_cache, max_workers=None, executor=None, max_in_flight=None,
+                 batch_size=DEFAULT_BATCH_SIZE, refresh_interval=DEFAULT_REFRESH_INTERVAL,
+                 active_window=DEFAULT_ACTIVE_WINDOW, ttl=None, clock=time.monotonic):
+        self.artifacts = tuple(artifacts)
+        self.cache = cache
+        self.refresh_interval = refresh_interval
+        self.active_window = active_window
+        self.ttl = active_window if ttl is None else ttl
+        self._clock = clock
+        self._executor = executor
+        self._max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_in_flight = max_in_flight or 2 * self._max_workers
+        self.batch_size = batch_size
+        self._jobs = 0             # jobs handed to the executor and not done
+        self._cond = threading.Condition()
+        self._heap = []            # (-last_active, -seq, user_id): latest first
+        self._queued = {}          # user_id -> (seq, enqueued_at) of its live heap entry
+        self._in_flight = {}       # user_id -> data version the job read
+        self._rerun = set()        # changed while in flight
+        self._active = {}          # user_id -> last touch
+        self._done = {}            # user_id -> (finished_at, version)
+        self._seq = itertools.count()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._counts = {'submitted': 0, 'completed': 0, 'failed': 0, 'stale': 0, 'deduplicated': 0}
+        self._next_sweep = clock() + refresh_interval
+        self._thread = None
+        self._closed = False
+
+    # ---- UI side ----
+
+    def touch(self, user_id):
+        """Mark the user active and queue a refresh if their results are due."""
+        now = self._clock()
+        with self._cond:
+            if self._closed:
+                return
+            self._active[user_id] = now
+            if user_id in self._in_flight or user_id in self._queued:
+                self._counts['deduplicated'] += 1
+                if user_id in self._queued:
+                    self._enqueue(user_id, now)  # move up to its new activity time
+                elif self._in_flight[user_id] != self.cache.version(user_id):
+                    self._rerun.add(user_id)
+            elif self._due(user_id, now):
+                self._enqueue(user_id, now)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name="precompute", daemon=True)
+                self._thread.start()
+
+    def results(self, user_id):
+        """``{artifact name: cached value or None}``; never computes."""
+        return {artifact.name: self.cache.get(artifact.namespace, user_id) for artifact in self.artifacts}
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or in flight; returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queued and not self._in_flight, timeout)
+
+    def stats(self):
+        with self._cond:
+            latencies = sorted(self._latencies)
+            stats = dict(self._counts)
+            stats.update(active=len(self._active), queued=len(self._queued), in_flight=len(self._in_flight))
+        stats.update(latency_p50=_percentile(latencies, 0.5), latency_p99=_percentile(latencies, 0.99))
+        return stats
+
+    def close(self, wait=True):
+        """Stop dispatching and shut the executor down (pending jobs are cancelled)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ---- scheduling ----
+
+    def _due(self, user_id, now):
+        # Caller holds the lock
+        done = self._done.get(user_id)
+        return (done is None or now - done[0] >= self.refresh_interval
+                or done[1] != self.cache.version(user_id))
+
+    def _enqueue(self, user_id, now):
+        # Caller holds the lock; an older heap entry of the user goes stale
+        seq = next(self._seq)
+        previous = self._queued.get(user_id)
+        self._queued[user_id] = (seq, now if previous is None else previous[1])
+        heapq.heappush(self._heap, (-self._active.get(user_id, now), -seq, user_id))
+        self._cond.notify_all()
+
+    def _sweep(self, now):
+        # Caller holds the lock: forget idle users, queue active ones that are due
+        for user_id, last in list(self._active.items()):
+            if now - last > self.active_window:
+                del self._active[user_id]
+                self._done.pop(user_id, None)
+            elif user_id not in self._queued and user_id not in self._in_flight and self._due(user_id, now):
+                self._enqueue(user_id, now)
+        self._next_sweep = now + self.refresh_interval
+
+    def _next_batch(self):
+        # Caller holds the lock; up to batch_size (user_id, version, enqueued_at)
+        batch = []
+        while self._heap and len(batch) < self.batch_size:
+            _, seq, user_id = heapq.heappop(self._heap)
+            queued = self._queued.get(user_id)
+            if queued is None or queued[0] != -seq:
+                continue  # superseded by a later touch
+            del self._queued[user_id]
+            version = self._in_flight[user_id] = self.cache.version(user_id)
+            batch.append((user_id, version, queued[1]))
+        return batch
+
+    def _dispatch(self):
+        while True:
+            job = self._wait_for_batch()
+            if job is None:
+                return
+            executor, batch = job
+            inputs = self._gather(batch)
+            try:
+                future = executor.submit(_run_job, [a.compute for a in self.artifacts], inputs)
+            except Exception:
+                self._fail(batch)
+                continue
+            future.add_done_callback(functools.partial(self._on_done, batch))
+
+    def _wait_for_batch(self):
+        # Block until a batch may be handed out; (executor, batch), or None once closed
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                now = self._clock()
+                if now >= self._next_sweep:
+                    self._sweep(now)
+                if self._jobs < self.max_in_flight:
+                    batch = self._next_batch()
+                    if batch:
+                        break
+                self._cond.wait(max(0.0, self._next_sweep - now))
+            if self._executor is None:
+                self._executor = default_executor(self._max_workers)
+            self._jobs += 1
+            self._counts['submitted'] += len(batch)
+            return self._executor, batch
+
+    def _gather(self, batch):
+        # Inputs of each job in the batch; a job whose gather fails is dropped from it
+        inputs = []
+        for job in batch[:]:
+            user_id = job[0]
+            try:
+                inputs.append([user_id if a.gather is None else a.gather(user_id) for a in self.artifacts])
+            except Exception:
+                batch.remove(job)
+                self._finish(*job, None)
+        return inputs
+
+    def _on_done(self, batch, future):
+        try:
+            results = future.result()
+        except Exception:
+            results = [None] * len(batch)
+        self._complete(batch, results)
+
+    def _fail(self, batch):
+        # The batch never reached the executor
+        self._complete(batch, [None] * len(batch))
+
+    def _complete(self, batch, results):
+        for job, values in zip(batch, results):
+            self._finish(*job, values)
+        with self._cond:
+            self._jobs -= 1
+            self._cond.notify_all()
+
+    def _finish(self, user_id, version, enqueued_at, values):
+        stored = False
+        if values is not None:
+            stored = all([
+                self.cache.set_if_current(artifact.namespace, user_id, version, value, ttl=self.ttl)
+                for artifact, value in zip(self.artifacts, values)
+            ])
+        now = self._clock()
+        with self._cond:
+            del self._in_flight[user_id]
+            if values is None:
+                self._counts['failed'] += 1
+            elif stored:
+                self._counts['completed'] += 1
+                self._done[user_id] = (now, version)
+                self._latencies.append(now - enqueued_at)
+            else:
+                self._counts['stale'] += 1
+            rerun = user_id in self._rerun or (values is not None and not stored)
+            self._rerun.discard(user_id)
+            if rerun and user_id in self._active and not self._closed:
+                self._enqueue(user_id, now)
+            self._cond.notify_all()
@@ -0,0 +1,263 @@
+"""
+Per-bet price history: bounded tick rings and incremental OHLC rollups.
+
+Every change to a bet's Yes price is recorded as a tick (epoch seconds,
+yes_value). A bet keeps its newest ``tick_capacity`` ticks plus open/high/
+low/close bars at each of RESOLUTIONS (1 s, 1 min, 1 h), each bounded by
+BAR_CAPACITY. Bars are rolled up as ticks arrive: the bar still open at
+each resolution is updated in place and appended to its ring when the
+next tick falls in a later bar, so no query ever re-scans raw ticks.
+
+Ticks are recorded in arrival order; a timestamp older than the bet's last
+tick is moved up to it. Bets that never trade only remember their opening
+price, so a large catalog costs a dict entry per bet until it moves.
+
+``series`` answers a chart: it picks the coarsest level (1 h, 1 min, 1 s
+bars, then ticks) that covers the requested range with at least as many
+points as the chart is wide and downsamples it to that width with LTTB
+(data/timeseries.py). Every level is bounded, so a query never touches
+more than a few thousand rows.
+
+    history = PriceHistory()
+    history.attach(store)                          # follow the store's price updates
+    times, prices = history.series('btc-100k', 120)   # at most 120 points
+    bars = history.bars('btc-100k', 60)            # 1-minute OHLC arrays
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from data.timeseries import lttb_indices
+
+# Bar sizes in seconds
+RESOLUTIONS = (1, 60, 3600)
+# Bars kept per resolution: 15 minutes of seconds, a day of minutes, 30 days of hours
+BAR_CAPACITY = {1: 900, 60: 1440, 3600: 720}
+DEFAULT_TICK_CAPACITY = 2048
+BAR_FIELDS = ('start', 'open', 'high', 'low', 'close', 'ticks')
+PRICE_FIELDS = ('yes_value', 'yes_percent')
+_INITIAL_ROWS = 16
+
+
+class _Rows:
+    """Fixed-width float64 rows, keeping only the newest ``capacity``.
+
+    Rows live in a buffer up to a quarter larger than the capacity and
+    slide back to its front when it fills (like the feed's key rings), so
+    the live rows are one contiguous slice and appends are amortized O(1).
+    """
+
+    __slots__ = ('buf', 'start', 'end', 'capacity', 'limit', 'dropped')
+
+    def __init__(self, columns, capacity):
+        self.capacity = capacity
+        self.limit = capacity + max(capacity // 4, _INITIAL_ROWS)
+        self.buf = np.empty((_INITIAL_ROWS, columns))
+        self.start = self.end = 0
+        self.dropped = False
+
+    def __len__(self):
+        return self.end - self.start
+
+    def rows(self):
+        """The live rows, oldest first (a view)."""
+        return self.buf[self.start:self.end]
+
+    def oldest(self):
+        """Time (first column) of the oldest row once rows have been dropped; None before."""
+        return self.buf[self.start, 0] if self.dropped else None
+
+    def append(self, row):
+        if self.end == len(self.buf):
+            live = self.rows()
+            if len(self.buf) < self.limit:
+                buf = np.empty((min(2 * len(self.buf), self.limit), self.buf.shape[1]))
+                buf[:len(live)] = live
+                self.buf = buf
+            else:
+                self.buf[:len(live)] = live
+            self.start, self.end = 0, len(live)
+        self.buf[self.end] = row
+        self.end += 1
+        if self.end - self.start > self.capacity:
+            self.start += 1
+            self.dropped = True
+
+
+class _BetHistory:
+    """The tick ring and bar rings of one bet, plus its open bars."""
+
+    __slots__ = ('ticks', 'bars', 'open', 'last_time')
+
+    def __init__(self, resolutions, tick_capacity):
+        self.ticks = _Rows(2, tick_capacity)
+        self.bars = [_Rows(len(BAR_FIELDS), BAR_CAPACITY.get(r, 1440)) for r in resolutions]
+        # Per resolution, the bar the latest tick fell in: [start, open, high, low, close, ticks]
+        self.open = [None] * len(resolutions)
+        self.last_time = float('-inf')
+
+
+class PriceHistory:
+    """Price ticks and OHLC bars of every bet, by bet_id.
+
+    Thread-safe: the store's listener records ticks while sessions query.
+    Query results are copies.
+    """
+
+    def __init__(self, resolutions=RESOLUTIONS, tick_capacity=DEFAULT_TICK_CAPACITY, clock=time.time):
+        self.resolutions = tuple(resolutions)
+        self.tick_capacity = tick_capacity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._histories = {}
+        # bet_id -> (time, price) for bets that have not moved yet
+        self._opening = {}
+
+    def __contains__(self, bet_id):
+        return bet_id in self._histories or bet_id in self._opening
+
+    def attach(self, store):
+        """Record the opening price of every bet in ``store`` and a tick on
+        every later change to its Yes price."""
+        store.add_listener(self._on_change)
+
+    def _on_change(self, event, bet, fields):
+        if event == "remove":
+            self.discard(bet.bet_id)
+        elif event == "add":
+            self.discard(bet.bet_id)
+            with self._lock:
+                self._opening[bet.bet_id] = (self._clock(), _price(bet))
+        elif any(field in fields for field in PRICE_FIELDS):
+            self.record(bet.bet_id, _price(bet))
+
+    # ---- recording ----
+
+    def record(self, bet_id, price, timestamp=None):
+        """Add a tick; ``timestamp`` defaults to now."""
+        if timestamp is None:
+            timestamp = self._clock()
+        with self._lock:
+            history = self._histories.get(bet_id)
+            if history is None:
+                history = self._histories[bet_id] = _BetHistory(self.resolutions, self.tick_capacity)
+                opening = self._opening.pop(bet_id, None)
+                if opening is not None:
+                    self._add_tick(history, *opening)
+            self._add_tick(history, float(timestamp), float(price))
+
+    def _add_tick(self, history, timestamp, price):
+        # Caller holds the lock
+        timestamp = max(timestamp, history.last_time)
+        history.last_time = timestamp
+        history.ticks.append((timestamp, price))
+        for i, resolution in enumerate(self.resolutions):
+            start = timestamp - timestamp % resolution
+            bar = history.open[i]
+            if bar is not None and bar[0] == start:
+                if price > bar[2]:
+                    bar[2] = price
+                elif price < bar[3]:
+                    bar[3] = price
+                bar[4] = price
+                bar[5] += 1
+            else:
+                if bar is not None:
+                    history.bars[i].append(bar)
+                history.open[i] = [start, price, price, price, price, 1]
+
+    def discard(self, bet_id):
+        """Forget a bet's history."""
+        with self._lock:
+            self._histories.pop(bet_id, None)
+            self._opening.pop(bet_id, None)
+
+    # ---- queries ----
+
+    def ticks(self, bet_id, start=None, end=None):
+        """``(times, prices)`` of the retained ticks with start <= time < end."""
+        with self._lock:
+            history = self._histories.get(bet_id)
+            rows = self._opening_rows(bet_id) if history is None else history.ticks.rows()
+            rows = _in_range(rows, start, end).copy()
+        return rows[:, 0], rows[:, 1]
+
+    def bars(self, bet_id, resolution, start=None, end=None):
+        """OHLC bars of ``resolution`` seconds whose start is in [start, end).
+
+        Returns a dict of equal-length arrays: start, open, high, low,
+        close, ticks. The last bar is still open while ticks arrive in it.
+        """
+        level = self.resolutions.index(resolution)
+        with self._lock:
+            history = self._histories.get(bet_id)
+            if history is None:
+                rows = self._opening_rows(bet_id)
+                rows = np.column_stack((rows[:, 0] - rows[:, 0] % resolution, rows[:, [1, 1, 1, 1]], np.ones(len(rows))))
+            else:
+                rows = self._bar_rows(history, level)
+        rows = _in_range(rows, start, end)
+        return {field: rows[:, i] for i, field in enumerate(BAR_FIELDS)}
+
+    def series(self, bet_id, points, start=None, end=None):
+        """``(times, prices)`` of at most ``points`` points for a chart of the
+        range [start, end).
+
+        Drawn from the coarsest level that reaches back to ``start`` (or to
+        the first tick) with at least ``points`` entries in the range, else
+        from the finest level that reaches back that far; bar levels give
+        their closes at their start times. The result keeps the shape of
+        the price path (LTTB).
+        """
+        with self._lock:
+            history = self._histories.get(bet_id)
+            if history is None:
+                rows = self._opening_rows(bet_id)
+            else:
+                rows = None
+                for level in reversed(range(len(self.resolutions) + 1)):
+                    if level == 0:
+                        first, candidate = history.ticks.oldest(), history.ticks.rows()
+                    else:
+                        first = history.bars[level - 1].oldest()
+                        candidate = self._bar_rows(history, level - 1)[:, [0, 4]]
+                    candidate = _in_range(candidate, start, end)
+                    covered = first is None or (start is not None and start >= first)
+                    # The coarsest level stands in when nothing covers the range
+                    if covered or rows is None:
+                        rows = candidate
+                    if covered and len(candidate) >= points:
+                        break
+            rows = rows.copy()
+        times, prices = rows[:, 0], rows[:, 1]
+        kept = lttb_indices(times, prices, points)
+        return times[kept], prices[kept]
+
+    def _opening_rows(self, bet_id):
+        # Caller holds the lock; the opening tick of a bet that has not moved
+        opening = self._opening.get(bet_id)
+        return np.array([opening] if opening is not None else [], dtype=float).reshape(-1, 2)
+
+    @staticmethod
+    def _bar_rows(history, level):
+        # Caller holds the lock; the closed bars plus the open one (a copy)
+        closed = history.bars[level].rows()
+        current = history.open[level]
+        return np.concatenate((closed, [current])) if current is not None else closed.copy()
+
+
+def _price(bet):
+    # The Yes price in dollars; yes_percent when a feed only sends that
+    if bet.yes_value is not None:
+        return bet.yes_value
+    return bet.yes_percent / 100
+
+
+def _in_range(rows, start, end):
+    # Rows whose first column (a time, ascending) is in [start, end)
+    times = rows[:, 0]
+    lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+    hi = len(rows) if end is None else int(np.searchsorted(times, end, side='left'))
+    return rows[lo:hi]
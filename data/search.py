@@ -0,0 +1,430 @@
+"""
+Full-text and faceted search over the bet catalog.
+
+SearchIndex keeps an inverted index of each bet's name, rules and
+category: every term has a posting list of (document, term frequency) in
+growable numpy arrays, so a query scores whole posting lists at once
+with BM25 instead of looping over bets. Name tokens count NAME_WEIGHT
+times, so a match in the title outranks one in the rules.
+
+- the last query token is a prefix while typing (``prefix=True``): once
+  it has MIN_PREFIX characters it matches every term it starts. The
+  short prefixes, which start the most terms, are indexed as terms of
+  their own (edge n-grams, "bi*" for bitcoin); longer ones expand to up
+  to MAX_EXPANSIONS vocabulary terms, the most frequent first;
+- every query term must match; results are ranked by BM25, then by age;
+- facet counts per category and probability bucket (see data/store.py)
+  come back with each result, each ignoring its own filter so the other
+  choices stay visible;
+- the index follows a BetStore through ``attach``: repricing only moves
+  a bet between probability buckets, a changed name/rules/category
+  re-indexes it. Replaced documents are tombstoned and the arrays are
+  compacted once tombstones outnumber live bets.
+
+    index = SearchIndex()
+    index.attach(get_bet_store())
+    results = index.search("bitcoin 10", category="Crypto", limit=10)
+    results.bets, results.total, results.facets, results.next_cursor
+"""
+
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+import numpy as np
+
+from data.store import PROBABILITY_BUCKETS, probability_bucket
+
+K1 = 1.2
+B = 0.75
+NAME_WEIGHT = 2        # a name token counts as this many rules tokens
+MAX_EXPANSIONS = 16    # vocabulary terms a prefix may expand to
+MIN_PREFIX = 2         # shorter partial terms are ignored while typing
+INDEXED_PREFIX = 3     # prefixes up to this length are indexed as "<prefix>*" terms
+COMPACT_MIN_DEAD = 1024
+CACHE_BUDGET = 4_000_000   # postings kept in the query cache
+TEXT_FIELDS = ("bet_name", "rules", "category")
+
+# Words in nearly every bet ("Will ... ?", "Resolves YES if ...") carry no
+# ranking signal but have the longest posting lists, so they are not indexed
+STOPWORDS = frozenset(
+    "a an and are at be before by for from if in is it of on or the to will with".split()
+)
+
+_PREFIX_SIZES = range(MIN_PREFIX, INDEXED_PREFIX + 1)
+_EMPTY = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+_TOKEN = re.compile(r"[a-z0-9]+")
+_DIGIT_GROUP = re.compile(r"(?<=\d),(?=\d)")
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of ``text`` without stopwords; "$100,000" is "100000"."""
+    if not text:
+        return []
+    return [t for t in _TOKEN.findall(_DIGIT_GROUP.sub("", text.lower())) if t not in STOPWORDS]
+
+
+def _term_counts(bet):
+    """``({term: weighted frequency}, length)`` of a bet, with the indexed
+    prefixes of its terms as ``prefix*`` entries (not counted in length)."""
+    counts = {}
+    for term in tokenize(bet["bet_name"]):
+        counts[term] = counts.get(term, 0) + NAME_WEIGHT
+    for term in tokenize(bet["rules"]) + tokenize(bet["category"]):
+        counts[term] = counts.get(term, 0) + 1
+    length = sum(counts.values())
+    prefixes = {}
+    for term, tf in counts.items():
+        for size in _PREFIX_SIZES:
+            if len(term) < size:
+                break
+            key = term[:size] + "*"
+            prefixes[key] = prefixes.get(key, 0) + tf
+    counts.update(prefixes)
+    return counts, length
+
+
+class _Postings:
+    """(document, weighted term frequency) pairs of one term, sorted by
+    document because documents are numbered in insertion order, and the
+    number of live documents among them. Appends go to compact array.array
+    buffers; queries copy them into numpy arrays."""
+
+    __slots__ = ("docs", "tfs", "df")
+
+    def __init__(self):
+        self.docs = array("i")
+        self.tfs = array("f")
+        self.df = 0
+
+    def arrays(self):
+        return np.array(self.docs, dtype=np.int32), np.array(self.tfs, dtype=np.float32)
+
+
+class SearchResults:
+    """One page of ranked bets plus the counts for the whole result set.
+
+    bets:        the bets on this page, best match first
+    total:       how many bets match the query and filters
+    facets:      ``{'category': {name: count}, 'probability': {bucket: count}}``
+                 (zero counts left out)
+    next_cursor: pass as ``after`` for the next page; None on the last one
+    """
+
+    __slots__ = ("bets", "total", "facets", "next_cursor")
+
+    def __init__(self, bets, total, facets, next_cursor):
+        self.bets = bets
+        self.total = total
+        self.facets = facets
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return f"SearchResults({len(self.bets)} of {self.total})"
+
+
+class SearchIndex:
+    """Inverted index with BM25 ranking, prefix matching and facet counts.
+
+    Thread-safe: a feed thread may reprice bets while sessions search.
+    """
+
+    def __init__(self, k1=K1, b=B):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}     # term -> _Postings, tombstoned documents included
+        self._vocab = []        # sorted terms, for prefix lookups
+        self._docno = {}        # bet_id -> document number of its live document
+        self._bets = []         # document number -> Bet, or None once tombstoned
+        self._doc_terms = []    # document number -> its distinct terms
+        self._categories = []   # category code -> name
+        self._category_code = {}
+        capacity = 1024
+        self._length = np.zeros(capacity, dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        # Facet cell of each document: category code * PROBABILITY_BUCKETS +
+        # probability bucket; one gather and bincount count both facets
+        self._cell = np.zeros(capacity, dtype=np.int16)
+        self._counts = np.zeros(0, dtype=np.int64)   # live documents per cell
+        self._live = 0
+        self._dead = 0
+        self._total_length = 0.0
+        self._cache = OrderedDict()   # term, "prefix*" or "" -> (documents, weights)
+        self._cache_size = 0
+        self._norm = None             # BM25 length normalization per document
+
+    # ---- maintenance ----
+
+    def attach(self, store):
+        """Index every bet in a BetStore and follow its changes from now on."""
+        store.add_listener(self._on_change)
+
+    def _on_change(self, event, bet, fields):
+        if event == "remove":
+            self.remove(bet.bet_id)
+        elif event == "add" or any(field in TEXT_FIELDS for field in fields):
+            self.add(bet)
+        elif "yes_percent" in fields:
+            self.reprice(bet.bet_id, fields["yes_percent"])
+
+    def __len__(self):
+        return self._live
+
+    def add(self, bet):
+        """Index a bet (a Bet or a bet dict), replacing an earlier version."""
+        counts, length = _term_counts(bet)
+        with self._lock:
+            self.remove(bet["bet_id"])
+            doc = len(self._bets)
+            if doc == len(self._alive):
+                self._grow()
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = _Postings()
+                    if not term.endswith("*"):
+                        insort(self._vocab, term)
+                postings.docs.append(doc)
+                postings.tfs.append(tf)
+                postings.df += 1
+            code = self._category_code.get(bet["category"])
+            if code is None:
+                code = self._category_code[bet["category"]] = len(self._categories)
+                self._categories.append(bet["category"])
+                self._counts = np.concatenate([self._counts, np.zeros(PROBABILITY_BUCKETS, dtype=np.int64)])
+            cell = code * PROBABILITY_BUCKETS + probability_bucket(bet["yes_percent"])
+            self._length[doc] = length
+            self._cell[doc] = cell
+            self._counts[cell] += 1
+            self._alive[doc] = True
+            self._docno[bet["bet_id"]] = doc
+            self._bets.append(bet)
+            self._doc_terms.append(tuple(counts))
+            self._live += 1
+            self._total_length += length
+            self._clear_cache()
+
+    def remove(self, bet_id):
+        """Drop a bet from the index; unknown ids are ignored."""
+        with self._lock:
+            if bet_id in self._docno:
+                self._tombstone(bet_id)
+                if self._dead > max(COMPACT_MIN_DEAD, self._live):
+                    self.compact()
+
+    def reprice(self, bet_id, yes_percent):
+        """Move a bet to the probability bucket of its new Yes percentage."""
+        with self._lock:
+            doc = self._docno.get(bet_id)
+            if doc is not None:
+                old = int(self._cell[doc])
+                new = old - old % PROBABILITY_BUCKETS + probability_bucket(yes_percent)
+                self._counts[old] -= 1
+                self._counts[new] += 1
+                self._cell[doc] = new
+
+    def compact(self):
+        """Rebuild the arrays without tombstoned documents."""
+        with self._lock:
+            bets = [bet for bet in self._bets if bet is not None]
+            self._reset()
+            for bet in bets:
+                self.add(bet)
+
+    def _tombstone(self, bet_id):
+        # Caller holds the lock
+        doc = self._docno.pop(bet_id)
+        for term in self._doc_terms[doc]:
+            self._postings[term].df -= 1
+        self._doc_terms[doc] = ()
+        self._bets[doc] = None
+        self._alive[doc] = False
+        self._counts[self._cell[doc]] -= 1
+        self._live -= 1
+        self._dead += 1
+        self._total_length -= float(self._length[doc])
+        self._clear_cache()
+
+    def _clear_cache(self):
+        # Caller holds the lock; document frequencies and lengths changed
+        self._cache.clear()
+        self._cache_size = 0
+        self._norm = None
+
+    def _grow(self):
+        # Caller holds the lock
+        capacity = 2 * len(self._alive)
+        self._length = np.resize(self._length, capacity)
+        self._cell = np.resize(self._cell, capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+
+    # ---- queries ----
+
+    def suggest(self, prefix, limit=8):
+        """Up to ``limit`` indexed terms starting with ``prefix``, most frequent first."""
+        with self._lock:
+            return self._expand(prefix.lower(), limit)
+
+    def search(self, query="", category=None, probability=None, limit=20, after=None, prefix=True):
+        """Rank the bets matching every term of ``query``.
+
+        category:    only this category (None or "All" for every one)
+        probability: only these probability buckets (an int or an iterable)
+        limit:       page size
+        after:       ``next_cursor`` of the previous page
+        prefix:      treat the last term as a prefix unless the query ends
+                     with a space, for search-as-you-type
+
+        An empty query matches every bet, in insertion order. The cost is
+        linear in the matches of the rarest term, not in the catalog size.
+        """
+        terms = tokenize(query)
+        partial = terms.pop() if terms and prefix and not query[-1].isspace() else None
+        if partial is not None and len(partial) < MIN_PREFIX:
+            partial = None   # matches nearly everything; wait for the next keystroke
+        start = after or 0
+        if category == "All":
+            category = None
+        if isinstance(probability, int):
+            probability = (probability,)
+        with self._lock:
+            groups = [self._term(term) for term in terms]
+            if partial is not None:
+                groups.append(self._prefix(partial))
+            if groups:
+                docs, scores = self._intersect(groups)
+                cells = self._cell[docs]
+                counts = np.bincount(cells, minlength=len(self._counts))
+            else:
+                docs, scores = self._everything()
+                cells, counts = None, self._counts
+            matrix = counts.reshape(-1, PROBABILITY_BUCKETS)
+            in_category = np.ones(len(matrix), dtype=bool)
+            in_bucket = np.ones(PROBABILITY_BUCKETS, dtype=bool)
+            if category is not None:
+                in_category = np.arange(len(matrix)) == self._category_code.get(category, -1)
+            if probability is not None:
+                in_bucket = np.isin(np.arange(PROBABILITY_BUCKETS), list(probability))
+            if category is not None or probability is not None:
+                keep = np.outer(in_category, in_bucket).ravel()[self._cell[docs] if cells is None else cells]
+                docs, scores = docs[keep], scores[keep]
+
+            total = len(docs)
+            if groups:
+                docs = self._top(docs, scores, start + limit)
+            page = [self._bets[doc] for doc in docs[start:start + limit].tolist()]
+            # Each facet counts the matches under the other facet's filter only
+            category_counts = matrix[:, in_bucket].sum(axis=1)
+            bucket_counts = matrix[in_category].sum(axis=0)
+            facets = {
+                'category': {name: int(count) for name, count in zip(self._categories, category_counts) if count},
+                'probability': {bucket: int(count) for bucket, count in enumerate(bucket_counts) if count},
+            }
+        next_cursor = start + limit if start + limit < total else None
+        return SearchResults(page, total, facets, next_cursor)
+
+    # Each of these returns (live documents ascending, BM25 weights) and is
+    # cached until the postings change; repricing leaves them valid
+
+    def _cached(self, key, compute):
+        # Caller holds the lock
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = self._cache[key] = compute()
+            self._cache_size += len(entry[0])
+            while self._cache_size > CACHE_BUDGET and len(self._cache) > 1:
+                _, (docs, _) = self._cache.popitem(last=False)
+                self._cache_size -= len(docs)
+        else:
+            self._cache.move_to_end(key)
+        return entry
+
+    def _term(self, term):
+        def compute():
+            postings = self._postings.get(term)
+            if postings is None or not postings.df:
+                return _EMPTY
+            docs, tfs = postings.arrays()
+            if self._dead:
+                alive = self._alive[docs]
+                docs, tfs = docs[alive], tfs[alive]
+            if self._norm is None:
+                average = self._total_length / self._live
+                self._norm = self.k1 * (1 - self.b + self.b * self._length[:len(self._bets)] / average)
+            df = postings.df
+            idf = math.log(1 + (self._live - df + 0.5) / (df + 0.5))
+            return docs, (idf * (self.k1 + 1)) * tfs / (tfs + self._norm[docs])
+        return self._cached(term, compute)
+
+    def _prefix(self, partial):
+        # A document matching several completions scores its best one
+        if len(partial) <= INDEXED_PREFIX:
+            return self._term(partial + "*")
+
+        def compute():
+            groups = [self._term(term) for term in self._expand(partial, MAX_EXPANSIONS)]
+            if len(groups) < 2:
+                return groups[0] if groups else _EMPTY
+            if sum(len(docs) for docs, _ in groups) > len(self._bets) // 4:
+                # Scatter into one weight per document
+                best = np.zeros(len(self._bets), dtype=np.float32)
+                for docs, weights in groups:
+                    best[docs] = np.maximum(best[docs], weights)
+                docs = np.flatnonzero(best).astype(np.int32)
+                return docs, best[docs]
+            docs = np.concatenate([group[0] for group in groups])
+            weights = np.concatenate([group[1] for group in groups])
+            # The concatenation is a series of sorted runs, which a stable sort merges
+            order = np.argsort(docs, kind="stable")
+            docs, weights = docs[order], weights[order]
+            first = np.flatnonzero(np.diff(docs, prepend=-1))
+            return docs[first], np.maximum.reduceat(weights, first)
+        return self._cached(partial + "*", compute)
+
+    def _everything(self):
+        def compute():
+            docs = np.flatnonzero(self._alive[:len(self._bets)]).astype(np.int32)
+            return docs, np.zeros(len(docs), dtype=np.float32)
+        return self._cached("", compute)
+
+    @staticmethod
+    def _intersect(groups):
+        """Documents in every group with their summed weights, from the shortest group."""
+        groups = sorted(groups, key=lambda group: len(group[0]))
+        docs, scores = groups[0]
+        for other_docs, other_weights in groups[1:]:
+            if not len(docs):
+                break
+            at = np.searchsorted(other_docs, docs)
+            at[at == len(other_docs)] = 0
+            hit = other_docs[at] == docs
+            docs, scores = docs[hit], scores[hit] + other_weights[at[hit]]
+        return docs, scores
+
+    def _expand(self, partial, limit):
+        # Caller holds the lock; the most frequent live terms starting with partial
+        lo = bisect_left(self._vocab, partial)
+        hi = bisect_left(self._vocab, partial + "\uffff", lo)
+        postings = self._postings
+        terms = [term for term in self._vocab[lo:hi] if postings[term].df]
+        if len(terms) > limit:
+            terms = heapq.nlargest(limit, terms, key=lambda term: postings[term].df)
+        return terms
+
+    @staticmethod
+    def _top(docs, scores, k):
+        """``docs`` ordered by descending score then document number, cut to the best k."""
+        if len(docs) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            docs, scores = docs[best], scores[best]
+        return docs[np.lexsort((docs, -scores))]
@@ -0,0 +1,123 @@
+"""
+Local exchange simulator for the ingestion pipeline.
+
+Serves a JSON-lines stream of random-walk price deltas (see data/ingest.py)
+to every client that connects, at a fixed rate, so ingestion throughput and
+staleness can be measured without a real Kalshi/Polymarket feed.
+
+    python -m data.simulator --rate 5000 --port 8765
+    python -m data.simulator --markets 100000   # synthetic bet-<n> ids
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from data.bets import AVAILABLE_BETS
+
+CATEGORIES = ["Crypto", "Politics", "Sports", "Other"]
+
+# Deltas are written in bursts this many times per second
+TICKS_PER_SECOND = 100
+
+
+def synthetic_bets(n, seed=0):
+    """Return ``n`` random bet dicts with ids bet-0 ... bet-<n-1>."""
+    rng = random.Random(seed)
+    bets = []
+    for i in range(n):
+        yes_percent = rng.randint(1, 99)
+        bets.append({
+            "bet_id": f"bet-{i}",
+            "bet_name": f"Synthetic market {i}",
+            "bet_image_link": None,
+            "yes_value": yes_percent / 100,
+            "no_value": (100 - yes_percent) / 100,
+            "yes_percent": yes_percent,
+            "no_percent": 100 - yes_percent,
+            "rules": "Resolves YES if the synthetic event happens.",
+            "category": rng.choice(CATEGORIES),
+        })
+    return bets
+
+
+class DeltaGenerator:
+    """Random-walks yes_percent per bet and formats the resulting deltas."""
+
+    def __init__(self, bets, seed=None):
+        self._rng = random.Random(seed)
+        self._bet_ids = [bet["bet_id"] for bet in bets]
+        self._percent = {bet["bet_id"]: bet["yes_percent"] for bet in bets}
+
+    def next_line(self):
+        bet_id = self._rng.choice(self._bet_ids)
+        yes_percent = min(99, max(1, self._percent[bet_id] + self._rng.choice((-1, 1))))
+        self._percent[bet_id] = yes_percent
+        return json.dumps({
+            "bet_id": bet_id,
+            "yes_value": yes_percent / 100,
+            "no_value": round(1 - yes_percent / 100, 2),
+            "yes_percent": yes_percent,
+            "no_percent": 100 - yes_percent,
+            "ts": time.time(),
+        }) + "\n"
+
+
+async def stream_deltas(writer, generator, rate, duration=None):
+    """Write ``rate`` deltas per second to ``writer`` for ``duration`` seconds.
+
+    ``writer.drain()`` after each burst lets a slow client push back on us.
+    """
+    loop = asyncio.get_running_loop()
+    per_tick = rate / TICKS_PER_SECOND
+    start = loop.time()
+    sent = 0
+    tick = 0
+    while duration is None or loop.time() - start < duration:
+        tick += 1
+        due = int(tick * per_tick) - sent
+        writer.write("".join(generator.next_line() for _ in range(due)).encode())
+        sent += due
+        await writer.drain()
+        await asyncio.sleep(max(0.0, start + tick / TICKS_PER_SECOND - loop.time()))
+    return sent
+
+
+async def serve(bets, host="127.0.0.1", port=8765, rate=1_000, duration=None, seed=None):
+    """Serve delta streams until cancelled."""
+
+    async def handle(reader, writer):
+        try:
+            await stream_deltas(writer, DeltaGenerator(bets, seed), rate, duration)
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local exchange simulator emitting price deltas.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=int, default=1_000, help="deltas per second per client")
+    parser.add_argument("--duration", type=float, default=None, help="seconds per client stream")
+    parser.add_argument("--markets", type=int, default=0, help="use N synthetic bets instead of AVAILABLE_BETS")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    bets = synthetic_bets(args.markets) if args.markets else AVAILABLE_BETS
+    print(f"Streaming {args.rate} deltas/s over {len(bets)} markets on {args.host}:{args.port}", flush=True)
+    try:
+        asyncio.run(serve(bets, args.host, args.port, args.rate, args.duration, args.seed))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
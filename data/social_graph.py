@@ -0,0 +1,420 @@
+"""
+Friend graph in compressed sparse row (CSR) form.
+
+Users are dense integer ids 0..n-1. Every user's friends are one sorted
+slice of a single int32 ``indices`` array, found through an int64
+``indptr`` array: the friends of ``u`` are ``indices[indptr[u]:indptr[u+1]]``.
+That is 4 bytes per friendship direction plus 8 bytes per user, with no
+per-user Python objects, so a 1M-user / 50M-friendship graph takes ~400 MB.
+
+Friendships are undirected. Edge updates go to a small overlay (added and
+removed neighbors per touched user) that lookups merge in; once the
+overlay grows past ``compact_ratio`` of the graph it is folded back into new
+CSR arrays. Lookups take the same lock as updates, so they never see the
+CSR arrays of one version with the overlay of another.
+
+    graph = FriendGraph.from_edges(src, dst, n_users)
+    graph.neighbors(7)                    # sorted int32 array (a view)
+    graph.k_hop(7, 2)                     # friends and friends of friends
+    graph.mutual_counts(7)                # friend suggestions by mutual friends
+
+SocialGraph wraps a FriendGraph with the string user ids used elsewhere.
+"""
+
+import threading
+
+import numpy as np
+
+INDEX_DTYPE = np.int32
+# Overlay edges (as a fraction of the graph's edges) that trigger compact()
+DEFAULT_COMPACT_RATIO = 0.01
+MIN_COMPACT_EDGES = 1024
+
+
+def _gather(indptr, indices, nodes):
+    """Concatenated neighbor slices of ``nodes`` plus their offsets (CSR of the batch)."""
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    # Position i of the output reads indices[starts[row] + (i - offsets[row])]
+    positions = np.arange(offsets[-1], dtype=np.int64) + np.repeat(starts - offsets[:-1], lengths)
+    return indices[positions], offsets
+
+
+class FriendGraph:
+    """An undirected graph over users 0..n_users-1 in CSR arrays."""
+
+    def __init__(self, indptr, indices, compact_ratio=DEFAULT_COMPACT_RATIO):
+        # Swapped as one tuple by compact(), so readers never mix versions
+        self._csr = (indptr, indices)
+        self.compact_ratio = compact_ratio
+        self._n_users = len(indptr) - 1
+        self._added = {}    # user -> set of neighbors not in the CSR arrays
+        self._removed = {}  # user -> set of CSR neighbors that were removed
+        self._overlay_edges = 0  # net change in neighbor entries
+        self._pending = 0        # entries held in _added and _removed
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_edges(cls, src, dst, n_users=None, chunk=1 << 22, **kwargs):
+        """Build from parallel arrays of friendships (each listed once, in
+        either direction). Self-loops and duplicates are dropped.
+
+        Edges are sorted as packed int64 ``(user << 32) | friend`` keys, so
+        building needs ~17 bytes per friendship on top of the input and the
+        result; everything else is converted ``chunk`` edges at a time.
+        """
+        src, dst = np.asarray(src), np.asarray(dst)
+        if n_users is None:
+            n_users = int(max(src.max(initial=-1), dst.max(initial=-1))) + 1
+        if len(src) and (min(src.min(), dst.min()) < 0 or max(src.max(), dst.max()) >= n_users):
+            raise ValueError(f"Edge endpoints must be in 0..{n_users - 1}")
+
+        # Both directions of every edge, self-loops dropped, converted a chunk at a time
+        keys = np.empty(2 * int(np.count_nonzero(src != dst)), dtype=np.int64)
+        filled = 0
+        for start in range(0, len(src), chunk):
+            s = src[start:start + chunk].astype(np.int64)
+            d = dst[start:start + chunk].astype(np.int64)
+            keep = s != d
+            s, d = s[keep], d[keep]
+            keys[filled:filled + 2 * len(s):2] = (s << 32) | d
+            keys[filled + 1:filled + 2 * len(s):2] = (d << 32) | s
+            filled += 2 * len(s)
+        keys.sort()
+
+        unique = np.empty(len(keys), dtype=bool)
+        if len(keys):
+            unique[0] = True
+            np.not_equal(keys[1:], keys[:-1], out=unique[1:])
+        indices = np.empty(int(np.count_nonzero(unique)), dtype=INDEX_DTYPE)
+        counts = np.zeros(n_users, dtype=np.int64)
+        filled = 0
+        for start in range(0, len(keys), chunk):
+            part = keys[start:start + chunk][unique[start:start + chunk]]
+            indices[filled:filled + len(part)] = part & 0xFFFFFFFF
+            counts += np.bincount(part >> 32, minlength=n_users)
+            filled += len(part)
+        indptr = np.zeros(n_users + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(indptr, indices, **kwargs)
+
+    @classmethod
+    def from_adjacency(cls, adjacency, n_users=None, **kwargs):
+        """Build from ``{user: iterable of friends}``."""
+        src, dst = [], []
+        for user, friends in adjacency.items():
+            for friend in friends:
+                src.append(user)
+                dst.append(friend)
+        return cls.from_edges(np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64), n_users, **kwargs)
+
+    # ---- size ----
+
+    @property
+    def indptr(self):
+        return self._csr[0]
+
+    @property
+    def indices(self):
+        return self._csr[1]
+
+    @property
+    def n_users(self):
+        return self._n_users
+
+    @property
+    def n_edges(self):
+        """Number of friendships (each counted once)."""
+        with self._lock:
+            return (len(self.indices) + self._overlay_edges) // 2
+
+    @property
+    def nbytes(self):
+        """Bytes held by the CSR arrays (the overlay is small by design)."""
+        return self.indptr.nbytes + self.indices.nbytes
+
+    # ---- lookups ----
+
+    def _base(self, user):
+        indptr, indices = self._csr
+        if user >= len(indptr) - 1:
+            return indices[:0]
+        return indices[indptr[user]:indptr[user + 1]]
+
+    def neighbors(self, user):
+        """Sorted friends of ``user``; a view of the CSR arrays unless the
+        user has pending updates."""
+        with self._lock:
+            if not 0 <= user < self._n_users:
+                raise IndexError(f"No user {user}")
+            base = self._base(user)
+            added, removed = self._added.get(user), self._removed.get(user)
+            if not added and not removed:
+                return base
+            if removed:
+                base = base[~np.isin(base, np.fromiter(removed, dtype=INDEX_DTYPE, count=len(removed)))]
+            if added:
+                base = np.union1d(base, np.fromiter(added, dtype=INDEX_DTYPE, count=len(added))).astype(INDEX_DTYPE)
+            return base
+
+    def degree(self, user):
+        return len(self.neighbors(user))
+
+    def neighbors_many(self, users):
+        """Friends of every user in ``users`` as ``(flat, offsets)``: the
+        friends of ``users[i]`` are ``flat[offsets[i]:offsets[i+1]]``."""
+        with self._lock:
+            users = np.asarray(users, dtype=np.int64)
+            if len(users) and (users.min() < 0 or users.max() >= self._n_users):
+                raise IndexError("User id out of range")
+            indptr, indices = self._csr
+            touched = self._added.keys() | self._removed.keys()
+            # Users with pending updates (or added since the last compact) are
+            # looked up one by one; everyone else is gathered from the CSR arrays
+            special = users >= len(indptr) - 1
+            if touched:
+                special |= np.isin(users, np.fromiter(touched, dtype=np.int64, count=len(touched)))
+            if not special.any():
+                return _gather(indptr, indices, users)
+
+            plain = ~special
+            rows = {i: self.neighbors(int(users[i])) for i in np.flatnonzero(special).tolist()}
+            safe = np.where(plain, users, 0)
+            lengths = np.where(plain, indptr[safe + 1] - indptr[safe], 0)
+            for i, row in rows.items():
+                lengths[i] = len(row)
+            offsets = np.zeros(len(users) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            flat = np.empty(offsets[-1], dtype=INDEX_DTYPE)
+            part, part_offsets = _gather(indptr, indices, users[plain])
+            shift = np.repeat(offsets[:-1][plain] - part_offsets[:-1], np.diff(part_offsets))
+            flat[np.arange(len(part)) + shift] = part
+            for i, row in rows.items():
+                flat[offsets[i]:offsets[i + 1]] = row
+            return flat, offsets
+
+    def k_hop(self, user, k, include_distance=False):
+        """Users within ``k`` hops of ``user`` (excluding ``user``), sorted.
+
+        With include_distance=True returns ``(users, hops)``.
+        """
+        with self._lock:
+            seen = np.zeros(self._n_users, dtype=bool)
+            seen[user] = True
+            frontier = np.array([user], dtype=np.int64)
+            found, hops = [], []
+            for hop in range(1, k + 1):
+                flat, _ = self.neighbors_many(frontier)
+                frontier = np.unique(flat[~seen[flat]]).astype(np.int64)
+                if not len(frontier):
+                    break
+                seen[frontier] = True
+                found.append(frontier)
+                hops.append(np.full(len(frontier), hop, dtype=np.int8))
+            if not found:
+                empty = np.empty(0, dtype=np.int64)
+                return (empty, np.empty(0, dtype=np.int8)) if include_distance else empty
+            users, distances = np.concatenate(found), np.concatenate(hops)
+            order = np.argsort(users)
+            return (users[order], distances[order]) if include_distance else users[order]
+
+    def mutual_friends(self, a, b):
+        """Number of friends ``a`` and ``b`` have in common."""
+        return len(np.intersect1d(self.neighbors(a), self.neighbors(b), assume_unique=True))
+
+    def mutual_counts(self, user, limit=None):
+        """Friends of friends who are not yet friends of ``user``, with how
+        many mutual friends each has, most first: ``(users, counts)``."""
+        with self._lock:
+            friends = self.neighbors(user)
+            flat, _ = self.neighbors_many(friends)
+            candidates, counts = np.unique(flat, return_counts=True)
+            keep = (candidates != user) & ~np.isin(candidates, friends, assume_unique=True)
+            candidates, counts = candidates[keep], counts[keep]
+            # Most mutual friends first, ties by user id
+            order = np.lexsort((candidates, -counts))
+            if limit is not None:
+                order = order[:limit]
+            return candidates[order], counts[order]
+
+    # ---- updates ----
+
+    def has_edge(self, a, b):
+        with self._lock:
+            if not (0 <= a < self._n_users and 0 <= b < self._n_users):
+                return False
+            if b in self._added.get(a, ()):
+                return True
+            if b in self._removed.get(a, ()):
+                return False
+            base = self._base(a)
+        i = np.searchsorted(base, b)
+        return bool(i < len(base) and base[i] == b)
+
+    def add_user(self):
+        """Append a user with no friends; returns their id."""
+        with self._lock:
+            self._n_users += 1
+            return self._n_users - 1
+
+    def add_edge(self, a, b):
+        """Make ``a`` and ``b`` friends; returns False if they already were."""
+        if a == b:
+            raise ValueError("A user cannot befriend themselves")
+        with self._lock:
+            if not (0 <= a < self._n_users and 0 <= b < self._n_users):
+                raise IndexError(f"No user {max(a, b)}")
+            if self.has_edge(a, b):
+                return False
+            for x, y in ((a, b), (b, a)):
+                if not self._discard(self._removed, x, y):
+                    self._added.setdefault(x, set()).add(y)
+                    self._pending += 1
+                self._overlay_edges += 1
+            self._maybe_compact()
+            return True
+
+    def remove_edge(self, a, b):
+        """End the friendship of ``a`` and ``b``; returns False if there was none."""
+        with self._lock:
+            if not self.has_edge(a, b):
+                return False
+            for x, y in ((a, b), (b, a)):
+                if not self._discard(self._added, x, y):
+                    self._removed.setdefault(x, set()).add(y)
+                    self._pending += 1
+                self._overlay_edges -= 1
+            self._maybe_compact()
+            return True
+
+    def _discard(self, overlay, x, y):
+        # Caller holds the lock; drops y from overlay[x] if it is there
+        entries = overlay.get(x)
+        if not entries or y not in entries:
+            return False
+        entries.discard(y)
+        if not entries:
+            del overlay[x]
+        self._pending -= 1
+        return True
+
+    def pending_updates(self):
+        """Neighbor entries held in the overlay."""
+        return self._pending
+
+    def _maybe_compact(self):
+        if self._pending > max(MIN_COMPACT_EDGES, self.compact_ratio * len(self.indices)):
+            self.compact()
+
+    def compact(self):
+        """Fold the overlay into new CSR arrays.
+
+        Only the rows of touched users are rebuilt; the rest are copied as
+        whole blocks between them.
+        """
+        with self._lock:
+            touched = sorted(self._added.keys() | self._removed.keys())
+            old_indptr, old_indices = self._csr
+            old_users = len(old_indptr) - 1
+            counts = np.zeros(self._n_users, dtype=np.int64)
+            counts[:old_users] = np.diff(old_indptr)
+            rows = {user: self.neighbors(user) for user in touched}
+            for user, row in rows.items():
+                counts[user] = len(row)
+            indptr = np.zeros(self._n_users + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+            indices = np.empty(indptr[-1], dtype=INDEX_DTYPE)
+            previous = 0
+            for user in touched + [self._n_users]:
+                # Untouched users previous..user-1 keep their rows
+                stop = min(user, old_users)
+                if stop > previous:
+                    block = old_indices[old_indptr[previous]:old_indptr[stop]]
+                    indices[indptr[previous]:indptr[previous] + len(block)] = block
+                if user < self._n_users:
+                    indices[indptr[user]:indptr[user + 1]] = rows[user]
+                previous = user + 1
+            self._csr = (indptr, indices)
+            self._added, self._removed = {}, {}
+            self._overlay_edges = self._pending = 0
+
+
+class SocialGraph:
+    """A FriendGraph addressed by string user ids.
+
+    Ids are interned to dense integers in order of first appearance.
+    """
+
+    def __init__(self, graph, user_ids):
+        self.graph = graph
+        self.user_ids = list(user_ids)
+        self._index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_friend_lists(cls, friends_by_user):
+        """Build from ``{user_id: [friend ids]}`` (e.g. the profile dicts'
+        ``friends``); a friendship listed on either side counts."""
+        user_ids, index = [], {}
+        for user_id, friends in friends_by_user.items():
+            for uid in (user_id, *friends):
+                if uid not in index:
+                    index[uid] = len(user_ids)
+                    user_ids.append(uid)
+        adjacency = {index[user_id]: [index[f] for f in friends] for user_id, friends in friends_by_user.items()}
+        return cls(FriendGraph.from_adjacency(adjacency, len(user_ids)), user_ids)
+
+    def _id(self, user_id):
+        index = self._index.get(user_id)
+        if index is None:
+            with self._lock:
+                index = self._index.get(user_id)
+                if index is None:
+                    index = self.graph.add_user()
+                    # Named before it is findable, so readers can always name it
+                    self.user_ids.append(user_id)
+                    self._index[user_id] = index
+        return index
+
+    def _names(self, indices):
+        user_ids = self.user_ids
+        return [user_ids[i] for i in indices.tolist()]
+
+    def friends(self, user_id):
+        index = self._index.get(user_id)
+        return [] if index is None else self._names(self.graph.neighbors(index))
+
+    def degree(self, user_id):
+        index = self._index.get(user_id)
+        return 0 if index is None else self.graph.degree(index)
+
+    def friends_within(self, user_id, k=2):
+        """Users within ``k`` hops of ``user_id`` with their distance."""
+        index = self._index.get(user_id)
+        if index is None:
+            return {}
+        users, hops = self.graph.k_hop(index, k, include_distance=True)
+        return dict(zip(self._names(users), hops.tolist()))
+
+    def mutual_friends(self, a, b):
+        if a not in self._index or b not in self._index:
+            return 0
+        return self.graph.mutual_friends(self._index[a], self._index[b])
+
+    def suggestions(self, user_id, limit=5):
+        """``(user_id, mutual friend count)`` pairs, most mutual friends first."""
+        index = self._index.get(user_id)
+        if index is None:
+            return []
+        users, counts = self.graph.mutual_counts(index, limit)
+        return list(zip(self._names(users), counts.tolist()))
+
+    def add_friendship(self, a, b):
+        return self.graph.add_edge(self._id(a), self._id(b))
+
+    def remove_friendship(self, a, b):
+        if a not in self._index or b not in self._index:
+            return False
+        return self.graph.remove_edge(self._index[a], self._index[b])
@@ -0,0 +1,647 @@
+"""
+Pluggable storage for users, friends, posts, trades and bets.
+
+data_fetcher and data/bets.py read and write through a StorageBackend picked
+by AIRBETS_STORAGE:
+
+    memory              (default) dicts in this process; trades in the
+                        trade log of data/trade_log.py
+    sqlite:<path>       an embedded SQLite database, e.g. sqlite:var/airbets.db
+    latency:<ms>:<spec> the backend of <spec> behind a delay of <ms> per call,
+                        a local stand-in for a remote store, e.g.
+                        latency:50:memory
+
+SQLiteBackend shares one ConnectionPool between every Streamlit session of
+the process. The database runs in WAL mode, so sessions read while a trade
+is written. Every query is one of the module-level SQL constants with ``?``
+parameters; sqlite3 keeps each connection's compiled statements in its
+statement cache, so each is prepared once per connection and then reused.
+Bulk loads (load_users, load_bets, add_trades, ...) use ``executemany`` in
+one transaction.
+
+Bets are still served from the in-memory BetStore of data/bets.py; the
+backend holds the catalog it is loaded from and the prices after trades.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from data.columnar import TIMESTAMP_FORMAT, TRADE_SCHEMA, ColumnarTable
+from data.store import BET_FIELDS
+from data.trade_analytics import to_epoch
+from data.trade_log import get_trade_log
+
+DEFAULT_POOL_SIZE = 8
+POOL_TIMEOUT = 10.0  # seconds a session waits for a free connection
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id       TEXT PRIMARY KEY,
+    full_name     TEXT NOT NULL,
+    username      TEXT NOT NULL,
+    date_of_birth TEXT,
+    profile_image TEXT
+);
+CREATE TABLE IF NOT EXISTS friends (
+    user_id   TEXT NOT NULL REFERENCES users (user_id),
+    friend_id TEXT NOT NULL REFERENCES users (user_id),
+    position  INTEGER NOT NULL,
+    PRIMARY KEY (user_id, friend_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS posts (
+    user_id   TEXT NOT NULL,
+    post_id   TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    content   TEXT NOT NULL,
+    image     TEXT,
+    PRIMARY KEY (user_id, post_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS trades (
+    trade_id  INTEGER PRIMARY KEY,
+    user_id   TEXT NOT NULL,
+    symbol    TEXT NOT NULL,
+    action    TEXT NOT NULL CHECK (action IN ('BUY', 'SELL')),
+    quantity  INTEGER NOT NULL,
+    price     REAL NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_by_user_time ON trades (user_id, timestamp);
+CREATE TABLE IF NOT EXISTS bets (
+    bet_id         TEXT PRIMARY KEY,
+    bet_name       TEXT NOT NULL,
+    bet_image_link TEXT,
+    yes_value      REAL NOT NULL,
+    no_value       REAL NOT NULL,
+    yes_percent    INTEGER NOT NULL,
+    no_percent     INTEGER NOT NULL,
+    rules          TEXT,
+    category       TEXT NOT NULL,
+    position       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bets_by_category ON bets (category, position);
+"""
+
+SELECT_USER = "SELECT user_id, full_name, username, date_of_birth, profile_image FROM users WHERE user_id = ?"
+SELECT_FRIENDS = "SELECT friend_id FROM friends WHERE user_id = ? ORDER BY position"
+COUNT_USERS = "SELECT COUNT(*) FROM users"
+UPSERT_USER = (
+    "INSERT INTO users (user_id, full_name, username, date_of_birth, profile_image) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (user_id) DO UPDATE SET full_name = excluded.full_name, username = excluded.username, "
+    "date_of_birth = excluded.date_of_birth, profile_image = excluded.profile_image"
+)
+DELETE_FRIENDS = "DELETE FROM friends WHERE user_id = ?"
+INSERT_FRIEND = "INSERT OR REPLACE INTO friends (user_id, friend_id, position) VALUES (?, ?, ?)"
+APPEND_FRIEND = (
+    "INSERT OR IGNORE INTO friends (user_id, friend_id, position) "
+    "VALUES (?1, ?2, (SELECT COALESCE(MAX(position) + 1, 0) FROM friends WHERE user_id = ?1))"
+)
+SELECT_FRIEND_EDGES = "SELECT user_id, friend_id FROM friends"
+SELECT_POSTS = "SELECT user_id, post_id, timestamp, content, image FROM posts WHERE user_id = ? ORDER BY timestamp, post_id"
+UPSERT_POST = "INSERT OR REPLACE INTO posts (user_id, post_id, timestamp, content, image) VALUES (?, ?, ?, ?, ?)"
+SELECT_TRADES = (
+    "SELECT trade_id, symbol, action, quantity, price, timestamp FROM trades "
+    "WHERE user_id = ? AND timestamp >= ? AND timestamp < ? ORDER BY trade_id"
+)
+INSERT_TRADE = "INSERT INTO trades (user_id, symbol, action, quantity, price, timestamp) VALUES (?, ?, ?, ?, ?, ?)"
+SELECT_BETS = f"SELECT {', '.join(BET_FIELDS)} FROM bets ORDER BY position"
+COUNT_BETS = "SELECT COUNT(*) FROM bets"
+UPSERT_BET = (
+    f"INSERT INTO bets ({', '.join(BET_FIELDS)}, position) VALUES ({', '.join('?' * len(BET_FIELDS))}, "
+    "(SELECT COALESCE(MAX(position) + 1, 0) FROM bets)) "
+    "ON CONFLICT (bet_id) DO UPDATE SET "
+    + ", ".join(f"{field} = excluded.{field}" for field in BET_FIELDS[1:])
+)
+UPDATE_BET_PRICES = "UPDATE bets SET yes_value = ?, no_value = ?, yes_percent = ?, no_percent = ? WHERE bet_id = ?"
+
+# Open time range for trade queries
+_MIN_TS, _MAX_TS = -(2 ** 63), 2 ** 63 - 1
+
+ACTIONS = ("BUY", "SELL")
+
+
+def _check_trade(trade):
+    user_id, symbol, action, quantity, price, timestamp = trade
+    if action not in ACTIONS:
+        raise ValueError(f"Invalid action: {action}")
+    return user_id, symbol, action, int(quantity), float(price), to_epoch(time.time() if timestamp is None else timestamp)
+
+
+def _format_ts(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+class StorageBackend:
+    """What data_fetcher and data/bets.py need from a store.
+
+    Users are dicts with full_name, username, date_of_birth, profile_image
+    and friends (a list of user ids), keyed by user id. Trades are
+    ``(user_id, symbol, action, quantity, price, timestamp)`` tuples on the
+    way in and the dicts of data_fetcher.get_user_trades on the way out.
+    """
+
+    def get_user(self, user_id):
+        """The user dict (with ``friends``), or None."""
+        raise NotImplementedError
+
+    def count_users(self):
+        raise NotImplementedError
+
+    def load_users(self, users):
+        """Insert or replace users from a ``{user_id: user dict}`` mapping."""
+        raise NotImplementedError
+
+    def get_friend_edges(self):
+        """Every ``(user_id, friend_id)`` pair, for building the friend graph."""
+        raise NotImplementedError
+
+    def add_friends(self, pairs):
+        """Append ``(user_id, friend_id)`` pairs to the users' friend lists
+        (pairs already present are skipped)."""
+        raise NotImplementedError
+
+    def get_user_posts(self, user_id):
+        raise NotImplementedError
+
+    def add_posts(self, posts):
+        """Insert or replace post dicts (user_id, post_id, timestamp, content, image)."""
+        raise NotImplementedError
+
+    def get_user_trades(self, user_id, start=None, end=None, columnar=False):
+        """The user's trades with ``start <= timestamp < end``, oldest first;
+        a ColumnarTable when ``columnar``."""
+        raise NotImplementedError
+
+    def add_trades(self, trades):
+        """Append trade tuples in one commit; returns their trade ids.
+
+        Raises ValueError for an unknown action.
+        """
+        raise NotImplementedError
+
+    def get_bets(self):
+        """Every bet dict, in catalog order."""
+        raise NotImplementedError
+
+    def count_bets(self):
+        raise NotImplementedError
+
+    def load_bets(self, bets):
+        """Insert or replace bet dicts; new bets go to the end of the catalog."""
+        raise NotImplementedError
+
+    def save_bet_prices(self, bets):
+        """Store the yes/no value and percent of each bet (dict or Bet)."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryBackend(StorageBackend):
+    """Everything in process memory, except trades, which go to the trade log.
+
+    trade_log: a TradeLog (default: data.trade_log.get_trade_log())
+    """
+
+    def __init__(self, trade_log=None):
+        self._trade_log = trade_log
+        self._users = {}
+        self._posts = {}
+        self._bets = {}
+        self._lock = threading.Lock()
+
+    @property
+    def trade_log(self):
+        if self._trade_log is None:
+            self._trade_log = get_trade_log()
+        return self._trade_log
+
+    def get_user(self, user_id):
+        return self._users.get(user_id)
+
+    def count_users(self):
+        return len(self._users)
+
+    def load_users(self, users):
+        with self._lock:
+            for user_id, user in users.items():
+                self._users[user_id] = dict(user, friends=list(user.get('friends', ())))
+
+    def get_friend_edges(self):
+        return [(user_id, friend_id) for user_id, user in self._users.items() for friend_id in user['friends']]
+
+    def add_friends(self, pairs):
+        with self._lock:
+            for user_id, friend_id in pairs:
+                friends = self._users[user_id]['friends']
+                if friend_id not in friends:
+                    # Copy on write: returned profiles may still hold the old list
+                    self._users[user_id] = dict(self._users[user_id], friends=friends + [friend_id])
+
+    def get_user_posts(self, user_id):
+        with self._lock:
+            posts = [dict(post) for post in self._posts.get(user_id, {}).values()]
+        return sorted(posts, key=lambda post: (post['timestamp'], post['post_id']))
+
+    def add_posts(self, posts):
+        with self._lock:
+            for post in posts:
+                self._posts.setdefault(post['user_id'], {})[post['post_id']] = dict(post)
+
+    def get_user_trades(self, user_id, start=None, end=None, columnar=False):
+        log = self.trade_log
+        trades = log.scan(user_id, start, end)
+        return log.to_table(trades) if columnar else log.to_records(trades)
+
+    def add_trades(self, trades):
+        return [f"trade{seq}" for seq in self.trade_log.append_many(trades)]
+
+    def get_bets(self):
+        return [dict(bet) for bet in self._bets.values()]
+
+    def count_bets(self):
+        return len(self._bets)
+
+    def load_bets(self, bets):
+        with self._lock:
+            for bet in bets:
+                self._bets[bet['bet_id']] = {field: bet.get(field) for field in BET_FIELDS}
+
+    def save_bet_prices(self, bets):
+        with self._lock:
+            for bet in bets:
+                stored = self._bets.get(bet['bet_id'])
+                if stored is not None:
+                    for field in ('yes_value', 'no_value', 'yes_percent', 'no_percent'):
+                        stored[field] = bet[field]
+
+
+class PoolTimeout(TimeoutError):
+    """No pooled connection became free within the pool's timeout."""
+
+
+class ConnectionPool:
+    """A fixed-size, thread-safe pool of SQLite connections to one database.
+
+    Connections are opened on demand up to ``size``. Idle ones are handed out
+    most recently used first (their page and statement caches are warmest);
+    when none is idle, sessions queue and get returned connections in
+    arrival order, so a busy session cannot starve the others.
+
+        with pool.connection() as conn:
+            conn.execute(...)
+
+    path:    database file (":memory:" is not supported: each connection
+             would get its own database)
+    size:    most connections open at once
+    timeout: seconds to wait for a free connection before PoolTimeout
+    """
+
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, timeout=POOL_TIMEOUT):
+        if path == ":memory:":
+            raise ValueError("ConnectionPool needs a database file, not :memory:")
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle = []           # stack of idle connections
+        self._waiters = deque()   # [event, connection] per queued session
+        self._opened = 0
+        self._closed = False
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def _acquire(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._idle and not self._waiters:
+                return self._idle.pop()
+            if self._opened < self.size:
+                self._opened += 1
+                waiter = None
+            else:
+                waiter = [threading.Event(), None]
+                self._waiters.append(waiter)
+        if waiter is None:
+            try:
+                return self._connect()
+            except BaseException:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        start = time.perf_counter()
+        waiter[0].wait(self.timeout)
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += time.perf_counter() - start
+            if waiter[1] is None:
+                self._waiters.remove(waiter)
+                raise PoolTimeout(f"No free connection to {self.path} after {self.timeout} s")
+        return waiter[1]
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter[1] = conn
+                waiter[0].set()
+            elif self._closed:
+                conn.close()
+                self._opened -= 1
+            else:
+                self._idle.append(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool on exit.
+
+        A transaction left open by an exception is rolled back first.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._opened,
+                'idle': len(self._idle),
+                'waiting': len(self._waiters),
+                'waits': self.waits,
+                'wait_ms': self.wait_seconds * 1e3,
+            }
+
+    def close(self):
+        """Close the idle connections; borrowed ones are closed as they return."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+        for conn in idle:
+            conn.close()
+
+
+class SQLiteBackend(StorageBackend):
+    """Storage in an SQLite database file, shared through a ConnectionPool."""
+
+    def __init__(self, path, pool_size=DEFAULT_POOL_SIZE, timeout=POOL_TIMEOUT):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.pool = ConnectionPool(path, pool_size, timeout)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so reads inside the
+        # transaction see no concurrent writer
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    # ---- users ----
+
+    def get_user(self, user_id):
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_USER, (user_id,)).fetchone()
+            if row is None:
+                return None
+            friends = [friend_id for friend_id, in conn.execute(SELECT_FRIENDS, (user_id,))]
+        user_id, full_name, username, date_of_birth, profile_image = row
+        return {
+            'full_name': full_name,
+            'username': username,
+            'date_of_birth': date_of_birth,
+            'profile_image': profile_image,
+            'friends': friends,
+        }
+
+    def count_users(self):
+        with self.pool.connection() as conn:
+            return conn.execute(COUNT_USERS).fetchone()[0]
+
+    def load_users(self, users):
+        rows = [
+            (user_id, user['full_name'], user['username'], user.get('date_of_birth'), user.get('profile_image'))
+            for user_id, user in users.items()
+        ]
+        friends = [
+            (user_id, friend_id, position)
+            for user_id, user in users.items()
+            for position, friend_id in enumerate(user.get('friends', ()))
+        ]
+        with self._transaction() as conn:
+            conn.executemany(UPSERT_USER, rows)
+            conn.executemany(DELETE_FRIENDS, [(user_id,) for user_id in users])
+            # Friends may reference users later in the same load
+            conn.execute("PRAGMA defer_foreign_keys = ON")
+            conn.executemany(INSERT_FRIEND, friends)
+
+    def get_friend_edges(self):
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_FRIEND_EDGES).fetchall()
+
+    def add_friends(self, pairs):
+        with self._transaction() as conn:
+            conn.executemany(APPEND_FRIEND, list(pairs))
+
+    # ---- posts ----
+
+    def get_user_posts(self, user_id):
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_POSTS, (user_id,)).fetchall()
+        names = ('user_id', 'post_id', 'timestamp', 'content', 'image')
+        return [dict(zip(names, row)) for row in rows]
+
+    def add_posts(self, posts):
+        rows = [(p['user_id'], p['post_id'], p['timestamp'], p['content'], p.get('image')) for p in posts]
+        with self._transaction() as conn:
+            conn.executemany(UPSERT_POST, rows)
+
+    # ---- trades ----
+
+    def get_user_trades(self, user_id, start=None, end=None, columnar=False):
+        start = _MIN_TS if start is None else to_epoch(start)
+        end = _MAX_TS if end is None else to_epoch(end)
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_TRADES, (user_id, start, end)).fetchall()
+        trades = [
+            {
+                'trade_id': f"trade{trade_id}",
+                'symbol': symbol,
+                'action': action,
+                'quantity': quantity,
+                'price': price,
+                'timestamp': timestamp if columnar else _format_ts(timestamp),
+            }
+            for trade_id, symbol, action, quantity, price, timestamp in rows
+        ]
+        return ColumnarTable.from_records(trades, TRADE_SCHEMA) if columnar else trades
+
+    def add_trades(self, trades):
+        rows = [_check_trade(trade) for trade in trades]
+        with self._transaction() as conn:
+            if len(rows) == 1:
+                return [f"trade{conn.execute(INSERT_TRADE, rows[0]).lastrowid}"]
+            # executemany does not report row ids; they are consecutive from
+            # MAX + 1 since the transaction holds the write lock
+            first = conn.execute("SELECT COALESCE(MAX(trade_id), 0) + 1 FROM trades").fetchone()[0]
+            conn.executemany(INSERT_TRADE, rows)
+        return [f"trade{first + i}" for i in range(len(rows))]
+
+    # ---- bets ----
+
+    def get_bets(self):
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_BETS).fetchall()
+        return [dict(zip(BET_FIELDS, row)) for row in rows]
+
+    def count_bets(self):
+        with self.pool.connection() as conn:
+            return conn.execute(COUNT_BETS).fetchone()[0]
+
+    def load_bets(self, bets):
+        rows = [tuple(bet.get(field) for field in BET_FIELDS) for bet in bets]
+        with self._transaction() as conn:
+            conn.executemany(UPSERT_BET, rows)
+
+    def save_bet_prices(self, bets):
+        rows = [(b['yes_value'], b['no_value'], b['yes_percent'], b['no_percent'], b['bet_id']) for b in bets]
+        with self._transaction() as conn:
+            conn.executemany(UPDATE_BET_PRICES, rows)
+
+    def close(self):
+        self.pool.close()
+
+
+class LatencyBackend(StorageBackend):
+    """Another backend behind a delay on every call, to stand in for a
+    remote store when benchmarking or testing concurrent fetches.
+
+    backend: the backend that answers
+    latency: seconds each call sleeps first
+    jitter:  up to this many more seconds, uniformly at random
+    """
+
+    def __init__(self, backend, latency=0.05, jitter=0.0, seed=None):
+        self.backend = backend
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def _delay(self):
+        time.sleep(self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0))
+
+    def get_user(self, user_id):
+        self._delay()
+        return self.backend.get_user(user_id)
+
+    def count_users(self):
+        self._delay()
+        return self.backend.count_users()
+
+    def load_users(self, users):
+        self._delay()
+        self.backend.load_users(users)
+
+    def get_friend_edges(self):
+        self._delay()
+        return self.backend.get_friend_edges()
+
+    def add_friends(self, pairs):
+        self._delay()
+        self.backend.add_friends(pairs)
+
+    def get_user_posts(self, user_id):
+        self._delay()
+        return self.backend.get_user_posts(user_id)
+
+    def add_posts(self, posts):
+        self._delay()
+        self.backend.add_posts(posts)
+
+    def get_user_trades(self, user_id, start=None, end=None, columnar=False):
+        self._delay()
+        return self.backend.get_user_trades(user_id, start, end, columnar)
+
+    def add_trades(self, trades):
+        self._delay()
+        return self.backend.add_trades(trades)
+
+    def get_bets(self):
+        self._delay()
+        return self.backend.get_bets()
+
+    def count_bets(self):
+        self._delay()
+        return self.backend.count_bets()
+
+    def load_bets(self, bets):
+        self._delay()
+        self.backend.load_bets(bets)
+
+    def save_bet_prices(self, bets):
+        self._delay()
+        self.backend.save_bet_prices(bets)
+
+    def close(self):
+        self.backend.close()
+
+
+def open_backend(spec):
+    """A backend from an AIRBETS_STORAGE value ("memory", "sqlite:<path>"
+    or "latency:<ms>:<spec>").
+
+    Raises ValueError for anything else.
+    """
+    if spec in ("", "memory"):
+        return MemoryBackend()
+    if spec.startswith("sqlite:"):
+        return SQLiteBackend(spec[len("sqlite:"):])
+    if spec.startswith("latency:"):
+        milliseconds, _, inner = spec[len("latency:"):].partition(":")
+        try:
+            latency = float(milliseconds) / 1000
+        except ValueError:
+            raise ValueError(f"Unknown AIRBETS_STORAGE: {spec!r}") from None
+        return LatencyBackend(open_backend(inner), latency)
+    raise ValueError(f"Unknown AIRBETS_STORAGE: {spec!r}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The process-wide backend configured by AIRBETS_STORAGE, opened on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = open_backend(os.environ.get("AIRBETS_STORAGE", "memory"))
+    return _backend
@@ -0,0 +1,303 @@
+"""
+Indexed in-memory bet store.
+
+Bets are held as compact ``Bet`` records with secondary indexes by bet_id,
+category and implied-probability bucket, plus sorted indexes for ranking by
+a numeric field. Lookups return views or small slices instead of copying the
+whole catalog, so they stay cheap at 100k+ markets. ``page`` walks the
+catalog (or one category) in insertion order with an opaque cursor.
+Listeners registered with ``add_listener`` are told about every change,
+so derived indexes (e.g. data/search.py) stay in step.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+BET_FIELDS = (
+    "bet_id",
+    "bet_name",
+    "bet_image_link",
+    "yes_value",
+    "no_value",
+    "yes_percent",
+    "no_percent",
+    "rules",
+    "category",
+)
+
+# Fields top_n_by can rank on
+NUMERIC_FIELDS = ("yes_value", "no_value", "yes_percent", "no_percent")
+
+# yes_percent is bucketed into 10-point bands: 0 = [0, 10), ..., 9 = [90, 100]
+PROBABILITY_BUCKETS = 10
+
+
+def probability_bucket(yes_percent):
+    """Return the implied-probability bucket (0-9) for a Yes percentage."""
+    bucket = int(yes_percent) * PROBABILITY_BUCKETS // 100
+    return min(max(bucket, 0), PROBABILITY_BUCKETS - 1)
+
+
+class Bet:
+    """A single market. Supports ``bet["field"]`` and ``bet.get("field")`` so it
+    can stand in for the bet dicts the pages and modules already use."""
+
+    __slots__ = BET_FIELDS
+
+    def __init__(self, bet_id, bet_name, bet_image_link, yes_value, no_value, yes_percent, no_percent, rules, category):
+        self.bet_id = bet_id
+        self.bet_name = bet_name
+        self.bet_image_link = bet_image_link
+        self.yes_value = yes_value
+        self.no_value = no_value
+        self.yes_percent = yes_percent
+        self.no_percent = no_percent
+        self.rules = rules
+        self.category = category
+
+    @classmethod
+    def from_dict(cls, bet):
+        return cls(**{field: bet.get(field) for field in BET_FIELDS})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in BET_FIELDS}
+
+    def __getitem__(self, key):
+        if key not in BET_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in BET_FIELDS else default
+
+    def keys(self):
+        return BET_FIELDS
+
+    def __eq__(self, other):
+        if not isinstance(other, Bet):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in BET_FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Bet({self.bet_id!r}, yes={self.yes_value}, no={self.no_value})"
+
+
+class BetStore:
+    """Bets indexed by id, category, probability bucket and numeric field.
+
+    Lookups return live views of the indexes; do not add or remove bets while
+    iterating one. Mutations are serialized by an internal lock so a feed
+    thread can update prices while sessions read.
+    """
+
+    def __init__(self, bets=()):
+        self._lock = threading.RLock()
+        self._bets = {}
+        self._by_category = {}
+        self._by_bucket = {b: {} for b in range(PROBABILITY_BUCKETS)}
+        # field -> sorted list of (value, bet_id), built on first top_n_by
+        self._sorted = {}
+        # Paging: every bet gets an increasing sequence number on insert, and
+        # each category (None = all bets) keeps its sequence numbers sorted
+        self._next_seq = 0
+        self._seq = {}
+        self._by_seq = {}
+        self._order = {None: []}
+        self._listeners = []
+        for bet in bets:
+            self.add(bet)
+
+    @classmethod
+    def from_dicts(cls, bets):
+        return cls(Bet.from_dict(bet) for bet in bets)
+
+    # ---- lookups ----
+
+    def __len__(self):
+        return len(self._bets)
+
+    def __iter__(self):
+        return iter(self._bets.values())
+
+    def __contains__(self, bet_id):
+        return bet_id in self._bets
+
+    def all_bets(self):
+        """Every bet, in insertion order (a view, not a copy)."""
+        return self._bets.values()
+
+    def get_bet(self, bet_id, default=None):
+        """Return the bet with this id in O(1), or ``default``."""
+        return self._bets.get(bet_id, default)
+
+    def bets_in_category(self, category):
+        """Bets in one category, in insertion order (a view, not a copy)."""
+        bets = self._by_category.get(category)
+        return bets.values() if bets is not None else {}.values()
+
+    def categories(self):
+        return self._by_category.keys()
+
+    def bets_in_bucket(self, bucket):
+        """Bets whose yes_percent falls in the given probability bucket."""
+        return self._by_bucket[bucket].values()
+
+    def top_n_by(self, field, n, descending=True):
+        """The ``n`` bets with the highest (or lowest) ``field`` value.
+
+        The sorted index is built once in O(n log n) and then maintained on
+        every update, so each call only slices ``n`` entries off one end.
+        """
+        if field not in NUMERIC_FIELDS:
+            raise ValueError(f"Cannot rank bets by {field!r}")
+        with self._lock:
+            index = self._sorted.get(field)
+            if index is None:
+                index = sorted((getattr(bet, field), bet.bet_id) for bet in self._bets.values())
+                self._sorted[field] = index
+            keys = index[-n:][::-1] if descending else index[:n]
+        return [self._bets[bet_id] for _, bet_id in keys]
+
+    def page(self, category=None, after=None, limit=20):
+        """Return ``(bets, next_cursor)`` for one page in insertion order.
+
+        category: restrict to one category (None for every bet)
+        after:    cursor returned by the previous call (None for the first page)
+        limit:    page size
+
+        ``next_cursor`` is None on the last page. Cost is O(log n + limit).
+        """
+        with self._lock:
+            order = self._order.get(category, ())
+            start = bisect_right(order, after) if after is not None else 0
+            seqs = order[start:start + limit]
+            bets = [self._by_seq[seq] for seq in seqs]
+            more = start + limit < len(order)
+        return bets, (seqs[-1] if more and seqs else None)
+
+    def count(self, category=None):
+        """Number of bets in a category (None for every bet)."""
+        return len(self._order.get(category, ()))
+
+    # ---- change listeners ----
+
+    def add_listener(self, listener):
+        """Call ``listener(event, bet, fields)`` after every change.
+
+        event is "add", "remove" or "update"; fields is the dict of changed
+        fields for "update" and None otherwise. Every bet already in the
+        store is replayed as an "add" first, under the same lock, so no
+        change is missed. Listeners run with the store locked and must not
+        mutate it.
+        """
+        with self._lock:
+            for bet in self._bets.values():
+                listener("add", bet, None)
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, bet, fields=None):
+        for listener in self._listeners:
+            listener(event, bet, fields)
+
+    # ---- mutations ----
+
+    def add(self, bet):
+        """Insert a bet (a ``Bet`` or a bet dict), replacing any with the same id."""
+        if not isinstance(bet, Bet):
+            bet = Bet.from_dict(bet)
+        with self._lock:
+            if bet.bet_id in self._bets:
+                self.remove(bet.bet_id)
+            self._bets[bet.bet_id] = bet
+            self._by_category.setdefault(bet.category, {})[bet.bet_id] = bet
+            seq = self._next_seq
+            self._next_seq += 1
+            self._seq[bet.bet_id] = seq
+            self._by_seq[seq] = bet
+            self._order[None].append(seq)
+            self._order.setdefault(bet.category, []).append(seq)
+            self._by_bucket[probability_bucket(bet.yes_percent)][bet.bet_id] = bet
+            for field, index in self._sorted.items():
+                insort(index, (getattr(bet, field), bet.bet_id))
+            self._notify("add", bet)
+        return bet
+
+    def remove(self, bet_id):
+        """Remove and return a bet; raises KeyError if it is unknown."""
+        with self._lock:
+            bet = self._bets.pop(bet_id)
+            category = self._by_category[bet.category]
+            del category[bet_id]
+            if not category:
+                del self._by_category[bet.category]
+            del self._by_bucket[probability_bucket(bet.yes_percent)][bet_id]
+            for field, index in self._sorted.items():
+                self._discard_sorted(index, getattr(bet, field), bet_id)
+            seq = self._seq.pop(bet_id)
+            del self._by_seq[seq]
+            self._discard_seq(None, seq)
+            self._discard_seq(bet.category, seq)
+            self._notify("remove", bet)
+        return bet
+
+    def update(self, bet_id, **fields):
+        """Change fields of a bet in place and keep every index in step."""
+        unknown = set(fields) - set(BET_FIELDS)
+        if unknown or "bet_id" in fields:
+            raise ValueError(f"Cannot update fields: {sorted(unknown | ({'bet_id'} & set(fields)))}")
+        with self._lock:
+            bet = self._bets[bet_id]
+            if "category" in fields and fields["category"] != bet.category:
+                category = self._by_category[bet.category]
+                del category[bet_id]
+                if not category:
+                    del self._by_category[bet.category]
+                self._by_category.setdefault(fields["category"], {})[bet_id] = bet
+                seq = self._seq[bet_id]
+                self._discard_seq(bet.category, seq)
+                insort(self._order.setdefault(fields["category"], []), seq)
+            if "yes_percent" in fields:
+                old_bucket = probability_bucket(bet.yes_percent)
+                new_bucket = probability_bucket(fields["yes_percent"])
+                if old_bucket != new_bucket:
+                    del self._by_bucket[old_bucket][bet_id]
+                    self._by_bucket[new_bucket][bet_id] = bet
+            for field, value in fields.items():
+                index = self._sorted.get(field)
+                if index is not None:
+                    self._discard_sorted(index, getattr(bet, field), bet_id)
+                    insort(index, (value, bet_id))
+                setattr(bet, field, value)
+            self._notify("update", bet, fields)
+        return bet
+
+    def update_many(self, updates):
+        """Apply ``(bet_id, fields)`` pairs under one lock acquisition.
+
+        Unknown bet ids are skipped; returns how many updates were applied.
+        """
+        applied = 0
+        with self._lock:
+            for bet_id, fields in updates:
+                if bet_id in self._bets:
+                    self.update(bet_id, **fields)
+                    applied += 1
+        return applied
+
+    def _discard_seq(self, category, seq):
+        order = self._order[category]
+        del order[bisect_left(order, seq)]
+        if not order and category is not None:
+            del self._order[category]
+
+    @staticmethod
+    def _discard_sorted(index, value, bet_id):
+        i = bisect_left(index, (value, bet_id))
+        if i < len(index) and index[i] == (value, bet_id):
+            del index[i]
@@ -0,0 +1,290 @@
+"""
+Sensor time series in contiguous typed arrays.
+
+A Series holds one sensor's readings as two growable NumPy arrays (float64
+epoch seconds and float64 values) kept sorted by time, so a time range is a
+binary search and a zero-copy slice. Appends are amortized O(1); a batch
+that arrives out of order is merged in.
+
+On top of that slice a series can be
+
+- downsampled to a target point count for charting: ``lttb`` (Largest
+  Triangle Three Buckets, keeps the visual shape) or ``minmax`` (the lowest
+  and highest reading of each bucket, keeps every spike);
+- aggregated over fixed windows (count/mean/min/max per N seconds);
+- streamed in chunks by a generator, so a long workout can be fed to the UI
+  without copying it.
+
+WorkoutSeries groups the series of one workout by sensor type:
+
+    workout = WorkoutSeries.from_records(get_user_sensor_data(user_id, workout_id))
+    times, values = workout['heart_rate'].downsample(500)
+    windows = workout['heart_rate'].aggregate(60)       # per-minute mean/max
+    for times, values in workout['heart_rate'].iter_chunks(10_000):
+        ...
+"""
+
+import threading
+
+import numpy as np
+
+from data.columnar import SENSOR_SCHEMA, ColumnarTable
+
+TIME_DTYPE = np.float64
+VALUE_DTYPE = np.float64
+INITIAL_CAPACITY = 1024
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def lttb_indices(times, values, points):
+    """Indices of the ``points`` readings Largest Triangle Three Buckets keeps.
+
+    The first and last readings are always kept; the rest are split into
+    ``points - 2`` buckets of equal count and from each the reading forming
+    the largest triangle with the previously kept one and the next bucket's
+    average is picked.
+    """
+    n = len(times)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.array([0, n - 1][:max(points, 0)], dtype=np.int64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Average of every bucket; the bucket after the last one is the last reading
+    avg_t = np.append(np.add.reduceat(times[:n - 1], edges[:-1]) / counts, times[-1])
+    avg_v = np.append(np.add.reduceat(values[:n - 1], edges[:-1]) / counts, values[-1])
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for bucket in range(points - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ta, va = times[a], values[a]
+        area = np.abs((ta - avg_t[bucket + 1]) * (values[lo:hi] - va)
+                      - (ta - times[lo:hi]) * (avg_v[bucket + 1] - va))
+        a = lo + int(area.argmax())
+        kept[bucket + 1] = a
+    return kept
+
+
+def minmax_indices(values, points):
+    """Indices of the lowest and highest reading of each of ``points // 2``
+    equal-count buckets, plus the first and last reading, in order."""
+    n = len(values)
+    if points >= n:
+        return np.arange(n)
+    size = -(-n // max(1, points // 2))
+    full = n // size
+    # Full buckets as rows of a (zero-copy) 2-D view; the short tail on its own
+    rows = values[:full * size].reshape(full, size)
+    offsets = np.arange(full) * size
+    lows = [offsets + rows.argmin(axis=1)]
+    highs = [offsets + rows.argmax(axis=1)]
+    if full * size < n:
+        tail = values[full * size:]
+        lows.append([full * size + int(tail.argmin())])
+        highs.append([full * size + int(tail.argmax())])
+    lows, highs = np.concatenate(lows), np.concatenate(highs)
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+class Series:
+    """One sensor's readings, sorted by time, in growable typed arrays.
+
+    Appends take a lock; readers get views of the readings present when they
+    asked, which later appends never modify.
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._times = np.empty(capacity, dtype=TIME_DTYPE)
+        self._values = np.empty(capacity, dtype=VALUE_DTYPE)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_arrays(cls, times, values):
+        """A series of copies of the given readings (in any order)."""
+        series = cls(max(INITIAL_CAPACITY, len(times)))
+        series.extend(times, values)
+        return series
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return self._times.nbytes + self._values.nbytes
+
+    def _reserve(self, extra):
+        # Caller holds the lock
+        needed = self._size + extra
+        if needed > len(self._times):
+            capacity = max(needed, 2 * len(self._times))
+            for name in ('_times', '_values'):
+                old = getattr(self, name)
+                new = np.empty(capacity, dtype=old.dtype)
+                new[:self._size] = old[:self._size]
+                setattr(self, name, new)
+
+    def append(self, timestamp, value):
+        """Add one reading (epoch seconds, value)."""
+        with self._lock:
+            size = self._size
+            if size and timestamp < self._times[size - 1]:
+                self._merge(np.array([timestamp], dtype=TIME_DTYPE), np.array([value], dtype=VALUE_DTYPE))
+                return
+            self._reserve(1)
+            self._times[size] = timestamp
+            self._values[size] = value
+            self._size = size + 1
+
+    def extend(self, times, values):
+        """Add a batch of readings; they need not be sorted."""
+        times = np.asarray(times, dtype=TIME_DTYPE)
+        values = np.asarray(values, dtype=VALUE_DTYPE)
+        if len(times) != len(values):
+            raise ValueError("times and values must have the same length")
+        if not len(times):
+            return
+        if len(times) > 1 and (np.diff(times) < 0).any():
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        with self._lock:
+            size = self._size
+            if size and times[0] < self._times[size - 1]:
+                self._merge(times, values)
+                return
+            self._reserve(len(times))
+            self._times[size:size + len(times)] = times
+            self._values[size:size + len(values)] = values
+            self._size = size + len(times)
+
+    def _merge(self, times, values):
+        # Caller holds the lock; sorted late readings go into fresh arrays so
+        # views handed out earlier keep seeing the old ones
+        size = self._size
+        old_times = self._times[:size]
+        first = int(np.searchsorted(old_times, times[0], side='right'))
+        merged_t = np.concatenate((old_times[first:], times))
+        order = np.argsort(merged_t, kind='stable')
+        capacity = max(len(self._times), size + len(times))
+        new_times = np.empty(capacity, dtype=TIME_DTYPE)
+        new_values = np.empty(capacity, dtype=VALUE_DTYPE)
+        new_times[:first] = old_times[:first]
+        new_values[:first] = self._values[:first]
+        new_times[first:size + len(times)] = merged_t[order]
+        new_values[first:size + len(times)] = np.concatenate((self._values[first:size], values))[order]
+        self._times, self._values = new_times, new_values
+        self._size = size + len(times)
+
+    def arrays(self, start=None, end=None):
+        """``(times, values)`` views of the readings with start <= time < end."""
+        with self._lock:
+            times = self._times[:self._size]
+            values = self._values[:self._size]
+        lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side='left'))
+        return times[lo:hi], values[lo:hi]
+
+    def time_range(self):
+        """``(first, last)`` timestamp, or None when empty."""
+        times, _ = self.arrays()
+        return (float(times[0]), float(times[-1])) if len(times) else None
+
+    def downsample(self, points, method='lttb', start=None, end=None):
+        """``(times, values)`` of at most ``points`` readings (``minmax`` may
+        add the first and last) chosen by ``method`` ('lttb' or 'minmax')."""
+        times, values = self.arrays(start, end)
+        if method == 'lttb':
+            kept = lttb_indices(times, values, points)
+        elif method == 'minmax':
+            kept = minmax_indices(values, points)
+        else:
+            raise ValueError(f"Unknown downsampling method: {method}")
+        return times[kept], values[kept]
+
+    def aggregate(self, window, start=None, end=None):
+        """Per-window statistics of the readings, for windows of ``window``
+        seconds aligned to the epoch. Windows without readings are left out.
+
+        Returns a dict of equal-length arrays: start, count, mean, min, max.
+        """
+        if window <= 0:
+            raise ValueError("window must be positive")
+        times, values = self.arrays(start, end)
+        if not len(times):
+            empty = np.empty(0)
+            return {'start': empty, 'count': np.empty(0, dtype=np.int64), 'mean': empty, 'min': empty, 'max': empty}
+        buckets = np.floor(times / window)
+        starts = np.flatnonzero(np.diff(buckets)) + 1
+        starts = np.concatenate(([0], starts))
+        counts = np.diff(np.append(starts, len(values)))
+        return {
+            'start': buckets[starts] * window,
+            'count': counts,
+            'mean': np.add.reduceat(values, starts) / counts,
+            'min': np.minimum.reduceat(values, starts),
+            'max': np.maximum.reduceat(values, starts),
+        }
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE, start=None, end=None):
+        """Yield ``(times, values)`` views of up to ``chunk_size`` readings,
+        oldest first, of the readings present when iteration starts."""
+        times, values = self.arrays(start, end)
+        for offset in range(0, len(times), chunk_size):
+            yield times[offset:offset + chunk_size], values[offset:offset + chunk_size]
+
+
+class WorkoutSeries:
+    """The Series of one workout, by sensor type."""
+
+    def __init__(self, series=None):
+        self._series = dict(series or {})
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_table(cls, table):
+        """Group a SENSOR_SCHEMA ColumnarTable into one series per sensor type."""
+        codes = table['sensor_type']
+        times = table['timestamp'].astype(TIME_DTYPE)
+        order = np.lexsort((times, codes))
+        codes = codes[order]
+        bounds = np.searchsorted(codes, np.arange(len(table.categories['sensor_type']) + 1))
+        series = {}
+        for code, sensor_type in enumerate(table.categories['sensor_type']):
+            rows = order[bounds[code]:bounds[code + 1]]
+            if len(rows):
+                series[sensor_type] = Series.from_arrays(times[rows], table['data'][rows])
+        return cls(series)
+
+    @classmethod
+    def from_records(cls, records):
+        """Group get_user_sensor_data rows (sensor_type, timestamp, data)."""
+        return cls.from_table(ColumnarTable.from_records(records, SENSOR_SCHEMA))
+
+    def __getitem__(self, sensor_type):
+        return self._series[sensor_type]
+
+    def __contains__(self, sensor_type):
+        return sensor_type in self._series
+
+    def sensor_types(self):
+        return sorted(self._series)
+
+    def series(self, sensor_type):
+        """The sensor's Series, created empty if it has none yet."""
+        with self._lock:
+            series = self._series.get(sensor_type)
+            if series is None:
+                series = self._series[sensor_type] = Series()
+            return series
+
+    def append(self, sensor_type, timestamp, value):
+        self.series(sensor_type).append(timestamp, value)
+
+    def downsample(self, points, method='lttb', start=None, end=None):
+        """``{sensor_type: (times, values)}`` downsampled to ``points`` each."""
+        return {
+            sensor_type: self._series[sensor_type].downsample(points, method, start, end)
+            for sensor_type in self.sensor_types()
+        }
@@ -0,0 +1,237 @@
+"""
+Incremental trade analytics.
+
+Running aggregates are updated in O(1) as each trade arrives, per user, per
+symbol and per action (BUY/SELL), so metrics never need a pass over the full
+trade history. Besides count/volume/notional this tracks net position,
+VWAP, realized P&L (average-cost method) and volume per time bucket.
+
+    analytics = TradeAnalytics()
+    analytics.add_trade('user1', trade)     # a get_user_trades-style dict
+    analytics.metrics('user1')              # dict, see TradeStats.as_dict
+"""
+
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+
+ACTIONS = ("BUY", "SELL")
+
+# Default width of the volume_by_bucket buckets, in seconds
+DEFAULT_BUCKET_SECONDS = 3600
+
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp(timestamp):
+    # 'YYYY-MM-DD HH:MM:SS' strings (as in get_user_trades) are taken as UTC
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def to_epoch(timestamp):
+    """Return ``timestamp`` (epoch seconds or an ISO string) as int seconds."""
+    if isinstance(timestamp, str):
+        return _parse_timestamp(timestamp)
+    return int(timestamp)
+
+
+def apply_fill(position, avg_cost, signed_quantity, price):
+    """Average-cost bookkeeping of one fill (positive buys, negative sells).
+
+    Returns ``(position, avg_cost, realized P&L)`` after the fill: adding
+    to a position blends its average cost, reducing it realizes P&L, and
+    flipping it opens the remainder at ``price``. A fill of 0 changes
+    nothing.
+    """
+    if signed_quantity == 0:
+        return position, avg_cost, 0.0
+    if position == 0 or (position > 0) == (signed_quantity > 0):
+        # Opening or adding to a position: blend the average cost
+        new_position = position + signed_quantity
+        return new_position, (avg_cost * abs(position) + price * abs(signed_quantity)) / abs(new_position), 0.0
+
+    # Reducing, closing or flipping the position
+    closed = min(abs(signed_quantity), abs(position))
+    realized = (price - avg_cost) * closed * (1 if position > 0 else -1)
+    new_position = position + signed_quantity
+    if new_position == 0:
+        avg_cost = 0.0
+    elif (new_position > 0) != (position > 0):
+        avg_cost = price
+    return new_position, avg_cost, realized
+
+
+class RunningTotals:
+    """Count, volume and notional of a stream of fills."""
+
+    __slots__ = ("trades", "volume", "notional")
+
+    def __init__(self):
+        self.trades = 0
+        self.volume = 0
+        self.notional = 0.0
+
+    def add(self, quantity, notional):
+        self.trades += 1
+        self.volume += quantity
+        self.notional += notional
+
+    @property
+    def vwap(self):
+        return self.notional / self.volume if self.volume else None
+
+    def as_dict(self):
+        return {'trades': self.trades, 'volume': self.volume, 'value': self.notional, 'vwap': self.vwap}
+
+
+class SymbolStats:
+    """Aggregates and the open position for one symbol."""
+
+    __slots__ = ("totals", "buys", "sells", "position", "avg_cost", "realized_pnl")
+
+    def __init__(self):
+        self.totals = RunningTotals()
+        self.buys = RunningTotals()
+        self.sells = RunningTotals()
+        self.position = 0      # shares held; negative when short
+        self.avg_cost = 0.0    # average entry price of the open position
+        self.realized_pnl = 0.0
+
+    def fill(self, signed_quantity, price):
+        """Apply a fill (positive buys, negative sells); return realized P&L."""
+        self.position, self.avg_cost, realized = apply_fill(self.position, self.avg_cost, signed_quantity, price)
+        self.realized_pnl += realized
+        return realized
+
+    def as_dict(self):
+        return {
+            **self.totals.as_dict(),
+            'buy_volume': self.buys.volume,
+            'sell_volume': self.sells.volume,
+            'net_position': self.position,
+            'avg_cost': self.avg_cost if self.position else None,
+            'realized_pnl': self.realized_pnl,
+        }
+
+
+class TradeStats:
+    """Every running aggregate for one user."""
+
+    __slots__ = ("totals", "by_action", "symbols", "volume_by_bucket", "realized_pnl", "bucket_seconds")
+
+    def __init__(self, bucket_seconds=DEFAULT_BUCKET_SECONDS):
+        self.totals = RunningTotals()
+        self.by_action = {action: RunningTotals() for action in ACTIONS}
+        self.symbols = {}
+        self.volume_by_bucket = {}
+        self.realized_pnl = 0.0
+        self.bucket_seconds = bucket_seconds
+
+    def add(self, symbol, action, quantity, price, timestamp=None):
+        """Fold one trade into the aggregates in O(1).
+
+        Trades with an action other than BUY/SELL count toward the totals
+        but do not move positions.
+        """
+        notional = quantity * price
+        self.totals.add(quantity, notional)
+
+        stats = self.symbols.get(symbol)
+        if stats is None:
+            stats = self.symbols[symbol] = SymbolStats()
+        stats.totals.add(quantity, notional)
+
+        if action == "BUY":
+            self.by_action["BUY"].add(quantity, notional)
+            stats.buys.add(quantity, notional)
+            self.realized_pnl += stats.fill(quantity, price)
+        elif action == "SELL":
+            self.by_action["SELL"].add(quantity, notional)
+            stats.sells.add(quantity, notional)
+            self.realized_pnl += stats.fill(-quantity, price)
+
+        if timestamp is not None:
+            epoch = to_epoch(timestamp)
+            bucket = epoch - epoch % self.bucket_seconds
+            self.volume_by_bucket[bucket] = self.volume_by_bucket.get(bucket, 0) + quantity
+
+    def add_trade(self, trade):
+        """Fold in a trade dict shaped like get_user_trades' output."""
+        self.add(
+            trade.get('symbol'),
+            trade.get('action'),
+            trade.get('quantity', 0),
+            trade.get('price', 0),
+            trade.get('timestamp'),
+        )
+
+    def as_dict(self):
+        """Metrics as plain data; includes compute_trade_metrics' original keys."""
+        return {
+            'total_trades': self.totals.trades,
+            'total_volume': self.totals.volume,
+            'total_value': self.totals.notional,
+            'vwap': self.totals.vwap,
+            'buy_volume': self.by_action["BUY"].volume,
+            'sell_volume': self.by_action["SELL"].volume,
+            'net_position': sum(stats.position for stats in self.symbols.values()),
+            'realized_pnl': self.realized_pnl,
+            'by_action': {action: totals.as_dict() for action, totals in self.by_action.items()},
+            'by_symbol': {symbol: stats.as_dict() for symbol, stats in self.symbols.items()},
+            'volume_by_bucket': dict(sorted(self.volume_by_bucket.items())),
+        }
+
+
+class TradeAnalytics:
+    """Per-user TradeStats, updated as trades arrive.
+
+    Safe to share across Streamlit sessions: writes take a lock, and
+    ``metrics`` snapshots one user's aggregates under the same lock.
+    """
+
+    def __init__(self, bucket_seconds=DEFAULT_BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def _stats_for(self, user_id):
+        stats = self._users.get(user_id)
+        if stats is None:
+            stats = self._users[user_id] = TradeStats(self.bucket_seconds)
+        return stats
+
+    def record(self, user_id, symbol, action, quantity, price, timestamp=None):
+        """Fold one trade for ``user_id`` into the running aggregates."""
+        with self._lock:
+            self._stats_for(user_id).add(symbol, action, quantity, price, timestamp)
+
+    def add_trade(self, user_id, trade):
+        """Fold in one trade dict (see get_user_trades)."""
+        with self._lock:
+            self._stats_for(user_id).add_trade(trade)
+
+    def add_trades(self, user_id, trades):
+        """Fold in many trade dicts under one lock acquisition."""
+        with self._lock:
+            stats = self._stats_for(user_id)
+            for trade in trades:
+                stats.add_trade(trade)
+
+    def metrics(self, user_id):
+        """Return the user's metrics dict, or None if they have no trades."""
+        with self._lock:
+            stats = self._users.get(user_id)
+            return stats.as_dict() if stats is not None else None
+
+    def users(self):
+        return list(self._users)
+
+    def reset(self, user_id=None):
+        """Forget one user's aggregates, or everyone's."""
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
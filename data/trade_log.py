@@ -0,0 +1,631 @@
+"""
+Append-only, memory-mapped trade log.
+
+Every trade is one fixed-width 40-byte record (RECORD_DTYPE) appended to a
+single log file after a 24-byte header. User ids and symbols are stored as
+small integer codes; their names are kept in a ``<log>.names`` side file that
+is written (and fsynced) before any record that refers to them.
+
+Reads go through a read-only mmap of the log viewed as a NumPy structured
+array, so scans never copy the file into Python objects. A per-user index
+(record numbers ordered by user) finds one user's trades without scanning
+everyone else's; ``checkpoint()`` saves it to ``<log>.idx`` so reopening a
+large log does not rebuild it. A checkpoint sorts only the records added
+since the one before and merges them into its index, outside the lock
+appends and scans take. Appends start one on a background thread every
+``checkpoint_every`` group commits once the log has grown by
+CHECKPOINT_RATIO since the last, so a log that is never closed still
+reopens without re-verifying its whole history, and the index rewrites
+cost a bounded number of bytes per appended record.
+
+Appends are crash-safe with group commit: concurrent ``append(sync=True)``
+calls queue their records, one of them writes the whole queue with a single
+write and fsync, and all of them return once their record is durable. Each
+record carries a CRC32; on open the records written since the last
+checkpoint are verified and a torn or corrupt tail is truncated.
+
+``compact()`` rewrites the log sorted by (user, time), optionally dropping
+trades older than a cutoff, so each user's trades become one contiguous
+slice of the mapping.
+
+    log = TradeLog("var/trades.log")
+    log.append("user1", "AAPL", "BUY", 10, 187.5)
+    log.to_records(log.scan("user1", start=..., end=...))
+"""
+
+import bisect
+import contextlib
+import errno
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+from data.columnar import TIMESTAMP_FORMAT, TRADE_SCHEMA, ColumnarTable
+from data.trade_analytics import to_epoch
+
+ACTIONS = ("BUY", "SELL")
+
+# One trade; ``crc`` covers the 36 bytes before it
+RECORD_DTYPE = np.dtype([
+    ('seq', '<i8'),
+    ('timestamp', '<i8'),   # epoch seconds, UTC
+    ('user', '<u4'),
+    ('symbol', '<u2'),
+    ('action', 'u1'),
+    ('flags', 'u1'),        # reserved, always 0
+    ('quantity', '<i4'),
+    ('price', '<f8'),
+    ('crc', '<u4'),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+_RECORD = struct.Struct("<qqIHBBidI")
+_CRC_BYTES = RECORD_SIZE - 4
+
+# magic, format version, record size, log id (changes on every rewrite)
+_HEADER = struct.Struct("<8sHH4xQ")
+HEADER_SIZE = _HEADER.size
+_MAGIC = b"AIRTRLOG"
+_VERSION = 1
+
+# magic, log id, records covered, next sequence number, number of users
+_INDEX_HEADER = struct.Struct("<8sQQQQ")
+_INDEX_MAGIC = b"AIRTRIDX"
+
+# Records copied per write while compacting
+COMPACT_CHUNK = 1 << 20
+
+# Group commits between automatic checkpoints
+CHECKPOINT_EVERY = 1024
+# ...and records past the last checkpoint, as a share of those it covers
+CHECKPOINT_RATIO = 0.1
+
+assert RECORD_SIZE == _RECORD.size == 40
+
+
+def _fsync_dir(path):
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _new_log_id():
+    return int.from_bytes(os.urandom(8), "little")
+
+
+def _user_index(users, n_users, order=None, offsets=None):
+    """Record numbers of ``users`` grouped by user, in log order within each
+    user, plus per-user offsets into them.
+
+    ``order``/``offsets``: the same for a prefix of ``users``, which is kept
+    as is; only the records after it are sorted and merged in.
+    """
+    covered = 0 if order is None else len(order)
+    tail = users[covered:]
+    tail_order = np.argsort(tail, kind='stable')
+    tail_counts = np.bincount(tail, minlength=n_users)
+    counts = tail_counts.copy()
+    if covered:
+        old_counts = np.diff(offsets)
+        counts[:len(old_counts)] += old_counts
+    new_offsets = np.zeros(n_users + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_offsets[1:])
+    merged = np.empty(len(users), dtype=np.int64)
+    if covered:
+        # Each user's indexed rows open the user's new slice, in the same order
+        shift = np.repeat(new_offsets[:len(old_counts)] - offsets[:-1], old_counts)
+        merged[np.arange(covered) + shift] = order
+    # The new rows follow them
+    tail_users = tail[tail_order]
+    rank = np.arange(len(tail)) - np.searchsorted(tail_users, tail_users)
+    merged[new_offsets[:-1][tail_users] + (counts - tail_counts)[tail_users] + rank] = tail_order + covered
+    return merged, new_offsets
+
+
+def _write_all(fd, data, offset=None):
+    """Write all of ``data`` to ``fd`` (at ``offset`` if given, else at its
+    position), going on after short writes; raises OSError if none is made."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view) if offset is None else os.pwrite(fd, view, offset)
+        if not written:
+            raise OSError(errno.ENOSPC, "Nothing written", fd)
+        view = view[written:]
+        if offset is not None:
+            offset += written
+
+
+def _write_atomic(path, chunks):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as file:
+        for chunk in chunks:
+            file.write(chunk)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+class TradeLog:
+    """A durable trade store: append-only log plus per-user index.
+
+    path:    log file; ``.names`` and ``.idx`` files are kept next to it
+    durable: fsync every commit (turn off only for throwaway logs)
+    clock:   default trade timestamp source, replaceable in tests
+    checkpoint_every: group commits between automatic checkpoints (0 or
+             None to checkpoint only on ``checkpoint()``, ``compact()``
+             and ``close()``); each also waits for CHECKPOINT_RATIO growth
+
+    Only committed (durable) records are visible to reads. The log is meant
+    for one process; threads within it may append and read concurrently.
+    """
+
+    def __init__(self, path, durable=True, clock=time.time, checkpoint_every=CHECKPOINT_EVERY):
+        self.path = os.path.abspath(path)
+        self.durable = durable
+        self.checkpoint_every = checkpoint_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._committed = threading.Condition(self._lock)
+        # Serializes index writes, so an older snapshot never replaces a newer one
+        self._checkpoint_lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._names = {'U': [], 'S': []}
+        self._codes = {'U': {}, 'S': {}}
+        self._load_names()
+        self._names_fd = os.open(self.path + ".names", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        if not os.path.exists(self.path):
+            _write_atomic(self.path, [_HEADER.pack(_MAGIC, _VERSION, RECORD_SIZE, _new_log_id())])
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._log_id = self._read_header()
+
+        # Queue of records waiting for the next group commit
+        self._pending = []
+        self._pending_names = []
+        self._flushing = False
+        self._next_seq = 1
+        self._count = 0      # durable records
+        self._queued = 0     # records handed out a slot (durable + pending)
+        self._commits = 0    # group commits since the last checkpoint
+        self._checkpointer = None   # background checkpoint thread, while one runs
+
+        self._records = None
+        self._mapped = 0
+        self._snap_order = self._snap_offsets = None
+        self._snap_count = 0
+        self._tail = {}      # user code -> array('q') of record numbers past the snapshot
+        self._recover()
+
+    # ------------------------------------------------------------------
+    # Opening and recovery
+
+    def _read_header(self):
+        header = os.pread(self._fd, HEADER_SIZE, 0)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"Not a trade log (short header): {self.path}")
+        magic, version, record_size, log_id = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f"Not a trade log or unsupported version: {self.path}")
+        return log_id
+
+    def _load_names(self):
+        try:
+            with open(self.path + ".names", "rb+") as file:
+                data = file.read()
+                # Drop a torn last line so later appends start on a fresh one
+                end = data.rfind(b"\n") + 1
+                if end != len(data):
+                    file.truncate(end)
+        except FileNotFoundError:
+            return
+        for line in data[:end].decode("utf-8").splitlines():
+            kind, _, name = line.partition("\t")
+            if kind in self._names and name not in self._codes[kind]:
+                self._codes[kind][name] = len(self._names[kind])
+                self._names[kind].append(name)
+
+    def _recover(self):
+        size = os.fstat(self._fd).st_size
+        count = (size - HEADER_SIZE) // RECORD_SIZE
+        self._map(count)
+        verify_from = self._load_index(count)
+        good = verify_from + self._first_bad(verify_from, count)
+        if HEADER_SIZE + good * RECORD_SIZE != size:
+            os.ftruncate(self._fd, HEADER_SIZE + good * RECORD_SIZE)
+            os.fsync(self._fd)
+            self._map(good)
+        self._count = self._queued = good
+        if good > verify_from:
+            self._next_seq = max(self._next_seq, int(self._records['seq'][verify_from:].max()) + 1)
+        if self._snap_order is None:
+            self._build_index()
+        else:
+            self._index_rows(self._snap_count, good)
+
+    def _first_bad(self, start, stop):
+        """Number of valid records from ``start``, stopping at the first bad one."""
+        records = self._records[start:stop]
+        # Codes past the names file can only come from a torn names write
+        unnamed = (records['user'] >= len(self._names['U'])) | (records['symbol'] >= len(self._names['S']))
+        if unnamed.any():
+            stop = start + int(unnamed.argmax())
+        mm, crcs = self._mm, records['crc'].tolist()
+        for i, row in enumerate(range(start, stop)):
+            offset = HEADER_SIZE + row * RECORD_SIZE
+            if zlib.crc32(mm[offset:offset + _CRC_BYTES]) != crcs[i]:
+                return i
+        return stop - start
+
+    def _map(self, count):
+        """(Re)map the first ``count`` records; older views keep the old mapping."""
+        self._mm = mmap.mmap(self._fd, HEADER_SIZE + count * RECORD_SIZE, access=mmap.ACCESS_READ)
+        self._records = np.frombuffer(self._mm, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+        self._mapped = count
+
+    # ------------------------------------------------------------------
+    # Per-user index
+
+    def _build_index(self):
+        self._snap_order, self._snap_offsets = _user_index(self._records['user'], len(self._names['U']))
+        self._snap_count = self._count
+        self._tail = {}
+
+    def _install_index(self, order, offsets, count):
+        # Caller holds the lock; the tail keeps only rows past the new snapshot
+        self._snap_order, self._snap_offsets, self._snap_count = order, offsets, count
+        tail = {}
+        for code, rows in self._tail.items():
+            start = bisect.bisect_left(rows, count)
+            if start < len(rows):
+                tail[code] = rows[start:]
+        self._tail = tail
+
+    def _index_rows(self, start, stop):
+        if stop <= start:
+            return
+        users = self._records['user'][start:stop]
+        order = np.argsort(users, kind='stable')
+        codes, first = np.unique(users[order], return_index=True)
+        bounds = list(first) + [len(order)]
+        for i, code in enumerate(codes.tolist()):
+            rows = self._tail.setdefault(code, array('q'))
+            rows.extend((order[bounds[i]:bounds[i + 1]] + start).tolist())
+
+    def _load_index(self, count):
+        """Load ``<log>.idx`` if it matches this log; return the rows it covers."""
+        try:
+            with open(self.path + ".idx", "rb") as file:
+                index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return 0
+        if len(index) < _INDEX_HEADER.size:
+            return 0
+        magic, log_id, covered, next_seq, n_users = _INDEX_HEADER.unpack_from(index)
+        expected = _INDEX_HEADER.size + 8 * (n_users + 1 + covered)
+        if magic != _INDEX_MAGIC or log_id != self._log_id or covered > count or len(index) != expected:
+            return 0
+        self._snap_offsets = np.frombuffer(index, dtype='<i8', count=n_users + 1, offset=_INDEX_HEADER.size)
+        self._snap_order = np.frombuffer(index, dtype='<i8', count=covered, offset=_INDEX_HEADER.size + 8 * (n_users + 1))
+        self._snap_count = covered
+        self._next_seq = next_seq
+        return covered
+
+    def checkpoint(self):
+        """Write the per-user index to ``<log>.idx`` (atomically) so the next
+        open loads it instead of rebuilding and re-verifying the whole log.
+
+        Appends and scans go on while it sorts and writes; the lock is only
+        taken to read the current index and to install the new one.
+        """
+        with self._checkpoint_lock:
+            with self._lock:
+                self._ensure_mapped()
+                self._commits = 0
+                log_id, count, next_seq = self._log_id, self._count, self._next_seq
+                users, n_users = self._records['user'], len(self._names['U'])
+                order, offsets = self._snap_order, self._snap_offsets
+            order, offsets = _user_index(users, n_users, order, offsets)
+            header = _INDEX_HEADER.pack(_INDEX_MAGIC, log_id, count, next_seq, n_users)
+            chunks = [header, offsets.astype('<i8', copy=False).data, order.astype('<i8', copy=False).data]
+            _write_atomic(self.path + ".idx", chunks)
+            with self._lock:
+                # Unless compact() replaced the log meanwhile
+                if self._log_id == log_id and count > self._snap_count:
+                    self._install_index(order, offsets, count)
+
+    def _checkpoint_in_background(self):
+        try:
+            self.checkpoint()
+        finally:
+            with self._lock:
+                self._checkpointer = None
+
+    def _user_rows(self, code):
+        parts = []
+        offsets = self._snap_offsets
+        if code + 1 < len(offsets):
+            parts.append(self._snap_order[offsets[code]:offsets[code + 1]])
+        tail = self._tail.get(code)
+        if tail:
+            parts.append(np.frombuffer(tail, dtype=np.int64))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    # ------------------------------------------------------------------
+    # Appending
+
+    def _code(self, kind, name):
+        # Caller holds the lock
+        code = self._codes[kind].get(name)
+        if code is None:
+            if not name or "\t" in name or "\n" in name:
+                raise ValueError(f"Invalid name: {name!r}")
+            code = self._codes[kind][name] = len(self._names[kind])
+            self._names[kind].append(name)
+            self._pending_names.append(f"{kind}\t{name}\n")
+        return code
+
+    def _encode(self, user_id, symbol, action, quantity, price, timestamp):
+        # Caller holds the lock
+        if action not in ACTIONS:
+            raise ValueError(f"Invalid action: {action}")
+        timestamp = to_epoch(self._clock() if timestamp is None else timestamp)
+        seq = self._next_seq
+        body = _RECORD.pack(
+            seq, timestamp, self._code('U', user_id), self._code('S', symbol),
+            ACTIONS.index(action), 0, int(quantity), float(price), 0,
+        )[:_CRC_BYTES]
+        self._next_seq += 1
+        return seq, body + zlib.crc32(body).to_bytes(4, "little")
+
+    def append(self, user_id, symbol, action, quantity, price, timestamp=None, sync=True):
+        """Append one trade; returns its sequence number.
+
+        timestamp: epoch seconds or a 'YYYY-MM-DD HH:MM:SS' string (default: now)
+        sync:      wait until the trade is durable; otherwise it is written
+                   by the next synced append, ``flush()`` or ``close()``
+
+        Raises ValueError for an unknown action or an unusable name.
+        """
+        return self.append_many([(user_id, symbol, action, quantity, price, timestamp)], sync)[0]
+
+    def append_many(self, trades, sync=True):
+        """Append ``(user_id, symbol, action, quantity, price, timestamp)``
+        tuples in one commit; returns their sequence numbers."""
+        with self._lock:
+            seqs = []
+            for trade in trades:
+                seq, record = self._encode(*trade)
+                self._pending.append(record)
+                seqs.append(seq)
+            self._queued += len(seqs)
+            target = self._queued
+            if sync:
+                self._commit(target)
+            if (self.checkpoint_every and self._checkpointer is None
+                    and self._commits >= self.checkpoint_every
+                    and self._count - self._snap_count >= CHECKPOINT_RATIO * self._snap_count):
+                self._checkpointer = threading.Thread(
+                    target=self._checkpoint_in_background, name="trade-log-checkpoint", daemon=True)
+                self._checkpointer.start()
+        return seqs
+
+    def flush(self):
+        """Make every queued trade durable."""
+        with self._lock:
+            self._commit(self._queued)
+
+    def _commit(self, target):
+        # Caller holds the lock. Whoever finds no commit in progress writes
+        # the whole queue; everyone else waits for a commit that covers them.
+        while self._count < target:
+            if self._flushing:
+                self._committed.wait()
+                continue
+            records, names = self._pending, self._pending_names
+            self._pending, self._pending_names = [], []
+            start = self._count
+            self._flushing = True
+            self._lock.release()
+            names_size = None
+            try:
+                if names:
+                    names_size = os.fstat(self._names_fd).st_size
+                    _write_all(self._names_fd, "".join(names).encode("utf-8"))
+                    if self.durable:
+                        os.fdatasync(self._names_fd)
+                _write_all(self._fd, b"".join(records), HEADER_SIZE + start * RECORD_SIZE)
+                if self.durable:
+                    os.fdatasync(self._fd)
+            except BaseException:
+                # Requeue: the next commit rewrites from the same offsets, so
+                # drop any part of the names already appended
+                if names_size is not None:
+                    with contextlib.suppress(OSError):
+                        os.ftruncate(self._names_fd, names_size)
+                self._lock.acquire()
+                self._pending[:0], self._pending_names[:0] = records, names
+                self._flushing = False
+                self._committed.notify_all()
+                raise
+            self._lock.acquire()
+            self._flushing = False
+            self._committed.notify_all()
+            self._count = start + len(records)
+            self._commits += 1
+            self._ensure_mapped()
+            self._index_rows(start, self._count)
+
+    def _ensure_mapped(self):
+        if self._mapped != self._count:
+            self._map(self._count)
+
+    # ------------------------------------------------------------------
+    # Reading
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def records(self):
+        """Every committed record as a structured array over the mapping."""
+        with self._lock:
+            return self._records
+
+    def scan(self, user_id, start=None, end=None):
+        """The user's committed trades with ``start <= timestamp < end``, in
+        log order, as a structured RECORD_DTYPE array.
+
+        start/end: epoch seconds or 'YYYY-MM-DD HH:MM:SS' strings; None for open
+
+        After ``compact()`` a user's trades are one contiguous slice of the
+        mapping, returned as a view without copying.
+        """
+        with self._lock:
+            code = self._codes['U'].get(user_id)
+            if code is None:
+                return self._records[:0]
+            rows = self._user_rows(code)
+            records = self._records
+        if not len(rows):
+            return records[:0]
+        if rows[-1] - rows[0] + 1 == len(rows):
+            trades = records[rows[0]:rows[-1] + 1]
+        else:
+            trades = records[rows]
+        return _between(trades, start, end)
+
+    def scan_time(self, start=None, end=None):
+        """Every user's committed trades with ``start <= timestamp < end``."""
+        return _between(self.records, start, end)
+
+    def user_ids(self):
+        return list(self._names['U'])
+
+    def to_records(self, trades):
+        """Records in the list-of-dicts shape of data_fetcher.get_user_trades."""
+        symbols = self._names['S']
+        return [
+            {
+                'trade_id': f"trade{seq}",
+                'symbol': symbols[symbol],
+                'action': ACTIONS[action],
+                'quantity': quantity,
+                'price': price,
+                'timestamp': datetime.fromtimestamp(timestamp, timezone.utc).strftime(TIMESTAMP_FORMAT),
+            }
+            for seq, timestamp, symbol, action, quantity, price in zip(
+                trades['seq'].tolist(), trades['timestamp'].tolist(), trades['symbol'].tolist(),
+                trades['action'].tolist(), trades['quantity'].tolist(), trades['price'].tolist(),
+            )
+        ]
+
+    def to_table(self, trades):
+        """A TRADE_SCHEMA ColumnarTable of ``trades`` (symbol codes are shared
+        with the log, so every known symbol is a category)."""
+        columns = {
+            'trade_id': np.array([f"trade{seq}" for seq in trades['seq'].tolist()], dtype=object),
+            'symbol': trades['symbol'].astype(np.int32),
+            'action': trades['action'].astype(np.int8),
+            'quantity': trades['quantity'].astype(np.int64),
+            'price': trades['price'].astype(np.float64),
+            'timestamp': trades['timestamp'].astype(np.int64),
+        }
+        categories = {'symbol': list(self._names['S']), 'action': list(ACTIONS)}
+        return ColumnarTable(columns, categories, TRADE_SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+
+    def compact(self, before=None):
+        """Rewrite the log sorted by (user, timestamp) and checkpoint it.
+
+        before: drop trades older than this (epoch seconds or string)
+
+        Returns the number of trades dropped. Appends wait while it runs.
+        """
+        with self._lock:
+            self._commit(self._queued)
+            while self._flushing:
+                self._committed.wait()
+            records = self._records
+            if before is not None:
+                records = records[records['timestamp'] >= to_epoch(before)]
+            order = np.lexsort((records['seq'], records['timestamp'], records['user']))
+            log_id = _new_log_id()
+            chunks = (records[order[i:i + COMPACT_CHUNK]].tobytes() for i in range(0, len(order), COMPACT_CHUNK))
+            _write_atomic(self.path, [_HEADER.pack(_MAGIC, _VERSION, RECORD_SIZE, log_id), *chunks])
+            dropped = self._count - len(records)
+            os.close(self._fd)
+            self._fd = os.open(self.path, os.O_RDWR)
+            self._log_id = log_id
+            self._count = self._queued = len(records)
+            self._map(self._count)
+            # Before any reader can see the new mapping with the old order
+            self._build_index()
+        self.checkpoint()
+        return dropped
+
+    def close(self):
+        """Commit queued trades, checkpoint the index and close the files."""
+        if self._fd is None:
+            return
+        checkpointer = self._checkpointer
+        if checkpointer is not None:
+            checkpointer.join()
+        self.flush()
+        self.checkpoint()
+        with self._lock:
+            os.close(self._fd)
+            os.close(self._names_fd)
+            self._fd = self._names_fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _between(trades, start, end):
+    if start is None and end is None:
+        return trades
+    timestamps = trades['timestamp']
+    mask = np.ones(len(trades), dtype=bool)
+    if start is not None:
+        mask &= timestamps >= to_epoch(start)
+    if end is not None:
+        mask &= timestamps < to_epoch(end)
+    return trades[mask]
+
+
+DEFAULT_PATH = os.environ.get(
+    "AIRBETS_TRADE_LOG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "var", "trades.log"),
+)
+
+_trade_log = None
+_open_lock = threading.Lock()
+
+
+def get_trade_log():
+    """The process-wide TradeLog at AIRBETS_TRADE_LOG (default var/trades.log),
+    opened on first use."""
+    global _trade_log
+    if _trade_log is None:
+        with _open_lock:
+            if _trade_log is None:
+                _trade_log = TradeLog(DEFAULT_PATH)
+    return _trade_log
@@ -6,9 +6,58 @@
 # You will re-write these functions in Unit 3, and are welcome to alter the
 # data returned in the meantime. We will replace this file with other data when
 # testing earlier units.
+#
+# Per-user results are cached in data/cache.py (TTL + LRU, keyed by user and
+# data version). Call invalidate_user_data(user_id) whenever a user's data
+# changes, e.g. when new trades land. Cached values are shared between
+# sessions, so do not modify what these functions return.
+#
+# Every fetch is timed by instrumentation.traced when AIRBETS_PROFILE=1.
+#
+# Profiles, friends, posts and trades are read from the storage backend of
+# data/storage.py (AIRBETS_STORAGE: the in-memory default, whose trades live
+# in the trade log of data/trade_log.py, or an SQLite database). An empty
+# backend is seeded with the demo users below. record_trade() appends a trade.
+#
+# The home feed (data/feed.py) keeps a precomputed timeline per user;
+# publish_post() stores a post and fans it out, get_home_feed() reads a page.
+#
+# Sensor readings are kept per workout in time-sorted arrays (data/timeseries.py)
+# for downsampled charts, windowed aggregates and chunked streaming.
+#
+# get_user_dashboard() returns a user's derived dashboard data. With
+# AIRBETS_PRECOMPUTE=<workers> it is refreshed for active users on a process
+# pool (data/precompute.py) and the page only reads the results.
+#
+# get_user_portfolio() values a user's positions at current prices, from the
+# process-wide Portfolio of data/portfolio.py: their traded symbols (loaded
+# from the trade log on first use) and the bets they traded via place_order.
+#
+# get_genai_advice() never waits for the model: advice is generated in the
+# background by the AdviceService of data/advice.py (AIRBETS_ADVICE_MODEL
+# picks the model), batched across users and cached by feature snapshot.
+#
+# async_fetcher.py has async variants of these functions and
+# gather_page_data(), which fetches the pieces of a page concurrently.
 #############################################################################
 
+import os
 import random
+import threading
+import time
+import uuid
+
+from data.advice import AdviceService, open_model
+from data.bets import get_portfolio
+from data.cache import user_cache
+from data.columnar import SENSOR_SCHEMA, TIMESTAMP_FORMAT, ColumnarTable, trade_metrics
+from data.feed import FeedService
+from data.precompute import Artifact, PrecomputeScheduler
+from data.timeseries import DEFAULT_CHUNK_SIZE, WorkoutSeries
+from data.trade_analytics import TradeStats, to_epoch
+from data.social_graph import SocialGraph
+from data.storage import get_backend
+from instrumentation import traced
 
 users = {
     'user1': {
@@ -42,9 +91,13 @@ users = {
 }
 
 
-def get_user_sensor_data(user_id, workout_id):
+@traced("fetch.get_user_sensor_data")
+def get_user_sensor_data(user_id, workout_id, columnar=False):
     """Returns a list of timestampped information for a given workout.
 
+    With columnar=True the same rows come back as a ColumnarTable (see
+    data/columnar.py) with sensor_type codes and int64 epoch timestamps.
+
     This function currently returns random data. You will re-write it in Unit 3.
     """
     sensor_data = []
@@ -65,9 +118,55 @@ def get_user_sensor_data(user_id, workout_id):
         sensor_data.append(
             {'sensor_type': sensor_type, 'timestamp': timestamp, 'data': data}
         )
+    if columnar:
+        return ColumnarTable.from_records(sensor_data, SENSOR_SCHEMA)
     return sensor_data
 
 
+def get_user_sensor_series(user_id, workout_id):
+    """Returns a workout's sensor readings as a WorkoutSeries (see
+    data/timeseries.py): one time-sorted series per sensor type, loaded from
+    get_user_sensor_data on first use and extended by record_sensor_reading.
+    """
+    key = (user_id, workout_id)
+    workout = _sensor_series.get(key)
+    if workout is None:
+        with _sensor_lock:
+            workout = _sensor_series.get(key)
+            if workout is None:
+                table = get_user_sensor_data(user_id, workout_id, columnar=True)
+                workout = _sensor_series[key] = WorkoutSeries.from_table(table)
+    return workout
+
+
+_sensor_series = {}
+_sensor_lock = threading.Lock()
+
+
+def record_sensor_reading(user_id, workout_id, sensor_type, timestamp, value):
+    """Appends one reading to a workout's series; timestamp is epoch seconds
+    or a 'YYYY-MM-DD HH:MM:SS' string."""
+    if isinstance(timestamp, str):
+        timestamp = to_epoch(timestamp)
+    get_user_sensor_series(user_id, workout_id).append(sensor_type, timestamp, value)
+
+
+def stream_user_sensor_data(user_id, workout_id, sensor_type, chunk_size=DEFAULT_CHUNK_SIZE, start=None, end=None):
+    """Yields ``(times, values)`` arrays of up to chunk_size readings of one
+    sensor, oldest first, without copying the workout. Yields nothing for a
+    sensor the workout has no readings of."""
+    workout = get_user_sensor_series(user_id, workout_id)
+    if sensor_type in workout:
+        yield from workout[sensor_type].iter_chunks(chunk_size, start, end)
+
+
+def get_user_sensor_chart(user_id, workout_id, points=500, method='lttb'):
+    """Returns ``{sensor_type: (times, values)}`` with each sensor downsampled
+    to about ``points`` readings ('lttb' or 'minmax') for charting."""
+    return get_user_sensor_series(user_id, workout_id).downsample(points, method)
+
+
+@traced("fetch.get_user_workouts")
 def get_user_workouts(user_id):
     """Returns a list of user's workouts.
 
@@ -96,8 +195,10 @@ def get_user_workouts(user_id):
     return workouts
 
 
-def get_user_trades(user_id):
-    """Returns a list of mock trades for a given user.
+@traced("fetch.get_user_trades")
+@user_cache.cached("trades")
+def get_user_trades(user_id, columnar=False):
+    """Returns the user's trades from the trade log, oldest first.
 
     Each trade dict contains:
       - trade_id
@@ -107,69 +208,389 @@ def get_user_trades(user_id):
       - price
       - timestamp
 
-    This is a stand‑in for whatever back end you'll implement later.
+    With columnar=True the trades come back as a ColumnarTable (see
+    data/columnar.py): typed arrays per field, symbol/action codes and int64
+    epoch timestamps.
+
+    A user with no trades yet is given 1-5 random demo trades, which are
+    stored so they stay the same across reruns and restarts.
     """
-    trades = []
+    backend = _storage()
+    trades = backend.get_user_trades(user_id, columnar=columnar)
+    if not len(trades):
+        with _seed_lock:
+            trades = backend.get_user_trades(user_id, columnar=columnar)
+            if not len(trades):
+                backend.add_trades(_demo_trades(user_id))
+                trades = backend.get_user_trades(user_id, columnar=columnar)
+    return trades
+
+
+_seed_lock = threading.Lock()
+_seeded = False
+
+
+def _storage():
+    """The storage backend, with the demo users loaded if it has none."""
+    global _seeded
+    backend = get_backend()
+    if not _seeded:
+        with _seed_lock:
+            if not _seeded and not backend.count_users():
+                backend.load_users(users)
+            _seeded = True
+    return backend
+
+
+def _demo_trades(user_id):
     symbols = ['AAPL', 'GOOG', 'TSLA', 'MSFT']
     actions = ['BUY', 'SELL']
-    for index in range(random.randint(1, 5)):
-        trades.append({
-            'trade_id': f'trade{index}',
-            'symbol': random.choice(symbols),
-            'action': random.choice(actions),
-            'quantity': random.randint(1, 100),
-            'price': round(random.uniform(10.0, 500.0), 2),
-            'timestamp': '2024-01-01 09:30:00',
-        })
-    return trades
+    return [
+        (
+            user_id,
+            random.choice(symbols),
+            random.choice(actions),
+            random.randint(1, 100),
+            round(random.uniform(10.0, 500.0), 2),
+            '2024-01-01 09:30:00',
+        )
+        for _ in range(random.randint(1, 5))
+    ]
+
+
+def record_trade(user_id, symbol, action, quantity, price, timestamp=None):
+    """Durably appends a trade to the user's history and returns its trade_id.
+
+    timestamp defaults to now. Raises ValueError for an unknown action.
+    """
+    trade_id, = _storage().add_trades([(user_id, symbol, action, quantity, price, timestamp)])
+    invalidate_user_data(user_id)
+    trade = {'trade_id': trade_id, 'symbol': symbol, 'action': action, 'quantity': quantity, 'price': price}
+    with _portfolio_lock:
+        mark = _portfolio_marks.get(user_id)
+        if mark is not None:
+            # Trades up to the mark came with the user's first load
+            if _trade_number(trade_id) > mark:
+                get_portfolio().add_trades(user_id, [trade])
+        elif user_id in _portfolio_loads:
+            # A first load is reading the user's trades; it applies this one
+            # unless its read already had it
+            _portfolio_loads[user_id][1].append(trade)
+    return trade_id
+
 
+@traced("fetch.get_user_portfolio")
+def get_user_portfolio(user_id):
+    """Returns the user's positions marked to current prices (see
+    Portfolio.valuation): market_value, cost_basis, unrealized_pnl,
+    realized_pnl and a list of positions, each with market, outcome (YES/NO
+    for bets, None for symbols), quantity, avg_cost, mark, market_value and
+    unrealized_pnl.
 
+    Symbols are marked at their latest trade price; bets at their current
+    yes_value/no_value. Only positions whose price moved are revalued.
+    """
+    if user_id not in _portfolio_marks:
+        _load_portfolio(user_id)
+    return get_portfolio().valuation(user_id)
+
+
+def _load_portfolio(user_id):
+    """Applies the user's logged trades to the portfolio once. They are read
+    without the lock; trades recorded meanwhile are queued by record_trade."""
+    with _portfolio_lock:
+        load = _portfolio_loads.setdefault(user_id, [0, []])
+        load[0] += 1
+    trades = None
+    try:
+        trades = get_user_trades(user_id)
+    finally:
+        with _portfolio_lock:
+            load[0] -= 1
+            if trades is not None and user_id not in _portfolio_marks:
+                # Reads see trades in commit order, so the read had every
+                # trade numbered up to its newest one and none after it
+                mark = max((_trade_number(trade['trade_id']) for trade in trades), default=0)
+                late = [trade for trade in load[1] if _trade_number(trade['trade_id']) > mark]
+                get_portfolio().add_trades(user_id, trades + late)
+                _portfolio_marks[user_id] = mark
+            if user_id in _portfolio_marks or not load[0]:
+                _portfolio_loads.pop(user_id, None)
+
+
+def _trade_number(trade_id):
+    # Storage trade ids are "trade<n>", with n increasing in commit order
+    return int(trade_id[len("trade"):])
+
+
+# Users whose trade log has been loaded into the portfolio -> the newest
+# trade number that load read
+_portfolio_marks = {}
+# Users whose first load is running -> [loads running, trades recorded since]
+_portfolio_loads = {}
+_portfolio_lock = threading.Lock()
+
+
+@traced("fetch.get_user_profile")
+@user_cache.cached("profile")
 def get_user_profile(user_id):
-    """Returns information about the given user.
+    """Returns information about the given user, including the ids of their
+    friends.
 
-    This function currently returns random data. You will re-write it in Unit 3.
+    Raises ValueError if there is no such user.
     """
-    if user_id not in users:
+    user = _storage().get_user(user_id)
+    if user is None:
         raise ValueError(f'User {user_id} not found.')
-    return users[user_id]
+    return user
+
+
+def get_social_graph():
+    """Returns the process-wide SocialGraph (see data/social_graph.py) of
+    every friendship in storage, built on first use."""
+    global _social_graph
+    if _social_graph is None:
+        with _graph_lock:
+            if _social_graph is None:
+                friends = {}
+                for user_id, friend_id in _storage().get_friend_edges():
+                    friends.setdefault(user_id, []).append(friend_id)
+                _social_graph = SocialGraph.from_friend_lists(friends)
+    return _social_graph
+
 
+_social_graph = None
+_graph_lock = threading.Lock()
 
+
+def get_friend_suggestions(user_id, limit=5):
+    """Returns up to ``limit`` (user_id, mutual friend count) pairs for people
+    the user is not friends with yet, most mutual friends first."""
+    return get_social_graph().suggestions(user_id, limit)
+
+
+def add_friend(user_id, friend_id):
+    """Makes two users friends, in storage and in the social graph.
+
+    Raises ValueError if either user does not exist.
+    """
+    for uid in (user_id, friend_id):
+        get_user_profile(uid)
+    _storage().add_friends([(user_id, friend_id), (friend_id, user_id)])
+    get_social_graph().add_friendship(user_id, friend_id)
+    feed = get_feed_service()
+    feed.follow(user_id, friend_id)
+    feed.follow(friend_id, user_id)
+    invalidate_user_data(user_id)
+    invalidate_user_data(friend_id)
+
+
+@traced("fetch.get_user_posts")
+@user_cache.cached("posts")
 def get_user_posts(user_id):
-    """Returns a list of a user's posts.
+    """Returns a list of a user's posts, oldest first.
 
-    This function currently returns random data. You will re-write it in Unit 3.
+    A user with no posts yet is given a random demo post, which is stored;
+    ids without a profile get none, so every post has an author.
     """
-    content = random.choice([
-        'Had a great workout today!',
-        'The AI really motivated me to push myself further, I ran 10 miles!',
-    ])
-    return [{
+    backend = _storage()
+    posts = backend.get_user_posts(user_id)
+    if not posts and backend.get_user(user_id) is not None:
+        content = random.choice([
+            'Had a great workout today!',
+            'The AI really motivated me to push myself further, I ran 10 miles!',
+        ])
+        backend.add_posts([{
+            'user_id': user_id,
+            'post_id': 'post1',
+            'timestamp': '2024-01-01 00:00:00',
+            'content': content,
+            'image': None,
+        }])
+        posts = backend.get_user_posts(user_id)
+    return posts
+
+
+def get_feed_service():
+    """Returns the process-wide FeedService (see data/feed.py) over the
+    social graph and stored posts, created on first use."""
+    global _feed_service
+    if _feed_service is None:
+        with _graph_lock:
+            if _feed_service is None:
+                _feed_service = FeedService(
+                    friends_of=lambda user_id: get_social_graph().friends(user_id),
+                    load_posts=get_user_posts,
+                    degree_of=lambda user_id: get_social_graph().degree(user_id),
+                )
+    return _feed_service
+
+
+_feed_service = None
+
+
+def publish_post(user_id, content, image=None):
+    """Stores a new post by the user, adds it to their friends' home feeds
+    and returns it."""
+    post = {
         'user_id': user_id,
-        'post_id': 'post1',
-        'timestamp': '2024-01-01 00:00:00',
+        'post_id': f'post-{uuid.uuid4().hex[:12]}',
+        'timestamp': time.strftime(TIMESTAMP_FORMAT, time.gmtime()),
         'content': content,
-        'image': 'image_url',
-    }]
+        'image': image,
+    }
+    _storage().add_posts([post])
+    invalidate_user_data(user_id)
+    get_feed_service().publish(post)
+    return post
+
+
+@traced("fetch.get_home_feed")
+def get_home_feed(user_id, limit=20, before=None):
+    """Returns ``(posts, next_cursor)``: a page of posts by the user and their
+    friends, newest first.
+
+    Pass the returned cursor as ``before`` to get the following page; it is
+    None on the last page.
+    """
+    return get_feed_service().read(user_id, limit, before)
 
 
+@traced("fetch.get_genai_advice")
 def get_genai_advice(user_id):
-    """Returns the most recent advice from the genai model.
+    """Returns the latest advice from the genai model for the user, or None
+    while their first advice is being generated.
 
-    This function currently returns random data. You will re-write it in Unit 3.
+    Never waits for the model: the user is marked active and the advice
+    service (data/advice.py) generates and refreshes their advice in the
+    background, batched with other users' and cached by their features.
+    """
+    service = get_advice_service()
+    service.touch(user_id)
+    return service.get(user_id)
+
+
+def get_advice_service():
+    """Returns the process-wide AdviceService over the model picked by
+    AIRBETS_ADVICE_MODEL ("stub" by default), created on first use."""
+    global _advice_service
+    if _advice_service is None:
+        with _advice_lock:
+            if _advice_service is None:
+                _advice_service = AdviceService(
+                    open_model(os.environ.get("AIRBETS_ADVICE_MODEL", "stub")), features_of=_advice_features,
+                )
+    return _advice_service
+
+
+_advice_service = None
+_advice_lock = threading.Lock()
+
+
+def _advice_features(user_id):
+    # Coarse, so that similar users and small changes reuse cached advice
+    metrics = get_user_trade_metrics(user_id)
+    symbols = metrics['by_symbol']
+    return {
+        'trades': metrics['total_trades'],
+        'net_position': metrics['net_position'],
+        'realized_pnl': round(metrics['realized_pnl'], -2),
+        'top_symbol': max(symbols, key=lambda symbol: symbols[symbol]['volume']) if symbols else None,
+    }
+
+
+@traced("metrics.get_user_trade_metrics")
+def get_user_trade_metrics(user_id, columnar=False):
+    """Returns the trade metrics (see TradeStats.as_dict) for the trades
+    get_user_trades currently returns for the user.
+
+    The result is cached alongside the trades it was computed from and
+    recomputed only when those trades change.
     """
-    advice = random.choice([
-        'Your heart rate indicates you can push yourself further. You got this!',
-        "You're doing great! Keep up the good work.",
-        'You worked hard yesterday, take it easy today.',
-        'You have burned 100 calories so far today!',
-    ])
-    image = random.choice([
-        'https://plus.unsplash.com/premium_photo-1669048780129-051d670fa2d1?q=80&w=3870&auto=format&fit=crop&ixlib=rb-4.0.3&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D',
-        None,
-    ])
+    trades = get_user_trades(user_id, columnar=columnar)
+    cached = user_cache.get("trade_metrics", user_id, (columnar,))
+    if cached is not None and cached[0] is trades:
+        return cached[1]
+    metrics = _trade_metrics(trades)
+    user_cache.set("trade_metrics", user_id, (trades, metrics), (columnar,))
+    return metrics
+
+
+def _trade_metrics(trades):
+    if isinstance(trades, ColumnarTable):
+        return trade_metrics(trades)
+    stats = TradeStats()
+    for trade in trades:
+        stats.add_trade(trade)
+    return stats.as_dict()
+
+
+def _workout_summary(workouts):
+    minutes = sum(
+        (to_epoch(w['end_timestamp']) - to_epoch(w['start_timestamp'])) / 60 for w in workouts
+    )
     return {
-        'advice_id': 'advice1',
-        'timestamp': '2024-01-01 00:00:00',
-        'content': advice,
-        'image': image,
+        'workouts': len(workouts),
+        'distance': sum(w['distance'] for w in workouts),
+        'steps': sum(w['steps'] for w in workouts),
+        'calories_burned': sum(w['calories_burned'] for w in workouts),
+        'active_minutes': minutes,
     }
+
+
+# Per-user dashboard pieces: (name, compute in a worker, inputs read here)
+DASHBOARD_ARTIFACTS = (
+    Artifact('trade_metrics', _trade_metrics, get_user_trades),
+    Artifact('workout_summary', _workout_summary, get_user_workouts),
+)
+
+
+def get_precompute_scheduler():
+    """Returns the process-wide PrecomputeScheduler (see data/precompute.py)
+    for DASHBOARD_ARTIFACTS, or None unless AIRBETS_PRECOMPUTE is set to a
+    number of worker processes."""
+    global _scheduler
+    if _scheduler is None and PRECOMPUTE_WORKERS:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = PrecomputeScheduler(DASHBOARD_ARTIFACTS, max_workers=PRECOMPUTE_WORKERS)
+    return _scheduler
+
+
+PRECOMPUTE_WORKERS = int(os.environ.get("AIRBETS_PRECOMPUTE") or 0)
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_user_dashboard(user_id):
+    """Returns ``{artifact name: value}`` for DASHBOARD_ARTIFACTS
+    (trade_metrics, workout_summary) plus genai_advice, which is None until
+    the advice service has generated it.
+
+    With the precompute scheduler enabled this only reads results computed
+    in the background (None for ones that are not ready yet) and marks the
+    user active; otherwise the artifacts are computed here.
+    """
+    scheduler = get_precompute_scheduler()
+    if scheduler is None:
+        return {
+            'trade_metrics': get_user_trade_metrics(user_id),
+            'workout_summary': _workout_summary(get_user_workouts(user_id)),
+            'genai_advice': get_genai_advice(user_id),
+        }
+    scheduler.touch(user_id)
+    results = scheduler.results(user_id)
+    results['genai_advice'] = get_genai_advice(user_id)
+    return results
+
+
+def invalidate_user_data(user_id):
+    """Drops every cached result for the user; call when their data changes."""
+    user_cache.invalidate_user(user_id)
+    if _advice_service is not None:
+        _advice_service.stale(user_id)
+
+
+def get_cache_stats():
+    """Returns hit/miss counters of the per-user result cache."""
+    return user_cache.stats()
@@ -0,0 +1,261 @@
+#############################################################################
+# instrumentation.py
+#
+# Lightweight timing of the hot paths of a Streamlit rerun: data fetches,
+# metric computation, template rendering and component emission.
+#
+# Enable with AIRBETS_PROFILE=1 (read once at import). When disabled the
+# @traced decorator returns the function unchanged, so there is no overhead
+# at all. When enabled every traced call records a span (name, duration,
+# payload bytes) on the current rerun; finished reruns go into an
+# in-process ring buffer that render_debug_panel shows and export_jsonl
+# writes out. Spans outside a rerun (background threads, tests) are grouped
+# into one "background" record per thread.
+#
+#############################################################################
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENABLED = os.environ.get("AIRBETS_PROFILE", "") == "1"
+
+# Completed reruns kept in memory
+RING_SIZE = 500
+# Spans per background record before the thread starts a new one
+BACKGROUND_SPANS = 1000
+
+_reruns = deque(maxlen=RING_SIZE)
+_local = threading.local()
+_rerun_ids = itertools.count(1)
+_generation = 0     # bumped by clear(), retiring every thread's background record
+_MISSING = object()
+
+
+class Rerun:
+    """The spans recorded during one script run of one session."""
+
+    __slots__ = ("rerun_id", "page", "session_id", "started_at", "_start_ns", "duration_ms", "spans")
+
+    def __init__(self, page, session_id):
+        self.rerun_id = next(_rerun_ids)
+        self.page = page
+        self.session_id = session_id
+        self.started_at = time.time()
+        self._start_ns = time.perf_counter_ns()
+        self.duration_ms = None
+        # (name, start ns, end ns, payload bytes or None); converted to ms on read
+        self.spans = []
+
+    def span_times(self):
+        """Yield (name, start offset ms, duration ms, bytes) per span."""
+        origin = self._start_ns
+        for name, start_ns, end_ns, size in self.spans:
+            yield name, (start_ns - origin) / 1e6, (end_ns - start_ns) / 1e6, size
+
+    def as_dict(self):
+        return {
+            'rerun_id': self.rerun_id,
+            'page': self.page,
+            'session_id': self.session_id,
+            'started_at': self.started_at,
+            'duration_ms': self.duration_ms,
+            'spans': [
+                {'name': name, 'offset_ms': offset, 'duration_ms': duration, 'bytes': size}
+                for name, offset, duration, size in self.span_times()
+            ],
+        }
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+def start_rerun(page):
+    """Mark the start of a script run; call at the top of app.py and each page.
+
+    Any rerun still open on this thread (e.g. one ended by st.stop or
+    st.rerun) is finished first.
+    """
+    if not ENABLED:
+        return
+    finish_rerun()
+    _local.rerun = Rerun(page, _session_id())
+
+
+def finish_rerun():
+    """Close the current rerun and push it into the ring buffer."""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return
+    rerun.duration_ms = (time.perf_counter_ns() - rerun._start_ns) / 1e6
+    _reruns.append(rerun)
+    _local.rerun = None
+
+
+def current_rerun():
+    return getattr(_local, "rerun", None)
+
+
+def _record(name, start_ns, end_ns, size):
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        # Work outside a marked rerun (tests, background threads) goes into
+        # the thread's background record, not one record per span
+        generation, rerun = getattr(_local, "background", (None, None))
+        if rerun is None or generation != _generation or len(rerun.spans) >= BACKGROUND_SPANS:
+            rerun = Rerun("background", None)
+            rerun._start_ns = start_ns
+            _local.background = (_generation, rerun)
+            _reruns.append(rerun)
+        rerun.duration_ms = (end_ns - rerun._start_ns) / 1e6
+    rerun.spans.append((name, start_ns, end_ns, size))
+
+
+def payload_bytes(text):
+    """UTF-8 size of a rendered string, for ``traced(..., size=payload_bytes)``."""
+    return len(text.encode("utf-8"))
+
+
+def traced(name, size=None):
+    """Decorator recording a span named ``name`` for every call.
+
+    size: optional function of the return value giving the payload size in
+          bytes (e.g. ``payload_bytes`` for rendered HTML)
+
+    Returns ``func`` itself when instrumentation is disabled.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_ns = time.perf_counter_ns()
+            result = _MISSING
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                # Failed calls are recorded too, without a size
+                end_ns = time.perf_counter_ns()
+                _record(name, start_ns, end_ns, size(result) if size is not None and result is not _MISSING else None)
+        return wrapper
+    return decorator
+
+
+class _Span:
+    __slots__ = ("name", "bytes", "_start_ns")
+
+    def __init__(self, name):
+        self.name = name
+        self.bytes = None
+
+    def __enter__(self):
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self._start_ns, time.perf_counter_ns(), self.bytes)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+    bytes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager recording a span; set ``.bytes`` on it for payload size.
+
+        with span("grid.build") as s:
+            html = build()
+            s.bytes = len(html)
+    """
+    return _Span(name) if ENABLED else _NULL_SPAN
+
+
+def recent_reruns(session_id=None, limit=None):
+    """Completed reruns, newest last, optionally for one session only."""
+    reruns = [r for r in list(_reruns) if session_id is None or r.session_id == session_id]
+    return reruns[-limit:] if limit else reruns
+
+
+def clear():
+    global _generation
+    _generation += 1
+    _reruns.clear()
+    _local.rerun = None
+
+
+def export_jsonl(path_or_file):
+    """Write every buffered rerun as one JSON object per line; returns the count."""
+    reruns = list(_reruns)
+    if hasattr(path_or_file, "write"):
+        for rerun in reruns:
+            path_or_file.write(json.dumps(rerun.as_dict()) + "\n")
+    else:
+        with open(path_or_file, "a") as file:
+            for rerun in reruns:
+                file.write(json.dumps(rerun.as_dict()) + "\n")
+    return len(reruns)
+
+
+def summarize(reruns):
+    """Per-span-name call count, total/mean/max ms and bytes over ``reruns``."""
+    summary = {}
+    for rerun in reruns:
+        for name, _, duration, size in rerun.span_times():
+            entry = summary.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'bytes': 0})
+            entry['calls'] += 1
+            entry['total_ms'] += duration
+            entry['max_ms'] = max(entry['max_ms'], duration)
+            entry['bytes'] += size or 0
+    for entry in summary.values():
+        entry['mean_ms'] = entry['total_ms'] / entry['calls']
+    return summary
+
+
+def render_debug_panel(limit=20):
+    """Finish the current rerun and show this session's recent timings in a
+    sidebar expander; call at the bottom of a page.
+
+    Does nothing unless instrumentation is enabled.
+    """
+    if not ENABLED:
+        return
+    import streamlit as st
+
+    finish_rerun()
+
+    reruns = recent_reruns(_session_id(), limit)
+    with st.sidebar.expander("⏱ Rerun timings"):
+        if not reruns:
+            st.caption("No completed reruns yet.")
+            return
+        last = reruns[-1]
+        st.caption(f"Last rerun ({last.page}): {last.duration_ms:.1f} ms, {len(last.spans)} spans")
+        rows = [{'span': name, **stats} for name, stats in summarize(reruns).items()]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        st.dataframe(rows, hide_index=True)
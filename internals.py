@@ -4,13 +4,43 @@
 # This file contains internals for component templating. You do not need
 # to understand this file, but are welcome to read through it if you want.
 #
+# Components are loaded, have their static CSS/JS inlined and are split
+# into literal segments and {{PLACEHOLDER}} slots once per process. Each
+# render then only escapes the data values and joins the segments.
+#
 #############################################################################
 
+import functools
+import json
 import os
+import re
 import streamlit.components.v1 as components
+import streamlit.components.v2 as components_v2
+
+from assets import get_asset
+from instrumentation import payload_bytes, span, traced
 
 _COMPONENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "custom_components")
 
+# Matches template placeholders such as {{BET_NAME}}
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+# Tags referencing a file in custom_components/static/, which get inlined
+_STATIC_CSS_RE = re.compile(r'<link rel="stylesheet" href="static/([\w.-]+)">')
+_STATIC_JS_RE = re.compile(r'<script src="static/([\w.-]+)"></script>')
+
+# When set (AIRBETS_DEV_MODE=1), cached templates are recompiled whenever the
+# HTML file or a CSS/JS file it references changes on disk. Otherwise files
+# are read only once.
+DEV_MODE = os.environ.get("AIRBETS_DEV_MODE", "") == "1"
+
+# Compiled templates keyed by the path of their HTML file
+_template_cache = {}
+
+# Registered st.components.v2 components keyed by component name:
+# name -> (mount callable, source paths, mtimes)
+_live_components = {}
+
 
 def load_html_file(file_path):
     # Read an html file
@@ -18,40 +48,259 @@ def load_html_file(file_path):
         return file.read()
 
 
+# Escaping tables for each output context: (character, replacement) pairs,
+# applied in order. The character that replacements introduce (a backslash
+# or '&') comes first so it is never escaped twice.
+_SAFE_TABLE = (('\\', '\\\\'), ("'", "\\'"), ('"', '\\"'))
+_HTML_TABLE = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'))
+_ATTR_TABLE = _HTML_TABLE + (('"', '&quot;'), ("'", '&#x27;'))
+_JS_TABLE = _SAFE_TABLE + (
+    ('`', '\\`'),
+    ('\n', '\\n'),
+    ('\r', '\\r'),
+    ('<', '\\u003c'),  # keeps "</script>" from closing the surrounding tag
+    ('\u2028', '\\u2028'),
+    ('\u2029', '\\u2029'),
+)
+
+# Escaped results are memoized for strings up to this length; longer values
+# (base64 images, huge rules text) are escaped every time so the cache stays small.
+_ESCAPE_CACHE_SIZE = 4096
+_ESCAPE_CACHE_MAX_LEN = 16 * 1024
+
+
+def _memoized(escape):
+    # Cache an escaper's results for short strings, which repeat across reruns
+    cached = functools.lru_cache(maxsize=_ESCAPE_CACHE_SIZE)(escape)
+
+    @functools.wraps(escape)
+    def wrapper(string):
+        if len(string) > _ESCAPE_CACHE_MAX_LEN:
+            return escape(string)
+        return cached(string)
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+def _apply_table(string, table):
+    # One str.replace per table entry: each is a C-speed scan, whereas
+    # str.translate falls back to a slow path for multi-character replacements
+    for char, replacement in table:
+        string = string.replace(char, replacement)
+    return string
+
+
+@_memoized
 def safe_string(string):
     # Make the string "safe" by escaping quotes and a backslash character
-    return ''.join(['\\' + c if c in ["'", '"', '\\'] else c for c in string])
-
-
-def create_component(data, component_name, height=None, width=None, scrolling=False):
-    # Read the HTML content from the file
-    component_html = load_html_file(os.path.join(_COMPONENTS_DIR, f"{component_name}.html"))
-
-    # Inject CSS inline if a companion CSS file exists
-    try:
-        css = load_html_file(f'custom_components/static/{component_name}_css.css')
-        component_html = component_html.replace(
-            f'<link rel="stylesheet" href="static/{component_name}_css.css">',
-            f'<style>{css}</style>'
-        )
-    except FileNotFoundError:
-        pass
-
-    # Inject JS inline if a companion JS file exists
-    try:
-        js = load_html_file(f'custom_components/static/{component_name}_js.js')
-        component_html = component_html.replace(
-            f'<script src="static/{component_name}_js.js"></script>',
-            f'<script>{js}</script>'
-        )
-    except FileNotFoundError:
-        pass
-
-    # Replace the templates with the specified data
-    for key in data:
-        data_placeholder = "{{" + str(key) + "}}"
-        component_html = component_html.replace(
-            data_placeholder, safe_string(str(data[key])))
+    return _apply_table(string, _SAFE_TABLE)
+
+
+@_memoized
+def escape_html(string):
+    # Escape text placed in an HTML element body
+    return _apply_table(string, _HTML_TABLE)
+
+
+@_memoized
+def escape_attr(string):
+    # Escape text placed inside a quoted HTML attribute value
+    return _apply_table(string, _ATTR_TABLE)
+
+
+@_memoized
+def escape_js(string):
+    # Escape text placed inside a JavaScript string literal in a <script> block
+    return _apply_table(string, _JS_TABLE)
+
+
+ESCAPERS = {
+    'safe': safe_string,
+    'html': escape_html,
+    'attr': escape_attr,
+    'js': escape_js,
+}
+
+
+def escape_values(data, context='safe', raw=()):
+    """Return a copy of ``data`` with string keys and every value escaped.
+
+    ``context`` picks the escaper from ESCAPERS; the default matches the
+    quote/backslash escaping create_component has always applied. Keys in
+    ``raw`` hold markup the caller has already escaped and are passed through.
+    """
+    escape = ESCAPERS[context]
+    values = {}
+    for key, value in data.items():
+        key = str(key)
+        value = value if type(value) is str else str(value)
+        values[key] = value if key in raw else escape(value)
+    return values
+
+
+class CompiledTemplate:
+    """A component document pre-split around its placeholders.
+
+    ``segments`` alternates literal HTML (even indices) with placeholder
+    names (odd indices), so rendering is a single ``str.join``.
+    """
+
+    __slots__ = ("segments", "placeholders", "sources", "mtimes")
+
+    def __init__(self, html, sources=(), mtimes=None):
+        self.segments = _PLACEHOLDER_RE.split(html)
+        self.placeholders = frozenset(self.segments[1::2])
+        self.sources = tuple(sources)
+        self.mtimes = mtimes
+
+    def render(self, values):
+        """Fill the placeholders from ``values`` (already escaped strings).
+
+        Placeholders without a value are left in the output untouched.
+        """
+        parts = self.segments[:]
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            parts[i] = values[name] if name in values else "{{" + name + "}}"
+        return "".join(parts)
+
+
+def _file_mtimes(paths):
+    # Modification time of each file, or None when the file does not exist
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def _load_inlined_html(component_name):
+    """Read a component's HTML with the static CSS and JS files it references
+    inlined. Returns the HTML and every path it depends on (including
+    referenced files that do not exist, so DEV_MODE notices them appearing).
+
+    A component usually references its own ``<name>_css.css`` and
+    ``<name>_js.js``, but may share another component's files.
+    """
+    html_path = os.path.join(_COMPONENTS_DIR, f"{component_name}.html")
+    component_html = load_html_file(html_path)
+    sources = [html_path]
+
+    def inliner(open_tag, close_tag):
+        def inline(match):
+            path = os.path.join(_COMPONENTS_DIR, "static", match.group(1))
+            sources.append(path)
+            try:
+                return open_tag + get_asset(path, check_mtime=DEV_MODE).text + close_tag
+            except FileNotFoundError:
+                return match.group(0)
+        return inline
+
+    # Inject CSS and JS inline for each referenced file that exists
+    component_html = _STATIC_CSS_RE.sub(inliner('<style>', '</style>'), component_html)
+    component_html = _STATIC_JS_RE.sub(inliner('<script>', '</script>'), component_html)
+    return component_html, sources
+
+
+def get_template(component_name):
+    """Return the compiled template for a component, compiling it on first use.
+
+    In DEV_MODE the source files' mtimes are checked on every call and the
+    template is recompiled when any of them changed.
+    """
+    key = os.path.join(_COMPONENTS_DIR, f"{component_name}.html")
+    template = _template_cache.get(key)
+    if template is not None and (not DEV_MODE or _file_mtimes(template.sources) == template.mtimes):
+        return template
+
+    html, sources = _load_inlined_html(component_name)
+    template = CompiledTemplate(html, sources, _file_mtimes(sources))
+    _template_cache[key] = template
+    return template
+
+
+def clear_template_cache():
+    """Drop every compiled template so the next render reloads from disk."""
+    _template_cache.clear()
+
+
+@traced("template.render", size=payload_bytes)
+def render_component(data, component_name, raw=(), context='safe'):
+    """Return the component's HTML with the templates replaced by ``data``.
+
+    Values are escaped for ``context`` (see ESCAPERS) except for the keys
+    listed in ``raw``.
+    """
+    return get_template(component_name).render(escape_values(data, context, raw))
+
+
+def create_component(data, component_name, height=None, width=None, scrolling=False, raw=()):
+    # Fill the cached, compiled template with the specified data
+    component_html = render_component(data, component_name, raw)
 
     # Have streamlit render the component
-    components.html(component_html, width, height, scrolling)
+    with span("component.emit") as emitted:
+        emitted.bytes = len(component_html)
+        components.html(component_html, width, height, scrolling)
+
+
+def _load_live_parts(component_name):
+    """Split a live component's HTML into markup, CSS and JS.
+
+    The ``static/`` files its link/script tags reference are read from the
+    asset cache and concatenated; the tags themselves are removed. Returns
+    ``(html, css, js, sources)``.
+    """
+    html_path = os.path.join(_COMPONENTS_DIR, f"{component_name}.html")
+    html = load_html_file(html_path)
+    sources = [html_path]
+    parts = {'css': [], 'js': []}
+
+    def collector(kind):
+        def collect(match):
+            path = os.path.join(_COMPONENTS_DIR, "static", match.group(1))
+            sources.append(path)
+            parts[kind].append(get_asset(path, check_mtime=DEV_MODE).text)
+            return ""
+        return collect
+
+    html = _STATIC_CSS_RE.sub(collector('css'), html)
+    html = _STATIC_JS_RE.sub(collector('js'), html)
+    return html.strip(), "\n".join(parts['css']), "\n".join(parts['js']), sources
+
+
+def get_live_component(component_name):
+    """Return the mount function of a bidirectional (st.components.v2)
+    component, registering it on first use.
+
+    ``custom_components/<name>.html`` holds the markup; its static JS must be
+    an ES module whose default export receives ``{data, parentElement,
+    setStateValue, setTriggerValue}``. In DEV_MODE the component is
+    re-registered when any of its files change.
+    """
+    entry = _live_components.get(component_name)
+    if entry is not None and (not DEV_MODE or _file_mtimes(entry[1]) == entry[2]):
+        return entry[0]
+
+    html, css, js, sources = _load_live_parts(component_name)
+    mount = components_v2.component(component_name, html=html, css=css or None, js=js or None)
+    _live_components[component_name] = (mount, sources, _file_mtimes(sources))
+    return mount
+
+
+def create_live_component(data, component_name, key, **callbacks):
+    """Mount a bidirectional component and return its state/trigger values.
+
+    Unlike create_component, the markup is mounted once per ``key``: on later
+    reruns only ``data`` (JSON-serializable) changes and the component's JS
+    patches the DOM. Callbacks follow Streamlit's ``on_<name>_change``
+    convention and declare the state/trigger names the JS may set.
+    """
+    mount = get_live_component(component_name)
+    with span("component.live") as emitted:
+        emitted.bytes = len(json.dumps(data))
+        return mount(key=key, data=data, **callbacks)
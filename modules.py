@@ -7,8 +7,28 @@
 # function other than the example.
 #############################################################################
 
+import math
+from urllib.parse import quote
+
 import streamlit as st
-from internals import create_component
+from data import count_bets, get_bet, get_bet_page, place_order
+from data.columnar import ColumnarTable, trade_metrics
+from data.orderbook import MAX_QUANTITY
+from data.trade_analytics import TradeStats
+from instrumentation import traced
+from internals import create_component, create_live_component, escape_attr, escape_html, render_component
+
+# Height of one row of cards in the single-component bet grid, in pixels
+GRID_ROW_HEIGHT = 162
+# Height of one row of cards in display_bet_summaries, in pixels
+SUMMARY_ROW_HEIGHT = 640
+# Order batch ids remembered per live card, to drop re-delivered batches
+SEEN_BATCHES = 256
+# Size of the price sparkline on the individual bet card, in pixels; pass
+# SPARKLINE_POINTS to get_price_series (about one point every 2 pixels)
+SPARKLINE_WIDTH = 240
+SPARKLINE_HEIGHT = 48
+SPARKLINE_POINTS = SPARKLINE_WIDTH // 2
 
 
 # This one has been written for you as an example. You may change it as wanted.
@@ -42,35 +62,75 @@ def display_post(username, user_image, timestamp, content, post_image):
         st.image(post_image)
 
 
+@traced("metrics.compute_trade_metrics")
 def compute_trade_metrics(trades_list):
-    """Return aggregate statistics for a list of trades."""
-    total_trades = len(trades_list)
-    total_volume = sum(t.get('quantity', 0) for t in trades_list)
-    total_value = sum(t.get('quantity', 0) * t.get('price', 0) for t in trades_list)
-    return {
-        'total_trades': total_trades,
-        'total_volume': total_volume,
-        'total_value': total_value,
-    }
+    """Return aggregate statistics for a list of trades.
+
+    Uses one pass of the incremental engine in data/trade_analytics.py, so
+    besides total_trades/total_volume/total_value the result has vwap,
+    buy/sell volume, net_position, realized_pnl and per-symbol, per-action
+    and per-hour breakdowns (see TradeStats.as_dict).
+
+    A ColumnarTable (get_user_trades(..., columnar=True)) takes the
+    vectorized path instead; its realized_pnl is None.
+    """
+    if isinstance(trades_list, ColumnarTable):
+        return trade_metrics(trades_list)
+    stats = TradeStats()
+    for trade in trades_list:
+        stats.add_trade(trade)
+    return stats.as_dict()
 
 
-def display_trade_summary(trades_list):
+@traced("display.display_trade_summary")
+def display_trade_summary(trades_list, metrics=None, portfolio=None):
     """Render a summary view and table for a user's trades.
 
-    Metrics are calculated via :func:`compute_trade_metrics`. The raw trade
-    data is then displayed with ``st.table``.
+    Metrics are calculated via :func:`compute_trade_metrics` unless already
+    computed ones (e.g. from get_user_trade_metrics) are passed. The raw trade
+    data is then displayed with ``st.table``; a ColumnarTable is handed over
+    as a DataFrame built on its arrays.
+
+    A ``portfolio`` valuation (from get_user_portfolio) adds the market
+    value and P&L of the open positions and a table of them at current
+    prices.
     """
-    if not trades_list:
+    if not len(trades_list):
         st.write("No trades available.")
         return
-    metrics = compute_trade_metrics(trades_list)
+    if metrics is None:
+        metrics = compute_trade_metrics(trades_list)
     st.header("Trade Summary")
     st.metric("Total trades", metrics['total_trades'])
     st.metric("Total volume", metrics['total_volume'])
     st.metric("Total value", f"${metrics['total_value']:.2f}")
-    st.table(trades_list)
+    if metrics['vwap'] is not None:
+        st.metric("VWAP", f"${metrics['vwap']:.2f}")
+    if metrics['realized_pnl'] is not None:
+        st.metric("Realized P&L", f"${metrics['realized_pnl']:.2f}")
+    if portfolio is not None:
+        st.subheader("Open positions")
+        st.metric("Market value", f"${portfolio['market_value']:.2f}")
+        st.metric("Unrealized P&L", f"${portfolio['unrealized_pnl']:.2f}")
+        if portfolio['positions']:
+            st.table([
+                {
+                    'market': p['market'] if p['outcome'] is None else f"{p['market']} ({p['outcome']})",
+                    'quantity': p['quantity'],
+                    'avg_cost': round(p['avg_cost'], 2),
+                    'mark': round(p['mark'], 2),
+                    'market_value': round(p['market_value'], 2),
+                    'unrealized_pnl': round(p['unrealized_pnl'], 2),
+                }
+                for p in portfolio['positions']
+            ])
+    if isinstance(trades_list, ColumnarTable):
+        st.table(trades_list.to_dataframe())
+    else:
+        st.table(trades_list)
 
 
+@traced("display.display_individual_bet_summary")
 def display_individual_bet_summary(
     bet_name: str,
     bet_image_link: str | None,
@@ -79,6 +139,7 @@ def display_individual_bet_summary(
     yes_percent: float,
     no_percent: float,
     rules: str,
+    price_history=None,
 ):
     """Displays an individual bet summary card containing a bet title, image (or "No Image Available" fallback), Buy/Sell mode toggle buttons, Yes/No choice toggle buttons, a rules description, and a transaction button. 
     The card defaults to Buy Mode and Yes Mode on load; clicking Buy or Sell updates the active mode border highlight and changes the transaction button's color and label accordingly, while clicking Yes or No similarly toggles the choice highlight. 
@@ -92,6 +153,8 @@ def display_individual_bet_summary(
         yes_percent    : Implied probability % for Yes
         no_percent     : Implied probability % for No
         rules          : Description / rules text for the bet
+        price_history  : Optional recent Yes prices, oldest first (e.g. from
+                         get_price_series), drawn as a sparkline under the title
     """
     # Build the image HTML — either an <img> tag or a "No Image Available" fallback
     if bet_image_link:
@@ -107,10 +170,268 @@ def display_individual_bet_summary(
         'YES_PERCENT': f"{yes_percent:.0f}",
         'NO_PERCENT':  f"{no_percent:.0f}",
         'RULES':       rules,
+        'SPARKLINE_HTML': _sparkline_svg(price_history),
     }
 
     html_file_name = "individual_bet_summary"
-    create_component(data, html_file_name, height=700)
+    create_component(data, html_file_name, height=700, raw=('SPARKLINE_HTML',))
+
+
+def _sparkline_svg(prices, width=SPARKLINE_WIDTH, height=SPARKLINE_HEIGHT):
+    # An inline SVG polyline of the prices, scaled to their range; empty
+    # until there are two prices to draw between
+    if prices is None or len(prices) < 2:
+        return ""
+    low, high = min(prices), max(prices)
+    span = (high - low) or 1
+    step = width / (len(prices) - 1)
+    points = " ".join(
+        f"{i * step:.1f},{height - 2 - (price - low) / span * (height - 4):.1f}" for i, price in enumerate(prices)
+    )
+    trend = "up" if prices[-1] >= prices[0] else "down"
+    return (
+        f'<svg class="bet-sparkline {trend}" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'<polyline points="{points}" /></svg>'
+    )
+
+
+def _bet_card_html(bet):
+    # One compact card for the bet_grid component, linking to the individual view
+    return (
+        f'<a class="grid-card" target="_top" href="/individual_view?bet_id={escape_attr(quote(str(bet["bet_id"])))}">'
+        f'<div class="grid-category">{escape_html(str(bet["category"]))}</div>'
+        f'<div class="grid-name">{escape_html(str(bet["bet_name"]))}</div>'
+        f'<div class="grid-odds">Yes <b>{bet["yes_percent"]}%</b> · No <b>{bet["no_percent"]}%</b></div>'
+        f'<div class="grid-prices">${bet["yes_value"]:.2f} / ${bet["no_value"]:.2f}</div>'
+        '</a>'
+    )
+
+
+@traced("display.display_bet_grid")
+def display_bet_grid(bets, cols_per_row=3, batch=False, column_major=False, view_buttons=False):
+    """Render a page of compact bet cards and return the bet_id whose View
+    button was clicked (or None).
+
+    Parameters:
+        bets          : The bets to show — normally one page from get_bet_page
+        cols_per_row  : Number of grid columns
+        batch         : Render every card inside one bet_grid component (one
+                        iframe) instead of one Streamlit container per card.
+                        Cards then link to the individual view instead of
+                        having View buttons.
+        column_major  : Fill each column top-to-bottom instead of row by row
+        view_buttons  : Add a "View" button under each native card
+    """
+    if batch:
+        rows = -(-len(bets) // cols_per_row)
+        data = {
+            'COLUMNS': cols_per_row,
+            'CARDS_HTML': ''.join(_bet_card_html(bet) for bet in bets),
+        }
+        create_component(data, "bet_grid", height=rows * GRID_ROW_HEIGHT, raw=('CARDS_HTML',))
+        return None
+
+    if column_major:
+        # A single row of columns; column c holds bets c, c + cols, c + 2*cols, ...
+        layout = [[bets[c::cols_per_row] for c in range(cols_per_row)]]
+    else:
+        # One row of columns per cols_per_row bets
+        layout = [[[bet] for bet in bets[i:i + cols_per_row]] for i in range(0, len(bets), cols_per_row)]
+
+    clicked = None
+    for row in layout:
+        for col, col_bets in zip(st.columns(cols_per_row), row):
+            with col:
+                for bet in col_bets:
+                    with st.container(border=True):
+                        st.markdown(f"**{bet['category']}**")
+                        st.markdown(f"### {bet['bet_name']}")
+                        st.caption(f"Yes **{bet['yes_percent']}%** · No **{bet['no_percent']}%**")
+                        st.caption(f"${bet['yes_value']:.2f} / ${bet['no_value']:.2f}")
+                        if view_buttons and st.button("View", key=f"view_{bet['bet_id']}"):
+                            clicked = bet['bet_id']
+    return clicked
+
+
+@traced("display.display_paginated_bets")
+def display_paginated_bets(category="All", page_size=12, key="bet_page", **grid_options):
+    """Render one page of bets from the store with Previous/Next controls.
+
+    Only the visible page is fetched and rendered, so rerun cost does not
+    grow with catalog size. The stack of page cursors lives in
+    ``st.session_state[key]`` and resets when ``category`` changes.
+    Remaining keyword arguments go to :func:`display_bet_grid`; returns the
+    bet_id whose View button was clicked (or None).
+    """
+    state = st.session_state.get(key)
+    if state is None or state['category'] != category or state['page_size'] != page_size:
+        state = st.session_state[key] = {'category': category, 'page_size': page_size, 'cursors': [None]}
+
+    bets, next_cursor = get_bet_page(category, after=state['cursors'][-1], limit=page_size)
+    clicked = display_bet_grid(bets, **grid_options)
+
+    display_page_controls(key, state['cursors'], next_cursor, count_bets(category), page_size)
+    return clicked
+
+
+def display_page_controls(key, cursors, next_cursor, total, page_size):
+    """Draw Previous/Next buttons and a page caption for cursor paging.
+
+    ``cursors`` is the stack of ``after`` cursors of the pages seen so far
+    (``[None]`` on the first page); Previous pops it and Next pushes
+    ``next_cursor``, which is None on the last page.
+    """
+    pages = max(1, -(-total // page_size))
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        st.button(
+            "← Previous", key=f"{key}_prev", disabled=len(cursors) == 1,
+            on_click=cursors.pop,
+        )
+    with info_col:
+        st.caption(f"Page {len(cursors)} of {pages} · {total} bets")
+    with next_col:
+        st.button(
+            "Next →", key=f"{key}_next", disabled=next_cursor is None,
+            on_click=cursors.append, args=(next_cursor,),
+        )
+
+
+@traced("display.display_bet_summaries")
+def display_bet_summaries(bets, cols_per_row=2, height=None):
+    """Displays several individual bet summary cards inside one component.
+
+    The stylesheet and script are shipped once for the whole document and
+    there is a single iframe, instead of one full copy of each per card.
+    Every card keeps its own Buy/Sell and Yes/No state, scoped by bet_id,
+    and behaves like :func:`display_individual_bet_summary`.
+
+    Parameters:
+        bets         : Bet dicts (or store records) with the fields used by
+                       display_individual_bet_summary plus bet_id
+        cols_per_row : Cards per row
+        height       : Component height in pixels; sized to the rows by default
+    """
+    if not bets:
+        return
+    cards = []
+    for bet in bets:
+        image_link = bet.get("bet_image_link")
+        if image_link:
+            image_html = f'<img src="{escape_attr(image_link)}" alt="Bet image" />'
+        else:
+            image_html = "No Image Available"
+        card_data = {
+            'BET_ID':      bet["bet_id"],
+            'BET_NAME':    bet["bet_name"],
+            'IMAGE_HTML':  image_html,
+            'YES_VALUE':   f"{bet['yes_value']:.2f}",
+            'NO_VALUE':    f"{bet['no_value']:.2f}",
+            'YES_PERCENT': f"{bet['yes_percent']:.0f}",
+            'NO_PERCENT':  f"{bet['no_percent']:.0f}",
+            'RULES':       bet["rules"],
+        }
+        # Card fields are escaped for HTML attributes, which is also safe in element bodies
+        cards.append(render_component(card_data, "bet_summary_card", raw=('IMAGE_HTML',), context='attr'))
+
+    if height is None:
+        height = -(-len(cards) // cols_per_row) * SUMMARY_ROW_HEIGHT
+    data = {
+        'COLUMNS':    cols_per_row,
+        'CARDS_HTML': ''.join(cards),
+    }
+    create_component(data, "bet_summaries", height=height, raw=('CARDS_HTML',))
+
+
+def place_ticket_orders(bet_id, user_id, orders):
+    """Turn order events from the live bet card into limit orders.
+
+    Each event has side, outcome, amount (dollars) and price (cents of the
+    outcome, as displayed when the user clicked). The dollar amount buys
+    as many whole contracts as it covers at that price, up to MAX_QUANTITY.
+    Returns one result dict per event: ``{'ok', 'message', 'order', 'fills'}``.
+    """
+    results = []
+    for event in orders:
+        try:
+            price = int(event['price'])
+            amount = float(event['amount'])
+            if not math.isfinite(amount) or amount <= 0:
+                raise ValueError(f"amount must be a positive number of dollars: {event['amount']}")
+            contracts = int(amount * 100 // price)
+            if contracts < 1:
+                raise ValueError(f"${amount:.2f} does not cover one contract at {price}¢")
+            if contracts > MAX_QUANTITY:
+                raise ValueError(f"${amount:,.2f} buys more than {MAX_QUANTITY:,} contracts at {price}¢")
+            order, fills = place_order(bet_id, user_id, event['side'], event['outcome'], price, contracts)
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as exc:
+            results.append({'ok': False, 'message': f"Order rejected: {exc}", 'order': None, 'fills': []})
+            continue
+        verb = "Bought" if order.side == "BUY" else "Sold"
+        message = f"{verb} {order.quantity} {order.outcome.title()} @ {order.price}¢"
+        if order.remaining:
+            message += f" ({order.filled} filled, {order.remaining} resting)"
+        results.append({'ok': True, 'message': message, 'order': order, 'fills': fills})
+    return results
+
+
+def _handle_order_batch(key, bet_id, user_id, batch):
+    # Apply one batch from the live card once, and leave a status for the card
+    if not isinstance(batch, dict) or not batch.get('orders'):
+        return
+    seen = st.session_state.setdefault(f"{key}__seen", [])
+    if batch.get('batch_id') in seen:
+        return
+    seen.append(batch.get('batch_id'))
+    del seen[:-SEEN_BATCHES]
+    results = place_ticket_orders(bet_id, user_id, batch['orders'])
+    st.session_state[f"{key}__status"] = {
+        'id': batch.get('batch_id'),
+        'ok': all(result['ok'] for result in results),
+        'message': " · ".join(result['message'] for result in results),
+    }
+
+
+@traced("display.display_live_bet_summary")
+def display_live_bet_summary(bet_id, user_id, key="live_bet", refresh_seconds=None):
+    """Displays the individual bet summary card as a live, two-way component.
+
+    Looks like :func:`display_individual_bet_summary`, but the card is mounted
+    once and later reruns only send the bet's current fields, which the card
+    patches in place (briefly highlighting price moves). Submitting posts
+    orders back in debounced batches; they are placed in the matching engine
+    for ``user_id`` and the outcome is shown as a toast. The current ticket
+    (side, outcome, amount) is available as ``st.session_state[key].ticket``.
+
+    Parameters:
+        bet_id          : Bet to show and trade
+        user_id         : Account the orders are placed for
+        key             : Widget key of the component
+        refresh_seconds : Re-send prices this often (as a fragment rerun);
+                          None to update only on normal reruns
+    """
+    def on_orders():
+        state = st.session_state.get(key) or {}
+        _handle_order_batch(key, bet_id, user_id, state.get('orders'))
+
+    def render():
+        bet = get_bet(bet_id)
+        if bet is None:
+            st.info("This bet is no longer available.")
+            return None
+        data = {'bet': bet.to_dict()}
+        status = st.session_state.pop(f"{key}__status", None)
+        if status is not None:
+            data['status'] = status
+        result = create_live_component(
+            data, "individual_bet_summary_live", key,
+            on_orders_change=on_orders, on_ticket_change=lambda: None,
+        )
+        return result.get('ticket')
+
+    if refresh_seconds:
+        return st.fragment(render, run_every=refresh_seconds)()
+    return render()
 
 
 def display_recent_workouts(workouts_list):
@@ -125,5 +446,17 @@ def display_recent_workouts(workouts_list):
 
 
 def display_genai_advice(timestamp, content, image):
-    """Placeholder for GenAI advice component; currently unused."""
-    st.write(f"Advice ({timestamp}): {content}")
+    """Shows the user's latest GenAI advice (from get_genai_advice, which
+    never waits for the model).
+
+    With no content yet (the first advice is still being generated) it
+    shows a note instead, so the page renders without blocking.
+    """
+    st.subheader("Advice")
+    if content is None:
+        st.caption("Your advice is being prepared, check back in a moment.")
+        return
+    st.write(content)
+    if image:
+        st.image(image)
+    st.caption(f"Generated {timestamp}")
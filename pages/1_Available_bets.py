@@ -3,11 +3,35 @@ Dashboard: navbar (logo + AirBets | Profile, Settings) and grid of compact bet c
 """
 import streamlit as st
 
-from data import get_available_bets, get_bet_categories
-from modules import display_individual_bet_summary
+import instrumentation
+
+from data import count_bets, get_bet, get_bet_categories, get_price_series, search_bets
+from modules import (
+    SPARKLINE_POINTS,
+    display_bet_grid,
+    display_individual_bet_summary,
+    display_page_controls,
+    display_paginated_bets,
+)
+
+instrumentation.start_rerun("available_bets")
 
 LOGO_PATH = "static/images/airbets-logo.svg"
 COLS_PER_ROW = 3
+PAGE_SIZE = 12
+# True renders each page of cards as one bet_grid component (one iframe,
+# cards link to the individual view) instead of Streamlit containers
+BATCH_GRID = False
+SEARCH_PAGE_KEY = "dashboard_search_page"
+
+
+def category_label(category):
+    """Category option text, with its match count while a search is shown."""
+    if results is None:
+        return category
+    matches = results.facets['category']
+    return f"{category} ({matches.get(category, 0) if category != 'All' else sum(matches.values())})"
+
 
 # ---- Navbar: logo + AirBets left, Profile + Settings right ----
 nav_left, nav_right = st.columns([3, 1])
@@ -30,21 +54,36 @@ with nav_right:
 
 st.markdown("---")
 
-# ---- Category filter ----
+# ---- Search and category filter ----
+query = st.text_input(
+    "Search markets", key="dashboard_search", placeholder="Search names, rules and categories"
+).strip()
+# Category counts ignore the category filter, so the value from the
+# previous rerun is good enough to search before the selectbox is drawn.
+# The stack of page cursors resets when the query or category changes.
+results = None
+if query:
+    search_category = st.session_state.get("dashboard_category", "All")
+    search_page = st.session_state.get(SEARCH_PAGE_KEY)
+    if search_page is None or (search_page['query'], search_page['category']) != (query, search_category):
+        search_page = st.session_state[SEARCH_PAGE_KEY] = {
+            'query': query, 'category': search_category, 'cursors': [None],
+        }
+    results = search_bets(query, search_category, limit=PAGE_SIZE, after=search_page['cursors'][-1])
 categories = get_bet_categories()
 selected = st.selectbox(
     "Filter by category",
     options=["All"] + categories,
     index=0,
     key="dashboard_category",
+    format_func=category_label,
 )
 
-bets = get_available_bets()
-filtered = [b for b in bets if selected == "All" or b.get("category") == selected]
-
 # ---- Selected bet detail (when user clicks a card) ----
-if "dashboard_selected_bet" in st.session_state and st.session_state.dashboard_selected_bet:
-    bet = st.session_state.dashboard_selected_bet
+# Only the bet_id is kept in session state so the card always shows current prices
+selected_bet_id = st.session_state.get("dashboard_selected_bet")
+bet = get_bet(selected_bet_id) if selected_bet_id else None
+if bet is not None:
     if st.button("← Back to list", key="back_to_list"):
         st.session_state.dashboard_selected_bet = None
         st.rerun()
@@ -56,23 +95,39 @@ if "dashboard_selected_bet" in st.session_state and st.session_state.dashboard_s
         yes_percent=bet["yes_percent"],
         no_percent=bet["no_percent"],
         rules=bet["rules"],
+        price_history=get_price_series(bet["bet_id"], SPARKLINE_POINTS)[1],
     )
+    instrumentation.render_debug_panel()
     st.stop()
 
-# ---- Grid of compact bet cards ----
-if not filtered:
+# ---- Search results, best match first ----
+if results is not None:
+    buckets = " · ".join(
+        f"{bucket * 10}–{bucket * 10 + 10}% Yes: {count}" for bucket, count in results.facets['probability'].items()
+    )
+    st.caption(f"{results.total} matching bets" + (f" · {buckets}" if buckets else ""))
+    if not results.bets:
+        st.info("No bets match your search.")
+    clicked = display_bet_grid(results.bets, cols_per_row=COLS_PER_ROW, batch=BATCH_GRID, view_buttons=True)
+    display_page_controls(SEARCH_PAGE_KEY, search_page['cursors'], results.next_cursor, results.total, PAGE_SIZE)
+    if clicked:
+        st.session_state.dashboard_selected_bet = clicked
+        st.rerun()
+
+# ---- Grid of compact bet cards (one page at a time) ----
+elif not count_bets(selected):
     st.info("No bets in this category yet.")
 else:
-    for start in range(0, len(filtered), COLS_PER_ROW):
-        row_bets = filtered[start : start + COLS_PER_ROW]
-        cols = st.columns(COLS_PER_ROW)
-        for col, bet in zip(cols, row_bets):
-            with col:
-                with st.container(border=True):
-                    st.markdown(f"**{bet['category']}**")
-                    st.markdown(f"### {bet['bet_name']}")
-                    st.caption(f"Yes **{bet['yes_percent']}%** · No **{bet['no_percent']}%**")
-                    st.caption(f"${bet['yes_value']:.2f} / ${bet['no_value']:.2f}")
-                    if st.button("View", key=f"view_{bet['bet_id']}"):
-                        st.session_state.dashboard_selected_bet = bet
-                        st.rerun()
+    clicked = display_paginated_bets(
+        selected,
+        page_size=PAGE_SIZE,
+        key="dashboard_page",
+        cols_per_row=COLS_PER_ROW,
+        batch=BATCH_GRID,
+        view_buttons=True,
+    )
+    if clicked:
+        st.session_state.dashboard_selected_bet = clicked
+        st.rerun()
+
+instrumentation.render_debug_panel()
@@ -1,28 +1,39 @@
 """
 Individual view: shows the full individual_bet_summary component (Shavaughn's design)
 — image, Buy/Sell, Yes/No, rules, amount input, Submit button — at /individual_view.
+Pass ?bet_id=<id> to pick the bet; defaults to the first available bet.
+The card is the live variant: orders reach the matching engine and prices
+refresh in place every few seconds.
 """
 import streamlit as st
 
-from data import get_available_bets
-from modules import display_individual_bet_summary
+import instrumentation
+
+from data import get_bet, get_bets_in_category
+from modules import display_live_bet_summary
+
+instrumentation.start_rerun("individual_view")
+
+# Seconds between in-place price refreshes of the card
+PRICE_REFRESH_SECONDS = 2
 
 st.set_page_config(page_title="Bet detail — AirBets", layout="wide")
 
 st.markdown("[← Back to dashboard](/)")
 st.markdown("---")
 
-bets = get_available_bets()
-if not bets:
+bet_id = st.query_params.get("bet_id")
+bet = get_bet(bet_id) if bet_id else None
+if bet is None:
+    bet = next(iter(get_bets_in_category("All")), None)
+if bet is None:
     st.info("No bets available.")
 else:
-    bet = bets[0]
-    display_individual_bet_summary(
-        bet_name=bet["bet_name"],
-        bet_image_link=bet.get("bet_image_link"),
-        yes_value=bet["yes_value"],
-        no_value=bet["no_value"],
-        yes_percent=bet["yes_percent"],
-        no_percent=bet["no_percent"],
-        rules=bet["rules"],
+    display_live_bet_summary(
+        bet["bet_id"],
+        st.session_state.get("username", "user1"),
+        key=f"live_{bet['bet_id']}",
+        refresh_seconds=PRICE_REFRESH_SECONDS,
     )
+
+instrumentation.render_debug_panel()
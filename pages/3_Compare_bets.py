@@ -0,0 +1,36 @@
+"""
+Compare bets: pick several bets and see their full summary cards side by side,
+rendered together in one component (shared CSS/JS, one iframe).
+"""
+import streamlit as st
+
+import instrumentation
+
+from data import get_bet, get_bet_categories, get_bets_in_category
+from modules import display_bet_summaries
+
+instrumentation.start_rerun("compare_bets")
+
+MAX_COMPARED = 6
+
+st.set_page_config(page_title="Compare bets — AirBets", layout="wide")
+
+st.markdown("[← Back to dashboard](/)")
+st.markdown("# Compare bets")
+
+category = st.selectbox("Category", options=["All"] + get_bet_categories(), key="compare_category")
+names = {bet["bet_id"]: bet["bet_name"] for bet in get_bets_in_category(category)}
+selected = st.multiselect(
+    "Bets to compare",
+    options=list(names),
+    format_func=names.get,
+    max_selections=MAX_COMPARED,
+    key="compare_bets",
+)
+
+if not selected:
+    st.info("Pick two or more bets to compare them.")
+else:
+    display_bet_summaries([get_bet(bet_id) for bet_id in selected])
+
+instrumentation.render_debug_panel()
@@ -0,0 +1,137 @@
+#############################################################################
+# tests/test_advice.py — tests for data/advice.py
+#############################################################################
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import data_fetcher
+from data.advice import AdviceService, StubModel, build_prompt, open_model, snapshot_key
+
+
+class TestStubModel(unittest.TestCase):
+    """Tests the deterministic stand-in model."""
+
+    def test_same_prompt_same_advice(self):
+        model = StubModel()
+        prompts = [build_prompt({'trades': n}) for n in range(10)]
+        self.assertEqual(model.generate(prompts), StubModel().generate(prompts))
+        self.assertGreater(len({r['content'] for r in model.generate(prompts)}), 1)
+        self.assertEqual((model.calls, model.prompts), (2, 20))
+
+    def test_snapshot_key_ignores_order(self):
+        self.assertEqual(snapshot_key({'a': 1, 'b': 2}), snapshot_key({'b': 2, 'a': 1}))
+        self.assertNotEqual(snapshot_key({'a': 1}), snapshot_key({'a': 2}))
+
+    def test_open_model(self):
+        self.assertEqual(open_model("stub:250").latency, 0.25)
+        for spec in ("gpt", "stub:soon"):
+            with self.assertRaises(ValueError):
+                open_model(spec)
+
+
+class TestAdviceService(unittest.TestCase):
+    """Tests queueing, micro-batching, caching and refreshes."""
+
+    def setUp(self):
+        self.features = {}
+        self.model = StubModel(latency=0.05)
+        self.service = AdviceService(self.model, features_of=lambda user_id: self.features[user_id],
+                                     batch_size=8, max_wait=0.05)
+        self.addCleanup(self.service.close)
+
+    def test_touch_never_blocks_and_users_are_batched(self):
+        for n in range(8):
+            self.features[f"u{n}"] = {'trades': n}
+        start = time.perf_counter()
+        for n in range(8):
+            self.service.touch(f"u{n}")
+        self.assertIsNone(self.service.get("u0"))
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertTrue(self.service.wait_idle(5))
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(self.model.prompts, 8)
+        advice = self.service.get("u3")
+        self.assertEqual(set(advice), {'advice_id', 'timestamp', 'content', 'image'})
+
+    def test_equal_snapshots_share_one_response(self):
+        self.features.update(a={'trades': 1}, b={'trades': 1})
+        self.service.prefetch(["a", "b"])
+        self.assertTrue(self.service.wait_idle(5))
+        self.assertIs(self.service.get("a"), self.service.get("b"))
+        self.assertEqual(self.model.prompts, 1)
+        # Unchanged features after a refresh: served from the cache
+        self.service.prefetch(["a"])
+        self.assertTrue(self.service.wait_idle(5))
+        self.assertEqual(self.model.prompts, 1)
+        self.assertEqual(self.service.stats()['cache_hits'], 1)
+
+    def test_stale_regenerates_active_users_only(self):
+        self.features.update(a={'trades': 1}, b={'trades': 1})
+        self.service.touch("a")
+        self.service.prefetch(["b"])
+        self.assertTrue(self.service.wait_idle(5))
+        self.features.update(a={'trades': 2}, b={'trades': 2})
+        self.service.stale("a")
+        self.service.stale("b")
+        self.service.touch("a")     # recent advice: not queued again
+        self.assertTrue(self.service.wait_idle(5))
+        self.assertEqual(self.model.prompts, 2)
+        self.assertNotEqual(self.service.get("a"), self.service.get("b"))
+
+    def test_active_users_are_refreshed(self):
+        self.service.refresh_interval = 0.1
+        self.features['a'] = {'trades': 1}
+        self.service.touch("a")
+        self.assertTrue(self.service.wait_idle(5))
+        self.features['a'] = {'trades': 5}
+        deadline = time.monotonic() + 5
+        while self.model.prompts < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.model.prompts, 2)
+
+    def test_failures_keep_the_last_advice(self):
+        self.features['a'] = {'trades': 1}
+        self.service.touch("a")
+        self.assertTrue(self.service.wait_idle(5))
+        advice = self.service.get("a")
+        self.features['a'] = {'trades': 2}
+        with patch.object(self.model, "generate", side_effect=RuntimeError("model down")):
+            self.service.prefetch(["a", "missing"])
+            self.assertTrue(self.service.wait_idle(5))
+        self.assertIs(self.service.get("a"), advice)
+        self.assertEqual(self.service.stats()['errors'], 2)
+
+
+class TestGetGenaiAdvice(unittest.TestCase):
+    """Tests get_genai_advice over a stub service."""
+
+    def setUp(self):
+        service = AdviceService(StubModel(latency=0.2), features_of=data_fetcher._advice_features)
+        self.addCleanup(service.close)
+        patcher = patch("data_fetcher._advice_service", service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_without_waiting_for_the_model(self):
+        start = time.perf_counter()
+        self.assertIsNone(data_fetcher.get_genai_advice('user1'))
+        self.assertLess(time.perf_counter() - start, 0.2)
+        self.assertTrue(data_fetcher.get_advice_service().wait_idle(5))
+        self.assertIsNotNone(data_fetcher.get_genai_advice('user1')['content'])
+
+    def test_sessions_do_not_wait_on_each_other(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(data_fetcher.get_genai_advice('user2')))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(1)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(data_fetcher.get_advice_service().stats()['touches'], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#############################################################################
+# tests/test_app.py — tests for app.py, run headless with AppTest
+#############################################################################
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from streamlit.testing.v1 import AppTest
+
+import data_fetcher
+from data.search import SearchIndex
+from data.storage import MemoryBackend
+from data.store import BetStore
+from data.trade_log import TradeLog
+from tests.test_bet_store import make_bet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+BETS_PAGE_PATH = os.path.join(ROOT, "pages", "1_Available_bets.py")
+
+
+class TestApp(unittest.TestCase):
+    """Tests pages of the app over a fresh in-memory backend."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        log = TradeLog(os.path.join(self.tmp, "trades.log"))
+        self.addCleanup(log.close)
+        backend = MemoryBackend(log)
+        for target, value in (
+            ("data_fetcher.get_backend", lambda: backend),
+            ("data_fetcher._seeded", False),
+            ("data_fetcher._social_graph", None),
+            ("data_fetcher._feed_service", None),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for user_id in ('alice', 'user1'):
+            self.addCleanup(data_fetcher.invalidate_user_data, user_id)
+
+    def test_home_page_for_a_user_without_a_profile(self):
+        at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+        next(t for t in at.text_input if t.label == 'Username').set_value('alice')
+        next(b for b in at.button if b.label == 'Log in').click().run()
+        at.run()
+        self.assertEqual(at.sidebar.radio[0].value, 'Home')
+        self.assertFalse(at.exception)
+        self.assertEqual(data_fetcher.get_user_posts('alice'), [])
+
+    def test_search_results_page_through_every_match(self):
+        index = SearchIndex()
+        index.attach(BetStore.from_dicts([make_bet(f"b{n:02}") for n in range(30)]))
+        with patch("data.search_bets", lambda query, category, limit, after: index.search(
+                query, category=category, limit=limit, after=after)):
+            at = AppTest.from_file(BETS_PAGE_PATH, default_timeout=60).run()
+            at.text_input(key="dashboard_search").set_value("bet").run()
+            seen = []
+            for page in (1, 2, 3):
+                self.assertIn(f"Page {page} of 3 · 30 bets", [caption.value for caption in at.caption])
+                seen += [button.key for button in at.button if button.label == "View"]
+                if page < 3:
+                    at.button(key="dashboard_search_page_next").click().run()
+            self.assertTrue(at.button(key="dashboard_search_page_next").disabled)
+            at.button(key="dashboard_search_page_prev").click().run()
+            self.assertIn("Page 2 of 3 · 30 bets", [caption.value for caption in at.caption])
+        self.assertFalse(at.exception)
+        self.assertEqual(len(set(seen)), 30)
@@ -0,0 +1,131 @@
+#############################################################################
+# tests/test_assets.py — tests for assets.py
+#############################################################################
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import assets
+
+
+def write_file(path, content):
+    with open(path, "w") as file:
+        file.write(content)
+
+
+class TestMinifiers(unittest.TestCase):
+    """Tests the CSS, JS and SVG minifiers."""
+
+    def test_minify_css(self):
+        css = "/* card */\n.card {\n    color: red;\n    margin: 0 auto;\n}\na, b > c { x: 1 }\n"
+        self.assertEqual(assets.minify_css(css), ".card{color:red;margin:0 auto}a,b > c{x:1}")
+
+    def test_minify_css_keeps_selector_pseudo_classes(self):
+        self.assertEqual(assets.minify_css("a:hover {\n  color: red;\n}"), "a:hover{color:red}")
+
+    def test_minify_js_keeps_line_breaks(self):
+        js = "// header\nlet a = 1\n\n    go(); // trailing\n"
+        self.assertEqual(assets.minify_js(js), "let a = 1\ngo(); // trailing")
+
+    def test_minify_js_keeps_template_literals_and_continued_strings(self):
+        js = (
+            "const card = `\n"
+            "    <div>\n"
+            "\n"
+            "        // shown as text  \n"
+            "    </div>`;\n"
+            "    const label = 'a \\\n"
+            "        b';\n"
+            "    /* block\n"
+            "    // still the block */\n"
+        )
+        self.assertEqual(assets.minify_js(js), (
+            "const card = `\n"
+            "    <div>\n"
+            "\n"
+            "        // shown as text  \n"
+            "    </div>`;\n"
+            "const label = 'a \\\n"
+            "        b';\n"
+            "/* block\n"
+            "// still the block */"
+        ))
+
+    def test_minify_svg(self):
+        svg = '<svg viewBox="0 0 777 777">\n  <!-- logo -->\n  <path d="M566.795 554.031L9.96 3.5" fill="#fff"/>\n</svg>\n'
+        self.assertEqual(assets.minify_svg(svg),
+                         '<svg viewBox="0 0 777 777"><path d="M566.8 554.0L10.0 3.5" fill="#fff"/></svg>')
+
+
+class TestAssetCache(unittest.TestCase):
+    """Tests loading, caching and bundling of assets."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "src")
+        self.dist = os.path.join(self.tmp.name, "dist")
+        os.mkdir(self.src)
+        self.css = os.path.join(self.src, "card.css")
+        write_file(self.css, "p {\n  color: red;\n}\n")
+        write_file(os.path.join(self.src, "notes.txt"), "not an asset")
+        self.patches = [
+            patch("assets.ROOT_DIR", self.tmp.name),
+            patch("assets.DIST_DIR", self.dist),
+            patch("assets.MANIFEST_PATH", os.path.join(self.dist, "manifest.json")),
+        ]
+        for p in self.patches:
+            p.start()
+        assets.clear_asset_cache()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        assets.clear_asset_cache()
+        self.tmp.cleanup()
+
+    def test_asset_is_minified_and_cached(self):
+        asset = assets.get_asset(self.css)
+        self.assertEqual(asset.text, "p{color:red}")
+        self.assertEqual(asset.bundle, f"card.{assets.content_hash('p{color:red}')}.css")
+        write_file(self.css, "p { color: blue; }")
+        self.assertIs(assets.get_asset(self.css), asset)
+
+    def test_check_mtime_reloads_changed_file(self):
+        assets.get_asset(self.css, check_mtime=True)
+        write_file(self.css, "p { color: blue; }")
+        os.utime(self.css, ns=(1, 1))
+        self.assertEqual(assets.get_asset(self.css, check_mtime=True).text, "p{color:blue}")
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            assets.get_asset(os.path.join(self.src, "missing.css"))
+
+    def test_inline_style(self):
+        self.assertEqual(assets.inline_style(self.css), "<style>p{color:red}</style>")
+
+    def test_url_falls_back_to_data_uri_without_build(self):
+        self.assertEqual(assets.asset_url(self.css), "data:text/css;base64,cHtjb2xvcjpyZWR9")
+        self.assertIsNone(assets.asset_url(self.css, fallback_to_data_uri=False))
+
+    def test_build_writes_hashed_bundles_and_manifest(self):
+        os.mkdir(self.dist)
+        write_file(os.path.join(self.dist, "card.0000000000.css"), "old")
+
+        manifest = assets.build(dirs=(self.src,), out_dir=self.dist)
+        bundle = manifest["src/card.css"]
+        self.assertEqual(list(manifest), ["src/card.css"])
+        self.assertEqual(sorted(os.listdir(self.dist)), sorted([bundle, "manifest.json"]))
+        with open(os.path.join(self.dist, "manifest.json")) as file:
+            self.assertEqual(json.load(file), manifest)
+
+        self.assertEqual(assets.asset_url(self.css), f"app/static/dist/{bundle}")
+        # Served from the prebuilt bundle, not the source
+        write_file(self.css, "p { color: blue; }")
+        assets.clear_asset_cache()
+        self.assertEqual(assets.get_asset(self.css).text, "p{color:red}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#############################################################################
+# tests/test_async_fetch.py — tests for data/async_fetch.py and async_fetcher.py
+#############################################################################
+import asyncio
+import threading
+import time
+import unittest
+from collections import OrderedDict
+from unittest.mock import patch
+
+import async_fetcher
+from data.async_fetch import InflightCalls
+
+
+class TestInflightCalls(unittest.TestCase):
+    """Tests sharing of in-flight calls and timeouts."""
+
+    def setUp(self):
+        self.calls = InflightCalls(max_workers=4)
+        self.addCleanup(self.calls.close)
+        self.release = threading.Event()
+        self.ran = 0
+
+    def slow(self, value):
+        self.ran += 1
+        self.release.wait(5)
+        return value
+
+    def test_identical_calls_in_flight_run_once(self):
+        async def main():
+            waits = [self.calls.run("k", self.slow, n) for n in range(3)]
+            waits.append(self.calls.run("other", self.slow, "o"))
+            waits.append(self.calls.run(None, self.slow, "n"))
+            asyncio.get_running_loop().call_later(0.05, self.release.set)
+            return await asyncio.gather(*waits)
+
+        self.assertEqual(asyncio.run(main()), [0, 0, 0, "o", "n"])
+        self.assertEqual(self.ran, 3)
+        self.assertEqual(self.calls.stats(), {'calls': 5, 'coalesced': 2, 'timeouts': 0})
+        self.assertEqual(self.calls.in_flight(), 0)
+
+    def test_timeout_leaves_the_shared_call_running(self):
+        async def main():
+            patient = asyncio.ensure_future(self.calls.run("k", self.slow, 1))
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.calls.run("k", self.slow, 1, timeout=0.01)
+            self.release.set()
+            return await patient
+
+        self.assertEqual(asyncio.run(main()), 1)
+        self.assertEqual(self.ran, 1)
+        self.assertEqual(self.calls.stats()['timeouts'], 1)
+
+    def test_errors_reach_every_waiter_and_are_not_kept(self):
+        def fail():
+            time.sleep(0.02)
+            raise KeyError("gone")
+
+        async def main():
+            return await asyncio.gather(self.calls.run("k", fail), self.calls.run("k", fail),
+                                        return_exceptions=True)
+
+        self.assertEqual([type(result) for result in asyncio.run(main())], [KeyError, KeyError])
+        self.assertEqual(asyncio.run(self.calls.run("k", lambda: "again")), "again")
+
+
+class TestGatherPageData(unittest.TestCase):
+    """Tests concurrent page fetches with timeouts and fallbacks."""
+
+    def setUp(self):
+        calls = InflightCalls(max_workers=8)
+        self.addCleanup(calls.close)
+        for target, value in (
+            ("async_fetcher._calls", calls),
+            ("async_fetcher._last_good", OrderedDict()),
+            ("data_fetcher.get_user_profile", self.fetch("profile")),
+            ("data_fetcher.get_user_trades", self.fetch(["trade"])),
+            ("data_fetcher.get_user_posts", self.fetch(["post"])),
+            ("data_fetcher.get_home_feed", lambda user_id, limit=20, before=None: (["post"] * limit, None)),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def fetch(value, delay=0.1):
+        def fetch(user_id):
+            time.sleep(delay)
+            return value
+        return fetch
+
+    def test_needs_are_fetched_concurrently(self):
+        start = time.perf_counter()
+        data, failed = async_fetcher.load_page_data("u", ("profile", "trades", "posts"))
+        self.assertLess(time.perf_counter() - start, 0.25)
+        self.assertEqual(data, {'profile': "profile", 'trades': ["trade"], 'posts': ["post"]})
+        self.assertEqual(failed, {})
+
+    def test_failed_needs_fall_back(self):
+        async_fetcher.load_page_data("u", ("trades",))
+        with patch("data_fetcher.get_user_trades", self.fetch(["late"], delay=0.5)), \
+                patch("data_fetcher.get_user_posts", side_effect=ValueError("down")):
+            data, failed = async_fetcher.load_page_data("u", ("profile", "trades", "posts"), timeouts={'trades': 0.05})
+        # The last trades fetched, the default for posts, which never loaded
+        self.assertEqual(data, {'profile': "profile", 'trades': ["trade"], 'posts': []})
+        self.assertEqual(failed, {'trades': "timed out after 0.05 s", 'posts': "ValueError: down"})
+
+    def test_options_are_passed_on(self):
+        data, _ = async_fetcher.load_page_data("u", ("home_feed",), options={'home_feed': {'limit': 2}})
+        self.assertEqual(data['home_feed'], (["post", "post"], None))
+        with self.assertRaises(ValueError):
+            async_fetcher.load_page_data("u", ("everything",))
+
+    def test_async_variants_share_identical_reads(self):
+        async def main():
+            return await asyncio.gather(*(async_fetcher.get_user_trades("u") for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), [["trade"]] * 5)
+        self.assertEqual(async_fetcher.get_fetch_stats()['coalesced'], 4)
+        self.assertEqual(async_fetcher.get_user_trades.__name__, "get_user_trades")
+
+
+if __name__ == "__main__":
+    unittest.main()
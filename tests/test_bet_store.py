@@ -0,0 +1,148 @@
+#############################################################################
+# tests/test_bet_store.py — tests for data/store.py and data/bets.py
+#############################################################################
+import unittest
+
+from data import get_available_bets, get_bet, get_bets_in_category
+from data.store import Bet, BetStore, probability_bucket
+
+
+def make_bet(bet_id, category="Crypto", yes_percent=50, **fields):
+    bet = {
+        "bet_id": bet_id,
+        "bet_name": f"Bet {bet_id}",
+        "bet_image_link": None,
+        "yes_value": yes_percent / 100,
+        "no_value": 1 - yes_percent / 100,
+        "yes_percent": yes_percent,
+        "no_percent": 100 - yes_percent,
+        "rules": "Resolves YES if it happens.",
+        "category": category,
+    }
+    bet.update(fields)
+    return bet
+
+
+class TestBet(unittest.TestCase):
+    """Tests the Bet record's dict-compatible access."""
+
+    def test_item_and_get_access(self):
+        bet = Bet.from_dict(make_bet("a"))
+        self.assertEqual(bet["bet_name"], "Bet a")
+        self.assertIsNone(bet.get("bet_image_link"))
+        self.assertEqual(bet.get("missing", "x"), "x")
+        with self.assertRaises(KeyError):
+            bet["missing"]
+
+    def test_round_trips_to_dict(self):
+        self.assertEqual(Bet.from_dict(make_bet("a")).to_dict(), make_bet("a"))
+        self.assertEqual(dict(Bet.from_dict(make_bet("a"))), make_bet("a"))
+
+    def test_probability_bucket(self):
+        self.assertEqual(probability_bucket(0), 0)
+        self.assertEqual(probability_bucket(45), 4)
+        self.assertEqual(probability_bucket(100), 9)
+
+
+class TestBetStore(unittest.TestCase):
+    """Tests lookups and index maintenance in BetStore."""
+
+    def setUp(self):
+        self.store = BetStore.from_dicts([
+            make_bet("a", "Crypto", 70),
+            make_bet("b", "Sports", 20),
+            make_bet("c", "Crypto", 45),
+        ])
+
+    def test_get_bet(self):
+        self.assertEqual(self.store.get_bet("b").category, "Sports")
+        self.assertIsNone(self.store.get_bet("zzz"))
+
+    def test_bets_in_category_keeps_order(self):
+        self.assertEqual([b.bet_id for b in self.store.bets_in_category("Crypto")], ["a", "c"])
+        self.assertEqual(list(self.store.bets_in_category("Other")), [])
+
+    def test_bets_in_bucket(self):
+        self.assertEqual([b.bet_id for b in self.store.bets_in_bucket(7)], ["a"])
+
+    def test_top_n_by(self):
+        self.assertEqual([b.bet_id for b in self.store.top_n_by("yes_percent", 2)], ["a", "c"])
+        self.assertEqual([b.bet_id for b in self.store.top_n_by("yes_percent", 1, descending=False)], ["b"])
+        with self.assertRaises(ValueError):
+            self.store.top_n_by("bet_name", 1)
+
+    def test_update_moves_indexes(self):
+        self.store.top_n_by("yes_percent", 1)  # build the sorted index first
+        self.store.update("b", yes_percent=95, category="Crypto")
+        self.assertEqual(self.store.top_n_by("yes_percent", 1)[0].bet_id, "b")
+        self.assertEqual([b.bet_id for b in self.store.bets_in_bucket(9)], ["b"])
+        self.assertEqual(list(self.store.bets_in_bucket(2)), [])
+        self.assertNotIn("Sports", self.store.categories())
+
+    def test_update_rejects_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            self.store.update("a", price=1)
+
+    def test_add_replaces_and_remove(self):
+        self.store.top_n_by("yes_value", 3)
+        self.store.add(make_bet("a", "Politics", 10))
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual([b.bet_id for b in self.store.bets_in_category("Crypto")], ["c"])
+        self.store.remove("a")
+        self.assertNotIn("a", self.store)
+        self.assertEqual([b.bet_id for b in self.store.top_n_by("yes_value", 5)], ["c", "b"])
+
+
+class TestBetStorePaging(unittest.TestCase):
+    """Tests cursor-based paging over the store."""
+
+    def setUp(self):
+        self.store = BetStore.from_dicts(
+            [make_bet(f"b{i}", "Crypto" if i % 2 else "Sports") for i in range(7)]
+        )
+
+    def collect(self, category=None, limit=3):
+        pages, cursor = [], None
+        while True:
+            bets, cursor = self.store.page(category, cursor, limit)
+            pages.append([b.bet_id for b in bets])
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_all_bets_in_order(self):
+        self.assertEqual(self.collect(), [["b0", "b1", "b2"], ["b3", "b4", "b5"], ["b6"]])
+        self.assertEqual(self.store.count(), 7)
+
+    def test_pages_within_category(self):
+        self.assertEqual(self.collect("Crypto", 2), [["b1", "b3"], ["b5"]])
+        self.assertEqual(self.store.count("Crypto"), 3)
+        self.assertEqual(self.store.page("Other"), ([], None))
+
+    def test_cursor_survives_removal_and_recategorisation(self):
+        first, cursor = self.store.page(None, None, 3)
+        self.store.remove("b3")
+        self.store.update("b4", category="Other")
+        rest, _ = self.store.page(None, cursor, 10)
+        self.assertEqual([b.bet_id for b in rest], ["b4", "b5", "b6"])
+        self.assertEqual([b.bet_id for b in self.store.page("Other")[0]], ["b4"])
+        self.assertEqual(self.store.count("Sports"), 3)
+
+
+class TestBetsModule(unittest.TestCase):
+    """Tests the data.bets functions backed by the shared store."""
+
+    def test_get_available_bets_structure(self):
+        bets = get_available_bets()
+        self.assertTrue(bets)
+        for bet in bets:
+            for key in ("bet_id", "bet_name", "yes_value", "no_value", "category"):
+                self.assertIsNotNone(bet.get(key))
+
+    def test_get_bet_and_category(self):
+        self.assertEqual(get_bet("btc-100k")["category"], "Crypto")
+        self.assertTrue(all(b["category"] == "Sports" for b in get_bets_in_category("Sports")))
+        self.assertEqual(len(get_bets_in_category("All")), len(get_available_bets()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#############################################################################
+# tests/test_cache.py — tests for data/cache.py and the cached data_fetcher
+#############################################################################
+import unittest
+
+import data_fetcher
+from data.cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache(unittest.TestCase):
+    """Tests TTL, LRU eviction, invalidation and counters."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResultCache(maxsize=3, ttl=10, clock=self.clock)
+
+    def test_hit_and_miss_counters(self):
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)  # noqa: E731
+        self.assertEqual(self.cache.get_or_compute("trades", "u1", compute), 1)
+        self.assertEqual(self.cache.get_or_compute("trades", "u1", compute), 1)
+        stats = self.cache.stats()['namespaces']['trades']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_entries_expire(self):
+        self.cache.set("posts", "u1", "old")
+        self.clock.now = 10.5
+        self.assertIsNone(self.cache.get("posts", "u1"))
+        self.assertEqual(self.cache.stats()['namespaces']['posts']['expired'], 1)
+
+    def test_per_entry_ttl_none_never_expires(self):
+        self.cache.set("profile", "u1", "p", ttl=None)
+        self.clock.now = 1e9
+        self.assertEqual(self.cache.get("profile", "u1"), "p")
+
+    def test_least_recently_used_is_evicted(self):
+        for user in ("a", "b", "c"):
+            self.cache.set("posts", user, user)
+        self.cache.get("posts", "a")
+        self.cache.set("posts", "d", "d")
+        self.assertIsNone(self.cache.get("posts", "b"))
+        self.assertEqual(self.cache.get("posts", "a"), "a")
+        self.assertEqual(self.cache.stats()['size'], 3)
+
+    def test_invalidate_user_bumps_version(self):
+        self.cache.set("trades", "u1", [1])
+        self.cache.set("trades", "u2", [2])
+        self.cache.invalidate_user("u1")
+        self.assertEqual(self.cache.version("u1"), 1)
+        self.assertIsNone(self.cache.get("trades", "u1"))
+        self.assertEqual(self.cache.get("trades", "u2"), [2])
+        self.assertEqual(self.cache.stats()['namespaces']['trades']['invalidated'], 1)
+
+    def test_set_if_current_skips_stale_versions(self):
+        version = self.cache.version("u1")
+        self.assertTrue(self.cache.set_if_current("metrics", "u1", version, "fresh"))
+        self.cache.invalidate_user("u1")
+        self.assertFalse(self.cache.set_if_current("metrics", "u1", version, "stale"))
+        self.assertIsNone(self.cache.get("metrics", "u1"))
+
+    def test_result_invalidated_while_computing_is_not_cached(self):
+        def compute():
+            # New trades land while the old ones are being read
+            self.cache.invalidate_user("u1")
+            return "stale"
+
+        self.assertEqual(self.cache.get_or_compute("trades", "u1", compute), "stale")
+        self.assertIsNone(self.cache.get("trades", "u1"))
+        self.assertEqual(self.cache.get_or_compute("trades", "u1", lambda: "fresh"), "fresh")
+        self.assertEqual(self.cache.get("trades", "u1"), "fresh")
+
+    def test_arguments_are_part_of_the_key(self):
+        @self.cache.cached("square")
+        def square(user_id, n, offset=0):
+            return n * n + offset
+
+        self.assertEqual(square("u", 3), 9)
+        self.assertEqual(square("u", 4), 16)
+        self.assertEqual(square("u", 4, offset=1), 17)
+        self.assertEqual(self.cache.stats()['namespaces']['square']['misses'], 3)
+
+    def test_exceptions_are_not_cached(self):
+        def fail():
+            raise ValueError("nope")
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_compute("profile", "ghost", fail)
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+
+class TestCachedDataFetcher(unittest.TestCase):
+    """Tests the cached data_fetcher functions."""
+
+    def setUp(self):
+        data_fetcher.invalidate_user_data('user1')
+
+    def test_trades_are_stable_until_invalidated(self):
+        first = data_fetcher.get_user_trades('user1')
+        self.assertIs(data_fetcher.get_user_trades('user1'), first)
+        data_fetcher.invalidate_user_data('user1')
+        self.assertIsNot(data_fetcher.get_user_trades('user1'), first)
+
+    def test_metrics_follow_the_cached_trades(self):
+        trades = data_fetcher.get_user_trades('user1')
+        metrics = data_fetcher.get_user_trade_metrics('user1')
+        self.assertEqual(metrics['total_trades'], len(trades))
+        self.assertIs(data_fetcher.get_user_trade_metrics('user1'), metrics)
+        data_fetcher.invalidate_user_data('user1')
+        new_trades = data_fetcher.get_user_trades('user1')
+        self.assertEqual(data_fetcher.get_user_trade_metrics('user1')['total_trades'], len(new_trades))
+
+    def test_cache_stats_are_exposed(self):
+        data_fetcher.get_user_posts('user1')
+        data_fetcher.get_user_posts('user1')
+        self.assertGreaterEqual(data_fetcher.get_cache_stats()['namespaces']['posts']['hits'], 1)
+
+    def test_unknown_profile_still_raises(self):
+        with self.assertRaises(ValueError):
+            data_fetcher.get_user_profile('nobody')
+
+
+if __name__ == "__main__":
+    unittest.main()
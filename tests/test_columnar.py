@@ -0,0 +1,86 @@
+#############################################################################
+# tests/test_columnar.py — tests for data/columnar.py
+#############################################################################
+import unittest
+
+import numpy as np
+
+from data.columnar import SENSOR_SCHEMA, TRADE_SCHEMA, ColumnarTable, sensor_means, trade_metrics
+from data.trade_analytics import TradeStats
+from data_fetcher import get_user_sensor_data, get_user_trades
+
+TRADES = [
+    {'trade_id': 't1', 'symbol': 'AAPL', 'action': 'BUY', 'quantity': 10, 'price': 100.0,
+     'timestamp': '2024-01-01 09:30:00'},
+    {'trade_id': 't2', 'symbol': 'TSLA', 'action': 'SELL', 'quantity': 5, 'price': 200.0,
+     'timestamp': '2024-01-01 10:15:00'},
+    {'trade_id': 't3', 'symbol': 'AAPL', 'action': 'SELL', 'quantity': 4, 'price': 110.0,
+     'timestamp': '2024-01-01 10:45:00'},
+]
+
+
+class TestColumnarTable(unittest.TestCase):
+    """Tests encoding and conversions of ColumnarTable."""
+
+    def setUp(self):
+        self.table = ColumnarTable.from_records(TRADES, TRADE_SCHEMA)
+
+    def test_column_types(self):
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual(self.table['symbol'].dtype, np.int8)
+        self.assertEqual(self.table.categories['symbol'], ['AAPL', 'TSLA'])
+        self.assertEqual(self.table['timestamp'].dtype, np.int64)
+        self.assertEqual(self.table['price'].dtype, np.float64)
+        self.assertEqual(self.table.labels('action').tolist(), ['BUY', 'SELL', 'SELL'])
+
+    def test_round_trips_to_records(self):
+        self.assertEqual(self.table.to_records(), TRADES)
+
+    def test_dataframe_shares_arrays(self):
+        frame = self.table.to_dataframe()
+        self.assertEqual(list(frame['symbol']), ['AAPL', 'TSLA', 'AAPL'])
+        self.assertTrue(np.shares_memory(frame['quantity'].to_numpy(), self.table['quantity']))
+        self.assertEqual(str(frame['timestamp'][0]), '2024-01-01 09:30:00')
+
+
+class TestVectorizedMetrics(unittest.TestCase):
+    """Tests the vectorized aggregation paths."""
+
+    def test_trade_metrics_match_incremental_engine(self):
+        stats = TradeStats()
+        for trade in TRADES:
+            stats.add_trade(trade)
+        expected = stats.as_dict()
+        actual = trade_metrics(ColumnarTable.from_records(TRADES, TRADE_SCHEMA))
+        for key in ('total_trades', 'total_volume', 'total_value', 'vwap', 'buy_volume', 'sell_volume',
+                    'net_position', 'by_action', 'volume_by_bucket'):
+            self.assertEqual(actual[key], expected[key], key)
+        self.assertEqual(actual['by_symbol']['AAPL']['net_position'], 6)
+        self.assertIsNone(actual['realized_pnl'])
+
+    def test_sensor_means(self):
+        rows = [
+            {'sensor_type': 'heart_rate', 'timestamp': '2024-01-01 00:00:00', 'data': 60.0},
+            {'sensor_type': 'heart_rate', 'timestamp': '2024-01-01 00:01:00', 'data': 80.0},
+            {'sensor_type': 'pressure', 'timestamp': '2024-01-01 00:01:00', 'data': 5.0},
+        ]
+        means = sensor_means(ColumnarTable.from_records(rows, SENSOR_SCHEMA))
+        self.assertEqual(means, {'heart_rate': 70.0, 'pressure': 5.0})
+
+
+class TestColumnarFetchers(unittest.TestCase):
+    """Tests the columnar=True options of data_fetcher."""
+
+    def test_get_user_trades_columnar(self):
+        table = get_user_trades('user1', columnar=True)
+        self.assertIsInstance(table, ColumnarTable)
+        self.assertEqual(set(table.columns), set(TRADE_SCHEMA))
+
+    def test_get_user_sensor_data_columnar(self):
+        table = get_user_sensor_data('user1', 'workout0', columnar=True)
+        self.assertGreaterEqual(len(table), 5)
+        self.assertEqual(table['timestamp'].dtype, np.int64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#############################################################################
+# tests/test_feed.py — tests for data/feed.py
+#############################################################################
+import unittest
+from unittest.mock import patch
+
+import data_fetcher
+from data.feed import FeedService
+from data.storage import MemoryBackend
+
+FRIENDS = {'a': ['b', 'c'], 'b': ['a'], 'c': ['a'], 'd': []}
+
+
+def post(user_id, n, timestamp=None):
+    return {
+        'user_id': user_id,
+        'post_id': f'{user_id}{n}',
+        'timestamp': timestamp if timestamp is not None else 1_700_000_000 + n,
+        'content': f'{user_id} says {n}',
+    }
+
+
+class TestFeedService(unittest.TestCase):
+    """Tests fan-out, celebrity fan-in and cursor paging."""
+
+    def setUp(self):
+        self.friends = {user: list(friends) for user, friends in FRIENDS.items()}
+        self.stored = {'b': [post('b', 0)]}
+        self.feed = self.make_feed()
+
+    def make_feed(self, **kwargs):
+        return FeedService(
+            friends_of=lambda user_id: self.friends.get(user_id, []),
+            load_posts=lambda user_id: self.stored.get(user_id, []),
+            **kwargs
+        )
+
+    def ids(self, user_id, **kwargs):
+        posts, _ = self.feed.read(user_id, **kwargs)
+        return [p['post_id'] for p in posts]
+
+    def test_timeline_is_built_from_stored_posts_then_fanned_out(self):
+        self.assertEqual(self.ids('a'), ['b0'])
+        self.feed.publish(post('c', 1))
+        self.feed.publish(post('a', 2))
+        self.feed.publish(post('d', 3))
+        self.assertEqual(self.ids('a'), ['a2', 'c1', 'b0'])
+        self.assertEqual(self.ids('b'), ['a2', 'b0'])
+        self.assertEqual(self.ids('d'), ['d3'])
+        self.assertEqual(self.feed.publish(post('c', 1)), self.feed.publish(post('c', 1)))
+        self.assertEqual(self.ids('a'), ['a2', 'c1', 'b0'])
+
+    def test_pages_follow_the_cursor(self):
+        for n in range(1, 8):
+            self.feed.publish(post('b', n))
+        seen = []
+        posts, cursor = self.feed.read('a', limit=3)
+        while True:
+            seen.extend(p['post_id'] for p in posts)
+            if cursor is None:
+                break
+            posts, cursor = self.feed.read('a', limit=3, before=cursor)
+        self.assertEqual(seen, [f'b{n}' for n in range(7, -1, -1)])
+
+    def test_backdated_post_is_merged_in_order(self):
+        self.feed.read('a')
+        self.feed.publish(post('c', 5))
+        self.feed.publish(post('c', 1, timestamp='2000-01-01 00:00:00'))
+        self.assertEqual(self.ids('a'), ['c5', 'b0', 'c1'])
+
+    def test_timelines_are_bounded(self):
+        self.feed = self.make_feed(timeline_capacity=3, author_capacity=4)
+        for n in range(1, 10):
+            self.feed.publish(post('b', n))
+        self.assertEqual(self.ids('a'), ['b9', 'b8', 'b7'])
+        self.assertEqual(self.feed.stats()['posts'], 4)
+
+    def test_celebrities_are_pulled_on_read(self):
+        self.feed = self.make_feed(celebrity_threshold=2)
+        self.feed.read('b')
+        self.feed.read('c')
+        self.feed.publish(post('b', 1))
+        entries = self.feed.stats()['timeline_entries']
+        self.feed.publish(post('a', 2))   # a has two friends: no fan-out
+        self.assertEqual(self.feed.stats()['timeline_entries'], entries)
+        self.assertEqual(self.feed.stats()['celebrities'], 1)
+        self.assertEqual(self.ids('b'), ['a2', 'b1', 'b0'])
+        self.assertEqual(self.ids('c'), ['a2'])
+        self.assertEqual(self.ids('a'), ['a2', 'b1', 'b0'])
+
+    def test_follow_backfills_and_pull_deduplicates(self):
+        self.feed.read('d')
+        self.feed.publish(post('a', 1))
+        self.friends['d'].append('a')
+        self.friends['a'].append('d')
+        self.feed.follow('d', 'a')
+        self.assertEqual(self.ids('d'), ['a1'])
+        # a turns into a celebrity after fanning out a1 to d
+        self.feed.celebrity_threshold = 3
+        self.feed.publish(post('a', 2))
+        self.assertEqual(self.ids('d'), ['a2', 'a1'])
+
+
+class TestHomeFeedFetcher(unittest.TestCase):
+    """Tests publish_post and get_home_feed in data_fetcher."""
+
+    def setUp(self):
+        backend = MemoryBackend()
+        patches = [
+            patch("data_fetcher.get_backend", return_value=backend),
+            patch("data_fetcher._seeded", False),
+            patch("data_fetcher._social_graph", None),
+            patch("data_fetcher._feed_service", None),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for user_id in data_fetcher.users:
+            data_fetcher.invalidate_user_data(user_id)
+            self.addCleanup(data_fetcher.invalidate_user_data, user_id)
+
+    def test_posts_reach_friends_feeds(self):
+        # user2's only friend is user1
+        before, _ = data_fetcher.get_home_feed('user2')
+        self.assertEqual({p['user_id'] for p in before}, {'user1', 'user2'})
+        post = data_fetcher.publish_post('user1', 'hello')
+        feed, cursor = data_fetcher.get_home_feed('user2', limit=1)
+        self.assertEqual(feed, [post])
+        self.assertIsNotNone(cursor)
+        self.assertIn(post, data_fetcher.get_user_posts('user1'))
+        data_fetcher.add_friend('user2', 'user3')
+        feed, _ = data_fetcher.get_home_feed('user2')
+        self.assertIn('user3', {p['user_id'] for p in feed})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+#############################################################################
+# tests/test_ingest.py — tests for data/ingest.py and data/simulator.py
+#############################################################################
+import asyncio
+import json
+import socket
+import unittest
+
+from data.ingest import IngestPipeline, PriceDelta, ingest_from_feed
+from data.simulator import DeltaGenerator, serve, synthetic_bets
+from data.store import BetStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestPriceDelta(unittest.TestCase):
+    """Tests parsing of JSON-line deltas."""
+
+    def test_from_json_keeps_only_price_fields(self):
+        delta = PriceDelta.from_json('{"bet_id": "a", "yes_value": 0.4, "rules": "x", "ts": 5}')
+        self.assertEqual(delta.bet_id, "a")
+        self.assertEqual(delta.fields, {"yes_value": 0.4})
+        self.assertEqual(delta.ts, 5)
+
+    def test_from_json_checks_and_converts_types(self):
+        delta = PriceDelta.from_json('{"bet_id": "a", "yes_value": "0.4", "no_percent": 60, "ts": 5}')
+        self.assertEqual(delta.fields, {"yes_value": 0.4, "no_percent": 60})
+        self.assertIsInstance(delta.ts, float)
+        for line in ('[1]', '{"bet_id": 7}', '{"bet_id": "a", "yes_value": null}',
+                     '{"bet_id": "a", "yes_percent": true}', '{"bet_id": "a", "yes_value": "high"}',
+                     '{"bet_id": "a", "yes_percent": 150}', '{"bet_id": "a", "no_value": NaN}',
+                     '{"bet_id": "a", "ts": "yesterday"}'):
+            with self.assertRaises(ValueError, msg=line):
+                PriceDelta.from_json(line)
+
+    def test_round_trip(self):
+        delta = PriceDelta("a", {"no_percent": 60}, 1.0)
+        self.assertEqual(PriceDelta.from_json(delta.to_json()).fields, {"no_percent": 60})
+
+
+class TestIngestPipeline(unittest.TestCase):
+    """Tests batching, coalescing and backpressure."""
+
+    def setUp(self):
+        self.store = BetStore.from_dicts(synthetic_bets(3))
+
+    def test_apply_batch_coalesces_per_bet(self):
+        pipeline = IngestPipeline(self.store)
+        applied = pipeline.apply_batch([
+            PriceDelta("bet-0", {"yes_percent": 10, "no_percent": 90}),
+            PriceDelta("bet-0", {"yes_percent": 11}),
+            PriceDelta("missing", {"yes_percent": 50}),
+        ])
+        self.assertEqual(applied, 1)
+        self.assertEqual(self.store.get_bet("bet-0").yes_percent, 11)
+        self.assertEqual(self.store.get_bet("bet-0").no_percent, 90)
+        self.assertEqual(pipeline.stats.coalesced, 1)
+        self.assertEqual(pipeline.stats.unknown, 1)
+
+    def test_run_applies_submitted_deltas(self):
+        async def scenario():
+            pipeline = IngestPipeline(self.store, max_batch=2)
+            consumer = asyncio.create_task(pipeline.run())
+            for percent in (20, 30, 40):
+                await pipeline.submit(PriceDelta("bet-1", {"yes_percent": percent}))
+            await pipeline.drain()
+            consumer.cancel()
+            return pipeline.stats
+
+        stats = run(scenario())
+        self.assertEqual(self.store.get_bet("bet-1").yes_percent, 40)
+        self.assertEqual(stats.received, 3)
+        self.assertGreaterEqual(stats.batches, 2)
+
+    def test_run_survives_a_bad_batch(self):
+        async def scenario():
+            pipeline = IngestPipeline(self.store, max_batch=1)
+            consumer = asyncio.create_task(pipeline.run())
+            # Built directly, so it skips from_json's checks
+            await pipeline.submit(PriceDelta("bet-1", {"yes_percent": "high"}))
+            await pipeline.submit(PriceDelta("bet-1", {"yes_percent": 40}))
+            await asyncio.wait_for(pipeline.drain(), 5)
+            consumer.cancel()
+            return pipeline.stats
+
+        stats = run(scenario())
+        self.assertEqual(self.store.get_bet("bet-1").yes_percent, 40)
+        self.assertEqual((stats.malformed, stats.applied), (1, 1))
+
+    def test_full_queue_blocks_producer(self):
+        async def scenario():
+            pipeline = IngestPipeline(self.store, max_queue=1)
+            await pipeline.submit(PriceDelta("bet-0", {}))
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(pipeline.submit(PriceDelta("bet-0", {})), 0.05)
+
+        run(scenario())
+
+    def test_malformed_lines_are_counted(self):
+        async def scenario():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'not json\n{"yes_value": 1}\n{"bet_id": "bet-2", "yes_value": [0.9]}\n'
+                             b'{"bet_id": "bet-2", "yes_value": 0.9}\n')
+            reader.feed_eof()
+            pipeline = IngestPipeline(self.store)
+            await pipeline.consume_stream(reader)
+            return pipeline
+
+        pipeline = run(scenario())
+        self.assertEqual(pipeline.stats.malformed, 3)
+        self.assertEqual(pipeline.stats.received, 1)
+
+
+class TestSimulator(unittest.TestCase):
+    """Tests the local exchange simulator."""
+
+    def test_generated_prices_are_consistent(self):
+        generator = DeltaGenerator(synthetic_bets(5), seed=3)
+        for _ in range(100):
+            message = json.loads(generator.next_line())
+            self.assertEqual(message["yes_percent"] + message["no_percent"], 100)
+            self.assertAlmostEqual(message["yes_value"] + message["no_value"], 1.0)
+
+    def test_feed_end_to_end(self):
+        async def scenario():
+            bets = synthetic_bets(5)
+            port = free_port()
+            server = asyncio.create_task(serve(bets, port=port, rate=500, duration=0.2, seed=1))
+            await asyncio.sleep(0.05)
+            store = BetStore.from_dicts(bets)
+            pipeline = IngestPipeline(store)
+            await ingest_from_feed(pipeline, "127.0.0.1", port)
+            server.cancel()
+            return pipeline.stats
+
+        stats = run(scenario())
+        self.assertGreater(stats.applied, 0)
+        self.assertEqual(stats.unknown, 0)
+        self.assertIsNotNone(stats.staleness_percentile(50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#############################################################################
+# tests/test_instrumentation.py — tests for instrumentation.py
+#############################################################################
+import io
+import json
+import threading
+import unittest
+from unittest import mock
+
+import instrumentation
+
+
+class TestTracedDisabled(unittest.TestCase):
+    """With instrumentation off nothing is wrapped or recorded."""
+
+    def setUp(self):
+        patcher = mock.patch.object(instrumentation, "ENABLED", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        instrumentation.clear()
+
+    def test_decorator_returns_function_unchanged(self):
+        def fetch():
+            return 1
+
+        self.assertIs(instrumentation.traced("fetch")(fetch), fetch)
+
+    def test_span_and_reruns_are_noops(self):
+        instrumentation.start_rerun("page")
+        with instrumentation.span("work") as s:
+            s.bytes = 10
+        instrumentation.finish_rerun()
+        self.assertIsNone(instrumentation.current_rerun())
+        self.assertEqual(instrumentation.recent_reruns(), [])
+
+
+class TestTracedEnabled(unittest.TestCase):
+    """Spans are grouped per rerun and buffered."""
+
+    def setUp(self):
+        patcher = mock.patch.object(instrumentation, "ENABLED", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        instrumentation.clear()
+        self.addCleanup(instrumentation.clear)
+
+    def test_spans_recorded_on_current_rerun(self):
+        render = instrumentation.traced("template.render", size=instrumentation.payload_bytes)(lambda: "héllo")
+        instrumentation.start_rerun("app")
+        self.assertEqual(render(), "héllo")
+        with instrumentation.span("component.emit") as s:
+            s.bytes = 42
+        instrumentation.finish_rerun()
+
+        (rerun,) = instrumentation.recent_reruns()
+        self.assertEqual(rerun.page, "app")
+        self.assertIsNotNone(rerun.duration_ms)
+        names = [span[0] for span in rerun.spans]
+        self.assertEqual(names, ["template.render", "component.emit"])
+        self.assertEqual(rerun.spans[0][3], 6)  # UTF-8 bytes
+        self.assertEqual(rerun.spans[1][3], 42)
+
+    def test_start_rerun_closes_previous_one(self):
+        instrumentation.start_rerun("first")
+        instrumentation.start_rerun("second")
+        instrumentation.finish_rerun()
+        self.assertEqual([r.page for r in instrumentation.recent_reruns()], ["first", "second"])
+
+    def test_spans_outside_reruns_share_a_background_record(self):
+        fetch = instrumentation.traced("fetch")(lambda: None)
+        for _ in range(3):
+            fetch()
+        (rerun,) = instrumentation.recent_reruns()
+        self.assertEqual(rerun.page, "background")
+        self.assertEqual([span[0] for span in rerun.spans], ["fetch"] * 3)
+        self.assertGreaterEqual(rerun.duration_ms, 0)
+
+        other = threading.Thread(target=fetch)
+        other.start()
+        other.join()
+        with mock.patch.object(instrumentation, "BACKGROUND_SPANS", 3):
+            fetch()
+        self.assertEqual([len(r.spans) for r in instrumentation.recent_reruns()], [3, 1, 1])
+
+    def test_ring_buffer_keeps_newest(self):
+        for i in range(instrumentation.RING_SIZE + 5):
+            instrumentation.start_rerun(str(i))
+        instrumentation.finish_rerun()
+        reruns = instrumentation.recent_reruns()
+        self.assertEqual(len(reruns), instrumentation.RING_SIZE)
+        self.assertEqual(reruns[-1].page, str(instrumentation.RING_SIZE + 4))
+
+    def test_export_jsonl_and_summarize(self):
+        fetch = instrumentation.traced("fetch")(lambda: None)
+        for _ in range(2):
+            instrumentation.start_rerun("app")
+            fetch()
+            fetch()
+            instrumentation.finish_rerun()
+
+        out = io.StringIO()
+        self.assertEqual(instrumentation.export_jsonl(out), 2)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines[0]['spans']), 2)
+        self.assertEqual(lines[0]['page'], "app")
+
+        summary = instrumentation.summarize(instrumentation.recent_reruns())
+        self.assertEqual(summary['fetch']['calls'], 4)
+        self.assertGreaterEqual(summary['fetch']['max_ms'], summary['fetch']['mean_ms'])
+
+    def test_failed_calls_are_recorded_and_raise(self):
+        @instrumentation.traced("boom", size=len)
+        def boom():
+            raise ValueError
+
+        instrumentation.start_rerun("app")
+        with self.assertRaises(ValueError):
+            boom()
+        instrumentation.finish_rerun()
+        (rerun,) = instrumentation.recent_reruns()
+        self.assertEqual([(span[0], span[3]) for span in rerun.spans], [("boom", None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
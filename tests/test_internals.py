@@ -0,0 +1,191 @@
+#############################################################################
+# tests/test_internals.py — tests for internals.py
+#############################################################################
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import internals
+from internals import (
+    CompiledTemplate,
+    clear_template_cache,
+    escape_attr,
+    escape_html,
+    escape_js,
+    escape_values,
+    get_template,
+    render_component,
+    safe_string,
+)
+
+
+def write_file(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestEscaping(unittest.TestCase):
+    """Tests the per-context escapers and the batch escape_values API."""
+
+    def test_safe_string_matches_original_behaviour(self):
+        text = 'it\'s "quoted" \\ back'
+        expected = ''.join(['\\' + c if c in ["'", '"', '\\'] else c for c in text])
+        self.assertEqual(safe_string(text), expected)
+
+    def test_backslash_is_not_escaped_twice(self):
+        self.assertEqual(safe_string('\\"'), '\\\\\\"')
+
+    def test_escape_html(self):
+        self.assertEqual(escape_html('<b>A & B</b> "q"'), '&lt;b&gt;A &amp; B&lt;/b&gt; "q"')
+
+    def test_escape_attr(self):
+        self.assertEqual(escape_attr('"x" & \'y\''), '&quot;x&quot; &amp; &#x27;y&#x27;')
+
+    def test_escape_js(self):
+        self.assertEqual(escape_js('</script>\n`'), '\\u003c/script>\\n\\`')
+
+    def test_repeated_values_are_memoized(self):
+        safe_string.cache_clear()
+        safe_string("Will Bitcoin hit $100k?")
+        safe_string("Will Bitcoin hit $100k?")
+        self.assertEqual(safe_string.cache_info().hits, 1)
+
+    def test_long_values_bypass_the_cache(self):
+        safe_string.cache_clear()
+        text = "'" * 100_000
+        self.assertEqual(safe_string(text), "\\'" * 100_000)
+        self.assertEqual(safe_string.cache_info().currsize, 0)
+
+    def test_escape_values(self):
+        escaped = escape_values({'NAME': '"x"', 1: 2.5}, context='html')
+        self.assertEqual(escaped, {'NAME': '"x"', '1': '2.5'})
+        self.assertEqual(escape_values({'NAME': '"x"'}), {'NAME': '\\"x\\"'})
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    """Tests the pre-split template representation."""
+
+    def test_render_fills_placeholders(self):
+        template = CompiledTemplate("<b>{{NAME}}</b> costs ${{PRICE}}")
+        self.assertEqual(template.render({"NAME": "Bet", "PRICE": "0.50"}), "<b>Bet</b> costs $0.50")
+        self.assertEqual(template.placeholders, {"NAME", "PRICE"})
+
+    def test_missing_value_keeps_placeholder(self):
+        template = CompiledTemplate("{{A}}-{{B}}")
+        self.assertEqual(template.render({"A": "x"}), "x-{{B}}")
+
+    def test_values_are_not_rescanned(self):
+        """A value that looks like a placeholder must not be substituted again."""
+        template = CompiledTemplate("{{A}}|{{B}}")
+        self.assertEqual(template.render({"A": "{{B}}", "B": "y"}), "{{B}}|y")
+
+
+class TestComponentTemplates(unittest.TestCase):
+    """Tests loading, inlining and caching of component files."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.mkdir(os.path.join(self.tmp.name, "static"))
+        self.html_path = os.path.join(self.tmp.name, "card.html")
+        write_file(
+            self.html_path,
+            '<link rel="stylesheet" href="static/card_css.css">'
+            '<p>{{TITLE}}</p>'
+            '<script src="static/card_js.js"></script>',
+        )
+        write_file(os.path.join(self.tmp.name, "static", "card_css.css"), "p{color:red}")
+        write_file(os.path.join(self.tmp.name, "static", "card_js.js"), "let x = 1;")
+        self.dir_patch = patch("internals._COMPONENTS_DIR", self.tmp.name)
+        self.dir_patch.start()
+        clear_template_cache()
+
+    def tearDown(self):
+        self.dir_patch.stop()
+        clear_template_cache()
+        self.tmp.cleanup()
+
+    def test_css_and_js_are_inlined(self):
+        html = render_component({"TITLE": "Hello"}, "card")
+        self.assertEqual(html, "<style>p{color:red}</style><p>Hello</p><script>let x = 1;</script>")
+
+    def test_values_are_escaped(self):
+        html = render_component({"TITLE": 'say "hi"'}, "card")
+        self.assertIn('say \\"hi\\"', html)
+
+    def test_shared_static_files_are_inlined(self):
+        write_file(
+            os.path.join(self.tmp.name, "pair.html"),
+            '<link rel="stylesheet" href="static/card_css.css"><script src="static/missing.js"></script>',
+        )
+        html = render_component({}, "pair")
+        self.assertEqual(html, '<style>p{color:red}</style><script src="static/missing.js"></script>')
+
+    def test_dev_mode_notices_new_static_file(self):
+        with patch("internals.DEV_MODE", True):
+            write_file(os.path.join(self.tmp.name, "late.html"), '<script src="static/late.js"></script>')
+            self.assertIn('src="static/late.js"', render_component({}, "late"))
+            write_file(os.path.join(self.tmp.name, "static", "late.js"), "go();")
+            self.assertEqual(render_component({}, "late"), "<script>go();</script>")
+
+    def test_raw_keys_are_not_escaped(self):
+        html = render_component({"TITLE": '<b class="x">'}, "card", raw=("TITLE",))
+        self.assertIn('<p><b class="x"></p>', html)
+
+    def test_template_is_cached(self):
+        self.assertIs(get_template("card"), get_template("card"))
+
+    def test_dev_mode_recompiles_on_change(self):
+        with patch("internals.DEV_MODE", True):
+            first = get_template("card")
+            write_file(self.html_path, "<i>{{TITLE}}</i>")
+            stat = os.stat(self.html_path)
+            os.utime(self.html_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertIsNot(get_template("card"), first)
+            self.assertEqual(render_component({"TITLE": "New"}, "card"), "<i>New</i>")
+
+    def test_missing_component_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            get_template("does_not_exist")
+
+
+class TestCreateComponent(unittest.TestCase):
+    """Tests create_component against the real bet summary component."""
+
+    @patch("internals.components.html")
+    def test_renders_bet_summary(self, mock_html):
+        internals.create_component({"BET_NAME": "Test Bet"}, "individual_bet_summary", height=700)
+        html = mock_html.call_args[0][0]
+        self.assertIn("Test Bet", html)
+        self.assertIn("<style>", html)
+        self.assertNotIn("{{BET_NAME}}", html)
+        self.assertEqual(mock_html.call_args[0][2], 700)
+
+
+class TestLiveComponent(unittest.TestCase):
+    """Tests registration and mounting of the two-way bet summary."""
+
+    def setUp(self):
+        internals._live_components.clear()
+        self.addCleanup(internals._live_components.clear)
+
+    def test_parts_are_split_out_of_the_html(self):
+        html, css, js, sources = internals._load_live_parts("individual_bet_summary_live")
+        self.assertTrue(html.startswith('<div class="bet-card">'))
+        self.assertNotIn("<link", html)
+        self.assertNotIn("<script", html)
+        self.assertIn(".bet-card{", css)
+        self.assertIn("export default function", js)
+        self.assertEqual(len(sources), 4)
+
+    @patch("internals.components_v2.component")
+    def test_registered_once_and_mounted_with_data(self, mock_component):
+        internals.create_live_component({"bet": {}}, "individual_bet_summary_live", "k", on_x_change=print)
+        internals.create_live_component({"bet": {"a": 1}}, "individual_bet_summary_live", "k")
+        self.assertEqual(mock_component.call_count, 1)
+        mount = mock_component.return_value
+        self.assertEqual(mount.call_args[1], {"key": "k", "data": {"bet": {"a": 1}}})
+
+
+if __name__ == "__main__":
+    unittest.main()
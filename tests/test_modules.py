@@ -12,7 +12,14 @@ from modules import (
     display_recent_workouts,
     compute_trade_metrics,
     display_trade_summary,
+    display_bet_grid,
+    display_bet_summaries,
+    display_live_bet_summary,
+    place_ticket_orders,
 )
+from data.orderbook import MatchingEngine
+from data.store import BetStore
+from tests.test_bet_store import make_bet
 
 
 def call_display(**kwargs):
@@ -131,6 +138,17 @@ class TestDisplayIndividualBetSummary(unittest.TestCase):
         self.assertEqual(data["YES_VALUE"], "0.55")
         self.assertEqual(data["YES_PERCENT"], "55")
 
+    @patch("modules.create_component")
+    def test_price_history_draws_a_sparkline(self, mock_create):
+        """A price history becomes an SVG polyline with one point per price."""
+        call_display(price_history=[0.50, 0.55, 0.53, 0.61])
+        data = get_data(mock_create)
+        self.assertIn('<svg class="bet-sparkline up"', data["SPARKLINE_HTML"])
+        self.assertEqual(data["SPARKLINE_HTML"].split('points="')[1].count(","), 4)
+        self.assertIn("SPARKLINE_HTML", mock_create.call_args.kwargs["raw"])
+        call_display()
+        self.assertEqual(get_data(mock_create)["SPARKLINE_HTML"], "")
+
     @patch("modules.create_component")
     def test_buy_no_valid_amount(self, mock_create):
         """Buy + No: data dict reflects no-side values."""
@@ -168,6 +186,154 @@ class TestDisplayIndividualBetSummary(unittest.TestCase):
         self.assertEqual(html_file_name, "individual_bet_summary")
 
 
+class TestDisplayBetGrid(unittest.TestCase):
+    """Tests the batch (single-component) mode of display_bet_grid."""
+
+    bets = [
+        {"bet_id": "a b", "bet_name": "<Risky> & bold", "category": "Crypto",
+         "yes_percent": 60, "no_percent": 40, "yes_value": 0.6, "no_value": 0.4},
+        {"bet_id": "c", "bet_name": "Plain", "category": "Sports",
+         "yes_percent": 10, "no_percent": 90, "yes_value": 0.1, "no_value": 0.9},
+    ]
+
+    @patch("modules.create_component")
+    def test_batch_renders_one_component(self, mock_create):
+        display_bet_grid(self.bets, cols_per_row=4, batch=True)
+        self.assertEqual(mock_create.call_count, 1)
+        data, name = mock_create.call_args[0][:2]
+        self.assertEqual(name, "bet_grid")
+        self.assertEqual(mock_create.call_args[1]["raw"], ("CARDS_HTML",))
+        self.assertEqual(data["COLUMNS"], 4)
+        self.assertEqual(data["CARDS_HTML"].count('class="grid-card"'), 2)
+
+    @patch("modules.create_component")
+    def test_batch_cards_are_escaped(self, mock_create):
+        display_bet_grid(self.bets, batch=True)
+        cards = get_data(mock_create)["CARDS_HTML"]
+        self.assertIn("&lt;Risky&gt; &amp; bold", cards)
+        self.assertIn("bet_id=a%20b", cards)
+        self.assertIn("$0.60 / $0.40", cards)
+
+
+class TestDisplayBetSummaries(unittest.TestCase):
+    """Tests the multi-card display_bet_summaries function."""
+
+    def make_bet(self, bet_id, **fields):
+        bet = dict(
+            bet_id=bet_id, bet_name=f"Bet {bet_id}", bet_image_link=None,
+            yes_value=0.65, no_value=0.35, yes_percent=65.0, no_percent=35.0,
+            rules="Resolves YES if the condition is met.",
+        )
+        bet.update(fields)
+        return bet
+
+    @patch("modules.create_component")
+    def test_one_component_for_all_cards(self, mock_create):
+        display_bet_summaries([self.make_bet("a"), self.make_bet("b"), self.make_bet("c")])
+        self.assertEqual(mock_create.call_count, 1)
+        self.assertEqual(mock_create.call_args[0][1], "bet_summaries")
+        cards = get_data(mock_create)["CARDS_HTML"]
+        self.assertEqual(cards.count('class="bet-card"'), 3)
+        for bet_id in "abc":
+            self.assertIn(f'data-bet-id="{bet_id}"', cards)
+        self.assertNotIn("<style>", cards)
+
+    @patch("modules.create_component")
+    def test_card_fields_are_escaped(self, mock_create):
+        display_bet_summaries([self.make_bet(
+            'x"y', bet_name="<b>Bold</b>", bet_image_link='https://e.com/a.png?q="1"', yes_value=0.6789,
+        )])
+        cards = get_data(mock_create)["CARDS_HTML"]
+        self.assertIn('data-bet-id="x&quot;y"', cards)
+        self.assertIn("&lt;b&gt;Bold&lt;/b&gt;", cards)
+        self.assertIn('<img src="https://e.com/a.png?q=&quot;1&quot;"', cards)
+        self.assertIn("Yes $0.68", cards)
+
+    @patch("modules.create_component")
+    def test_height_scales_with_rows(self, mock_create):
+        display_bet_summaries([self.make_bet(str(i)) for i in range(3)], cols_per_row=2)
+        self.assertEqual(mock_create.call_args[1]["height"], 2 * 640)
+
+    @patch("modules.create_component")
+    def test_no_bets_renders_nothing(self, mock_create):
+        display_bet_summaries([])
+        self.assertFalse(mock_create.called)
+
+
+class TestLiveBetSummary(unittest.TestCase):
+    """Tests the two-way bet card and its order handling."""
+
+    def setUp(self):
+        self.store = BetStore.from_dicts([make_bet("a", yes_percent=72)])
+        self.engine = MatchingEngine(self.store)
+        patches = [
+            patch("modules.place_order", self.engine.submit),
+            patch("modules.get_bet", self.store.get_bet),
+            patch("modules.st.session_state", {}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_amount_buys_whole_contracts(self):
+        (result,) = place_ticket_orders("a", "u1", [{'side': "BUY", 'outcome': "YES", 'amount': 7.5, 'price': 72}])
+        self.assertTrue(result['ok'])
+        self.assertEqual((result['order'].quantity, result['order'].price), (10, 72))
+        self.assertEqual(result['message'], "Bought 10 Yes @ 72¢ (0 filled, 10 resting)")
+
+    def test_opposite_orders_trade(self):
+        place_ticket_orders("a", "u1", [{'side': "BUY", 'outcome': "YES", 'amount': 7.2, 'price': 72}])
+        (result,) = place_ticket_orders("a", "u2", [{'side': "BUY", 'outcome': "NO", 'amount': 2.8, 'price': 28}])
+        self.assertEqual(len(result['fills']), 1)
+        self.assertEqual(result['message'], "Bought 10 No @ 28¢")
+
+    def test_bad_events_are_rejected(self):
+        results = place_ticket_orders("a", "u1", [
+            {'side': "BUY", 'outcome': "YES", 'amount': 0.5, 'price': 72},
+            {'side': "HOLD", 'outcome': "YES", 'amount': 5, 'price': 50},
+            {'side': "BUY", 'outcome': "YES", 'amount': 5},
+        ])
+        self.assertEqual([result['ok'] for result in results], [False, False, False])
+        self.assertIn("does not cover one contract", results[0]['message'])
+
+    def test_amounts_must_be_finite_positive_and_capped(self):
+        results = place_ticket_orders("a", "u1", [
+            {'side': "BUY", 'outcome': "YES", 'amount': amount, 'price': 50}
+            for amount in ('1e300', 'inf', 'nan', -5)
+        ])
+        self.assertEqual([result['ok'] for result in results], [False] * 4)
+        self.assertIn("more than 1,000,000 contracts", results[0]['message'])
+        self.assertIn("positive number of dollars", results[1]['message'])
+        (result,) = place_ticket_orders("a", "u1", [{'side': "BUY", 'outcome': "YES", 'amount': 500_000, 'price': 50}])
+        self.assertEqual(result['order'].quantity, 1_000_000)
+
+    @patch("modules.create_live_component")
+    def test_sends_bet_fields_as_data(self, mock_live):
+        mock_live.return_value = {'ticket': {'side': "SELL"}}
+        ticket = display_live_bet_summary("a", "u1", key="card")
+        data, name, key = mock_live.call_args[0]
+        self.assertEqual((name, key), ("individual_bet_summary_live", "card"))
+        self.assertEqual(data, {'bet': make_bet("a", yes_percent=72)})
+        self.assertEqual(ticket, {'side': "SELL"})
+
+    @patch("modules.create_live_component")
+    def test_order_batch_applied_once_with_status(self, mock_live):
+        mock_live.return_value = {}
+        display_live_bet_summary("a", "u1", key="card")
+        on_orders = mock_live.call_args[1]['on_orders_change']
+        batch = {'batch_id': "b1", 'orders': [{'side': "BUY", 'outcome': "YES", 'amount': 1, 'price': 50}]}
+        with patch.dict("modules.st.session_state", {'card': {'orders': batch}}):
+            on_orders()
+            on_orders()  # re-delivered batch
+            self.assertEqual(len(self.engine.book("a").orders), 1)
+            display_live_bet_summary("a", "u1", key="card")
+            status = mock_live.call_args[0][0]['status']
+            self.assertEqual(status['id'], "b1")
+            self.assertTrue(status['ok'])
+            display_live_bet_summary("a", "u1", key="card")
+            self.assertNotIn('status', mock_live.call_args[0][0])
+
+
 class TestDisplayGenAiAdvice(unittest.TestCase):
     """Tests the display_genai_advice function."""
 
@@ -175,6 +341,18 @@ class TestDisplayGenAiAdvice(unittest.TestCase):
         """Tests foo."""
         pass
 
+    @patch("modules.st")
+    def test_shows_advice_and_image(self, mock_st):
+        display_genai_advice("2024-01-01 00:00:00", "Keep going!", "https://example.com/a.png")
+        mock_st.write.assert_called_once_with("Keep going!")
+        mock_st.image.assert_called_once_with("https://example.com/a.png")
+
+    @patch("modules.st")
+    def test_pending_advice_shows_a_note(self, mock_st):
+        display_genai_advice(None, None, None)
+        mock_st.write.assert_not_called()
+        self.assertIn("being prepared", mock_st.caption.call_args[0][0])
+
 
 class TestDisplayRecentWorkouts(unittest.TestCase):
     """Tests the display_recent_workouts function."""
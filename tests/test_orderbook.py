@@ -0,0 +1,101 @@
+#############################################################################
+# tests/test_orderbook.py — tests for data/orderbook.py
+#############################################################################
+import unittest
+
+from data.orderbook import MatchingEngine
+from data.store import BetStore
+from tests.test_bet_store import make_bet
+
+
+class TestMatching(unittest.TestCase):
+    """Tests price-time priority and the linked Yes/No book."""
+
+    def setUp(self):
+        self.engine = MatchingEngine(clock=lambda: 0.0)
+
+    def submit(self, side, outcome, price, quantity, user="u"):
+        return self.engine.submit("bet", user, side, outcome, price, quantity)
+
+    def test_non_crossing_orders_rest(self):
+        self.submit("BUY", "YES", 40, 5)
+        self.submit("SELL", "YES", 60, 5)
+        book = self.engine.book("bet")
+        self.assertEqual((book.best_bid(), book.best_ask()), (40, 60))
+        self.assertEqual(book.depth(), {'bids': [(40, 5)], 'asks': [(60, 5)]})
+
+    def test_trade_prints_at_resting_price(self):
+        maker, _ = self.submit("SELL", "YES", 55, 5)
+        taker, fills = self.submit("BUY", "YES", 60, 3)
+        self.assertEqual([(f.maker_id, f.taker_id, f.yes_price, f.quantity) for f in fills],
+                         [(maker.order_id, taker.order_id, 55, 3)])
+        self.assertEqual(maker.remaining, 2)
+        self.assertEqual(taker.remaining, 0)
+        self.assertEqual(self.engine.book("bet").last_price, 55)
+
+    def test_price_then_time_priority(self):
+        first, _ = self.submit("SELL", "YES", 50, 1)
+        second, _ = self.submit("SELL", "YES", 50, 1)
+        better, _ = self.submit("SELL", "YES", 49, 1)
+        _, fills = self.submit("BUY", "YES", 50, 3)
+        self.assertEqual([f.maker_id for f in fills], [better.order_id, first.order_id, second.order_id])
+        self.assertEqual([f.yes_price for f in fills], [49, 50, 50])
+
+    def test_partial_fill_rests_remainder(self):
+        self.submit("SELL", "YES", 50, 2)
+        taker, fills = self.submit("BUY", "YES", 52, 5)
+        self.assertEqual(sum(f.quantity for f in fills), 2)
+        self.assertEqual(taker.filled, 2)
+        self.assertEqual(self.engine.book("bet").depth(), {'bids': [(52, 3)], 'asks': []})
+
+    def test_buy_no_matches_buy_yes(self):
+        # Buying No at 30 is selling Yes at 70, so it crosses a Yes bid at 70
+        yes, _ = self.submit("BUY", "YES", 70, 4)
+        no, fills = self.submit("BUY", "NO", 30, 4)
+        self.assertEqual(len(fills), 1)
+        self.assertEqual((fills[0].yes_price, fills[0].no_price), (70, 30))
+        self.assertEqual(yes.remaining + no.remaining, 0)
+
+    def test_sell_no_rests_as_yes_bid(self):
+        order, _ = self.submit("SELL", "NO", 35, 1)
+        self.assertTrue(order.is_bid)
+        self.assertEqual(self.engine.book("bet").best_bid(), 65)
+
+    def test_cancel(self):
+        order, _ = self.submit("BUY", "YES", 40, 5)
+        self.assertIs(self.engine.cancel("bet", order.order_id), order)
+        self.assertIsNone(self.engine.cancel("bet", order.order_id))
+        self.assertIsNone(self.engine.book("bet").best_bid())
+        _, fills = self.submit("SELL", "YES", 40, 5)
+        self.assertEqual(fills, [])
+
+    def test_invalid_orders(self):
+        for args in (("HOLD", "YES", 50, 1), ("BUY", "MAYBE", 50, 1), ("BUY", "YES", 0, 1),
+                     ("BUY", "YES", 100, 1), ("BUY", "YES", 50.5, 1), ("BUY", "YES", 50, 0),
+                     ("BUY", "YES", 50, 1_000_001), ("BUY", "YES", 50, float("inf"))):
+            with self.assertRaises(ValueError):
+                self.submit(*args)
+
+
+class TestStorePrices(unittest.TestCase):
+    """Tests that trades move the bet's prices in the store."""
+
+    def setUp(self):
+        self.store = BetStore.from_dicts([make_bet("a", yes_percent=50)])
+        self.engine = MatchingEngine(self.store)
+
+    def test_trade_updates_percent_and_value(self):
+        self.engine.submit("a", "u1", "BUY", "NO", 38, 2)
+        self.assertEqual(self.store.get_bet("a").yes_percent, 50)
+        self.engine.submit("a", "u2", "BUY", "YES", 62, 2)
+        bet = self.store.get_bet("a")
+        self.assertEqual((bet.yes_percent, bet.no_percent), (62, 38))
+        self.assertAlmostEqual(bet.yes_value + bet.no_value, 1.0)
+
+    def test_unknown_bet_rejected(self):
+        with self.assertRaises(ValueError):
+            self.engine.submit("missing", "u1", "BUY", "YES", 50, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+#############################################################################
+# tests/test_portfolio.py — tests for data/portfolio.py
+#############################################################################
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import data_fetcher
+from data.orderbook import MatchingEngine
+from data.portfolio import Portfolio
+from data.storage import MemoryBackend
+from data.store import BetStore
+from data.trade_log import TradeLog
+from tests.test_bet_store import make_bet
+
+
+class TestPortfolio(unittest.TestCase):
+    """Tests positions, marks and incremental revaluation."""
+
+    def setUp(self):
+        self.store = BetStore.from_dicts([make_bet("a", yes_percent=50), make_bet("b", yes_percent=20)])
+        self.engine = MatchingEngine(self.store, clock=lambda: 0.0)
+        self.portfolio = Portfolio()
+        self.portfolio.attach(self.store, self.engine)
+
+    def tick(self, bet_id, yes_percent):
+        self.store.update(bet_id, yes_percent=yes_percent, no_percent=100 - yes_percent,
+                          yes_value=yes_percent / 100, no_value=(100 - yes_percent) / 100)
+
+    def test_fills_open_positions_for_both_parties(self):
+        self.engine.submit("a", "maker", "SELL", "YES", 55, 10)
+        self.engine.submit("a", "taker", "BUY", "YES", 60, 4)
+        taker = self.portfolio.valuation("taker")
+        self.assertEqual([(p['market'], p['outcome'], p['quantity'], p['avg_cost'], p['mark'])
+                          for p in taker['positions']], [("a", "YES", 4, 0.55, 0.55)])
+        maker = self.portfolio.valuation("maker")
+        self.assertEqual(maker['positions'][0]['quantity'], -4)
+        self.assertAlmostEqual(maker['market_value'], -2.2)
+        self.assertEqual(sorted(self.portfolio.holders(("a", "YES"))), ["maker", "taker"])
+
+    def test_no_positions_are_marked_at_no_value(self):
+        # Buying No at 45 is selling Yes at 55
+        self.engine.submit("a", "maker", "BUY", "YES", 55, 5)
+        self.engine.submit("a", "taker", "BUY", "NO", 45, 5)
+        self.tick("a", 40)
+        valuation = self.portfolio.valuation("taker")
+        self.assertEqual([(p['outcome'], p['quantity'], p['mark']) for p in valuation['positions']], [("NO", 5, 0.6)])
+        self.assertAlmostEqual(valuation['unrealized_pnl'], 5 * (0.6 - 0.45))
+
+    def test_tick_revalues_only_holders_of_that_market(self):
+        self.portfolio.add_fill("u1", ("a", "YES"), 10, 0.5)
+        self.portfolio.add_fill("u2", ("a", "YES"), 20, 0.5)
+        self.portfolio.add_fill("u2", ("b", "YES"), 5, 0.2)
+        self.portfolio.revalue()
+        self.tick("a", 60)
+        self.tick("a", 70)          # coalesced with the tick before
+        self.tick("b", 20)
+        self.store.update("a", rules="New rules.")   # not a price change
+        # Both outcomes of a and b were flagged; the one held position of b did not move
+        self.assertEqual(self.portfolio.revalue(), 3)
+        self.assertEqual(self.portfolio.revalue(), 0)
+        self.assertAlmostEqual(self.portfolio.totals("u1")['market_value'], 7.0)
+        self.assertAlmostEqual(self.portfolio.totals("u2")['unrealized_pnl'], 20 * 0.2)
+
+    def test_per_instrument_and_full_pass_agree(self):
+        for n in range(40):
+            self.portfolio.add_fill(f"u{n}", ("a" if n % 4 else "b", "YES"), n + 1, 0.5)
+            self.portfolio.add_fill(f"u{n}", ("c", "NO"), 1, 0.5)
+
+        def expected(user):
+            return sum(p['quantity'] * p['mark'] for p in self.portfolio.valuation(user)['positions'])
+
+        self.tick("b", 90)          # a quarter of the rows or less: per instrument
+        self.assertEqual(self.portfolio.revalue(), 10)
+        self.assertAlmostEqual(self.portfolio.totals("u0")['market_value'], 0.9 + 0.5)
+        self.tick("a", 10)          # most rows: one pass over all of them
+        self.assertEqual(self.portfolio.revalue(), 30)
+        for user in ("u0", "u1", "u39"):
+            self.assertAlmostEqual(self.portfolio.totals(user)['market_value'], expected(user))
+        self.assertAlmostEqual(self.portfolio.totals("u1")['market_value'], 2 * 0.1 + 0.5)
+
+    def test_average_cost_and_realized_pnl(self):
+        self.portfolio.add_fill("u", ("AAPL", None), 10, 100.0)
+        self.portfolio.add_fill("u", ("AAPL", None), 10, 110.0)
+        self.portfolio.add_fill("u", ("AAPL", None), -5, 120.0)
+        self.portfolio.set_mark(("AAPL", None), 130.0)
+        totals = self.portfolio.totals("u")
+        self.assertEqual(totals['realized_pnl'], 5 * (120 - 105))
+        self.assertEqual(totals['cost_basis'], 15 * 105)
+        self.assertEqual(totals['market_value'], 15 * 130)
+        # Flip to short: the remainder opens at the fill price
+        self.portfolio.add_fill("u", ("AAPL", None), -20, 125.0)
+        position, = self.portfolio.valuation("u")['positions']
+        self.assertEqual((position['quantity'], position['avg_cost']), (-5, 125.0))
+        self.portfolio.add_fill("u", ("AAPL", None), 5, 120.0)
+        self.assertEqual(self.portfolio.valuation("u")['positions'], [])
+        self.assertEqual(self.portfolio.totals("u")['market_value'], 0)
+
+    def test_zero_or_missing_quantity_moves_nothing(self):
+        self.portfolio.add_fill("u", ("AAPL", None), 0, 100.0)
+        self.portfolio.add_trades("u", [
+            {'symbol': 'AAPL', 'action': 'BUY', 'price': 100.0},
+            {'symbol': 'AAPL', 'action': 'BUY', 'quantity': 5, 'price': 100.0},
+            {'symbol': 'AAPL', 'action': 'SELL', 'quantity': 0, 'price': 120.0},
+        ])
+        position, = self.portfolio.valuation("u")['positions']
+        self.assertEqual((position['quantity'], position['avg_cost']), (5, 100.0))
+        self.assertEqual(self.portfolio.totals("u")['realized_pnl'], 0)
+
+    def test_fill_between_tick_and_read(self):
+        self.portfolio.add_fill("u1", ("a", "YES"), 10, 0.5)
+        self.tick("a", 80)
+        self.portfolio.add_fill("u2", ("a", "YES"), 10, 0.8)
+        self.assertAlmostEqual(self.portfolio.totals("u1")['market_value'], 8.0)
+        self.assertAlmostEqual(self.portfolio.totals("u2")['market_value'], 8.0)
+
+    def test_symbols_are_marked_at_their_latest_trade(self):
+        self.portfolio.add_trades("u", [
+            {'symbol': 'TSLA', 'action': 'BUY', 'quantity': 2, 'price': 200.0},
+            {'symbol': 'TSLA', 'action': 'BUY', 'quantity': 2, 'price': 250.0},
+        ])
+        self.assertEqual(self.portfolio.totals("u")['unrealized_pnl'], 4 * 250 - (2 * 200 + 2 * 250))
+        with self.assertRaises(ValueError):
+            self.portfolio.add_trades("u", [{'symbol': 'TSLA', 'action': 'HOLD', 'quantity': 1, 'price': 1}])
+
+
+class TestGetUserPortfolio(unittest.TestCase):
+    """Tests get_user_portfolio over the user's trade log."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.log = TradeLog(os.path.join(self.tmp, "trades.log"))
+        self.addCleanup(self.log.close)
+        for patcher in (
+            patch("data_fetcher.get_backend", return_value=MemoryBackend(self.log)),
+            patch("data_fetcher.get_portfolio", return_value=Portfolio()),
+            patch("data_fetcher._portfolio_marks", {}),
+            patch("data_fetcher._portfolio_loads", {}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        data_fetcher.invalidate_user_data('user1')
+        self.addCleanup(data_fetcher.invalidate_user_data, 'user1')
+
+    def test_values_logged_trades_and_new_ones(self):
+        trades = data_fetcher.get_user_trades('user1')
+        before = data_fetcher.get_user_portfolio('user1')
+        net = {}
+        for trade in trades:
+            net[trade['symbol']] = net.get(trade['symbol'], 0) + (
+                trade['quantity'] if trade['action'] == 'BUY' else -trade['quantity'])
+        self.assertEqual({p['market']: p['quantity'] for p in before['positions']},
+                         {symbol: quantity for symbol, quantity in net.items() if quantity})
+
+        data_fetcher.record_trade('user1', 'NVDA', 'BUY', 3, 400.0)
+        after = data_fetcher.get_user_portfolio('user1')
+        self.assertIn(('NVDA', None, 3, 400.0), [(p['market'], p['outcome'], p['quantity'], p['mark'])
+                                                 for p in after['positions']])
+        self.assertAlmostEqual(after['cost_basis'] - before['cost_basis'], 1_200.0)
+
+    def test_trade_recorded_during_first_load_counts_once(self):
+        backend = data_fetcher.get_backend()
+        add_trades, loads = backend.add_trades, []
+
+        def add_trades_then_load(rows):
+            # A page's first portfolio load racing the write, which holds no portfolio lock
+            self.assertFalse(data_fetcher._portfolio_lock.locked())
+            trade_ids = add_trades(rows)
+            loads.append(threading.Thread(target=data_fetcher.get_user_portfolio, args=('user1',)))
+            loads[0].start()
+            loads[0].join(0.2)
+            return trade_ids
+
+        with patch.object(backend, "add_trades", add_trades_then_load):
+            data_fetcher.record_trade('user1', 'NVDA', 'BUY', 3, 400.0)
+        loads[0].join()
+        nvda = [p['quantity'] for p in data_fetcher.get_user_portfolio('user1')['positions'] if p['market'] == 'NVDA']
+        self.assertEqual(nvda, [3])
+
+    def test_trade_recorded_after_the_first_load_read_counts_once(self):
+        get_user_trades = data_fetcher.get_user_trades
+
+        def read_then_record(user_id):
+            trades = get_user_trades(user_id)
+            data_fetcher.record_trade('user1', 'NVDA', 'BUY', 3, 400.0)
+            return trades
+
+        with patch("data_fetcher.get_user_trades", read_then_record):
+            data_fetcher.get_user_portfolio('user1')
+        data_fetcher.record_trade('user1', 'NVDA', 'BUY', 2, 400.0)
+        nvda = [p['quantity'] for p in data_fetcher.get_user_portfolio('user1')['positions'] if p['market'] == 'NVDA']
+        self.assertEqual(nvda, [5])
+        self.assertEqual(data_fetcher._portfolio_loads, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
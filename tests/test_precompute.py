@@ -0,0 +1,139 @@
+#############################################################################
+# tests/test_precompute.py — tests for data/precompute.py
+#############################################################################
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import data_fetcher
+from data.cache import ResultCache
+from data.precompute import Artifact, PrecomputeScheduler, default_executor
+
+
+class GatedExecutor(ThreadPoolExecutor):
+    """One worker thread that runs jobs only while the gate is open."""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.gate = threading.Event()
+        self.order = []
+
+    def submit(self, fn, computes, batch):
+        def run():
+            self.gate.wait(5)
+            self.order.extend(inputs[0] for inputs in batch)
+            return fn(computes, batch)
+        return super().submit(run)
+
+
+def double(value):
+    return value * 2
+
+
+class TestPrecomputeScheduler(unittest.TestCase):
+    """Tests priorities, deduplication and the cache handoff."""
+
+    def setUp(self):
+        self.cache = ResultCache(ttl=None)
+        self.executor = GatedExecutor()
+        self.scheduler = PrecomputeScheduler(
+            [Artifact('name', str.upper), Artifact('double', double, gather=len)],
+            cache=self.cache, executor=self.executor, max_in_flight=1,
+        )
+        self.addCleanup(self.scheduler.close)
+
+    def wait_in_flight(self, count):
+        deadline = time.monotonic() + 5
+        while self.scheduler.stats()['in_flight'] != count and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def test_results_are_handed_over_through_the_cache(self):
+        self.assertEqual(self.scheduler.results('ann'), {'name': None, 'double': None})
+        self.scheduler.touch('ann')
+        self.executor.gate.set()
+        self.assertTrue(self.scheduler.wait_idle(5))
+        self.assertEqual(self.scheduler.results('ann'), {'name': 'ANN', 'double': 6})
+        self.assertEqual(self.cache.get('precompute.name', 'ann'), 'ANN')
+        # Fresh results are not recomputed on the next touch
+        self.scheduler.touch('ann')
+        self.assertTrue(self.scheduler.wait_idle(5))
+        self.assertEqual(self.scheduler.stats()['completed'], 1)
+
+    def test_recently_active_users_go_first_and_are_queued_once(self):
+        self.scheduler.touch('a')
+        self.wait_in_flight(1)
+        for user_id in ('b', 'c', 'd', 'b', 'b'):
+            self.scheduler.touch(user_id)
+        self.executor.gate.set()
+        self.assertTrue(self.scheduler.wait_idle(5))
+        # 'a' was already handed to the pool; 'b' was touched last
+        self.assertEqual(self.executor.order, ['a', 'b', 'd', 'c'])
+        stats = self.scheduler.stats()
+        self.assertEqual((stats['completed'], stats['deduplicated']), (4, 2))
+        self.assertIsNotNone(stats['latency_p99'])
+
+    def test_results_of_invalidated_data_are_dropped_and_recomputed(self):
+        self.scheduler.touch('ann')
+        self.wait_in_flight(1)
+        self.cache.invalidate_user('ann')   # while the job is waiting at the gate
+        self.scheduler.touch('ann')
+        self.executor.gate.set()
+        self.assertTrue(self.scheduler.wait_idle(5))
+        self.assertEqual(self.scheduler.results('ann')['name'], 'ANN')
+        stats = self.scheduler.stats()
+        self.assertEqual((stats['submitted'], stats['stale'], stats['completed']), (2, 1, 1))
+
+    def test_failures_are_counted(self):
+        self.scheduler.touch(None)   # str.upper(None) raises in the worker
+        self.executor.gate.set()
+        self.assertTrue(self.scheduler.wait_idle(5))
+        self.assertEqual(self.scheduler.stats()['failed'], 1)
+
+    def test_jobs_the_executor_refuses_fail_and_free_their_slot(self):
+        with patch.object(self.executor, "submit", side_effect=RuntimeError("shut down")):
+            self.scheduler.touch('ann')
+            self.assertTrue(self.scheduler.wait_idle(5))
+        stats = self.scheduler.stats()
+        self.assertEqual((stats['submitted'], stats['failed']), (1, 1))
+        self.assertEqual(self.scheduler._jobs, 0)
+
+    def test_jobs_run_in_worker_processes(self):
+        cache = ResultCache(ttl=None)
+        scheduler = PrecomputeScheduler(
+            [Artifact('double', double, gather=len)], cache=cache, executor=default_executor(1),
+        )
+        self.addCleanup(scheduler.close)
+        scheduler.touch('abcd')
+        self.assertTrue(scheduler.wait_idle(60))
+        self.assertEqual(scheduler.results('abcd'), {'double': 8})
+
+
+class TestUserDashboard(unittest.TestCase):
+    """Tests get_user_dashboard with and without the scheduler."""
+
+    def test_inline_without_scheduler(self):
+        with patch("data_fetcher.PRECOMPUTE_WORKERS", 0):
+            dashboard = data_fetcher.get_user_dashboard('user1')
+        self.assertEqual(set(dashboard), {'trade_metrics', 'workout_summary', 'genai_advice'})
+        self.assertEqual(dashboard['trade_metrics'], data_fetcher.get_user_trade_metrics('user1'))
+        self.assertGreaterEqual(dashboard['workout_summary']['active_minutes'], 30)
+
+    def test_scheduler_results_are_only_read(self):
+        scheduler = PrecomputeScheduler(
+            data_fetcher.DASHBOARD_ARTIFACTS, executor=ThreadPoolExecutor(max_workers=1),
+        )
+        self.addCleanup(scheduler.close)
+        with patch("data_fetcher._scheduler", scheduler):
+            data_fetcher.invalidate_user_data('user2')
+            self.assertIsNone(data_fetcher.get_user_dashboard('user2')['trade_metrics'])
+            self.assertTrue(scheduler.wait_idle(5))
+            self.assertTrue(data_fetcher.get_advice_service().wait_idle(5))
+            dashboard = data_fetcher.get_user_dashboard('user2')
+        self.assertEqual(dashboard['trade_metrics']['total_trades'], len(data_fetcher.get_user_trades('user2')))
+        self.assertIsNotNone(dashboard['genai_advice'])
+
+
+if __name__ == "__main__":
+    unittest.main()
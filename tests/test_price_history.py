@@ -0,0 +1,110 @@
+#############################################################################
+# tests/test_price_history.py — tests for data/price_history.py
+#############################################################################
+import unittest
+
+import numpy as np
+
+from data import get_price_series
+from data.price_history import PriceHistory
+from data.store import BetStore
+from tests.test_bet_store import make_bet
+
+
+class FakeClock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestPriceHistory(unittest.TestCase):
+    """Tests tick recording, OHLC rollups and chart series."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = BetStore.from_dicts([make_bet("a", yes_percent=50), make_bet("b", yes_percent=20)])
+        self.history = PriceHistory(clock=self.clock)
+        self.history.attach(self.store)
+
+    def trade(self, bet_id, yes_percent, at):
+        self.clock.now = at
+        self.store.update(bet_id, yes_percent=yes_percent, no_percent=100 - yes_percent,
+                          yes_value=yes_percent / 100, no_value=(100 - yes_percent) / 100)
+
+    def test_untraded_bet_has_its_opening_price(self):
+        times, prices = self.history.ticks("b")
+        self.assertEqual(times.tolist(), [1_000.0])
+        self.assertEqual(prices.tolist(), [0.2])
+        self.assertEqual(self.history.bars("b", 60)["close"].tolist(), [0.2])
+        self.assertEqual(len(self.history.series("missing", 10)[0]), 0)
+
+    def test_rolls_ticks_up_into_bars(self):
+        for at, yes_percent in [(1_001, 55), (1_010, 45), (1_030, 52), (1_065, 60), (1_070, 58)]:
+            self.trade("a", yes_percent, at)
+        self.store.update("a", rules="Only the rules changed.")   # not a tick
+        bars = self.history.bars("a", 60)
+        self.assertEqual(bars["start"].tolist(), [960, 1_020])
+        self.assertEqual(bars["open"].tolist(), [0.5, 0.52])
+        self.assertEqual(bars["high"].tolist(), [0.55, 0.6])
+        self.assertEqual(bars["low"].tolist(), [0.45, 0.52])
+        self.assertEqual(bars["close"].tolist(), [0.45, 0.58])
+        self.assertEqual(bars["ticks"].tolist(), [3, 3])
+        self.assertEqual(len(self.history.bars("a", 1)["start"]), 6)
+        self.assertEqual(self.history.bars("a", 60, start=1_000)["start"].tolist(), [1_020])
+
+    def test_late_ticks_keep_arrival_order(self):
+        self.trade("a", 60, 1_100)
+        self.trade("a", 40, 1_050)
+        times, prices = self.history.ticks("a")
+        self.assertEqual(times.tolist(), [1_000, 1_100, 1_100])
+        self.assertEqual(prices.tolist(), [0.5, 0.6, 0.4])
+
+    def test_ring_keeps_newest_ticks(self):
+        history = PriceHistory(tick_capacity=100, clock=self.clock)
+        for i in range(1_000):
+            history.record("x", i % 7, timestamp=i)
+            if i % 37 == 0:   # reads in between flush partial batches
+                self.assertEqual(history.ticks("x")[0].tolist(), list(range(max(0, i - 99), i + 1)))
+        times, _ = history.ticks("x")
+        self.assertEqual(times.tolist(), list(range(900, 1_000)))
+        self.assertEqual(history.bars("x", 60)["ticks"].sum(), 1_000)
+
+    def test_series_picks_a_level_and_downsamples(self):
+        for i in range(3_000):
+            self.history.record("a", 0.5 + 0.4 * np.sin(i / 50), timestamp=2_000 + i)
+        # 52 one-minute bars are enough for 40 points
+        times, prices = self.history.series("a", 40)
+        self.assertEqual(len(times), 40)
+        self.assertTrue((np.diff(times) > 0).all())
+        self.assertEqual(times[0] % 60, 0)
+        self.assertEqual((times[0], times[-1]), (960, 4_980))
+        # They are also the finest level still reaching back to the first
+        # tick, as only the newest 900 one-second bars are kept
+        times, prices = self.history.series("a", 100)
+        self.assertEqual((len(times), times[0], times[-1]), (52, 960, 4_980))
+        # A short recent window is drawn from 1-second bars
+        times, prices = self.history.series("a", 100, start=4_900)
+        self.assertEqual(len(times), 100)
+        self.assertEqual((times[0], times[-1]), (4_900, 4_999))
+        self.assertAlmostEqual(prices[-1], 0.5 + 0.4 * np.sin(2_999 / 50))
+
+    def test_removed_bets_are_forgotten(self):
+        self.trade("a", 60, 1_100)
+        self.store.remove("a")
+        self.assertNotIn("a", self.history)
+        self.assertEqual(len(self.history.ticks("a")[0]), 0)
+
+
+class TestGetPriceSeries(unittest.TestCase):
+    """Tests the process-wide price history over the seeded catalog."""
+
+    def test_returns_the_opening_price(self):
+        times, prices = get_price_series("btc-100k", 120)
+        self.assertGreaterEqual(len(prices), 1)
+        self.assertLessEqual(len(prices), 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#############################################################################
+# tests/test_search.py — tests for data/search.py and data/bets.search_bets
+#############################################################################
+import unittest
+
+from data import search_bets
+from data.search import SearchIndex, tokenize
+from data.store import BetStore
+from tests.test_bet_store import make_bet
+
+
+def make_store():
+    return BetStore.from_dicts([
+        make_bet("btc", "Crypto", 62, bet_name="Bitcoin above $100,000 by December?",
+                 rules="Resolves YES if the Bitcoin price closes above 100,000."),
+        make_bet("eth", "Crypto", 35, bet_name="Ethereum ETF approved?",
+                 rules="Resolves YES if an Ethereum spot ETF is approved, unlike Bitcoin."),
+        make_bet("elect", "Politics", 48, bet_name="Election turnout above 60%?",
+                 rules="Resolves YES if official turnout exceeds 60 percent."),
+        make_bet("final", "Sports", 71, bet_name="Home team wins the final?",
+                 rules="Resolves YES if the home team wins the championship final."),
+    ])
+
+
+def ids(results):
+    return [bet["bet_id"] for bet in results.bets]
+
+
+class TestTokenize(unittest.TestCase):
+    """Tests tokenization of bet text."""
+
+    def test_lowercases_and_drops_stopwords(self):
+        self.assertEqual(tokenize("Will the Fed CUT rates?"), ["fed", "cut", "rates"])
+
+    def test_joins_digit_groups(self):
+        self.assertEqual(tokenize("Above $100,000, or not"), ["above", "100000", "not"])
+        self.assertEqual(tokenize(None), [])
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Tests ranking, prefix matching, facets and incremental updates."""
+
+    def setUp(self):
+        self.store = make_store()
+        self.index = SearchIndex()
+        self.index.attach(self.store)
+
+    def test_name_match_outranks_rules_match(self):
+        results = self.index.search("bitcoin", prefix=False)
+        self.assertEqual(ids(results), ["btc", "eth"])
+        self.assertEqual(results.total, 2)
+
+    def test_every_term_must_match(self):
+        self.assertEqual(ids(self.index.search("bitcoin approved", prefix=False)), ["eth"])
+        self.assertEqual(ids(self.index.search("bitcoin championship", prefix=False)), [])
+
+    def test_last_term_is_a_prefix_while_typing(self):
+        self.assertEqual(ids(self.index.search("ele")), ["elect"])          # indexed n-gram
+        self.assertEqual(ids(self.index.search("champ")), ["final"])        # vocabulary expansion
+        self.assertEqual(ids(self.index.search("champ ")), [])              # finished word
+        self.assertEqual(self.index.search("e").total, len(self.store))     # too short to filter
+        self.assertEqual(self.index.suggest("eth"), ["ethereum"])
+
+    def test_category_text_is_searchable(self):
+        self.assertEqual(sorted(ids(self.index.search("crypto"))), ["btc", "eth"])
+
+    def test_facets_count_under_the_other_filter(self):
+        results = self.index.search("resolves", category="Crypto", probability=6)
+        self.assertEqual(ids(results), ["btc"])
+        self.assertEqual(results.facets["category"], {"Crypto": 1})
+        self.assertEqual(results.facets["probability"], {3: 1, 6: 1})
+
+        browse = self.index.search("", category="All")
+        self.assertEqual(ids(browse), ["btc", "eth", "elect", "final"])
+        self.assertEqual(browse.facets["category"], {"Crypto": 2, "Politics": 1, "Sports": 1})
+
+    def test_pages_with_a_cursor(self):
+        first = self.index.search("resolves", limit=3)
+        second = self.index.search("resolves", limit=3, after=first.next_cursor)
+        self.assertEqual(len(first.bets), 3)
+        self.assertIsNone(second.next_cursor)
+        self.assertEqual(sorted(ids(first) + ids(second)), ["btc", "elect", "eth", "final"])
+
+    def test_follows_store_changes(self):
+        self.store.add(make_bet("doge", "Crypto", 5, bet_name="Dogecoin to a dollar?"))
+        self.assertEqual(ids(self.index.search("dogecoin")), ["doge"])
+
+        self.store.update("btc", yes_percent=15, no_percent=85)
+        self.assertEqual(ids(self.index.search("bitcoin", probability=1, prefix=False)), ["btc"])
+        self.assertEqual(self.index.search("", category="Crypto").facets["probability"], {0: 1, 1: 1, 3: 1})
+
+        self.store.update("eth", bet_name="Solana ETF approved?", rules="Resolves YES if approved.")
+        self.assertEqual(ids(self.index.search("bitcoin", prefix=False)), ["btc"])
+        self.assertEqual(ids(self.index.search("solana")), ["eth"])
+
+        self.store.remove("final")
+        self.assertEqual(ids(self.index.search("final")), [])
+        self.assertNotIn("Sports", self.index.search("").facets["category"])
+
+    def test_compaction_keeps_results(self):
+        for bet_id in ("eth", "final"):
+            self.store.remove(bet_id)
+        self.index.compact()
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(ids(self.index.search("above", prefix=False)), ["btc", "elect"])
+
+
+class TestSearchBets(unittest.TestCase):
+    """Tests search_bets over the seeded catalog."""
+
+    def test_searches_the_shared_store(self):
+        results = search_bets("bitcoin", category="All")
+        self.assertTrue(results.bets)
+        self.assertTrue(all("bitcoin" in (bet["bet_name"] + bet["rules"]).lower() for bet in results.bets))
+        self.assertEqual(search_bets("bitcoin", category="Sports").bets, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+#############################################################################
+# tests/test_social_graph.py — tests for data/social_graph.py
+#############################################################################
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import data_fetcher
+from data.social_graph import FriendGraph, SocialGraph
+from data.storage import MemoryBackend
+
+# 0 - 1 - 2 - 3, plus 0 - 2 and 4 - 1; user 5 has no friends
+EDGES = [(0, 1), (1, 2), (2, 3), (0, 2), (4, 1), (1, 0), (3, 3)]
+
+
+def make_graph(**kwargs):
+    src, dst = zip(*EDGES)
+    return FriendGraph.from_edges(np.array(src), np.array(dst), n_users=6, **kwargs)
+
+
+class TestFriendGraph(unittest.TestCase):
+    """Tests CSR construction, lookups and incremental updates."""
+
+    def setUp(self):
+        self.graph = make_graph()
+
+    def test_csr_is_symmetric_sorted_and_deduplicated(self):
+        self.assertEqual(self.graph.indptr.tolist(), [0, 2, 5, 8, 9, 10, 10])
+        self.assertEqual(self.graph.neighbors(1).tolist(), [0, 2, 4])
+        self.assertEqual(self.graph.neighbors(5).tolist(), [])
+        self.assertEqual(self.graph.n_edges, 5)
+        self.assertEqual(self.graph.indices.dtype, np.int32)
+
+    def test_out_of_range_edges_are_rejected(self):
+        with self.assertRaises(ValueError):
+            FriendGraph.from_edges(np.array([0]), np.array([7]), n_users=3)
+
+    def test_neighbors_many(self):
+        flat, offsets = self.graph.neighbors_many([3, 5, 0])
+        self.assertEqual(flat.tolist(), [2, 1, 2])
+        self.assertEqual(offsets.tolist(), [0, 1, 1, 3])
+
+    def test_k_hop(self):
+        self.assertEqual(self.graph.k_hop(3, 1).tolist(), [2])
+        users, hops = self.graph.k_hop(3, 3, include_distance=True)
+        self.assertEqual(dict(zip(users.tolist(), hops.tolist())), {0: 2, 1: 2, 2: 1, 4: 3})
+        self.assertEqual(self.graph.k_hop(5, 2).tolist(), [])
+
+    def test_mutual_friends_and_suggestions(self):
+        self.assertEqual(self.graph.mutual_friends(0, 2), 1)
+        users, counts = self.graph.mutual_counts(0)
+        self.assertEqual(list(zip(users.tolist(), counts.tolist())), [(3, 1), (4, 1)])
+
+    def test_updates_are_visible_before_and_after_compaction(self):
+        self.assertTrue(self.graph.add_edge(3, 5))
+        self.assertFalse(self.graph.add_edge(5, 3))
+        self.assertTrue(self.graph.remove_edge(1, 2))
+        self.assertFalse(self.graph.remove_edge(2, 1))
+        new_user = self.graph.add_user()
+        self.graph.add_edge(new_user, 0)
+        expected = {user: self.graph.neighbors(user).tolist() for user in range(7)}
+        flat, offsets = self.graph.neighbors_many(range(7))
+        batched = {user: flat[offsets[user]:offsets[user + 1]].tolist() for user in range(7)}
+        self.assertEqual(batched, expected)
+        self.assertEqual(expected[1], [0, 4])
+        self.assertEqual(expected[5], [3])
+        self.assertEqual(expected[6], [0])
+        self.assertEqual(self.graph.n_edges, 6)
+
+        self.graph.compact()
+        self.assertEqual(self.graph.pending_updates(), 0)
+        self.assertEqual({user: self.graph.neighbors(user).tolist() for user in range(7)}, expected)
+        self.assertEqual(self.graph.n_edges, 6)
+
+    def test_overlay_compacts_itself(self):
+        graph = FriendGraph.from_edges(np.arange(2000), np.arange(1, 2001), n_users=3000, compact_ratio=0.001)
+        with patch("data.social_graph.MIN_COMPACT_EDGES", 10):
+            for user in range(6):
+                graph.add_edge(user, 2500 + user)
+        self.assertLess(graph.pending_updates(), 12)
+        self.assertEqual(graph.neighbors(0).tolist(), [1, 2500])
+
+    def test_compaction_during_a_lookup(self):
+        self.graph.add_edge(3, 5)
+        base, compactions = self.graph._base, []
+
+        def base_then_compact(user):
+            # Another thread folds the overlay in between the two reads
+            row = base(user)
+            compactions.append(threading.Thread(target=self.graph.compact))
+            compactions[0].start()
+            compactions[0].join(0.2)
+            return row
+
+        with patch.object(self.graph, "_base", base_then_compact):
+            self.assertEqual(self.graph.neighbors(3).tolist(), [2, 5])
+        compactions[0].join()
+        self.assertEqual(self.graph.pending_updates(), 0)
+
+
+class TestSocialGraph(unittest.TestCase):
+    """Tests the string-id wrapper and the data_fetcher helpers."""
+
+    def test_friend_lists(self):
+        graph = SocialGraph.from_friend_lists({'a': ['b', 'c'], 'b': ['a'], 'd': ['c']})
+        self.assertEqual(graph.friends('c'), ['a', 'd'])
+        self.assertEqual(graph.friends_within('b', 2), {'a': 1, 'c': 2})
+        self.assertEqual(graph.suggestions('b'), [('c', 1)])
+        self.assertEqual(graph.mutual_friends('a', 'd'), 1)
+        self.assertTrue(graph.add_friendship('b', 'e'))
+        self.assertEqual(graph.friends('e'), ['b'])
+        self.assertEqual(graph.friends('nobody'), [])
+
+    def test_new_ids_are_interned_once(self):
+        graph = SocialGraph.from_friend_lists({'a': ['b']})
+        barrier = threading.Barrier(8)
+        # Interleave the threads as finely as possible
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+
+        def befriend(i):
+            barrier.wait()
+            graph.add_friendship('new', f"friend{i}")
+
+        threads = [threading.Thread(target=befriend, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(graph.user_ids.count('new'), 1)
+        self.assertEqual(len(graph.user_ids), graph.graph.n_users)
+        self.assertEqual(sorted(graph.friends('new')), [f"friend{i}" for i in range(8)])
+
+    def test_data_fetcher_suggestions_and_add_friend(self):
+        backend = MemoryBackend()
+        patches = [
+            patch("data_fetcher.get_backend", return_value=backend),
+            patch("data_fetcher._seeded", False),
+            patch("data_fetcher._social_graph", None),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for user_id in data_fetcher.users:
+            self.addCleanup(data_fetcher.invalidate_user_data, user_id)
+        # user2's only friend is user1, who is friends with user3 and user4
+        self.assertEqual(data_fetcher.get_friend_suggestions('user2'), [('user3', 1), ('user4', 1)])
+        data_fetcher.add_friend('user2', 'user3')
+        self.assertEqual(data_fetcher.get_friend_suggestions('user2'), [('user4', 2)])
+        self.assertIn('user3', data_fetcher.get_user_profile('user2')['friends'])
+        with self.assertRaises(ValueError):
+            data_fetcher.add_friend('user2', 'nobody')
+
+
+if __name__ == "__main__":
+    unittest.main()
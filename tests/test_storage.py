@@ -0,0 +1,224 @@
+#############################################################################
+# tests/test_storage.py — tests for data/storage.py
+#############################################################################
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import data_fetcher
+from data.bets import AVAILABLE_BETS
+from data.columnar import ColumnarTable
+from data.storage import ConnectionPool, LatencyBackend, MemoryBackend, PoolTimeout, SQLiteBackend, open_backend
+from data.trade_log import TradeLog
+
+USERS = {
+    'a': {'full_name': 'Ann', 'username': 'ann', 'date_of_birth': '1990-01-01', 'profile_image': None, 'friends': ['c', 'b']},
+    'b': {'full_name': 'Bo', 'username': 'bo', 'date_of_birth': None, 'profile_image': None, 'friends': []},
+    'c': {'full_name': 'Cy', 'username': 'cy', 'date_of_birth': None, 'profile_image': None, 'friends': ['a']},
+}
+
+
+class BackendContract:
+    """Behaviour every StorageBackend must share; mixed into a TestCase."""
+
+    def make_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.backend = self.make_backend()
+        self.addCleanup(self.backend.close)
+
+    def test_users_and_friends(self):
+        self.backend.load_users(USERS)
+        self.assertEqual(self.backend.count_users(), 3)
+        self.assertEqual(self.backend.get_user('a')['friends'], ['c', 'b'])
+        self.assertEqual(self.backend.get_user('b')['full_name'], 'Bo')
+        self.assertIsNone(self.backend.get_user('z'))
+        self.backend.load_users({'a': dict(USERS['a'], friends=['b'])})
+        self.assertEqual(self.backend.get_user('a')['friends'], ['b'])
+
+    def test_posts(self):
+        post = {'user_id': 'a', 'post_id': 'p1', 'timestamp': '2024-01-01 00:00:00', 'content': 'hi', 'image': None}
+        self.backend.add_posts([post, post])
+        self.assertEqual(self.backend.get_user_posts('a'), [post])
+        self.assertEqual(self.backend.get_user_posts('b'), [])
+
+    def test_posts_are_oldest_first(self):
+        posts = [
+            {'user_id': 'a', 'post_id': post_id, 'timestamp': timestamp, 'content': 'hi', 'image': None}
+            for post_id, timestamp in (('p3', '2024-03-01 00:00:00'), ('p1', '2024-01-01 00:00:00'),
+                                       ('p2', '2024-01-01 00:00:00'))
+        ]
+        self.backend.add_posts(posts)
+        self.assertEqual([post['post_id'] for post in self.backend.get_user_posts('a')], ['p1', 'p2', 'p3'])
+
+    def test_trades_by_user_and_time(self):
+        ids = self.backend.add_trades([
+            ('a', 'AAPL', 'BUY', 10, 100.0, '2024-01-01 09:30:00'),
+            ('b', 'TSLA', 'SELL', 5, 200.0, '2024-01-02 09:30:00'),
+            ('a', 'GOOG', 'SELL', 3, 150.0, '2024-01-03 09:30:00'),
+        ])
+        self.assertEqual(len(set(ids)), 3)
+        trades = self.backend.get_user_trades('a')
+        self.assertEqual([t['trade_id'] for t in trades], [ids[0], ids[2]])
+        self.assertEqual(trades[0], {
+            'trade_id': ids[0], 'symbol': 'AAPL', 'action': 'BUY',
+            'quantity': 10, 'price': 100.0, 'timestamp': '2024-01-01 09:30:00',
+        })
+        later = self.backend.get_user_trades('a', start='2024-01-02 00:00:00')
+        self.assertEqual([t['symbol'] for t in later], ['GOOG'])
+        table = self.backend.get_user_trades('a', columnar=True)
+        self.assertIsInstance(table, ColumnarTable)
+        self.assertEqual(len(table), 2)
+
+    def test_invalid_trade_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.backend.add_trades([('a', 'AAPL', 'HOLD', 1, 1.0, None)])
+        self.assertEqual(self.backend.get_user_trades('a'), [])
+
+    def test_bets_keep_catalog_order(self):
+        self.backend.load_bets(AVAILABLE_BETS)
+        self.backend.load_bets([dict(AVAILABLE_BETS[0], bet_name='Renamed')])
+        bets = self.backend.get_bets()
+        self.assertEqual([b['bet_id'] for b in bets], [b['bet_id'] for b in AVAILABLE_BETS])
+        self.assertEqual(bets[0]['bet_name'], 'Renamed')
+        self.backend.save_bet_prices([dict(AVAILABLE_BETS[1], yes_value=0.9, no_value=0.1, yes_percent=90, no_percent=10)])
+        self.assertEqual(self.backend.get_bets()[1]['yes_percent'], 90)
+        self.assertEqual(self.backend.count_bets(), len(AVAILABLE_BETS))
+
+
+class TestMemoryBackend(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        log = TradeLog(os.path.join(self.tmp, "trades.log"))
+        self.addCleanup(log.close)
+        return MemoryBackend(log)
+
+
+class TestLatencyBackend(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return LatencyBackend(SQLiteBackend(os.path.join(self.tmp, "airbets.db")), latency=0.001)
+
+    def test_calls_are_delayed(self):
+        self.backend.latency = 0.05
+        start = time.perf_counter()
+        self.assertIsNone(self.backend.get_user('nobody'))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_opened_from_spec(self):
+        backend = open_backend("latency:20:sqlite:" + os.path.join(self.tmp, "other.db"))
+        self.addCleanup(backend.close)
+        self.assertEqual((type(backend), type(backend.backend), backend.latency), (LatencyBackend, SQLiteBackend, 0.02))
+        with self.assertRaises(ValueError):
+            open_backend("latency:soon:memory")
+
+
+class TestSQLiteBackend(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return SQLiteBackend(os.path.join(self.tmp, "airbets.db"), pool_size=4)
+
+    def test_data_survives_reopen(self):
+        self.backend.load_users(USERS)
+        self.backend.add_trades([('a', 'AAPL', 'BUY', 1, 1.0, 0)])
+        self.backend.close()
+        self.backend = SQLiteBackend(os.path.join(self.tmp, "airbets.db"))
+        self.addCleanup(self.backend.close)
+        self.assertEqual(self.backend.get_user('c')['friends'], ['a'])
+        self.assertEqual(len(self.backend.get_user_trades('a')), 1)
+
+    def test_concurrent_sessions_share_the_pool(self):
+        self.backend.load_users(USERS)
+        errors = []
+
+        def session(index):
+            try:
+                for _ in range(20):
+                    self.backend.add_trades([('a', 'AAPL', 'BUY', index, 1.0, None)])
+                    self.backend.get_user('a')
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.backend.get_user_trades('a')), 320)
+        self.assertLessEqual(self.backend.pool.stats()['open'], 4)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests pool limits, timeouts and rollback."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.pool = ConnectionPool(os.path.join(self.tmp, "pool.db"), size=1, timeout=0.05)
+        self.addCleanup(self.pool.close)
+
+    def test_exhausted_pool_times_out(self):
+        with self.pool.connection():
+            with self.assertRaises(PoolTimeout):
+                with self.pool.connection():
+                    pass
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.execute("SELECT 1").fetchone(), (1,))
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        with self.pool.connection() as conn:
+            conn.execute("CREATE TABLE t (x)")
+        with self.assertRaises(RuntimeError):
+            with self.pool.connection() as conn:
+                conn.execute("INSERT INTO t VALUES (1)")
+                raise RuntimeError("boom")
+        with self.pool.connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone(), (0,))
+
+    def test_memory_database_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ConnectionPool(":memory:")
+
+
+class TestStorageFacade(unittest.TestCase):
+    """Tests the data_fetcher functions on an SQLite backend."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        backend = open_backend("sqlite:" + os.path.join(self.tmp, "airbets.db"))
+        self.addCleanup(backend.close)
+        for target, value in (("data_fetcher.get_backend", lambda: backend), ("data_fetcher._seeded", False)):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for user_id in ('user1', 'user2'):
+            data_fetcher.invalidate_user_data(user_id)
+            self.addCleanup(data_fetcher.invalidate_user_data, user_id)
+
+    def test_demo_users_are_seeded(self):
+        profile = data_fetcher.get_user_profile('user1')
+        self.assertEqual(profile['full_name'], 'Remi')
+        self.assertEqual(profile['friends'], ['user2', 'user3', 'user4'])
+        with self.assertRaises(ValueError):
+            data_fetcher.get_user_profile('nobody')
+
+    def test_trades_and_posts_are_stored(self):
+        trades = data_fetcher.get_user_trades('user2')
+        posts = data_fetcher.get_user_posts('user2')
+        data_fetcher.invalidate_user_data('user2')
+        self.assertEqual(data_fetcher.get_user_trades('user2'), trades)
+        self.assertEqual(data_fetcher.get_user_posts('user2'), posts)
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            open_backend("postgres://db")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#############################################################################
+# tests/test_timeseries.py — tests for data/timeseries.py
+#############################################################################
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import data_fetcher
+from data.columnar import SENSOR_SCHEMA, ColumnarTable
+from data.timeseries import Series, WorkoutSeries, lttb_indices, minmax_indices
+
+RECORDS = [
+    {'sensor_type': 'heart_rate', 'timestamp': '2024-01-01 00:02:00', 'data': 120.0},
+    {'sensor_type': 'pressure', 'timestamp': '2024-01-01 00:01:00', 'data': 1.0},
+    {'sensor_type': 'heart_rate', 'timestamp': '2024-01-01 00:00:00', 'data': 100.0},
+    {'sensor_type': 'heart_rate', 'timestamp': '2024-01-01 00:01:00', 'data': 110.0},
+]
+T0 = 1_704_067_200  # 2024-01-01 00:00:00
+
+
+class TestSeries(unittest.TestCase):
+    """Tests appends, range queries, downsampling and aggregates."""
+
+    def test_appends_stay_sorted(self):
+        series = Series(capacity=2)
+        for t in (1, 2, 3):
+            series.append(t, t * 10)
+        before, _ = series.arrays()
+        series.extend([7, 5, 6], [70, 50, 60])
+        series.extend([0.5, 2.5], [5, 25])
+        series.append(4, 40)
+        times, values = series.arrays()
+        self.assertEqual(times.tolist(), [0.5, 1, 2, 2.5, 3, 4, 5, 6, 7])
+        self.assertEqual(values.tolist(), [5, 10, 20, 25, 30, 40, 50, 60, 70])
+        self.assertEqual(before.tolist(), [1, 2, 3])
+        times, _ = series.arrays(start=2, end=5)
+        self.assertEqual(times.tolist(), [2, 2.5, 3, 4])
+        self.assertEqual(series.time_range(), (0.5, 7.0))
+        with self.assertRaises(ValueError):
+            series.extend([1, 2], [1])
+
+    def test_lttb_keeps_endpoints_and_spikes(self):
+        times = np.arange(1000, dtype=float)
+        values = np.zeros(1000)
+        values[437] = 9.0
+        kept = lttb_indices(times, values, 20)
+        self.assertEqual(len(kept), 20)
+        self.assertEqual((kept[0], kept[-1]), (0, 999))
+        self.assertIn(437, kept.tolist())
+        self.assertTrue((np.diff(kept) > 0).all())
+        self.assertEqual(lttb_indices(times[:5], values[:5], 10).tolist(), [0, 1, 2, 3, 4])
+
+    def test_minmax_keeps_extremes_of_every_bucket(self):
+        values = np.sin(np.arange(1001) / 20.0)
+        values[300], values[301] = 5.0, -5.0
+        kept = minmax_indices(values, 100)
+        self.assertLessEqual(len(kept), 102)
+        self.assertTrue({0, 300, 301, 1000} <= set(kept.tolist()))
+        times, picked = Series.from_arrays(np.arange(1001), values).downsample(100, method='minmax')
+        self.assertEqual(picked.max(), 5.0)
+        self.assertEqual(picked.min(), -5.0)
+        self.assertTrue((np.diff(times) > 0).all())
+        with self.assertRaises(ValueError):
+            Series().downsample(10, method='mean')
+
+    def test_windowed_aggregates(self):
+        series = Series.from_arrays([0, 10, 59, 60, 200], [1, 2, 3, 10, 7])
+        windows = series.aggregate(60)
+        self.assertEqual(windows['start'].tolist(), [0, 60, 180])
+        self.assertEqual(windows['count'].tolist(), [3, 1, 1])
+        self.assertEqual(windows['mean'].tolist(), [2, 10, 7])
+        self.assertEqual(windows['max'].tolist(), [3, 10, 7])
+        self.assertEqual(windows['min'].tolist(), [1, 10, 7])
+        self.assertEqual(len(Series().aggregate(60)['start']), 0)
+
+    def test_chunks_cover_the_range_without_copying(self):
+        series = Series.from_arrays(np.arange(25), np.arange(25))
+        chunks = list(series.iter_chunks(10, start=3))
+        self.assertEqual([len(times) for times, _ in chunks], [10, 10, 2])
+        self.assertEqual(chunks[0][0][0], 3)
+        self.assertFalse(chunks[0][1].flags.owndata)
+
+
+class TestWorkoutSeries(unittest.TestCase):
+    """Tests grouping by sensor type and the data_fetcher helpers."""
+
+    def test_records_are_grouped_and_sorted(self):
+        workout = WorkoutSeries.from_records(RECORDS)
+        self.assertEqual(workout.sensor_types(), ['heart_rate', 'pressure'])
+        times, values = workout['heart_rate'].arrays()
+        self.assertEqual((times - T0).tolist(), [0, 60, 120])
+        self.assertEqual(values.tolist(), [100, 110, 120])
+        workout.append('cadence', T0, 80)
+        self.assertEqual(len(workout['cadence']), 1)
+
+    def test_data_fetcher_sensor_helpers(self):
+        table = ColumnarTable.from_records(RECORDS, SENSOR_SCHEMA)
+        patches = [
+            patch("data_fetcher._sensor_series", {}),
+            patch("data_fetcher.get_user_sensor_data", return_value=table),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        workout = data_fetcher.get_user_sensor_series('user1', 'workout0')
+        self.assertIs(data_fetcher.get_user_sensor_series('user1', 'workout0'), workout)
+        data_fetcher.record_sensor_reading('user1', 'workout0', 'heart_rate', '2024-01-01 00:03:00', 130.0)
+        chunks = list(data_fetcher.stream_user_sensor_data('user1', 'workout0', 'heart_rate', chunk_size=3))
+        self.assertEqual([values.tolist() for _, values in chunks], [[100, 110, 120], [130]])
+        self.assertEqual(list(data_fetcher.stream_user_sensor_data('user1', 'workout0', 'gyroscope')), [])
+        chart = data_fetcher.get_user_sensor_chart('user1', 'workout0', points=3)
+        self.assertEqual(chart['heart_rate'][1].tolist(), [100, 110, 130])
+        self.assertEqual(data_fetcher.get_user_sensor_data.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
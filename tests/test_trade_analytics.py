@@ -0,0 +1,106 @@
+#############################################################################
+# tests/test_trade_analytics.py — tests for data/trade_analytics.py
+#############################################################################
+import unittest
+
+from data.trade_analytics import SymbolStats, TradeAnalytics, TradeStats, to_epoch
+
+
+def trade(symbol, action, quantity, price, timestamp='2024-01-01 09:30:00'):
+    return {'symbol': symbol, 'action': action, 'quantity': quantity, 'price': price, 'timestamp': timestamp}
+
+
+class TestSymbolStats(unittest.TestCase):
+    """Tests average-cost position and realized P&L accounting."""
+
+    def test_buys_blend_average_cost(self):
+        stats = SymbolStats()
+        stats.fill(10, 100)
+        stats.fill(10, 110)
+        self.assertEqual(stats.position, 20)
+        self.assertAlmostEqual(stats.avg_cost, 105)
+
+    def test_partial_sell_realizes_pnl(self):
+        stats = SymbolStats()
+        stats.fill(10, 100)
+        self.assertAlmostEqual(stats.fill(-4, 120), 80)
+        self.assertEqual(stats.position, 6)
+        self.assertAlmostEqual(stats.avg_cost, 100)
+
+    def test_flip_to_short_resets_cost(self):
+        stats = SymbolStats()
+        stats.fill(5, 100)
+        self.assertAlmostEqual(stats.fill(-8, 90), -50)
+        self.assertEqual(stats.position, -3)
+        self.assertAlmostEqual(stats.avg_cost, 90)
+        # Covering the short below entry is a gain
+        self.assertAlmostEqual(stats.fill(3, 80), 30)
+        self.assertEqual(stats.position, 0)
+        self.assertAlmostEqual(stats.realized_pnl, -20)
+
+
+class TestTradeStats(unittest.TestCase):
+    """Tests the per-user aggregates."""
+
+    def test_totals_and_breakdowns(self):
+        stats = TradeStats()
+        for t in (trade('AAPL', 'BUY', 10, 100), trade('TSLA', 'SELL', 5, 200), trade('AAPL', 'SELL', 4, 110)):
+            stats.add_trade(t)
+        metrics = stats.as_dict()
+        self.assertEqual(metrics['total_trades'], 3)
+        self.assertEqual(metrics['total_volume'], 19)
+        self.assertAlmostEqual(metrics['total_value'], 1000 + 1000 + 440)
+        self.assertAlmostEqual(metrics['vwap'], 2440 / 19)
+        self.assertEqual(metrics['buy_volume'], 10)
+        self.assertEqual(metrics['sell_volume'], 9)
+        self.assertEqual(metrics['by_symbol']['AAPL']['net_position'], 6)
+        self.assertEqual(metrics['by_symbol']['TSLA']['net_position'], -5)
+        self.assertAlmostEqual(metrics['realized_pnl'], 40)
+        self.assertEqual(metrics['by_action']['SELL']['trades'], 2)
+
+    def test_volume_by_bucket(self):
+        stats = TradeStats(bucket_seconds=3600)
+        stats.add_trade(trade('A', 'BUY', 1, 1, '2024-01-01 09:10:00'))
+        stats.add_trade(trade('A', 'BUY', 2, 1, '2024-01-01 09:50:00'))
+        stats.add_trade(trade('A', 'BUY', 4, 1, '2024-01-01 10:00:00'))
+        nine = to_epoch('2024-01-01 09:00:00')
+        self.assertEqual(stats.as_dict()['volume_by_bucket'], {nine: 3, nine + 3600: 4})
+
+    def test_missing_fields_do_not_crash(self):
+        stats = TradeStats()
+        stats.add_trade({'trade_id': 'x', 'quantity': 1, 'price': 50})
+        self.assertEqual(stats.as_dict()['total_value'], 50)
+
+    def test_zero_or_missing_quantity_moves_nothing(self):
+        stats = TradeStats()
+        stats.add_trade({'symbol': 'A', 'action': 'BUY', 'price': 10})
+        stats.add_trade(trade('A', 'SELL', 0, 12))
+        stats.add_trade(trade('A', 'BUY', 5, 10))
+        stats.add_trade(trade('A', 'SELL', 0, 12))
+        metrics = stats.as_dict()
+        self.assertEqual((metrics['total_trades'], metrics['total_volume']), (4, 5))
+        self.assertEqual(metrics['by_symbol']['A']['net_position'], 5)
+        self.assertEqual(metrics['by_symbol']['A']['avg_cost'], 10)
+        self.assertEqual(metrics['realized_pnl'], 0)
+
+
+class TestTradeAnalytics(unittest.TestCase):
+    """Tests the multi-user engine."""
+
+    def test_users_are_independent(self):
+        analytics = TradeAnalytics()
+        analytics.add_trades('user1', [trade('AAPL', 'BUY', 10, 100)])
+        analytics.record('user2', 'GOOG', 'SELL', 3, 50, 1_700_000_000)
+        self.assertEqual(analytics.metrics('user1')['total_volume'], 10)
+        self.assertEqual(analytics.metrics('user2')['by_symbol']['GOOG']['net_position'], -3)
+        self.assertIsNone(analytics.metrics('nobody'))
+        analytics.reset('user1')
+        self.assertEqual(analytics.users(), ['user2'])
+
+    def test_to_epoch(self):
+        self.assertEqual(to_epoch('1970-01-01 00:01:00'), 60)
+        self.assertEqual(to_epoch(60.9), 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,242 @@
+#############################################################################
+# tests/test_trade_log.py — tests for data/trade_log.py
+#############################################################################
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import data.trade_log
+import data_fetcher
+from data.columnar import trade_metrics
+from data.storage import MemoryBackend
+from data.trade_log import HEADER_SIZE, RECORD_SIZE, TradeLog
+
+
+class TestTradeLog(unittest.TestCase):
+    """Tests appends, range scans, recovery and compaction."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "trades.log")
+        self.log = TradeLog(self.path)
+        self.addCleanup(lambda: self.log.close())
+
+    def reopen(self):
+        self.log.close()
+        self.log = TradeLog(self.path)
+
+    def add_history(self):
+        self.log.append_many([
+            ("user1", "AAPL", "BUY", 10, 100.0, "2024-01-01 09:30:00"),
+            ("user2", "TSLA", "SELL", 5, 200.0, "2024-01-02 09:30:00"),
+            ("user1", "GOOG", "SELL", 3, 150.0, "2024-01-03 09:30:00"),
+        ])
+
+    def test_records_round_trip(self):
+        seq = self.log.append("user1", "AAPL", "BUY", 10, 187.5, "2024-01-01 09:30:00")
+        self.assertEqual(self.log.to_records(self.log.scan("user1")), [{
+            'trade_id': f"trade{seq}",
+            'symbol': "AAPL",
+            'action': "BUY",
+            'quantity': 10,
+            'price': 187.5,
+            'timestamp': "2024-01-01 09:30:00",
+        }])
+        self.assertEqual(len(self.log.scan("nobody")), 0)
+
+    def test_scan_by_user_and_time(self):
+        self.add_history()
+        self.assertEqual(self.log.scan("user1")['symbol'].tolist(), [0, 2])
+        trades = self.log.scan("user1", start="2024-01-02 00:00:00")
+        self.assertEqual(self.log.to_records(trades)[0]['symbol'], "GOOG")
+        self.assertEqual(len(self.log.scan_time(end="2024-01-02 12:00:00")), 2)
+
+    def test_unsynced_appends_are_visible_after_flush(self):
+        self.log.append("user1", "AAPL", "BUY", 1, 1.0, sync=False)
+        self.assertEqual(len(self.log), 0)
+        self.log.flush()
+        self.assertEqual(len(self.log.scan("user1")), 1)
+
+    def test_invalid_action_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.log.append("user1", "AAPL", "HOLD", 1, 1.0)
+
+    def test_reopen_uses_checkpointed_index(self):
+        self.add_history()
+        self.reopen()
+        self.assertTrue(os.path.exists(self.path + ".idx"))
+        self.log.append("user1", "MSFT", "BUY", 1, 1.0)
+        self.assertEqual(self.log.to_records(self.log.scan("user1"))[-1]['symbol'], "MSFT")
+        self.assertEqual(len(self.log.scan("user1")), 3)
+        # Sequence numbers continue after a reopen
+        self.assertEqual(self.log.scan("user1")['seq'].tolist(), [1, 3, 4])
+
+    def test_torn_and_corrupt_tails_are_truncated(self):
+        self.add_history()
+        self.log.close()
+        with open(self.path, "r+b") as file:
+            # Flip a byte of the last record and append half a record
+            file.seek(HEADER_SIZE + 2 * RECORD_SIZE + 20)
+            file.write(b"\xff")
+            file.seek(0, os.SEEK_END)
+            file.write(b"\x00" * (RECORD_SIZE // 2))
+        os.remove(self.path + ".idx")
+        self.log = TradeLog(self.path)
+        self.assertEqual(len(self.log), 2)
+        self.assertEqual(os.path.getsize(self.path), HEADER_SIZE + 2 * RECORD_SIZE)
+        self.log.append("user1", "AAPL", "BUY", 1, 1.0)
+        self.assertEqual(len(self.log.scan("user1")), 2)
+
+    def test_short_writes_are_completed(self):
+        pwrite = os.pwrite
+        with patch("data.trade_log.os.pwrite", side_effect=lambda fd, data, offset: pwrite(fd, data[:7], offset)):
+            self.add_history()
+        self.reopen()
+        self.assertEqual(len(self.log), 3)
+        self.assertEqual(self.log.to_records(self.log.scan("user1"))[1]['symbol'], "GOOG")
+
+    def test_failed_write_is_retried_by_the_next_commit(self):
+        write = os.write
+        calls = iter([5, 0])   # the disk fills up partway through the new names
+
+        def fill_up(fd, data):
+            return write(fd, data[:next(calls)])
+
+        with patch("data.trade_log.os.write", side_effect=fill_up):
+            with self.assertRaises(OSError):
+                self.log.append("user1", "AAPL", "BUY", 1, 1.0)
+        self.assertEqual(len(self.log), 0)
+        self.log.append("user2", "TSLA", "SELL", 2, 2.0)
+        self.reopen()
+        self.assertEqual(self.log.user_ids(), ["user1", "user2"])
+        self.assertEqual([t['symbol'] for t in self.log.to_records(self.log.records)], ["AAPL", "TSLA"])
+
+    def test_concurrent_appends_share_commits(self):
+        with patch("data.trade_log.os.fdatasync", wraps=os.fdatasync) as fdatasync:
+            threads = [
+                threading.Thread(target=lambda i=i: [self.log.append(f"user{i}", "AAPL", "BUY", 1, 1.0) for _ in range(50)])
+                for i in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(self.log), 400)
+        self.assertEqual(len(set(self.log.records['seq'].tolist())), 400)
+        self.assertLessEqual(fdatasync.call_count, 400 + 8)
+        for i in range(8):
+            self.assertEqual(len(self.log.scan(f"user{i}")), 50)
+
+    def test_compaction_drops_old_trades_and_clusters_users(self):
+        self.add_history()
+        self.log.append("user1", "MSFT", "BUY", 1, 1.0, "2024-01-04 09:30:00")
+        self.assertEqual(self.log.compact(before="2024-01-02 00:00:00"), 1)
+        trades = self.log.scan("user1")
+        self.assertEqual(trades['seq'].tolist(), [3, 4])
+        # One contiguous slice of the mapping, so no copy
+        self.assertTrue(np.shares_memory(trades, self.log.records))
+        self.reopen()
+        self.assertEqual(len(self.log), 3)
+
+    def test_index_is_rebuilt_with_the_compacted_log(self):
+        self.add_history()
+        # Reads between the rewrite and the checkpoint see the new order
+        with patch.object(TradeLog, "checkpoint"):
+            self.log.compact()
+            self.assertEqual(self.log.scan("user1")['seq'].tolist(), [1, 3])
+            self.assertEqual(self.log.scan("user2")['seq'].tolist(), [2])
+
+    def test_appends_checkpoint_periodically(self):
+        self.log.close()
+        self.path = os.path.join(self.tmp, "periodic.log")
+        self.log = TradeLog(self.path, checkpoint_every=2)
+        self.log.append("user1", "AAPL", "BUY", 1, 1.0)
+        self.assertFalse(os.path.exists(self.path + ".idx"))
+        self.log.append("user1", "AAPL", "BUY", 1, 1.0)
+        checkpointer = self.log._checkpointer
+        if checkpointer is not None:
+            checkpointer.join()
+        self.log.append("user1", "AAPL", "BUY", 1, 1.0)
+        # Reopening without close() verifies only the record past the checkpoint
+        all_good = lambda log, start, stop: stop - start  # noqa: E731
+        with patch.object(TradeLog, "_first_bad", autospec=True, side_effect=all_good) as first_bad:
+            reopened = TradeLog(self.path)
+        self.addCleanup(reopened.close)
+        first_bad.assert_called_once_with(reopened, 2, 3)
+        self.assertEqual(len(reopened.scan("user1")), 3)
+
+    def test_checkpoint_merges_new_records_into_the_index(self):
+        self.add_history()
+        self.log.checkpoint()
+        self.log.append_many([
+            ("user3", "AAPL", "BUY", 1, 1.0, None),
+            ("user1", "TSLA", "BUY", 1, 1.0, None),
+            ("user3", "GOOG", "BUY", 1, 1.0, None),
+        ])
+        self.log.checkpoint()
+        merged = (self.log._snap_order.tolist(), self.log._snap_offsets.tolist())
+        self.assertEqual(merged, ([0, 2, 4, 1, 3, 5], [0, 3, 4, 6]))
+        self.assertEqual(self.log.scan("user1")['seq'].tolist(), [1, 3, 5])
+        self.reopen()
+        self.assertEqual(self.log.scan("user3")['seq'].tolist(), [4, 6])
+
+    def test_appends_go_on_while_the_index_is_sorted(self):
+        self.add_history()
+        user_index, appended = data.trade_log._user_index, []
+
+        def append_then_sort(*args):
+            other = threading.Thread(target=lambda: appended.append(self.log.append("user2", "AAPL", "BUY", 1, 1.0)))
+            other.start()
+            other.join(5)
+            return user_index(*args)
+
+        with patch("data.trade_log._user_index", append_then_sort):
+            self.log.checkpoint()
+        self.assertEqual(appended, [4])
+        # The snapshot covers the first three; the append is in the tail
+        self.assertEqual(self.log.scan("user2")['seq'].tolist(), [2, 4])
+
+    def test_table_feeds_vectorized_metrics(self):
+        self.add_history()
+        metrics = trade_metrics(self.log.to_table(self.log.scan("user1")))
+        self.assertEqual(metrics['total_trades'], 2)
+        self.assertEqual(metrics['by_symbol']['GOOG']['sell_volume'], 3)
+        self.assertNotIn('TSLA', metrics['by_symbol'])
+
+
+class TestTradeLogFetcher(unittest.TestCase):
+    """Tests get_user_trades and record_trade on the trade log."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.log = TradeLog(os.path.join(self.tmp, "trades.log"))
+        self.addCleanup(self.log.close)
+        patcher = patch("data_fetcher.get_backend", return_value=MemoryBackend(self.log))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        data_fetcher.invalidate_user_data('user1')
+        self.addCleanup(data_fetcher.invalidate_user_data, 'user1')
+
+    def test_demo_trades_are_seeded_once(self):
+        first = data_fetcher.get_user_trades('user1')
+        data_fetcher.invalidate_user_data('user1')
+        self.assertEqual(data_fetcher.get_user_trades('user1'), first)
+        self.assertEqual(len(self.log), len(first))
+
+    def test_recorded_trade_is_returned(self):
+        data_fetcher.get_user_trades('user1')
+        trade_id = data_fetcher.record_trade('user1', 'NVDA', 'BUY', 7, 120.0, '2024-02-01 10:00:00')
+        trades = data_fetcher.get_user_trades('user1')
+        self.assertEqual(trades[-1]['trade_id'], trade_id)
+        self.assertEqual(trades[-1]['symbol'], 'NVDA')
+
+
+if __name__ == "__main__":
+    unittest.main()